@@ -8,7 +8,7 @@ from app.deps.scopes import docs_security_with
 from app.deps.user import get_current_user_id
 from app.memory import api as memory_api
 from app.obs.ab import snapshot as ab_snapshot
-from app.retrieval import run_pipeline
+from app.retrieval import arun_pipeline
 from app.retrieval.diagnostics import why_logs
 
 router = APIRouter(
@@ -68,7 +68,7 @@ async def retrieval_trace(
         else:
             raise
     try:
-        docs, trace = run_pipeline(
+        docs, trace = await arun_pipeline(
             user_id=user_id,
             query=q,
             intent="search",
@@ -10,6 +10,8 @@ import aiofiles
 _DEFAULT_PATH = pathlib.Path("data/alias_store.json")
 _PATH = pathlib.Path(os.getenv("ALIAS_STORE_PATH", str(_DEFAULT_PATH)))
 _LOCK = asyncio.Lock()
+# Parsed aliases keyed by the file's mtime so lookups skip the disk read
+_CACHE: tuple[int, dict[str, str]] | None = None
 
 
 async def _ensure_parent_dir() -> None:
@@ -19,6 +21,13 @@ async def _ensure_parent_dir() -> None:
 
 
 async def _load() -> dict[str, str]:
+    global _CACHE
+    try:
+        mtime = _PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    if mtime is not None and _CACHE is not None and _CACHE[0] == mtime:
+        return dict(_CACHE[1])
     try:
         # Ensure directory exists before reads/writes
         await _ensure_parent_dir()
@@ -30,13 +39,23 @@ async def _load() -> dict[str, str]:
                 data = {}
             # Normalize keys to lowercase/stripped form
             if isinstance(data, dict):
-                return {str(k).lower().strip(): str(v) for k, v in data.items()}
-            return {}
+                data = {str(k).lower().strip(): str(v) for k, v in data.items()}
+            else:
+                data = {}
+            if mtime is not None:
+                _CACHE = (mtime, data)
+            return dict(data)
     except FileNotFoundError:
         return {}
 
 
 async def get(name: str) -> str | None:
+    cached = _CACHE
+    try:
+        if cached is not None and cached[0] == _PATH.stat().st_mtime_ns:
+            return cached[1].get(name.lower().strip())
+    except FileNotFoundError:
+        return None
     async with _LOCK:
         data = await _load()
         return data.get(name.lower().strip())
@@ -1,6 +1,8 @@
 import asyncio
-import math
 import os
+from collections import deque
+
+from app.rolling_window import RollingWindow
 
 _metrics = {
     "total": 0,
@@ -18,8 +20,12 @@ _metrics = {
 }
 _lock = asyncio.Lock()
 
-_latency_samples: list[int] = []
+# p95 is computed over the last few minutes from per-minute sketches; the
+# deque only keeps recent raw samples for diagnostics.
+_LATENCY_WINDOW_SECONDS = 300
+_latency_window = RollingWindow(_LATENCY_WINDOW_SECONDS)
 _MAX_SAMPLES = 200
+_latency_samples: deque[int] = deque(maxlen=_MAX_SAMPLES)
 
 
 async def record(engine: str, fallback: bool = False, source: str = "gpt") -> None:
@@ -51,18 +57,18 @@ def get_metrics() -> dict[str, int]:
 
 
 async def record_latency(duration_ms: int) -> None:
-    async with _lock:
-        _latency_samples.append(max(duration_ms, 0))
-        if len(_latency_samples) > _MAX_SAMPLES:
-            _latency_samples.pop(0)
+    duration_ms = max(duration_ms, 0)
+    _latency_window.record(duration_ms)
+    _latency_samples.append(duration_ms)
 
 
 def latency_p95() -> int:
-    if not _latency_samples:
-        return 0
-    samples = sorted(_latency_samples)
-    idx = math.ceil(0.95 * len(samples)) - 1
-    return samples[idx]
+    return round(_latency_window.summary(_LATENCY_WINDOW_SECONDS).quantile(0.95))
+
+
+def _reset_latency_for_tests() -> None:
+    _latency_window.clear()
+    _latency_samples.clear()
 
 
 # -----------------------------
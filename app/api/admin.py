@@ -456,10 +456,17 @@ async def admin_unlink_identity(
 
             from sqlalchemy import update
 
+            from app.auth_store_tokens import _cache_user, token_cache
             from app.db.models import ThirdPartyToken
 
             async with get_async_db() as session:
                 try:
+                    affected = await session.execute(
+                        select(ThirdPartyToken.user_id, ThirdPartyToken.provider)
+                        .where(ThirdPartyToken.identity_id == identity_id)
+                        .distinct()
+                    )
+                    pairs = list(affected.all())
                     stmt = (
                         update(ThirdPartyToken)
                         .where(ThirdPartyToken.identity_id == identity_id)
@@ -467,6 +474,9 @@ async def admin_unlink_identity(
                     )
                     await session.execute(stmt)
                     await session.commit()
+                    # Unlinked tokens must not be served from the read cache
+                    for token_user, provider in pairs:
+                        token_cache.invalidate(_cache_user(token_user), provider)
                 except Exception:
                     # best-effort: log and continue
                     logger.exception(
@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 
 from app.deps.scopes import docs_security_with, optional_require_scope
 from app.deps.user import get_current_user_id
-from app.history import HISTORY_FILE
+from app.history import HISTORY_FILE, query_history
 
 router = APIRouter(
     tags=["Admin"], dependencies=[Depends(docs_security_with(["admin:write"]))]
@@ -21,29 +21,19 @@ async def recent_history(
     path = HISTORY_FILE
     if not path.exists():
         return {"items": []}
-    text = path.read_text(encoding="utf-8")
     items: list[dict] = []
     if path.suffix == ".json":
+        text = path.read_text(encoding="utf-8")
         try:
             data = json.loads(text) if text else []
             if isinstance(data, list):
                 items = [x for x in data if isinstance(x, dict)]
         except Exception:
             items = []
-    else:
-        for line in reversed(text.splitlines()):
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                obj = json.loads(line)
-                if isinstance(obj, dict):
-                    items.append(obj)
-            except Exception:
-                continue
-            if len(items) >= limit:
-                break
-    return {"items": list(reversed(items[-limit:]))}
+        return {"items": list(reversed(items[-limit:]))}
+    # NDJSON segments are indexed; read only the newest ``limit`` records
+    items = await query_history(limit=limit)
+    return {"items": list(reversed(items))}
 
 
 @router.post(
@@ -35,6 +35,9 @@ async def delete_memory(mem_id: str, user_id: str = Depends(get_current_user_id)
         if hasattr(_vs, "delete_user_memory"):
             ok = _vs.delete_user_memory(user_id, mem_id)  # type: ignore[attr-defined]
             if ok:
+                from app.memory.api import _invalidate_retrieval_cache
+
+                _invalidate_retrieval_cache(user_id)
                 return {"status": "deleted"}
     except Exception:
         pass
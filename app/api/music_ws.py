@@ -14,6 +14,7 @@ from app.metrics import WS_MUSIC_CONNECTIONS_TOTAL, WS_MUSIC_MESSAGES_TOTAL
 from app.music import get_provider
 from app.music.delta import DeltaBuilder
 from app.music.models import PlayerState
+from app.music.poller import get_poller
 from app.utils.lru_cache import ws_idempotency_cache
 from app.ws_manager import WSConnectionManager, get_ws_manager
 
@@ -187,7 +188,7 @@ async def _dispatch_command(
     try:
         if cmd_type == "refreshState":
             # Update state from provider
-            await _update_current_state()
+            await _update_current_state(fresh=False)
             if current_state:
                 response_payload = {
                     "type": "state",
@@ -396,34 +397,22 @@ async def ws_music(ws: WebSocket, _v: None = dep_verify_ws()):
             )
             degraded_mode = True
 
-    # Store current state for delta builder (updated by commands)
+    # Store current state for delta builder (updated by the shared poller)
     current_state: PlayerState | None = None
+    poller = get_poller()
 
-    async def _update_current_state():
-        """Update current state from provider."""
+    async def _on_state(state: PlayerState) -> None:
         nonlocal current_state
-        try:
-            playback_state = await provider.get_state()
-            current_state = PlayerState(
-                is_playing=getattr(playback_state, "is_playing", False),
-                progress_ms=getattr(playback_state, "progress_ms", 0),
-                track=getattr(playback_state, "track", None),
-                device=getattr(playback_state, "device", None),
-                shuffle=getattr(playback_state, "shuffle", False),
-                repeat=getattr(playback_state, "repeat", "off"),
-                volume_percent=(
-                    getattr(playback_state.device, "volume", 50)
-                    if getattr(playback_state, "device", None)
-                    else 50
-                ),
-                provider=provider.name,
-            )
-        except Exception as e:
-            logger.error(
-                "ws.music.state.get_failed",
-                extra={"meta": {"user_id": uid, "error": str(e)}},
-            )
-            current_state = None
+        current_state = state
+
+    async def _update_current_state(*, fresh: bool = True):
+        """Refresh state through the per-user poller.
+
+        ``fresh`` (the default, used after commands) skips pulls that began
+        before the call; pass ``False`` to share whatever pull is in flight.
+        """
+        nonlocal current_state
+        current_state = await poller.refresh(uid, fresh=fresh)
 
     def _get_current_state() -> PlayerState | None:
         """Get current player state (synchronous for delta builder)."""
@@ -443,7 +432,8 @@ async def ws_music(ws: WebSocket, _v: None = dep_verify_ws()):
     manager_task = asyncio.create_task(_init_manager())
 
     # Initialize current state
-    await _update_current_state()
+    unsubscribe = poller.subscribe(uid, provider, _on_state)
+    await _update_current_state(fresh=False)
 
     # Send hello immediately with mode and timestamp
     hello_payload = {
@@ -463,6 +453,7 @@ async def ws_music(ws: WebSocket, _v: None = dep_verify_ws()):
         logger.error(
             "ws.music.hello.failed", extra={"meta": {"user_id": uid, "error": str(e)}}
         )
+        unsubscribe()
         return
 
     # Send initial state after hello
@@ -647,6 +638,8 @@ async def ws_music(ws: WebSocket, _v: None = dep_verify_ws()):
             )
 
     finally:
+        unsubscribe()
+
         # Clean up delta builder
         if delta_builder:
             try:
@@ -1,34 +1,94 @@
 # app/audit/store.py
+"""Append-only audit log.
+
+Events are written by a background :class:`~app.log_sink.LogSink` through a
+long-lived file handle. Calls made on a running event loop (the audit
+middleware) only enqueue the event and never wait for queue room (a full
+queue drops and counts it); calls from sync code wait until it is on disk.
+The file rotates when ``AUDIT_MAX_BYTES`` or ``AUDIT_ROTATE_SECONDS`` is set
+(both off by default).
+"""
+
+import asyncio
 import os
+import threading
 from collections.abc import Iterable
 from pathlib import Path
 
 from app.audit.models import AuditEvent
+from app.log_sink import LogSink, NdjsonFile, RotationPolicy
+
+
+def _audit_file_from_env() -> Path:
+    audit_dir = Path(os.getenv("AUDIT_DIR", "data/audit"))
+    return Path(os.getenv("AUDIT_FILE", audit_dir / "events.ndjson"))
 
 
 # Single source of truth:
 def _resolve_audit_file() -> Path:
-    audit_dir = Path(os.getenv("AUDIT_DIR", "data/audit"))
-    audit_dir.mkdir(parents=True, exist_ok=True)
-    audit_file = Path(os.getenv("AUDIT_FILE", audit_dir / "events.ndjson"))
+    audit_file = _audit_file_from_env()
     audit_file.parent.mkdir(parents=True, exist_ok=True)
     return audit_file
 
 
+_sinks: dict[Path, LogSink] = {}
+_sinks_lock = threading.Lock()
+
+
+def _sink_for(audit_file: Path) -> LogSink:
+    sink = _sinks.get(audit_file)
+    if sink is not None:
+        return sink
+    with _sinks_lock:
+        sink = _sinks.get(audit_file)
+        if sink is None:
+            audit_file.parent.mkdir(parents=True, exist_ok=True)
+            out = NdjsonFile(audit_file, RotationPolicy.from_env("AUDIT"))
+
+            def write(events: list[AuditEvent]) -> None:
+                out.append([ev.model_dump_json().encode("utf-8") for ev in events])
+
+            # Audit events are not shed lightly: wait briefly for room first
+            sink = LogSink("audit", write, overflow="block")
+            _sinks[audit_file] = sink
+        return sink
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
 def append(event: AuditEvent) -> None:
     """Append a single audit event to the append-only log."""
-    audit_file = _resolve_audit_file()
-    line = event.model_dump_json()
-    with audit_file.open("a", encoding="utf-8") as f:
-        f.write(line + "\n")
+    sink = _sink_for(_audit_file_from_env())
+    if _on_event_loop():
+        # Never stall the loop on a full queue: drop and count instead
+        sink.submit_nowait(event)
+    else:
+        sink.submit_and_wait(event)
 
 
 def bulk(events: Iterable[AuditEvent]) -> None:
     """Append multiple audit events to the append-only log."""
-    audit_file = _resolve_audit_file()
-    with audit_file.open("a", encoding="utf-8") as f:
-        for ev in events:
-            f.write(ev.model_dump_json() + "\n")
+    sink = _sink_for(_audit_file_from_env())
+    on_loop = _on_event_loop()
+    for ev in events:
+        if on_loop:
+            sink.submit_nowait(ev)
+        else:
+            sink.submit(ev)
+    if not on_loop:
+        sink.flush()
+
+
+def flush(timeout: float | None = 5.0) -> bool:
+    """Wait until queued events for the current audit file are on disk."""
+    sink = _sinks.get(_audit_file_from_env())
+    return sink.flush(timeout) if sink is not None else True
 
 
 def get_audit_file_path() -> Path:
@@ -38,6 +98,7 @@ def get_audit_file_path() -> Path:
 
 def get_audit_file_size() -> int:
     """Get the current size of the audit log file in bytes."""
+    flush()
     audit_file = _resolve_audit_file()
     if audit_file.exists():
         return audit_file.stat().st_size
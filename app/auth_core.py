@@ -471,6 +471,11 @@ def resolve_session_identity(session_id: str) -> dict | None:
     return store.get_session_identity(session_id)
 
 
+async def aresolve_session_identity(session_id: str) -> dict | None:
+    store = get_session_store()
+    return await store.aget_session_identity(session_id)
+
+
 def resolve_auth(target: Request | WebSocket) -> dict[str, Any]:
     """Resolve auth with unified precedence and attach to target.state when possible.
 
@@ -660,6 +665,7 @@ __all__ = [
     "extract_token_metadata",
     "extract_token",
     "resolve_session_identity",
+    "aresolve_session_identity",
     "resolve_auth",
     "csrf_validate",
     "has_scope",
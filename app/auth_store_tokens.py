@@ -8,6 +8,7 @@ and SQLAlchemy ORM. All tokens are encrypted at rest using envelope encryption.
 from __future__ import annotations
 
 import asyncio
+import dataclasses
 import logging
 import time
 from datetime import UTC, datetime, timedelta
@@ -40,6 +41,113 @@ def _epoch_seconds(value: int | float | datetime | None) -> int:
     return int(value)
 
 
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+class _TokenCache:
+    """In-process read-through cache of decrypted tokens.
+
+    Keyed by ``(user_id, provider, provider_sub)``. An entry lives for at most
+    ``TOKEN_CACHE_TTL_S`` seconds (default 60, 0 disables) and never past the
+    token's own expiry. Writes to a ``(user_id, provider)`` pair invalidate
+    all of its provider_subs; a generation counter keeps a load that raced an
+    invalidation from repopulating the cache with the old row. Concurrent
+    misses for one key share a single database read.
+    """
+
+    def __init__(self, max_entries: int = 10_000) -> None:
+        self._entries: dict[tuple, tuple[float, ThirdPartyToken]] = {}
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self._generation: dict[tuple[str, str], int] = {}
+        self._max_entries = max_entries
+
+    def _fresh(self, key: tuple) -> ThirdPartyToken | None:
+        hit = self._entries.get(key)
+        if hit is None:
+            return None
+        deadline, token = hit
+        if time.monotonic() >= deadline:
+            self._entries.pop(key, None)
+            return None
+        # Callers may mutate what they get back
+        return dataclasses.replace(token)
+
+    def _put(self, key: tuple, token: ThirdPartyToken, ttl: float) -> None:
+        remaining = float(token.expires_at or 0) - time.time()
+        ttl = min(ttl, remaining)
+        if ttl <= 0:
+            return
+        if len(self._entries) >= self._max_entries:
+            self._entries.pop(next(iter(self._entries)), None)
+        self._entries[key] = (time.monotonic() + ttl, dataclasses.replace(token))
+
+    async def get_or_load(self, key: tuple, loader) -> ThirdPartyToken | None:
+        ttl = _env_float("TOKEN_CACHE_TTL_S", 60.0)
+        if ttl <= 0:
+            return await loader()
+        token = self._fresh(key)
+        if token is not None:
+            return token
+        fut = self._inflight.get(key)
+        if fut is not None:
+            try:
+                token = await asyncio.shield(fut)
+            except asyncio.CancelledError:
+                if not fut.cancelled():
+                    raise
+                return await loader()  # the leader was cancelled; load ourselves
+            return dataclasses.replace(token) if token is not None else None
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        gen = self._generation.get(key[:2], 0)
+        try:
+            token = await loader()
+            if token is not None and self._generation.get(key[:2], 0) == gen:
+                self._put(key, token, ttl)
+            fut.set_result(token)
+            return token
+        except Exception as e:
+            fut.set_exception(e)
+            # Nobody else may be waiting; don't warn about an unread exception
+            fut.exception()
+            raise
+        finally:
+            if not fut.done():
+                fut.cancel()
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+
+    def invalidate(self, user_id: str, provider: str) -> None:
+        pair = (user_id, provider)
+        self._generation[pair] = self._generation.get(pair, 0) + 1
+        for key in [k for k in self._entries if k[:2] == pair]:
+            self._entries.pop(key, None)
+        # Later readers must not join a load that predates the write
+        for key in [k for k in self._inflight if k[:2] == pair]:
+            self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._inflight.clear()
+
+
+token_cache = _TokenCache()
+
+
+def _cache_user(user_id: str) -> str:
+    """Canonical user key so legacy ids and UUIDs share cache entries."""
+    try:
+        from app.util.ids import to_uuid
+
+        return str(to_uuid(user_id))
+    except Exception:
+        return str(user_id)
+
+
 def _default_db_path() -> str:
     """Get the default database path for backward compatibility.
 
@@ -108,6 +216,13 @@ class TokenDAO:
         Returns:
             True if successful, False otherwise
         """
+        try:
+            return await self._upsert_token(token)
+        finally:
+            # After the write, so a concurrent read can't re-cache the old row
+            token_cache.invalidate(_cache_user(token.user_id), token.provider)
+
+    async def _upsert_token(self, token: ThirdPartyToken) -> bool:
         print(f"DEBUG: upsert_token method called with token_id={token.id}, provider={token.provider}")
         start_time = time.time()
 
@@ -532,6 +647,15 @@ class TokenDAO:
                 return None
             return token
 
+        return await token_cache.get_or_load(
+            (_cache_user(user_id), provider, provider_sub),
+            lambda: self._load_token(user_id, provider, provider_sub),
+        )
+
+    async def _load_token(
+        self, user_id: str, provider: str, provider_sub: str | None
+    ) -> ThirdPartyToken | None:
+        """Read and decrypt the newest valid token row (uncached)."""
         # Convert user_id to UUID for database operations
         from app.util.ids import to_uuid
 
@@ -626,7 +750,7 @@ class TokenDAO:
                     is_valid=token_model.is_valid,
                 )
 
-                logger.info(
+                logger.debug(
                     "🔐 TOKEN STORE: get_token fetched",
                     extra={
                         "meta": {
@@ -787,6 +911,12 @@ class TokenDAO:
         Returns:
             True if successful, False otherwise
         """
+        try:
+            return await self._mark_invalid(user_id, provider)
+        finally:
+            token_cache.invalidate(_cache_user(user_id), provider)
+
+    async def _mark_invalid(self, user_id: str, provider: str) -> bool:
         # Memory-store path for tests
         if self._use_memory_store:
             key = (user_id, provider)
@@ -853,6 +983,30 @@ class TokenDAO:
         last_error_code: str | None = None,
     ) -> bool:
         """Update per-service state on the current valid token row."""
+        try:
+            return await self._update_service_status(
+                user_id=user_id,
+                provider=provider,
+                service=service,
+                status=status,
+                provider_sub=provider_sub,
+                provider_iss=provider_iss,
+                last_error_code=last_error_code,
+            )
+        finally:
+            token_cache.invalidate(_cache_user(user_id), provider)
+
+    async def _update_service_status(
+        self,
+        *,
+        user_id: str,
+        provider: str,
+        service: str,
+        status: str,
+        provider_sub: str | None,
+        provider_iss: str | None,
+        last_error_code: str | None,
+    ) -> bool:
         try:
             async with self._lock:
                 async with get_async_db() as session:
@@ -1405,7 +1559,13 @@ async def mark_invalid(user_id: str, provider: str) -> bool:
 
 
 class TokenRefreshService:
-    """Service for handling automatic token refresh with retry logic."""
+    """Service for handling automatic token refresh with retry logic.
+
+    Tokens that are still valid are served from the token cache without
+    taking the per-key lock. Once a token is within ``TOKEN_REFRESH_AHEAD_S``
+    (default 600, 0 disables) of expiry, one background refresh per key is
+    started so callers rarely wait on the provider.
+    """
 
     def __init__(self):
         # Per-key locks to prevent concurrent refresh for same user/provider
@@ -1417,6 +1577,8 @@ class TokenRefreshService:
         # In-memory backoff map to avoid aggressive refresh retries after failures
         # keyed by '{user_id}:{provider}:{provider_sub}' -> unix timestamp when next refresh allowed
         self._next_refresh_after: dict[str, float] = {}
+        # At most one proactive refresh task per key
+        self._ahead_tasks: dict[str, asyncio.Task] = {}
 
     async def _get_lock_for_key(self, key: str) -> asyncio.Lock:
         """Get or create a lock for the given key."""
@@ -1456,6 +1618,13 @@ class TokenRefreshService:
         # Prevent concurrent refresh for same user/provider
         lock_key = f"{user_id}:{provider}:{provider_sub or ''}"
 
+        if not force_refresh:
+            # Fast path: a valid (usually cached) token needs no lock
+            token = await get_token(user_id, provider, provider_sub)
+            if token is not None and not self._should_refresh_token(token):
+                self._maybe_refresh_ahead(lock_key, token, user_id, provider_sub)
+                return token
+
         # Get per-key lock to allow concurrent refreshes for different identities
         refresh_lock = await self._get_lock_for_key(lock_key)
 
@@ -1561,6 +1730,59 @@ class TokenRefreshService:
 
                 return None
 
+    def _maybe_refresh_ahead(
+        self,
+        key: str,
+        token: ThirdPartyToken,
+        user_id: str,
+        provider_sub: str | None,
+    ) -> None:
+        ahead = _env_float("TOKEN_REFRESH_AHEAD_S", 600.0)
+        if ahead <= 0 or not token.refresh_token or not token.is_expired(int(ahead)):
+            return
+        if time.time() < self._next_refresh_after.get(key, 0.0):
+            return
+        task = self._ahead_tasks.get(key)
+        if task is not None and not task.done():
+            return
+        self._ahead_tasks[key] = asyncio.create_task(
+            self._refresh_ahead(key, user_id, token.provider, provider_sub, ahead)
+        )
+
+    async def _refresh_ahead(
+        self,
+        key: str,
+        user_id: str,
+        provider: str,
+        provider_sub: str | None,
+        ahead: float,
+    ) -> None:
+        """Refresh a still-valid token nearing expiry (background, best-effort).
+
+        Failures only set the usual backoff: the current token keeps working
+        and the foreground path retries once it actually needs a refresh.
+        """
+        try:
+            async with await self._get_lock_for_key(key):
+                token = await get_token(user_id, provider, provider_sub)
+                # Someone else may have refreshed while we waited for the lock
+                if token is None or not token.is_expired(int(ahead)):
+                    return
+                if await self._refresh_token_for_provider(token):
+                    self._refresh_attempts.pop(key, None)
+                    try:
+                        TOKEN_REFRESH_OPERATIONS.labels(
+                            provider=provider, result="success", attempt="ahead"
+                        ).inc()
+                    except Exception:
+                        pass
+                else:
+                    self._next_refresh_after[key] = time.time() + 600
+        except Exception:
+            logger.debug("proactive token refresh failed for %s", key, exc_info=True)
+        finally:
+            self._ahead_tasks.pop(key, None)
+
     def _should_refresh_token(
         self, token: ThirdPartyToken, buffer_seconds: int = 300
     ) -> bool:
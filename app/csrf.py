@@ -9,9 +9,9 @@ from secrets import token_urlsafe
 from typing import Optional
 
 from fastapi import Request, Depends, HTTPException, Response
-from starlette.middleware.base import BaseHTTPMiddleware
 
 from app.errors import json_error
+from app.http_middleware import HTTPMiddleware
 
 logger = logging.getLogger(__name__)
 
@@ -207,7 +207,16 @@ def _extract_csrf_header(request: Request) -> tuple[str | None, bool, bool]:
     return None, False, False
 
 
-class CSRFMiddleware(BaseHTTPMiddleware):
+def _attach_csrf_token(response: Response) -> None:
+    # Generate and provide CSRF token for client
+    try:
+        csrf_token = get_csrf_token()
+        response.headers["X-CSRF-Token"] = csrf_token
+    except Exception as e:
+        logger.debug(f"csrf.token_generation_failed: {e}")
+
+
+class CSRFMiddleware(HTTPMiddleware):
     """Header-token CSRF protection service.
 
     - Allow safe methods (GET/HEAD/OPTIONS).
@@ -227,23 +236,18 @@ class CSRFMiddleware(BaseHTTPMiddleware):
         # For safe methods, provide CSRF token in response header
         if request.method.upper() in {"GET", "HEAD", "OPTIONS"}:
             try:
-                response = await call_next(request)
+                return await call_next(request, _attach_csrf_token)
             except Exception:
+                if call_next.started:
+                    raise
                 # Even on exceptions, we need to ensure CSRF headers are set
                 response = json_error(
                     code="internal_error",
                     message="Something went wrong",
                     http_status=500,
                 )
-
-            # Generate and provide CSRF token for client
-            try:
-                csrf_token = get_csrf_token()
-                response.headers["X-CSRF-Token"] = csrf_token
-            except Exception as e:
-                logger.debug(f"csrf.token_generation_failed: {e}")
-
-            return response
+                _attach_csrf_token(response)
+                return response
 
         # Skip CSRF validation for Bearer-only auth
         auth_header = request.headers.get("Authorization")
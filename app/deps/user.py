@@ -152,6 +152,27 @@ JWT_SECRET: str | None = None  # overridden in tests; env used when None
 logger = logging.getLogger(__name__)
 
 
+# request.state key for the identity resolved from a token earlier in the same
+# request (middleware and several dependencies each call get_current_user_id)
+_IDENTITY_MEMO = "auth_identity_memo"
+
+
+def _identity_memo(target, token: str) -> tuple[str, str, dict | None] | None:
+    """Return ``(token, user_id, jwt_payload)`` if ``token`` was resolved already."""
+    try:
+        memo = getattr(target.state, _IDENTITY_MEMO, None)
+    except Exception:
+        return None
+    hit = isinstance(memo, tuple) and memo[0] == token
+    try:
+        from ..metrics import AUTH_SESSION_CACHE
+
+        AUTH_SESSION_CACHE.labels("request", "hit" if hit else "miss").inc()
+    except Exception:
+        pass
+    return memo if hit else None
+
+
 def _decode_unverified(token: str) -> dict | None:
     if not token or not jose_jwt:
         return None
@@ -334,6 +355,17 @@ async def get_current_user_id(
         except Exception:
             token = None
 
+    # Same token already resolved in this request: skip session/JWT validation
+    if token and target is not None:
+        memo = _identity_memo(target, token)
+        if memo is not None:
+            _, user_id, payload = memo
+            if payload is not None:
+                target.state.jwt_payload = payload
+            target.state.user_id = user_id
+            rec.user_id = hash_user_id(user_id)
+            return user_id
+
     # Enhanced logging for debugging auth issues
     try:
         logged_flag = None
@@ -437,7 +469,7 @@ async def get_current_user_id(
 
         store = get_session_store()
         try:
-            identity = store.get_session_identity(token)
+            identity = await store.aget_session_identity(token)
         except SessionStoreUnavailable:
             # Flag for up-stack decision (503 on protected routes when session-only)
             try:
@@ -716,6 +748,15 @@ async def get_current_user_id(
     rec.user_id = hash_user_id(user_id) if user_id != "anon" else "anon"
     if target and user_id != "anon":
         target.state.user_id = user_id
+        if token:
+            try:
+                setattr(
+                    target.state,
+                    _IDENTITY_MEMO,
+                    (token, user_id, getattr(target.state, "jwt_payload", None)),
+                )
+            except Exception:
+                pass
 
     return user_id
 
@@ -0,0 +1,261 @@
+"""Persistent, content-addressed cache for embedding vectors.
+
+Vectors are stored in a SQLite database keyed by ``(backend, model,
+sha256(normalized text))`` as packed float32 blobs, so every uvicorn worker on
+the host shares one cache and entries survive restarts and deploys.
+
+Configuration:
+
+- ``EMBED_CACHE_PATH``: database path (default ``.embedding_cache.sqlite3``);
+  set to an empty string to disable the cache.
+- ``EMBED_CACHE_MAX_MB``: approximate size cap for stored vectors (default 512).
+  When exceeded, least recently used entries are evicted down to 90% of the cap.
+
+SQLite runs in WAL mode so readers in one worker do not block writers in
+another. All operations are best effort: failures are logged and treated as a
+cache miss so embedding never fails because of the cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections.abc import Sequence
+
+import numpy as np
+
+from .metrics import (
+    EMBEDDING_CACHE_BYTES,
+    EMBEDDING_CACHE_EVICTIONS,
+    EMBEDDING_CACHE_REQUESTS,
+)
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_PATH = ".embedding_cache.sqlite3"
+_DEFAULT_MAX_MB = 512
+# Only refresh ``last_used`` on hits when it is older than this, so hot entries
+# do not turn every read into a write.
+_TOUCH_INTERVAL_S = 3600.0
+_EVICT_TARGET = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,
+    backend TEXT NOT NULL,
+    model TEXT NOT NULL,
+    dim INTEGER NOT NULL,
+    vec BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used);
+"""
+
+
+def normalize_text(text: str) -> str:
+    """Return the canonical form of ``text`` used for cache keys.
+
+    Unicode is NFC-normalized and runs of whitespace are collapsed; case is kept
+    because embedding models are case sensitive.
+    """
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def cache_key(backend: str, model: str, text: str) -> str:
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{backend}|{model}|{digest}"
+
+
+class EmbeddingCache:
+    """SQLite-backed embedding cache with size-based LRU eviction."""
+
+    def __init__(self, path: str, max_bytes: int) -> None:
+        self.path = path
+        self.max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._approx_bytes = self._total_bytes()
+        EMBEDDING_CACHE_BYTES.set(self._approx_bytes)
+
+    def _total_bytes(self) -> int:
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM embeddings"
+        ).fetchone()
+        return int(row[0] or 0)
+
+    def get_many(
+        self, backend: str, model: str, texts: Sequence[str]
+    ) -> list[list[float] | None]:
+        """Return cached vectors for ``texts`` (``None`` for misses), in order."""
+        if not texts:
+            return []
+        keys = [cache_key(backend, model, t) for t in texts]
+        found: dict[str, list[float]] = {}
+        stale: list[str] = []
+        now = time.time()
+        try:
+            with self._lock:
+                uniq = list(dict.fromkeys(keys))
+                for i in range(0, len(uniq), 500):
+                    chunk = uniq[i : i + 500]
+                    marks = ",".join("?" * len(chunk))
+                    rows = self._conn.execute(
+                        f"SELECT key, vec, last_used FROM embeddings WHERE key IN ({marks})",
+                        chunk,
+                    ).fetchall()
+                    for key, blob, last_used in rows:
+                        found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+                        if now - float(last_used) > _TOUCH_INTERVAL_S:
+                            stale.append(key)
+                if stale:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                        [(now, k) for k in stale],
+                    )
+                    self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning("embedding_cache.get_failed: %s", e)
+            found = {}
+        out = [found.get(k) for k in keys]
+        hits = sum(1 for v in out if v is not None)
+        try:
+            if hits:
+                EMBEDDING_CACHE_REQUESTS.labels(backend, "hit").inc(hits)
+            if len(out) - hits:
+                EMBEDDING_CACHE_REQUESTS.labels(backend, "miss").inc(len(out) - hits)
+        except Exception:
+            pass
+        return out
+
+    def put_many(
+        self,
+        backend: str,
+        model: str,
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+    ) -> None:
+        """Store ``vectors`` for ``texts`` and evict if over the size cap."""
+        if not texts:
+            return
+        now = time.time()
+        rows = []
+        added = 0
+        for text, vec in zip(texts, vectors, strict=True):
+            blob = np.asarray(vec, dtype=np.float32).tobytes()
+            added += len(blob)
+            key = cache_key(backend, model, text)
+            rows.append((key, backend, model, len(blob) // 4, blob, len(blob), now))
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings "
+                    "(key, backend, model, dim, vec, size, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.commit()
+                self._approx_bytes += added
+                if self.max_bytes and self._approx_bytes > self.max_bytes:
+                    self._evict_locked()
+        except sqlite3.Error as e:
+            logger.warning("embedding_cache.put_failed: %s", e)
+        EMBEDDING_CACHE_BYTES.set(self._approx_bytes)
+
+    def _evict_locked(self) -> None:
+        # Other workers write to the same file, so re-read the true size first.
+        total = self._total_bytes()
+        target = int(self.max_bytes * _EVICT_TARGET)
+        if total <= self.max_bytes:
+            self._approx_bytes = total
+            return
+        victims: list[str] = []
+        freed = 0
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM embeddings ORDER BY last_used ASC"
+        ):
+            if total - freed <= target:
+                break
+            victims.append(key)
+            freed += int(size)
+        self._conn.executemany(
+            "DELETE FROM embeddings WHERE key = ?", [(k,) for k in victims]
+        )
+        self._conn.commit()
+        self._approx_bytes = total - freed
+        try:
+            EMBEDDING_CACHE_EVICTIONS.inc(len(victims))
+        except Exception:
+            pass
+        logger.info(
+            "embedding_cache.evicted",
+            extra={"meta": {"entries": len(victims), "bytes": freed}},
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._approx_bytes = 0
+        EMBEDDING_CACHE_BYTES.set(0)
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            return int(row[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_cache: EmbeddingCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache | None:
+    """Return the process-wide cache for ``EMBED_CACHE_PATH`` or ``None`` if disabled."""
+    global _cache
+    path = os.getenv("EMBED_CACHE_PATH", _DEFAULT_PATH).strip()
+    if not path:
+        return None
+    if _cache is not None and _cache.path == path:
+        return _cache
+    with _cache_lock:
+        if _cache is not None and _cache.path == path:
+            return _cache
+        try:
+            max_mb = float(os.getenv("EMBED_CACHE_MAX_MB", str(_DEFAULT_MAX_MB)))
+        except ValueError:
+            max_mb = _DEFAULT_MAX_MB
+        try:
+            cache = EmbeddingCache(path, int(max_mb * 1024 * 1024))
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("embedding_cache.open_failed path=%s: %s", path, e)
+            return None
+        if _cache is not None:
+            _cache.close()
+        _cache = cache
+        return _cache
+
+
+def _reset_embedding_cache_for_tests() -> None:  # pragma: no cover - test helper
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+        _cache = None
+
+
+__all__ = ["EmbeddingCache", "get_embedding_cache", "cache_key", "normalize_text"]
@@ -12,6 +12,14 @@ When using the LLaMA backend a local ``gguf`` model path must be supplied via
 ``llama-cpp-python`` which executes synchronously and is therefore dispatched to
 ``asyncio``'s default executor.
 
+Vectors from the ``openai`` and ``llama`` backends are read through the
+persistent cache in :mod:`app.embedding_cache`, shared by every entry point.
+
+Batch variants (:func:`embed_many` / :func:`embed_many_sync`) send texts to the
+backend in chunks of ``EMBED_BATCH_SIZE``. When ``EMBED_COALESCE_MS`` is set to a
+positive value, concurrent :func:`embed` calls arriving within that window are
+merged into a single backend request by :class:`EmbeddingCoalescer`.
+
 Simple benchmarking helpers are included to measure latency and throughput of
 repeated embedding calls.
 """
@@ -22,12 +30,14 @@ import hashlib
 import logging
 import os
 import time
+from collections.abc import Callable, Sequence
 from functools import lru_cache
 from typing import TYPE_CHECKING
 
 import numpy as np
 
-from .metrics import EMBEDDING_LATENCY_SECONDS
+from .embedding_cache import get_embedding_cache
+from .metrics import EMBEDDING_BATCH_SIZE, EMBEDDING_LATENCY_SECONDS
 
 if TYPE_CHECKING:  # pragma: no cover - for type checkers only
     from openai import OpenAI
@@ -40,6 +50,7 @@ logger = logging.getLogger(__name__)
 
 _TTL = 24 * 60 * 60  # seconds, for OpenAI sync cache bucket
 _llama_model = None
+_DEFAULT_BATCH_SIZE = 128  # OpenAI accepts up to 2048 inputs per request
 
 # Optional dependency
 try:  # pragma: no cover
@@ -124,7 +135,11 @@ def _embed_openai_sync(text: str, ttl_bucket: int) -> list[float]:
         # Older SDKs / stubs that don't accept encoding_format
         resp = client.embeddings.create(model=model, input=text)
 
-    embedding = resp.data[0].embedding
+    return _coerce_openai_embedding(resp.data[0].embedding)
+
+
+def _coerce_openai_embedding(embedding) -> list[float]:
+    """Return ``embedding`` as a list of floats, decoding base64 payloads."""
     if isinstance(embedding, str):  # pragma: no cover - safety hatch for base64
         try:
             try:
@@ -140,39 +155,75 @@ def _embed_openai_sync(text: str, ttl_bucket: int) -> list[float]:
     return embedding  # type: ignore[return-value]
 
 
+def _embed_openai_many_sync(texts: Sequence[str]) -> list[list[float]]:
+    """Embed ``texts`` with the OpenAI sync client, one request per chunk."""
+    client = get_openai_client()
+    model = os.getenv("EMBED_MODEL", "text-embedding-3-small")
+    out: list[list[float]] = []
+    for chunk in _chunks(texts, _batch_size()):
+        try:
+            resp = client.embeddings.create(
+                model=model, input=chunk, encoding_format="float"
+            )
+        except TypeError:
+            resp = client.embeddings.create(model=model, input=chunk)
+        data = list(resp.data)
+        # The API documents ``index`` on each item; keep input order regardless
+        # of the order the server (or a stub) returns them in.
+        if all(getattr(d, "index", None) is not None for d in data):
+            data.sort(key=lambda d: d.index)
+        if len(data) != len(chunk):
+            raise RuntimeError(
+                f"OpenAI returned {len(data)} embeddings for {len(chunk)} inputs"
+            )
+        out.extend(_coerce_openai_embedding(d.embedding) for d in data)
+        _observe_batch("openai", len(chunk))
+    return out
+
+
+def _flatten(v) -> list[float]:
+    """Flatten nested lists (some SDKs return nested arrays)."""
+    out = []
+    for item in v:
+        if isinstance(item, list | tuple):
+            out.extend(_flatten(item))
+        else:
+            out.append(item)
+    return out
+
+
+def _check_openai_vector(vec) -> list[float]:
+    """Flatten ``vec`` and warn when its length does not match ``EMBED_DIM``."""
+    try:
+        from app.config_runtime import CONFIG
+
+        exp_dim = CONFIG.embed_dim
+    except Exception:
+        exp_dim = int(os.getenv("EMBED_DIM", "1536"))
+
+    flat = _flatten(vec)
+    if exp_dim and len(flat) != exp_dim and exp_dim != 0:
+        logger.warning(
+            "embed_dim_mismatch: EMBED_DIM=%s but embedding length=%s",
+            exp_dim,
+            len(flat),
+        )
+    return flat
+
+
 async def _embed_openai(text: str) -> list[float]:
     """Asynchronously compute an OpenAI embedding with caching."""
     bucket = int(time.time() // _TTL)
     loop = asyncio.get_running_loop()
     t0 = time.perf_counter()
     try:
-        vec = await loop.run_in_executor(None, _embed_openai_sync, text, bucket)
-        # Flatten any nested structure and ensure length matches EMBED_DIM if set
-        try:
-            from app.config_runtime import CONFIG
-
-            exp_dim = CONFIG.embed_dim
-        except Exception:
-            exp_dim = int(os.getenv("EMBED_DIM", "1536"))
-
-        # Flatten nested lists (some SDKs return nested arrays)
-        def _flatten(v):
-            out = []
-            for item in v:
-                if isinstance(item, list | tuple):
-                    out.extend(_flatten(item))
-                else:
-                    out.append(item)
-            return out
-
-        flat = _flatten(vec)
-        if exp_dim and len(flat) != exp_dim and exp_dim != 0:
-            logger.warning(
-                "embed_dim_mismatch: EMBED_DIM=%s but embedding length=%s",
-                exp_dim,
-                len(flat),
-            )
-        return flat
+        vec = await loop.run_in_executor(
+            None,
+            lambda: _read_through(
+                "openai", [text], lambda ts: [_embed_openai_sync(ts[0], bucket)]
+            )[0],
+        )
+        return _check_openai_vector(vec)
     finally:
         try:
             EMBEDDING_LATENCY_SECONDS.labels("openai").observe(time.perf_counter() - t0)
@@ -181,11 +232,8 @@ async def _embed_openai(text: str) -> list[float]:
 
 
 async def _embed_llama(text: str) -> list[float]:
-    model = _get_llama_model()
-
     def _run() -> list[float]:
-        result = model.create_embedding(text)
-        return result["data"][0]["embedding"]
+        return _read_through("llama", [text], _embed_llama_many_sync)[0]
 
     loop = asyncio.get_running_loop()
     t0 = time.perf_counter()
@@ -198,13 +246,172 @@ async def _embed_llama(text: str) -> list[float]:
             pass
 
 
+def _embed_llama_many_sync(texts: Sequence[str]) -> list[list[float]]:
+    """Embed ``texts`` with the local LLaMA model, one call per chunk."""
+    model = _get_llama_model()
+    out: list[list[float]] = []
+    for chunk in _chunks(texts, _batch_size()):
+        result = model.create_embedding(chunk)
+        out.extend(d["embedding"] for d in result["data"])
+        _observe_batch("llama", len(chunk))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Batching helpers
+# ---------------------------------------------------------------------------
+
+
+def _batch_size() -> int:
+    try:
+        return max(1, int(os.getenv("EMBED_BATCH_SIZE", str(_DEFAULT_BATCH_SIZE))))
+    except ValueError:
+        return _DEFAULT_BATCH_SIZE
+
+
+def _chunks(texts: Sequence[str], size: int) -> list[list[str]]:
+    return [list(texts[i : i + size]) for i in range(0, len(texts), size)]
+
+
+def _observe_batch(backend: str, n: int) -> None:
+    try:
+        EMBEDDING_BATCH_SIZE.labels(backend).observe(n)
+    except Exception:
+        pass
+
+
+def _read_through(
+    backend: str,
+    texts: list[str],
+    compute: Callable[[list[str]], list[list[float]]],
+) -> list[list[float]]:
+    """Serve ``texts`` from the persistent cache, computing and storing misses.
+
+    The deterministic ``stub`` backend is never cached.
+    """
+    cache = get_embedding_cache() if backend != "stub" else None
+    if cache is None:
+        return compute(texts)
+    model = _model_for(backend)
+    cached = cache.get_many(backend, model, texts)
+    missing = [t for t, v in zip(texts, cached, strict=True) if v is None]
+    if not missing:
+        return cached  # type: ignore[return-value]
+    fresh = compute(missing)
+    cache.put_many(backend, model, missing, fresh)
+    it = iter(fresh)
+    return [v if v is not None else next(it) for v in cached]
+
+
+def _embed_many_backend_sync(backend: str, texts: Sequence[str]) -> list[list[float]]:
+    """Embed unique ``texts`` once each and fan results back out in input order."""
+    unique = list(dict.fromkeys(texts))
+    t0 = time.perf_counter()
+    try:
+        if backend == "stub":
+            vecs = [_embed_stub(t) for t in unique]
+        elif backend == "openai":
+            vecs = _read_through(
+                backend,
+                unique,
+                lambda ts: [_check_openai_vector(v) for v in _embed_openai_many_sync(ts)],
+            )
+        elif backend == "llama":
+            vecs = _read_through(backend, unique, _embed_llama_many_sync)
+        else:
+            raise ValueError(f"Unsupported EMBEDDING_BACKEND: {backend}")
+    finally:
+        try:
+            EMBEDDING_LATENCY_SECONDS.labels(backend).observe(time.perf_counter() - t0)
+        except Exception:
+            pass
+    by_text = dict(zip(unique, vecs, strict=True))
+    return [by_text[t] for t in texts]
+
+
+class EmbeddingCoalescer:
+    """Merge concurrent single-text embeds into one batched backend request.
+
+    Calls to :meth:`submit` made within ``window_s`` of the first pending call
+    (or until ``max_batch`` texts are queued) share one :func:`embed_many`
+    round trip. A coalescer is bound to the event loop it was first used on.
+    """
+
+    def __init__(self, backend: str, window_s: float, max_batch: int) -> None:
+        self.backend = backend
+        self.window_s = window_s
+        self.max_batch = max_batch
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, text: str) -> list[float]:
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        fut: asyncio.Future = loop.create_future()
+        self._pending.append((text, fut))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_s, self._flush)
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch and self._loop is not None:
+            task = self._loop.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        texts = [t for t, _ in batch]
+        loop = asyncio.get_running_loop()
+        try:
+            vecs = await loop.run_in_executor(
+                None, _embed_many_backend_sync, self.backend, texts
+            )
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for (_, fut), vec in zip(batch, vecs, strict=True):
+            if not fut.done():
+                fut.set_result(vec)
+
+
+_coalescers: dict[str, EmbeddingCoalescer] = {}
+
+
+def _coalesce_window_s() -> float:
+    try:
+        return max(0.0, float(os.getenv("EMBED_COALESCE_MS", "0") or 0)) / 1000.0
+    except ValueError:
+        return 0.0
+
+
+def _get_coalescer(backend: str, window_s: float) -> EmbeddingCoalescer:
+    """Return the coalescer for ``backend`` on the running loop."""
+    loop = asyncio.get_running_loop()
+    c = _coalescers.get(backend)
+    if c is None or (c._loop is not None and c._loop is not loop):
+        c = EmbeddingCoalescer(backend, window_s, _batch_size())
+        _coalescers[backend] = c
+    c.window_s = window_s
+    return c
+
+
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
 
 
-def embed_sync(text: str) -> list[float]:
-    """Synchronous helper used by vector stores."""
+def _resolve_backend() -> str:
+    """Return the configured backend, forcing ``stub`` under tests / memory store."""
     backend = os.getenv("EMBEDDING_BACKEND", "openai").lower()
 
     # In CI/pytest or when using in-memory vector store, force stub to avoid network.
@@ -213,12 +420,21 @@ def embed_sync(text: str) -> list[float]:
         or os.getenv("VECTOR_STORE", "").lower() in {"memory", "inmemory"}
     ):
         backend = "stub"
+    return backend
 
-    model = (
+
+def _model_for(backend: str) -> str:
+    return (
         os.getenv("EMBED_MODEL", "text-embedding-3-small")
         if backend == "openai"
         else os.getenv("LLAMA_EMBEDDINGS_MODEL", "")
     )
+
+
+def embed_sync(text: str) -> list[float]:
+    """Synchronous helper used by vector stores."""
+    backend = _resolve_backend()
+    model = _model_for(backend)
     logger.debug(
         "embed_sync backend=%s model=%s (cosine metric assumed)", backend, model
     )
@@ -229,10 +445,11 @@ def embed_sync(text: str) -> list[float]:
             return _embed_stub(text)
         if backend == "openai":
             bucket = int(time.time() // _TTL)
-            return _embed_openai_sync(text, bucket)
+            return _read_through(
+                backend, [text], lambda ts: [_embed_openai_sync(ts[0], bucket)]
+            )[0]
         if backend == "llama":
-            result = _get_llama_model().create_embedding(text)
-            return result["data"][0]["embedding"]
+            return _read_through(backend, [text], _embed_llama_many_sync)[0]
     finally:
         try:
             EMBEDDING_LATENCY_SECONDS.labels(backend).observe(time.perf_counter() - t0)
@@ -246,22 +463,13 @@ async def embed(text: str) -> list[float]:
 
     Backend chosen by ``EMBEDDING_BACKEND`` (default: ``openai``).
     """
-    backend = os.getenv("EMBEDDING_BACKEND", "openai").lower()
-
-    # Mirror sync behavior for tests / memory store
-    if backend != "stub" and (
-        os.getenv("PYTEST_CURRENT_TEST")
-        or os.getenv("VECTOR_STORE", "").lower() in {"memory", "inmemory"}
-    ):
-        backend = "stub"
-
-    model = (
-        os.getenv("EMBED_MODEL", "text-embedding-3-small")
-        if backend == "openai"
-        else os.getenv("LLAMA_EMBEDDINGS_MODEL", "")
-    )
+    backend = _resolve_backend()
+    model = _model_for(backend)
     logger.debug("embed backend=%s model=%s (cosine metric assumed)", backend, model)
 
+    window = _coalesce_window_s()
+    if window > 0 and backend in {"openai", "llama"}:
+        return await _get_coalescer(backend, window).submit(text)
     if backend == "openai":
         return await _embed_openai(text)
     if backend == "llama":
@@ -271,6 +479,40 @@ async def embed(text: str) -> list[float]:
     raise ValueError(f"Unsupported EMBEDDING_BACKEND: {backend}")
 
 
+def embed_many_sync(texts: Sequence[str]) -> list[list[float]]:
+    """Return one embedding per entry in ``texts`` using batched backend calls.
+
+    Duplicate texts are embedded once. Texts are sent in chunks of
+    ``EMBED_BATCH_SIZE`` (default 128).
+    """
+    if not texts:
+        return []
+    backend = _resolve_backend()
+    logger.debug(
+        "embed_many_sync backend=%s model=%s n=%d",
+        backend,
+        _model_for(backend),
+        len(texts),
+    )
+    return _embed_many_backend_sync(backend, list(texts))
+
+
+async def embed_many(texts: Sequence[str]) -> list[list[float]]:
+    """Async counterpart of :func:`embed_many_sync` (runs in the default executor)."""
+    if not texts:
+        return []
+    backend = _resolve_backend()
+    logger.debug(
+        "embed_many backend=%s model=%s n=%d", backend, _model_for(backend), len(texts)
+    )
+    if backend == "stub":
+        return _embed_many_backend_sync(backend, list(texts))
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None, _embed_many_backend_sync, backend, list(texts)
+    )
+
+
 async def benchmark(
     text: str, iterations: int = 10, user_id: str | None = None
 ) -> dict[str, float]:
@@ -293,4 +535,11 @@ async def benchmark(
     return {"latency": latency, "throughput": throughput}
 
 
-__all__ = ["embed", "benchmark", "embed_sync"]
+__all__ = [
+    "embed",
+    "benchmark",
+    "embed_sync",
+    "embed_many",
+    "embed_many_sync",
+    "EmbeddingCoalescer",
+]
@@ -0,0 +1,131 @@
+"""Precomputed lookup structures over Home Assistant entity states.
+
+An :class:`EntityIndex` is built once per states list (see
+``home_assistant.entity_index``) and answers the lookups behind
+``resolve_entity`` and fuzzy command matching without scanning every state:
+
+- exact maps for entity_id and friendly name,
+- a trigram inverted index for substring and fuzzy candidates,
+- per-domain entity lists and friendly-name choices.
+
+Results match the linear scans they replace, including first-match order.
+"""
+
+from __future__ import annotations
+
+from difflib import SequenceMatcher
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class EntityIndex:
+    def __init__(self, states: list[dict]) -> None:
+        # Identity of the list this index was built from (rebuild check)
+        self.source = states
+        self._ids: list[str] = []
+        self._eids: list[str] = []  # lower-cased entity ids
+        self._friendly: list[str] = []  # lower-cased friendly names
+        self._fuzzy: list[SequenceMatcher] = []  # label cached as seq2
+        self._by_id: dict[str, int] = {}
+        self._by_name: dict[str, int] = {}
+        self._grams: dict[str, set[int]] = {}
+        self._domains: dict[str, list[str]] = {}
+        self._choices: dict[str, dict[str, str]] = {}
+        for st in states:
+            eid = str(st.get("entity_id") or "")
+            friendly = str((st.get("attributes") or {}).get("friendly_name") or "")
+            row = len(self._ids)
+            self._ids.append(eid)
+            self._eids.append(eid.lower())
+            self._friendly.append(friendly.lower())
+            self._fuzzy.append(SequenceMatcher(None, "", (friendly or eid).lower()))
+            self._by_id.setdefault(eid.lower(), row)
+            self._by_name.setdefault(friendly.lower(), row)
+            for gram in _trigrams(eid.lower()) | _trigrams(friendly.lower()):
+                self._grams.setdefault(gram, set()).add(row)
+            if eid:
+                domain = eid.split(".", 1)[0]
+                self._domains.setdefault(domain, []).append(eid)
+                # Later entities win, as in a dict built by a linear pass
+                label = (friendly or eid).lower()
+                self._choices.setdefault(domain, {})[label] = eid
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def exact(self, name: str) -> str | None:
+        """First entity whose id or friendly name equals ``name`` (lower-case)."""
+        rows = [self._by_id.get(name), self._by_name.get(name)]
+        hits = [r for r in rows if r is not None]
+        return self._ids[min(hits)] if hits else None
+
+    def _candidates(self, text: str) -> set[int] | None:
+        """Rows sharing every trigram of ``text``; None when too short to filter."""
+        grams = _trigrams(text)
+        if not grams:
+            return None
+        postings = sorted((self._grams.get(g, set()) for g in grams), key=len)
+        rows = set(postings[0])
+        for p in postings[1:]:
+            rows &= p
+            if not rows:
+                break
+        return rows
+
+    def substring(self, text: str) -> list[str]:
+        """Entity ids whose id or friendly name contains ``text``, in state order."""
+        rows = self._candidates(text)
+        scan = range(len(self._ids)) if rows is None else sorted(rows)
+        return [
+            self._ids[r]
+            for r in scan
+            if text in self._eids[r] or text in self._friendly[r]
+        ]
+
+    def domain(self, domain: str) -> list[str]:
+        return list(self._domains.get(domain, ()))
+
+    def choices(self, domain: str | None = None) -> dict[str, str]:
+        """Lower-cased friendly name (or entity id) -> entity id, per domain."""
+        if domain:
+            return self._choices.get(domain, {})
+        merged: dict[str, str] = {}
+        for choices in self._choices.values():
+            merged.update(choices)
+        return merged
+
+    def fuzzy(self, target: str) -> tuple[str | None, float]:
+        """Best ``SequenceMatcher`` ratio of ``target`` against entity labels.
+
+        Rows sharing the most trigrams are scored first so the cheap
+        ``real_quick_ratio``/``quick_ratio`` upper bounds prune the rest.
+        """
+        t = target.strip().lower()
+        overlap: dict[int, int] = {}
+        for gram in _trigrams(t):
+            for r in self._grams.get(gram, ()):
+                overlap[r] = overlap.get(r, 0) + 1
+        order = sorted(range(len(self._ids)), key=lambda r: (-overlap.get(r, 0), r))
+        best_row: int | None = None
+        best_score = 0.0
+
+        def beats(score: float, row: int) -> bool:
+            # Ties go to the earlier state, as in a linear scan
+            return score > best_score or (
+                score == best_score and best_row is not None and row < best_row
+            )
+
+        for r in order:
+            sm = self._fuzzy[r]
+            sm.set_seq1(t)
+            if not beats(sm.real_quick_ratio(), r) or not beats(sm.quick_ratio(), r):
+                continue
+            score = sm.ratio()
+            if beats(score, r):
+                best_row, best_score = r, score
+        return (self._ids[best_row] if best_row is not None else None), best_score
+
+
+__all__ = ["EntityIndex"]
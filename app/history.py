@@ -2,13 +2,12 @@ import asyncio
 import json
 import logging
 import os
-import time
+import re
 from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
 
-import aiofiles  # pip install aiofiles
-
+from .history_store import HistoryStore, get_history_store
 from .logging_config import req_id_var
 from .telemetry import LogRecord
 
@@ -54,10 +53,34 @@ _DEFAULT_PATH = Path(__file__).resolve().parent.parent / "data" / "history.jsonl
 HISTORY_FILE = Path(os.getenv("HISTORY_FILE", _DEFAULT_PATH))
 HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
 
-_lock = asyncio.Lock()
 logger = logging.getLogger(__name__)
 # --------------------------------------------------------------------------
 
+# PHI/PII scrubbers applied to ``prompt``/``response`` unless
+# ALLOW_PHI_STORAGE is set.
+_REDACTIONS = (
+    # SSN (simple US pattern)
+    (re.compile(r"\b\d{3}-\d{2}-\d{4}\b"), "[REDACTED-SSN]"),
+    # Emails
+    (
+        re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}"),
+        "[REDACTED-EMAIL]",
+    ),
+    # Phone numbers (loose) e.g. +1 555-123-4567, (555) 123-4567, 5551234567
+    (
+        re.compile(
+            r"(?<!\d)(?:\+?\d{1,3}[\s-]?)?(?:\(?\d{3}\)?[\s-]?)?\d{3}[\s-]?\d{4}(?!\d)"
+        ),
+        "[REDACTED-PHONE]",
+    ),
+)
+
+
+def _redact(text: str) -> str:
+    for pattern, repl in _REDACTIONS:
+        text = pattern.sub(repl, text)
+    return text
+
 
 async def append_history(
     record_or_prompt: LogRecord | str | dict[str, Any],
@@ -69,7 +92,22 @@ async def append_history(
     ``record_or_prompt`` may be a ``LogRecord`` instance or the legacy
     ``prompt`` string (with ``engine_used`` and ``response`` also supplied).
     The function writes newline-delimited JSON objects. Missing optional fields
-    are omitted from the output.
+    are omitted from the output. The record is handed to the background
+    history writer and indexed by ``req_id``, ``user_id`` and timestamp;
+    lookups made afterwards always see it.
+    """
+    enqueue_history(record_or_prompt, engine_used, response)
+
+
+def enqueue_history(
+    record_or_prompt: LogRecord | str | dict[str, Any],
+    engine_used: str | None = None,
+    response: str | None = None,
+) -> bool:
+    """Synchronous form of :func:`append_history` for the request path.
+
+    Never blocks on disk; returns False when the writer queue is full and
+    the record was dropped.
     """
     if isinstance(record_or_prompt, dict):
         record = record_or_prompt
@@ -108,106 +146,50 @@ async def append_history(
             "yes",
         }
         if not allow_phi:
-            import re
-
-            def _redact(text: str) -> str:
-                if not isinstance(text, str):
-                    return text
-                t = text
-                # SSN (simple US pattern)
-                t = re.sub(r"\b\d{3}-\d{2}-\d{4}\b", "[REDACTED-SSN]", t)
-                # Emails
-                t = re.sub(
-                    r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}",
-                    "[REDACTED-EMAIL]",
-                    t,
-                )
-                # Phone numbers (loose) e.g. +1 555-123-4567, (555) 123-4567, 5551234567
-                t = re.sub(
-                    r"(?<!\d)(?:\+?\d{1,3}[\s-]?)?(?:\(?\d{3}\)?[\s-]?)?\d{3}[\s-]?\d{4}(?!\d)",
-                    "[REDACTED-PHONE]",
-                    t,
-                )
-                return t
-
             for key in ("prompt", "response"):
                 if key in record and isinstance(record[key], str):
                     record[key] = _redact(record[key])
     except Exception:  # pragma: no cover - best effort
         pass
 
-    async with _lock:
-        try:
-            file_path = Path(HISTORY_FILE)
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-
-            # Check file size and rotate if too large (>100MB)
-            if file_path.exists() and file_path.stat().st_size > 100 * 1024 * 1024:
-                backup_path = file_path.with_suffix(f".backup.{int(time.time())}.jsonl")
-                file_path.rename(backup_path)
-                logger.info("Rotated history file due to size: %s -> %s", file_path, backup_path)
-
-            if file_path.suffix == ".json":
-                existing = []
-                if file_path.exists():
-                    async with aiofiles.open(file_path, encoding="utf-8") as f:
-                        content = await f.read()
-                        existing = json.loads(content) if content else []
-                existing.append(record)
-                async with aiofiles.open(file_path, "w", encoding="utf-8") as f:
-                    await f.write(_safe_json_dumps(existing, ensure_ascii=False))
-            else:
-                async with aiofiles.open(file_path, "a", encoding="utf-8") as f:
-                    await f.write(_safe_json_dumps(record, ensure_ascii=False) + "\n")
-            logger.debug("history_write_ok", extra={"meta": record})
-        except Exception as e:
-            logger.error("Failed to append history: %s", e)
-            logger.exception("Full traceback for history failure")
-            # Try to write to a fallback location if main file fails
-            try:
-                fallback_path = file_path.with_suffix(".fallback.jsonl")
-                async with aiofiles.open(fallback_path, "a", encoding="utf-8") as f:
-                    await f.write(_safe_json_dumps(record, ensure_ascii=False) + "\n")
-                logger.warning("Wrote history record to fallback file: %s", fallback_path)
-            except Exception as fallback_e:
-                logger.error("Fallback history write also failed: %s", fallback_e)
+    return _store().enqueue(record)
+
+
+def _store() -> HistoryStore:
+    return get_history_store(
+        HISTORY_FILE, lambda obj: _safe_json_dumps(obj, ensure_ascii=False)
+    )
 
 
 async def get_record_by_req_id(req_id: str) -> dict[str, Any] | None:
     """Return the most recent history record with the given request id.
 
-    Supports both JSONL (newline-delimited objects) and a single JSON array file.
-    Returns None when not found or on read/parse errors.
+    Looks the id up in the sidecar index and seeks straight to the record,
+    including records in rotated backup segments. Supports both JSONL
+    (newline-delimited objects) and a single JSON array file. Returns None
+    when not found or on read/parse errors.
     """
     try:
-        file_path = Path(HISTORY_FILE)
-        if not file_path.exists():
-            return None
-        text = file_path.read_text(encoding="utf-8")
-        if not text:
-            return None
-        # JSON array file
-        if file_path.suffix == ".json":
-            try:
-                data = json.loads(text)
-                if isinstance(data, list):
-                    for obj in reversed(data):
-                        if isinstance(obj, dict) and obj.get("req_id") == req_id:
-                            return obj
-                return None
-            except Exception:
-                return None
-        # JSONL file
-        for line in reversed(text.splitlines()):
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                obj = json.loads(line)
-            except Exception:
-                continue
-            if isinstance(obj, dict) and obj.get("req_id") == req_id:
-                return obj
-        return None
+        return await asyncio.to_thread(_store().lookup, req_id)
     except Exception:
         return None
+
+
+async def query_history(
+    *,
+    limit: int = 50,
+    user_id: str | None = None,
+    since: float | None = None,
+    until: float | None = None,
+) -> list[dict[str, Any]]:
+    """Return up to ``limit`` history records, newest first, via the index.
+
+    ``since``/``until`` are epoch seconds. Rotated segments are included.
+    """
+    try:
+        return await asyncio.to_thread(
+            _store().query, limit=limit, user_id=user_id, since=since, until=until
+        )
+    except Exception:
+        logger.debug("history query failed", exc_info=True)
+        return []
@@ -0,0 +1,402 @@
+"""Segmented, indexed storage behind :mod:`app.history`.
+
+The active segment is ``HISTORY_FILE`` itself (NDJSON, or a JSON array when the
+path ends in ``.json``). When it grows past ``HISTORY_MAX_BYTES`` it is renamed
+to ``<stem>.backup.<ts><suffix>`` and a fresh segment is started.
+
+A SQLite sidecar (``<HISTORY_FILE>.idx.sqlite3``) maps every record to
+``(segment, offset, length)`` and indexes ``req_id``, timestamp and
+``user_id``, so lookups seek straight to the record instead of reading whole
+files. The index is a cache of the segments: records appended by other
+processes or older versions are picked up incrementally the next time a
+lookup misses, and every indexed read is verified against the record itself.
+
+Appends go through a shared :class:`~app.log_sink.LogSink`: records queued
+by concurrent callers are written as one batch (one write on a long-lived
+handle, one index transaction). ``enqueue`` returns immediately; lookups and
+queries flush the queue first so they see every record enqueued before them.
+Segments also rotate after ``HISTORY_ROTATE_SECONDS`` when set.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections.abc import Callable
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from .log_sink import LogSink, NdjsonFile, RotationPolicy, backup_path
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    segment TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    req_id TEXT,
+    user_id TEXT,
+    ts REAL,
+    PRIMARY KEY (segment, offset)
+);
+CREATE INDEX IF NOT EXISTS idx_records_req_id ON records(req_id);
+CREATE INDEX IF NOT EXISTS idx_records_user_ts ON records(user_id, ts);
+CREATE INDEX IF NOT EXISTS idx_records_ts ON records(ts);
+CREATE TABLE IF NOT EXISTS segments (
+    name TEXT PRIMARY KEY,
+    indexed_bytes INTEGER NOT NULL,
+    inode INTEGER NOT NULL
+);
+"""
+
+
+def _parse_ts(value: Any) -> float | None:
+    if isinstance(value, int | float):
+        return float(value)
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _index_row(
+    segment: str, offset: int, length: int, record: dict[str, Any]
+) -> tuple[str, int, int, str | None, str | None, float | None]:
+    req_id = record.get("req_id")
+    user_id = record.get("user_id")
+    return (
+        segment,
+        offset,
+        length,
+        str(req_id) if req_id is not None else None,
+        str(user_id) if user_id is not None else None,
+        _parse_ts(record.get("timestamp")),
+    )
+
+
+class HistoryStore:
+    """Append-only history segments with a SQLite sidecar index."""
+
+    def __init__(self, path: Path, dumps: Callable[[Any], str]) -> None:
+        self.path = Path(path)
+        self._dumps = dumps
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        idx = self.path.with_name(self.path.name + ".idx.sqlite3")
+        self._conn = sqlite3.connect(str(idx), check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._rotation = RotationPolicy.from_env(
+            "HISTORY", max_bytes=_DEFAULT_MAX_BYTES
+        )
+        self._file = NdjsonFile(self.path, self._rotation, on_rotate=self._on_rotate)
+        self._sink = LogSink("history", self._write_or_fallback)
+
+    @property
+    def is_array(self) -> bool:
+        return self.path.suffix == ".json"
+
+    # ------------------------------------------------------------------ writes
+    def enqueue(self, record: dict[str, Any]) -> bool:
+        """Queue ``record`` for the background writer without waiting."""
+        return self._sink.submit(record)
+
+    def flush(self, timeout: float | None = 5.0) -> bool:
+        """Wait until every queued record has been written."""
+        return self._sink.flush(timeout)
+
+    def _write_or_fallback(self, records: list[dict[str, Any]]) -> None:
+        try:
+            self.write_batch(records)
+        except Exception as e:
+            logger.error("Failed to append history: %s", e)
+            logger.exception("Full traceback for history failure")
+            self._write_fallback(records)
+
+    def write_batch(self, records: list[dict[str, Any]]) -> None:
+        """Append ``records`` to the active segment and index them."""
+        lines = [self._dumps(r).encode("utf-8") for r in records]
+        with self._lock:
+            if self.is_array:
+                self._maybe_rotate()
+                spans = self._append_array(lines)
+            else:
+                spans = self._file.append(lines)
+            seg = self.path.name
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO records "
+                "(segment, offset, length, req_id, user_id, ts) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    _index_row(seg, off, ln, rec)
+                    for (off, ln), rec in zip(spans, records, strict=True)
+                ],
+            )
+            if spans and not self.is_array:
+                self._advance_segment(seg, spans[0][0], spans[-1][0] + spans[-1][1] + 1)
+            self._conn.commit()
+        logger.debug("history_write_ok", extra={"meta": {"records": len(records)}})
+
+    def _advance_segment(self, seg: str, start: int, end: int) -> None:
+        # Mark our own bytes as indexed so _catch_up does not re-read them.
+        # Only when they directly follow what is already indexed: a gap means
+        # another writer appended in between and catch-up must index it.
+        inode = self._file.inode
+        row = self._conn.execute(
+            "SELECT indexed_bytes, inode FROM segments WHERE name = ?", (seg,)
+        ).fetchone()
+        indexed = 0 if row is None else int(row[0])
+        if (row is not None and int(row[1]) != inode) or indexed != start:
+            return
+        self._conn.execute(
+            "INSERT OR REPLACE INTO segments (name, indexed_bytes, inode) "
+            "VALUES (?, ?, ?)",
+            (seg, end, inode),
+        )
+
+    def _append_array(self, lines: list[bytes]) -> list[tuple[int, int]]:
+        # Splice new elements in front of the closing bracket instead of
+        # rewriting the whole array.
+        spans: list[tuple[int, int]] = []
+        mode = "r+b" if self.path.exists() else "w+b"
+        with open(self.path, mode) as f:
+            end = f.seek(0, os.SEEK_END)
+            empty = True
+            if end:
+                tail_len = min(end, 4096)
+                f.seek(end - tail_len)
+                tail = f.read(tail_len)
+                close = tail.rfind(b"]")
+                if close < 0:
+                    raise ValueError(f"{self.path} is not a JSON array")
+                pos = end - tail_len + close
+                before = tail[:close].rstrip()
+                empty = before.endswith(b"[") or (not before and pos <= 1)
+            else:
+                f.write(b"[")
+                pos = 1
+            f.seek(pos)
+            f.truncate()
+            for line in lines:
+                if not empty:
+                    f.write(b",\n")
+                spans.append((f.tell(), len(line)))
+                f.write(line)
+                empty = False
+            f.write(b"]")
+        return spans
+
+    def _maybe_rotate(self) -> None:
+        # JSON arrays are rewritten in place per batch, so there is no
+        # long-lived handle; rotate by size only.
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return
+        if not self._rotation.max_bytes or size <= self._rotation.max_bytes:
+            return
+        backup = backup_path(self.path)
+        self.path.rename(backup)
+        self._on_rotate(backup)
+        logger.info("Rotated history file due to size: %s -> %s", self.path, backup)
+
+    def _on_rotate(self, backup: Path) -> None:
+        self._conn.execute(
+            "UPDATE records SET segment = ? WHERE segment = ?",
+            (backup.name, self.path.name),
+        )
+        self._conn.execute(
+            "UPDATE segments SET name = ? WHERE name = ?",
+            (backup.name, self.path.name),
+        )
+        self._conn.commit()
+
+    def _write_fallback(self, records: list[dict[str, Any]]) -> None:
+        fallback = self.path.with_suffix(".fallback.jsonl")
+        try:
+            with open(fallback, "a", encoding="utf-8") as f:
+                for r in records:
+                    f.write(self._dumps(r) + "\n")
+            logger.warning("Wrote history record to fallback file: %s", fallback)
+        except Exception as e:
+            logger.error("Fallback history write also failed: %s", e)
+
+    # ------------------------------------------------------------------- reads
+    def segments(self) -> list[Path]:
+        """Return the active segment and rotated backups, newest first."""
+        backups = sorted(
+            self.path.parent.glob(f"{self.path.stem}.backup.*{self.path.suffix}"),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        return ([self.path] if self.path.exists() else []) + backups
+
+    def _read_at(self, segment: str, offset: int, length: int) -> dict | None:
+        try:
+            with open(self.path.parent / segment, "rb") as f:
+                f.seek(offset)
+                obj = json.loads(f.read(length))
+        except (OSError, ValueError):
+            return None
+        return obj if isinstance(obj, dict) else None
+
+    def _catch_up(self) -> None:
+        """Index records appended to NDJSON segments since the last catch-up."""
+        if self.is_array:
+            return
+        # Oldest first so a fresh index assigns rowids in append order
+        for seg in reversed(self.segments()):
+            try:
+                st = seg.stat()
+            except FileNotFoundError:
+                continue
+            row = self._conn.execute(
+                "SELECT indexed_bytes, inode FROM segments WHERE name = ?", (seg.name,)
+            ).fetchone()
+            start = 0
+            if row is not None:
+                start, inode = int(row[0]), int(row[1])
+                if inode != st.st_ino or st.st_size < start:
+                    # Replaced or truncated: rebuild this segment's rows
+                    self._conn.execute(
+                        "DELETE FROM records WHERE segment = ?", (seg.name,)
+                    )
+                    start = 0
+            if row is not None and start == st.st_size:
+                continue
+            rows = []
+            pos = start
+            with open(seg, "rb") as f:
+                f.seek(start)
+                for raw in f:
+                    line = raw.rstrip(b"\r\n")
+                    if line.strip():
+                        try:
+                            obj = json.loads(line)
+                        except ValueError:
+                            obj = None
+                        if isinstance(obj, dict):
+                            rows.append(_index_row(seg.name, pos, len(line), obj))
+                    if not raw.endswith(b"\n"):
+                        # Unterminated tail (possibly mid-write): index what
+                        # parses but revisit it on the next catch-up.
+                        break
+                    pos += len(raw)
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO records "
+                "(segment, offset, length, req_id, user_id, ts) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO segments (name, indexed_bytes, inode) "
+                "VALUES (?, ?, ?)",
+                (seg.name, pos, st.st_ino),
+            )
+        self._conn.commit()
+
+    def _find_indexed(self, req_id: str) -> dict | None:
+        rows = self._conn.execute(
+            "SELECT segment, offset, length FROM records WHERE req_id = ? "
+            "ORDER BY ts DESC, rowid DESC",
+            (req_id,),
+        ).fetchall()
+        for segment, offset, length in rows:
+            obj = self._read_at(segment, offset, length)
+            if obj is not None and obj.get("req_id") == req_id:
+                return obj
+        return None
+
+    def lookup(self, req_id: str) -> dict | None:
+        """Return the most recent record for ``req_id`` across all segments."""
+        self.flush()
+        with self._lock:
+            found = self._find_indexed(req_id)
+            if found is None:
+                self._catch_up()
+                found = self._find_indexed(req_id)
+        if found is None and self.is_array:
+            found = self._scan_array(req_id)
+        return found
+
+    def _scan_array(self, req_id: str) -> dict | None:
+        # Arrays written before the index existed have no offsets
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8") or "[]")
+        except (OSError, ValueError):
+            return None
+        if isinstance(data, list):
+            for obj in reversed(data):
+                if isinstance(obj, dict) and obj.get("req_id") == req_id:
+                    return obj
+        return None
+
+    def query(
+        self,
+        *,
+        limit: int = 50,
+        user_id: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+    ) -> list[dict[str, Any]]:
+        """Return up to ``limit`` records, newest first, via the index."""
+        where: list[str] = []
+        args: list[Any] = []
+        if user_id is not None:
+            where.append("user_id = ?")
+            args.append(str(user_id))
+        if since is not None:
+            where.append("ts >= ?")
+            args.append(float(since))
+        if until is not None:
+            where.append("ts < ?")
+            args.append(float(until))
+        clause = f"WHERE {' AND '.join(where)} " if where else ""
+        self.flush()
+        with self._lock:
+            self._catch_up()
+            rows = self._conn.execute(
+                f"SELECT segment, offset, length FROM records {clause}"
+                "ORDER BY ts DESC, rowid DESC LIMIT ?",
+                (*args, int(limit)),
+            ).fetchall()
+            out = [self._read_at(*row) for row in rows]
+        return [r for r in out if r is not None]
+
+    def close(self) -> None:
+        self._sink.close()
+        with self._lock:
+            self._file.close()
+            self._conn.close()
+
+
+_stores: dict[Path, HistoryStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_history_store(path: str | Path, dumps: Callable[[Any], str]) -> HistoryStore:
+    """Return the store for ``path``, creating it on first use."""
+    key = Path(path).resolve()
+    store = _stores.get(key)
+    if store is not None:
+        return store
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = HistoryStore(key, dumps)
+            _stores[key] = store
+        return store
+
+
+__all__ = ["HistoryStore", "get_history_store"]
@@ -1,15 +1,17 @@
+import asyncio
+import itertools
 import json as json_module
 import logging
 import os
 import re
 import time
 from dataclasses import dataclass
-from difflib import SequenceMatcher
 from typing import Any
 
 from . import alias_store
 from . import analytics as _analytics
 from .audit import append_audit  # Use the old audit.py directly
+from .ha_entity_index import EntityIndex
 from .http_utils import json_request, log_exceptions
 from .policy import moderation_precheck
 from .telemetry import log_record_var
@@ -141,8 +143,14 @@ async def _request(
 # Public API helpers
 # ---------------------------------------------------------------------------
 async def get_states() -> list[dict]:
-    """Return all HA entity states with a short lived cache."""
+    """Return all HA entity states.
+
+    Served from the websocket-fed :data:`_MIRROR` while it is in sync (no
+    network call); otherwise from ``/api/states`` with a short lived cache.
+    """
     global _STATES_CACHE, _STATES_CACHE_EXP
+    if _MIRROR.synced:
+        return _MIRROR.states()
     now = time.monotonic()
     if _STATES_CACHE is not None and now < _STATES_CACHE_EXP:
         return _STATES_CACHE
@@ -162,6 +170,32 @@ async def get_states() -> list[dict]:
     return _STATES_CACHE
 
 
+_ENTITY_INDEX: EntityIndex | None = None
+# Mirror names version the index was built at (None: keyed on list identity)
+_ENTITY_INDEX_NAMES: int | None = None
+
+
+def entity_index(states: list[dict]) -> EntityIndex:
+    """Return the lookup index for ``states``, rebuilt only when names change.
+
+    The index holds entity ids and friendly names only. For the mirror's list
+    it is keyed on :attr:`StateMirror.names_version`, so ``state_changed``
+    events that only touch state values reuse it. The REST cache hands out
+    one list object per fetch, so there list identity is the rebuild signal.
+    """
+    global _ENTITY_INDEX, _ENTITY_INDEX_NAMES
+    idx = _ENTITY_INDEX
+    if _MIRROR.owns(states):
+        version = _MIRROR.names_version
+        if idx is None or _ENTITY_INDEX_NAMES != version:
+            idx = _ENTITY_INDEX = EntityIndex(states)
+            _ENTITY_INDEX_NAMES = version
+    elif idx is None or _ENTITY_INDEX_NAMES is not None or idx.source is not states:
+        idx = _ENTITY_INDEX = EntityIndex(states)
+        _ENTITY_INDEX_NAMES = None
+    return idx
+
+
 def invalidate_states_cache() -> None:
     """Clear cached HA states."""
     global _STATES_CACHE, _STATES_CACHE_EXP
@@ -169,6 +203,174 @@ def invalidate_states_cache() -> None:
     _STATES_CACHE_EXP = 0.0
 
 
+# ---------------------------------------------------------------------------
+# Event-driven state mirror
+# ---------------------------------------------------------------------------
+# Process-wide so versions never repeat across mirror instances
+_NAMES_VERSIONS = itertools.count(1)
+
+
+def _friendly_name(state: dict | None) -> Any:
+    return ((state or {}).get("attributes") or {}).get("friendly_name")
+
+
+class StateMirror:
+    """In-memory copy of HA entity states kept current by ``state_changed``.
+
+    ``/api/states`` is only fetched right after each (re)subscription; from
+    then on every change arrives over the HA websocket API. ``synced`` is
+    False until the first sync completes and again while disconnected, so
+    callers fall back to REST rather than serve a stale mirror.
+    """
+
+    def __init__(self) -> None:
+        self._states: dict[str, dict] = {}
+        self._list: list[dict] | None = None
+        # Changes only when entities are added/removed or renamed
+        self.names_version = next(_NAMES_VERSIONS)
+        self.synced = False
+        self.last_event_at: float | None = None
+        self._task: asyncio.Task | None = None
+
+    def states(self) -> list[dict]:
+        # Rebuilt lazily: many reads per change on the command path
+        if self._list is None:
+            self._list = list(self._states.values())
+        return self._list
+
+    def owns(self, states: list[dict]) -> bool:
+        """True when ``states`` is the list this mirror currently hands out."""
+        return self._list is not None and states is self._list
+
+    def get(self, entity_id: str) -> dict | None:
+        return self._states.get(entity_id)
+
+    def load(self, states: list[dict]) -> None:
+        self._states = {
+            st["entity_id"]: st
+            for st in states
+            if isinstance(st, dict) and st.get("entity_id")
+        }
+        self._list = None
+        self.names_version = next(_NAMES_VERSIONS)
+        self.synced = True
+
+    def apply_event(self, event: dict) -> None:
+        """Apply one ``state_changed`` event (``new_state`` None = removed)."""
+        data = event.get("data") or {}
+        eid = data.get("entity_id")
+        if not eid:
+            return
+        new_state = data.get("new_state")
+        old_state = self._states.get(eid)
+        if new_state is None:
+            self._states.pop(eid, None)
+            renamed = old_state is not None
+        else:
+            self._states[eid] = new_state
+            renamed = old_state is None or _friendly_name(
+                old_state
+            ) != _friendly_name(new_state)
+        if renamed:
+            self.names_version = next(_NAMES_VERSIONS)
+        self._list = None
+        self.last_event_at = time.time()
+
+    def clear(self) -> None:
+        self._states = {}
+        self._list = None
+        self.names_version = next(_NAMES_VERSIONS)
+        self.synced = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run(), name="ha-state-mirror")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        self.synced = False
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def _run(self) -> None:
+        delay = 1.0
+        while True:
+            try:
+                await self._session()
+                delay = 1.0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("HA state mirror disconnected: %s", e)
+            self.synced = False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    async def _session(self) -> None:
+        import aiohttp
+
+        base = HOME_ASSISTANT_URL.rstrip("/")
+        url = re.sub(r"^http", "ws", base) + "/api/websocket"
+        async with aiohttp.ClientSession() as sess:
+            async with sess.ws_connect(url, heartbeat=30) as ws:
+                msg = await ws.receive_json()
+                if msg.get("type") == "auth_required":
+                    await ws.send_json(
+                        {"type": "auth", "access_token": HOME_ASSISTANT_TOKEN}
+                    )
+                    msg = await ws.receive_json()
+                if msg.get("type") != "auth_ok":
+                    raise HomeAssistantAPIError("unauthorized")
+                await ws.send_json(
+                    {"id": 1, "type": "subscribe_events", "event_type": "state_changed"}
+                )
+                # Subscribe before the REST sync: events that race the fetch
+                # queue up on the socket and are applied on top of it below
+                self.load(await _request("GET", "/states") or [])
+                logger.info("HA state mirror synced: %d entities", len(self._states))
+                async for raw in ws:
+                    if raw.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    msg = json_module.loads(raw.data)
+                    if msg.get("type") == "event" and msg.get("id") == 1:
+                        self.apply_event(msg.get("event") or {})
+                    elif msg.get("type") == "result" and not msg.get("success"):
+                        raise HomeAssistantAPIError("subscribe_failed")
+
+
+_MIRROR = StateMirror()
+
+
+def start_state_mirror() -> bool:
+    """Start the websocket state mirror; return False when it can't run."""
+    if not HOME_ASSISTANT_TOKEN:
+        return False
+    if os.getenv("HA_STATE_MIRROR", "1").lower() in {"0", "false", "no", "off"}:
+        return False
+    if os.getenv("SKILLS_DRY_RUN", "").lower() in {"1", "true", "yes"}:
+        return False
+    try:
+        import aiohttp  # noqa: F401
+    except Exception:
+        logger.info("aiohttp unavailable; HA states stay on REST polling")
+        return False
+    _MIRROR.start()
+    return True
+
+
+async def stop_state_mirror() -> None:
+    """Stop the state mirror (application shutdown)."""
+    await _MIRROR.stop()
+
+
 async def refresh_services_registry() -> None:
     """Fetch Home Assistant services and cache capabilities per domain/service.
 
@@ -298,7 +500,9 @@ async def call_service(domain: str, service: str, data: dict) -> Any:
         if ids is not None:
             rec.entity_ids = [ids] if isinstance(ids, str) else list(ids)
     result = await _request("POST", f"/services/{domain}/{service}", json=data)
-    invalidate_states_cache()
+    # The mirror hears about the resulting state change on its own
+    if not _MIRROR.synced:
+        invalidate_states_cache()
     try:
         rec = log_record_var.get()
         uid = getattr(rec, "user_id", None)
@@ -368,29 +572,22 @@ async def resolve_entity(name: str) -> list[str]:
         logger.warning("resolve_entity failed: %s", e)
         return []
 
+    idx = entity_index(states)
+
     # 2) Exact entity_id or friendly_name match
-    for st in states:
-        eid = st.get("entity_id", "")
-        friendly = st.get("attributes", {}).get("friendly_name", "")
-        if normalized == eid.lower() or normalized == friendly.lower():
-            return [eid]
+    eid = idx.exact(normalized)
+    if eid is not None:
+        return [eid]
 
     # 3) Synonym normalization then exact match
     target = _SYN_TO_ROOM.get(normalized, normalized)
     if target != normalized:
-        for st in states:
-            eid = st.get("entity_id", "")
-            friendly = st.get("attributes", {}).get("friendly_name", "")
-            if target == eid.lower() or target == friendly.lower():
-                return [eid]
+        eid = idx.exact(target)
+        if eid is not None:
+            return [eid]
 
     # 4) Substring fallback
-    matches: list[str] = []
-    for st in states:
-        eid = st.get("entity_id", "")
-        friendly = st.get("attributes", {}).get("friendly_name", "")
-        if target in eid.lower() or target in friendly.lower():
-            matches.append(eid)
+    matches = idx.substring(target)
 
     # 5) Domain collection resolution (e.g., "lights" -> all light entities)
     if not matches:
@@ -404,28 +601,14 @@ async def resolve_entity(name: str) -> list[str]:
         }
         domain = plural_to_domain.get(target)
         if domain:
-            matches = [
-                st.get("entity_id", "")
-                for st in states
-                if st.get("entity_id", "").startswith(domain + ".")
-            ]
+            matches = idx.domain(domain)
 
     return [m for m in matches if m]
 
 
 def _best_fuzzy_match(target: str, states: list[dict]) -> tuple[str | None, float]:
     """Return the best entity_id and confidence ratio [0,1] for a fuzzy match."""
-    best_id: str | None = None
-    best_score: float = 0.0
-    t = target.strip().lower()
-    for st in states:
-        eid = st.get("entity_id", "")
-        friendly = (st.get("attributes", {}) or {}).get("friendly_name", "")
-        cand = friendly or eid
-        score = SequenceMatcher(a=t, b=str(cand).lower()).ratio()
-        if score > best_score:
-            best_score, best_id = score, eid
-    return best_id, best_score
+    return entity_index(states).fuzzy(target)
 
 
 _HANDLE_CMD_DEPRECATION_WARNED = False
@@ -3,6 +3,7 @@ import importlib
 import logging
 import os
 from functools import wraps
+from typing import Any
 
 import httpx
 
@@ -46,45 +47,59 @@ def log_exceptions(module: str):
 
 
 async def json_request(
-    method: str, url: str, **kwargs
+    method: str, url: str, *, client: Any | None = None, **kwargs
 ) -> tuple[dict | None, str | None]:
     """Perform an HTTP request and return JSON with retry logic.
 
     Returns a tuple of ``(data, error)`` where ``error`` is ``None`` on success
     or a short string identifying the failure type.
+
+    Pass a long-lived ``client`` to reuse its connection pool; it is left open.
+    Otherwise a single client is created for the call and shared by all retry
+    attempts.
     """
 
+    # Global default timeout; allow override via kwargs
+    timeout = kwargs.pop("timeout", float(os.getenv("HTTPX_TIMEOUT_S", "2.0")))
+    if client is not None:
+        return await _request_with_retries(client, method, url, timeout, kwargs)
+    try:
+        httpx_module = httpx
+        try:
+            llama_module = importlib.import_module("app.llama_integration")
+            httpx_module = getattr(llama_module, "httpx", httpx_module)
+        except Exception:  # pragma: no cover - fallback if import fails
+            pass
+        factory = httpx_module.AsyncClient
+        try:
+            cm = factory(timeout=timeout)
+        except TypeError:
+            cm = factory()
+        async with cm as owned:
+            return await _request_with_retries(owned, method, url, timeout, kwargs)
+    except Exception as e:  # pragma: no cover - unexpected
+        logger.warning(
+            "http.unexpected_error", extra={"meta": {"url": url, "error": str(e)}}
+        )
+        return None, "unknown_error"
+
+
+async def _request_with_retries(
+    client: Any, method: str, url: str, timeout: float, kwargs: dict[str, Any]
+) -> tuple[dict | None, str | None]:
     delay = 1.0
     for attempt in range(3):
         try:
-            httpx_module = httpx
-            try:
-                llama_module = importlib.import_module("app.llama_integration")
-                httpx_module = getattr(llama_module, "httpx", httpx_module)
-            except Exception:  # pragma: no cover - fallback if import fails
-                pass
-            # Global default timeout; allow override via kwargs
-            timeout = kwargs.pop("timeout", float(os.getenv("HTTPX_TIMEOUT_S", "2.0")))
-            factory = httpx_module.AsyncClient
-            try:
-                cm = factory(timeout=timeout)
-            except TypeError:
-                cm = factory()
-            # Wrap outbound calls with asyncio.wait_for to enforce global deadline
-            async with cm as client:
-                # Create a client span around outbound call
-                with start_span(
-                    "http.client", {"http.method": method, "http.url": url}
-                ):
-                    if hasattr(client, "request"):
-                        resp = await asyncio.wait_for(
-                            client.request(method, url, **kwargs), timeout=timeout
-                        )
-                    else:  # pragma: no cover - testing hooks
-                        func = getattr(client, method.lower())
-                        resp = await asyncio.wait_for(
-                            func(url, **kwargs), timeout=timeout
-                        )
+            # Create a client span around outbound call
+            with start_span("http.client", {"http.method": method, "http.url": url}):
+                # Wrap outbound calls with asyncio.wait_for to enforce global deadline
+                if hasattr(client, "request"):
+                    resp = await asyncio.wait_for(
+                        client.request(method, url, **kwargs), timeout=timeout
+                    )
+                else:  # pragma: no cover - testing hooks
+                    func = getattr(client, method.lower())
+                    resp = await asyncio.wait_for(func(url, **kwargs), timeout=timeout)
             resp.raise_for_status()
             try:
                 return resp.json(), None
@@ -119,3 +134,4 @@ async def json_request(
                 "http.unexpected_error", extra={"meta": {"url": url, "error": str(e)}}
             )
             return None, "unknown_error"
+    return None, "network_error"  # pragma: no cover - loop always returns
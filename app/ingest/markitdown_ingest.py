@@ -146,9 +146,9 @@ def _split_markdown(text: str, max_tokens: int = 800) -> tuple[list[str], list[s
 
 
 def _embed_many(texts: list[str]) -> list[list[float]]:
-    from app.embeddings import embed_sync
+    from app.embeddings import embed_many_sync
 
-    return [embed_sync(t) for t in texts]
+    return embed_many_sync(texts)
 
 
 def _qdrant_client():
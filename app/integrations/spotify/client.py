@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import os
 import time
 from dataclasses import dataclass
 from time import perf_counter
@@ -13,6 +14,7 @@ from ...auth_store_tokens import get_token, mark_invalid, upsert_token
 from ...http_utils import json_request
 from ...metrics import SPOTIFY_429, SPOTIFY_LATENCY, SPOTIFY_REFRESH, SPOTIFY_REQUESTS
 from ...models.third_party_tokens import ThirdPartyToken
+from ...utils.async_clients import aclose_client, retire_client
 from .budget import get_spotify_budget_manager
 from .oauth import SpotifyOAuth, SpotifyOAuthError
 
@@ -73,6 +75,66 @@ class SpotifyRateLimitedError(SpotifyAuthError):
         self.retry_after = retry_after
 
 
+# Long-lived pooled client for api.spotify.com, one per event loop
+_http: tuple[asyncio.AbstractEventLoop, httpx.AsyncClient] | None = None
+
+# In-flight /me/player reads per user, shared by concurrent callers
+_player_inflight: dict[str, asyncio.Future] = {}
+
+
+def _http2_enabled() -> bool:
+    if os.getenv("SPOTIFY_HTTP2", "1").lower() not in {"1", "true", "yes"}:
+        return False
+    try:  # HTTP/2 support is an optional extra of httpx
+        import h2  # noqa: F401
+    except Exception:
+        return False
+    return True
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared keep-alive client for the Spotify Web API.
+
+    Pool limits are configurable via ``SPOTIFY_MAX_CONNECTIONS``,
+    ``SPOTIFY_MAX_KEEPALIVE`` and ``SPOTIFY_KEEPALIVE_EXPIRY_S``; HTTP/2 is
+    used when ``h2`` is installed unless ``SPOTIFY_HTTP2=0``. Per-request
+    timeouts are passed on each call.
+    """
+    global _http
+    loop = asyncio.get_running_loop()
+    cached = _http
+    if cached is not None and cached[0] is loop and not cached[1].is_closed:
+        return cached[1]
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("SPOTIFY_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.getenv("SPOTIFY_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=float(os.getenv("SPOTIFY_KEEPALIVE_EXPIRY_S", "60")),
+    )
+    client = httpx.AsyncClient(timeout=10.0, limits=limits, http2=_http2_enabled())
+    _http = (loop, client)
+    if cached is not None and not cached[1].is_closed:
+        retire_client(cached[0], cached[1], "spotify")
+    return client
+
+
+async def close_http_client() -> None:
+    """Close the pooled Spotify client and reset the singleton."""
+    global _http
+    cached, _http = _http, None
+    if cached is not None:
+        if cached[0] is asyncio.get_running_loop():
+            await aclose_client(cached[1], "spotify")
+        else:
+            retire_client(cached[0], cached[1], "spotify")
+
+
+def _player_done(user_id: str, fut: asyncio.Future) -> None:
+    if _player_inflight.get(user_id) is fut:
+        del _player_inflight[user_id]
+    if not fut.cancelled():
+        fut.exception()  # retrieved here in case every waiter was cancelled
+
+
 class SpotifyClient:
     """Spotify Web API client with unified token storage and budget support."""
 
@@ -110,6 +172,7 @@ class SpotifyClient:
             "token_retrieval_start",
             self.user_id,
             {"message": "Starting token retrieval from store", "method": "_get_tokens"},
+            level="debug",
         )
 
         try:
@@ -136,6 +199,7 @@ class SpotifyClient:
                     "scope": getattr(token, "scope", None) if token else None,
                     "current_time": time.time(),
                 },
+                level="debug",
             )
 
             if not token:
@@ -177,6 +241,7 @@ class SpotifyClient:
                         0, spotify_tokens.expires_at - time.time()
                     ),
                 },
+                level="debug",
             )
 
             return spotify_tokens
@@ -633,12 +698,17 @@ class SpotifyClient:
                 },
             )
 
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                t0 = perf_counter()
-                r = await client.request(
-                    method, url, params=params, json=json_body, headers=headers
-                )
-                dt = perf_counter() - t0
+            client = get_http_client()
+            t0 = perf_counter()
+            r = await client.request(
+                method,
+                url,
+                params=params,
+                json=json_body,
+                headers=headers,
+                timeout=timeout,
+            )
+            dt = perf_counter() - t0
 
             logger.info(
                 "🎵 SPOTIFY CLIENT: HTTP response received",
@@ -932,7 +1002,18 @@ class SpotifyClient:
     # ------------------------------------------------------------------
 
     async def get_currently_playing(self) -> dict[str, Any] | None:
-        """Get the user's currently playing track (raw proxy semantics)."""
+        """Get the user's currently playing track (raw proxy semantics).
+
+        Concurrent calls for the same user share a single upstream request.
+        """
+        fut = _player_inflight.get(self.user_id)
+        if fut is None:
+            fut = asyncio.ensure_future(self._fetch_currently_playing())
+            _player_inflight[self.user_id] = fut
+            fut.add_done_callback(lambda f, uid=self.user_id: _player_done(uid, f))
+        return await asyncio.shield(fut)
+
+    async def _fetch_currently_playing(self) -> dict[str, Any] | None:
         log_spotify_operation(
             "get_currently_playing_start",
             self.user_id,
@@ -78,9 +78,9 @@ def _inventory_chroma() -> dict[str, dict[str, int]]:
 
 
 def _embed_many(texts: list[str]) -> list[list[float]]:
-    from app.embeddings import embed_sync
+    from app.embeddings import embed_many_sync
 
-    return [embed_sync(t) for t in texts]
+    return embed_many_sync(texts)
 
 
 def _export_qa(chroma_client) -> list[tuple[str, str, dict]]:
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+"""Move per-user Qdrant memory collections into the shared collection.
+
+Steps:
+- List ``mem_user_*`` collections.
+- Stream each one in ``--batch-size`` pages (payloads + stored vectors, no
+  re-embedding) into ``QDRANT_MEMORY_COLLECTION``, tagging every point with
+  its ``user_id``. Point ids are kept, so re-running is an idempotent resume.
+- With ``--drop-source``, delete a per-user collection once every one of its
+  point ids is found in the shared collection.
+
+Run with ``QDRANT_MEMORY_LAYOUT=shared`` afterwards to serve from the new layout.
+"""
+
+import argparse
+import os
+import sys
+
+_PREFIX = "mem_user_"
+
+
+def _open_store():
+    # The store owns the shared collection's HNSW and tenant index config
+    os.environ["QDRANT_MEMORY_LAYOUT"] = "shared"
+    from app.memory.vector_store.qdrant import QdrantVectorStore
+
+    return QdrantVectorStore()
+
+
+def _user_collections(client, target: str) -> list[str]:
+    # The shared collection may itself carry the prefix; never treat it as a
+    # source, or --drop-source would verify it against itself and delete it.
+    cols = getattr(client.get_collections(), "collections", []) or []
+    return sorted(
+        c.name for c in cols if c.name.startswith(_PREFIX) and c.name != target
+    )
+
+
+def _missing_in_target(client, source: str, target: str, batch_size: int) -> int:
+    """Return how many of ``source``'s point ids are absent from ``target``."""
+    missing = 0
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=source,
+            limit=batch_size,
+            offset=offset,
+            with_payload=False,
+            with_vectors=False,
+        )
+        ids = [pt.id for pt in points]
+        if ids:
+            found = client.retrieve(
+                collection_name=target,
+                ids=ids,
+                with_payload=False,
+                with_vectors=False,
+            )
+            missing += len(set(map(str, ids)) - {str(pt.id) for pt in found})
+        if offset is None:
+            break
+    return missing
+
+
+def _migrate_collection(
+    client, source: str, target: str, batch_size: int, dry_run: bool
+) -> dict[str, object]:
+    from qdrant_client.http.models import PointStruct
+
+    # Collection names are sanitized; prefer the user_id stored in payloads
+    fallback_uid = source[len(_PREFIX) :]
+    user_ids: set[str] = set()
+    moved = 0
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=source,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        batch = []
+        for pt in points:
+            payload = dict(pt.payload or {})
+            payload.setdefault("user_id", fallback_uid)
+            user_ids.add(str(payload["user_id"]))
+            batch.append(PointStruct(id=pt.id, vector=pt.vector, payload=payload))
+        if batch and not dry_run:
+            client.upsert(collection_name=target, points=batch)
+        moved += len(batch)
+        if offset is None:
+            break
+    return {"collection": source, "points": moved, "user_ids": sorted(user_ids)}
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser("migrate_qdrant_shared")
+    p.add_argument("--dry-run", action="store_true")
+    p.add_argument("--batch-size", type=int, default=256)
+    p.add_argument(
+        "--drop-source",
+        action="store_true",
+        help="Delete each per-user collection after its points are verified",
+    )
+    args = p.parse_args(argv)
+
+    store = _open_store()
+    client = store.client
+    target = store.memory_collection
+    dim = int(os.getenv("EMBED_DIM", "1536"))
+    if not args.dry_run:
+        store._ensure_collection(target, dim)
+
+    report = []
+    for source in _user_collections(client, target):
+        res = _migrate_collection(
+            client, source, target, max(1, args.batch_size), args.dry_run
+        )
+        if args.drop_source and not args.dry_run:
+            # Counting the user's points in the target would also count points
+            # written there directly, so look up the source's own point ids.
+            missing = _missing_in_target(
+                client, source, target, max(1, args.batch_size)
+            )
+            if missing == 0:
+                client.delete_collection(collection_name=source)
+                res["dropped"] = True
+            else:
+                res["dropped"] = False
+                res["missing"] = missing
+        report.append(res)
+        print(res)
+    print(
+        {
+            "migrated": {
+                "collections": len(report),
+                "points": sum(int(r["points"]) for r in report),  # type: ignore[arg-type]
+                "target": target,
+                "dry_run": args.dry_run,
+            }
+        }
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry
+    main(sys.argv[1:])
@@ -40,6 +40,7 @@ from .logging_config import req_id_var
 from .metrics import LLAMA_LATENCY, LLAMA_TOKENS, MODEL_LATENCY_SECONDS
 from .model_params import for_ollama
 from .otel_utils import start_span
+from .utils.async_clients import aclose_client, retire_client
 
 # ---- ENV --------------------------------------------------------------------
 # Default to local Ollama to avoid import-time crashes when env isn’t set.
@@ -120,6 +121,56 @@ llama_health_check_state = {
 _MAX_STREAMS = int(os.getenv("LLAMA_MAX_STREAMS", "2"))
 _sema = asyncio.Semaphore(_MAX_STREAMS)
 
+# Long-lived pooled client, one per event loop (httpx pools are loop-bound)
+_client: tuple[asyncio.AbstractEventLoop, httpx.AsyncClient] | None = None
+
+
+def _http2_enabled() -> bool:
+    if os.getenv("OLLAMA_HTTP2", "1").lower() not in {"1", "true", "yes"}:
+        return False
+    try:  # HTTP/2 support is an optional extra of httpx
+        import h2  # noqa: F401
+    except Exception:
+        return False
+    return True
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared keep-alive client for Ollama on the running loop.
+
+    Pool limits are configurable via ``OLLAMA_MAX_CONNECTIONS``,
+    ``OLLAMA_MAX_KEEPALIVE`` and ``OLLAMA_KEEPALIVE_EXPIRY_S``; HTTP/2 is used
+    when ``h2`` is installed unless ``OLLAMA_HTTP2=0``.
+    """
+    global _client
+    loop = asyncio.get_running_loop()
+    cached = _client
+    if cached is not None and cached[0] is loop and not cached[1].is_closed:
+        return cached[1]
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("OLLAMA_MAX_CONNECTIONS", "10")),
+        max_keepalive_connections=int(os.getenv("OLLAMA_MAX_KEEPALIVE", "5")),
+        keepalive_expiry=float(os.getenv("OLLAMA_KEEPALIVE_EXPIRY_S", "60")),
+    )
+    client = httpx.AsyncClient(
+        timeout=HEALTH_TIMEOUT, limits=limits, http2=_http2_enabled()
+    )
+    _client = (loop, client)
+    if cached is not None and not cached[1].is_closed:
+        retire_client(cached[0], cached[1], "ollama")
+    return client
+
+
+async def close_client() -> None:
+    """Close the pooled client and reset the singleton."""
+    global _client
+    cached, _client = _client, None
+    if cached is not None:
+        if cached[0] is asyncio.get_running_loop():
+            await aclose_client(cached[1], "ollama")
+        else:
+            retire_client(cached[0], cached[1], "ollama")
+
 
 # --- always-yield generator for all return paths ---
 async def _empty_gen():
@@ -184,6 +235,7 @@ async def _check_and_set_flag() -> None:
             f"{OLLAMA_URL}/api/generate",
             json=payload,
             timeout=HEALTH_TIMEOUT,
+            client=get_client(),
         )
         # ---- PATCH: check if models returned but not present ----
         # Simulate what test expects (returns models list, not including selected)
@@ -331,19 +383,10 @@ async def ask_llama(
         LLAMA_HEALTHY = False
         return _empty_gen()
 
-    # -- Health ping ------------------------------------------------------
-    try:
-        _, err = await json_request(
-            "POST",
-            f"{OLLAMA_URL}/api/generate",
-            json={"model": model, "prompt": "ping", "stream": False},
-            timeout=timeout,
-        )
-        if err:
-            LLAMA_HEALTHY = False
-            return _empty_gen()
-    except Exception:
-        LLAMA_HEALTHY = False
+    # -- Health gate ------------------------------------------------------
+    # Liveness comes from the scheduled ``_check_and_set_flag`` loop; no ping
+    # in the request path. Only a failing background check short-circuits.
+    if not LLAMA_HEALTHY and llama_health_check_state["consecutive_failures"] > 0:
         return _empty_gen()
 
     # -- Circuit breaker --------------------------------------------------
@@ -384,34 +427,34 @@ async def ask_llama(
                                 "llm.model": model or OLLAMA_MODEL,
                             },
                         ):
-                            async with httpx.AsyncClient(timeout=timeout) as client:
-                                async with client.stream(
-                                    "POST", url, json=payload
-                                ) as resp:
-                                    resp.raise_for_status()
-                                    async for line in resp.aiter_lines():
-                                        if not line.strip():
-                                            continue
-                                        try:
-                                            data = json.loads(line)
-                                        except Exception:
-                                            continue
-                                        token = data.get("response")
-                                        if token:
-                                            yield token
-                                        if (
-                                            data.get("prompt_eval_count") is not None
-                                            and prompt_tokens == 0
-                                        ):
-                                            prompt_tokens = data.get(
-                                                "prompt_eval_count", 0
-                                            )
-                                        if data.get("eval_count") is not None:
-                                            completion_tokens = data.get(
-                                                "eval_count", completion_tokens
-                                            )
-                                        if data.get("done"):
-                                            break
+                            client = get_client()
+                            async with client.stream(
+                                "POST", url, json=payload, timeout=timeout
+                            ) as resp:
+                                resp.raise_for_status()
+                                async for line in resp.aiter_lines():
+                                    if not line.strip():
+                                        continue
+                                    try:
+                                        data = json.loads(line)
+                                    except Exception:
+                                        continue
+                                    token = data.get("response")
+                                    if token:
+                                        yield token
+                                    if (
+                                        data.get("prompt_eval_count") is not None
+                                        and prompt_tokens == 0
+                                    ):
+                                        prompt_tokens = data.get(
+                                            "prompt_eval_count", 0
+                                        )
+                                    if data.get("eval_count") is not None:
+                                        completion_tokens = data.get(
+                                            "eval_count", completion_tokens
+                                        )
+                                    if data.get("done"):
+                                        break
                     # on success
                     LLAMA_HEALTHY = True
                     _reset_failures()
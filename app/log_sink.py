@@ -0,0 +1,374 @@
+"""Shared background writer for append-only logs (request history, audit).
+
+Request-path loggers hand records to a :class:`LogSink` and return at once.
+Each sink owns a bounded queue drained by a daemon writer thread that groups
+whatever is queued into one batch and passes it to the sink's ``write``
+callable -- typically one ``write`` and one ``flush`` against a long-lived
+:class:`NdjsonFile` handle per batch.
+
+* Backpressure: when ``LOG_SINK_MAX_QUEUE`` records (default 10000) are
+  waiting, ``overflow="drop"`` sinks drop the new record and
+  ``overflow="block"`` sinks first wait up to ``block_timeout_s`` for room
+  (never for ``submit_nowait``, which event-loop callers use).
+  Every record is counted in ``log_sink_records_total`` as written, dropped
+  or failed.
+* Durability: ``flush()`` waits until everything queued so far has been
+  handled, and ``submit_and_wait`` does so for sync callers that need the
+  record on disk before returning. All sinks are flushed and
+  closed on application shutdown (:func:`close_log_sinks`) and at interpreter
+  exit.
+* ``LOG_SINK_SYNC=1`` writes on the caller's thread instead (tests,
+  debugging).
+
+The queue is drained by a thread rather than an asyncio task so a sink
+behaves the same for sync callers, for any event loop and across loops that
+come and go (TestClient portals, ``asyncio.run``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from .metrics import LOG_SINK_BATCH_SIZE, LOG_SINK_QUEUE_DEPTH, LOG_SINK_RECORDS
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_MAX_QUEUE = 10_000
+_BATCH_MAX = 256
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def backup_path(path: Path) -> Path:
+    """Name for a rotated segment of ``path``: ``<stem>.backup.<ms><suffix>``."""
+    return path.with_name(f"{path.stem}.backup.{int(time.time() * 1000)}{path.suffix}")
+
+
+class RotationPolicy:
+    """Rotate when a segment exceeds ``max_bytes`` or is older than ``max_age_s``.
+
+    Zero disables a limit. Age is measured from when this process opened the
+    segment.
+    """
+
+    def __init__(self, max_bytes: int = 0, max_age_s: float = 0.0) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self.max_age_s = max(0.0, float(max_age_s))
+
+    @classmethod
+    def from_env(cls, prefix: str, *, max_bytes: int = 0) -> RotationPolicy:
+        """Read ``<prefix>_MAX_BYTES`` and ``<prefix>_ROTATE_SECONDS``."""
+        return cls(
+            _env_int(f"{prefix}_MAX_BYTES", max_bytes),
+            _env_float(f"{prefix}_ROTATE_SECONDS", 0.0),
+        )
+
+    def due(self, size: int, opened_at: float) -> bool:
+        if size <= 0:
+            return False
+        if self.max_bytes and size > self.max_bytes:
+            return True
+        return bool(self.max_age_s) and time.time() - opened_at >= self.max_age_s
+
+
+class NdjsonFile:
+    """Append handle kept open across batches, with rotation.
+
+    The file is reopened if it disappears or is replaced behind our back.
+    ``on_rotate`` is called with the backup path after each rotation.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        rotation: RotationPolicy | None = None,
+        *,
+        on_rotate: Callable[[Path], None] | None = None,
+    ) -> None:
+        self.path = Path(path)
+        self.rotation = rotation or RotationPolicy()
+        self._on_rotate = on_rotate
+        self._fh = None
+        self._ino = -1
+        self._opened_at = 0.0
+
+    @property
+    def inode(self) -> int:
+        """Inode of the segment the open handle writes to (``-1`` if none)."""
+        return self._ino
+
+    def _open(self) -> None:
+        self.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self.path, "ab")
+        self._ino = os.fstat(self._fh.fileno()).st_ino
+        self._opened_at = time.time()
+
+    def _prepare(self) -> None:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._open()
+            return
+        if self._fh is None or st.st_ino != self._ino:
+            self._open()
+        if self.rotation.due(st.st_size, self._opened_at):
+            self.rotate()
+
+    def rotate(self) -> Path | None:
+        """Move the current segment aside and start a new one."""
+        self.close()
+        if not self.path.exists():
+            return None
+        backup = backup_path(self.path)
+        self.path.rename(backup)
+        if self._on_rotate is not None:
+            self._on_rotate(backup)
+        logger.info("Rotated log file: %s -> %s", self.path, backup)
+        self._open()
+        return backup
+
+    def append(self, lines: list[bytes]) -> list[tuple[int, int]]:
+        """Write ``lines`` (without newlines); return their ``(offset, length)``."""
+        self._prepare()
+        fh = self._fh
+        assert fh is not None
+        pos = fh.seek(0, os.SEEK_END)
+        spans: list[tuple[int, int]] = []
+        for line in lines:
+            spans.append((pos, len(line)))
+            pos += len(line) + 1
+        try:
+            fh.write(b"".join(line + b"\n" for line in lines))
+            fh.flush()
+        except OSError:
+            # Drop the handle so the next batch starts from a fresh open
+            self.close()
+            raise
+        return spans
+
+    def close(self) -> None:
+        fh, self._fh = self._fh, None
+        if fh is not None:
+            try:
+                fh.close()
+            except OSError:
+                pass
+
+
+class LogSink:
+    """Bounded queue drained in batches by a background writer thread."""
+
+    def __init__(
+        self,
+        name: str,
+        write: Callable[[list[Any]], None],
+        *,
+        max_queue: int | None = None,
+        batch_max: int = _BATCH_MAX,
+        overflow: str = "drop",
+        block_timeout_s: float = 0.1,
+        sync: bool | None = None,
+    ) -> None:
+        if overflow not in ("drop", "block"):
+            raise ValueError(f"unknown overflow policy: {overflow}")
+        self.name = name
+        self._write = write
+        if max_queue is None:
+            max_queue = _env_int("LOG_SINK_MAX_QUEUE", _DEFAULT_MAX_QUEUE)
+        self.max_queue = max(1, max_queue)
+        self.batch_max = max(1, batch_max)
+        self.overflow = overflow
+        self.block_timeout_s = block_timeout_s
+        if sync is None:
+            sync = os.getenv("LOG_SINK_SYNC", "").strip().lower() in {
+                "1",
+                "true",
+                "yes",
+            }
+        self.sync = sync
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._pending: deque[Any] = deque()
+        self._submitted = 0
+        self._handled = 0
+        self._closing = False
+        self._thread: threading.Thread | None = None
+        _sinks.add(self)
+
+    # ---------------------------------------------------------------- submit
+    def submit(self, item: Any) -> bool:
+        """Queue ``item``; False if it was dropped.
+
+        ``overflow="block"`` sinks wait up to ``block_timeout_s`` for room when
+        the queue is full, so event-loop callers use :meth:`submit_nowait`.
+        """
+        return self._enqueue(item, wait=self.overflow == "block")
+
+    def submit_nowait(self, item: Any) -> bool:
+        """Queue ``item`` without ever waiting; a full queue drops it."""
+        return self._enqueue(item, wait=False)
+
+    def _enqueue(self, item: Any, *, wait: bool) -> bool:
+        if self.sync:
+            self._write_batch([item])
+            return True
+        with self._cond:
+            if len(self._pending) >= self.max_queue and wait:
+                self._cond.wait_for(
+                    lambda: len(self._pending) < self.max_queue, self.block_timeout_s
+                )
+            dropped = len(self._pending) >= self.max_queue
+            if not dropped:
+                self._pending.append(item)
+                self._submitted += 1
+                self._cond.notify_all()
+        if dropped:
+            LOG_SINK_RECORDS.labels(self.name, "dropped").inc()
+            logger.debug("log_sink.dropped", extra={"meta": {"sink": self.name}})
+            return False
+        self._ensure_thread()
+        return True
+
+    def submit_and_wait(self, item: Any, timeout: float | None = 5.0) -> bool:
+        """Queue ``item`` and block until it has been handled."""
+        if not self.submit(item):
+            return False
+        return self.flush(timeout)
+
+    @property
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    # ---------------------------------------------------------------- writer
+    def _ensure_thread(self) -> None:
+        t = self._thread
+        if t is not None and t.is_alive():
+            return
+        with self._cond:
+            t = self._thread
+            if t is not None and t.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name=f"log-sink-{self.name}", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closing:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                n = min(len(self._pending), self.batch_max)
+                batch = [self._pending.popleft() for _ in range(n)]
+                depth = len(self._pending)
+                # Wake producers blocked on a full queue
+                self._cond.notify_all()
+            LOG_SINK_QUEUE_DEPTH.labels(self.name).set(depth)
+            self._write_batch(batch)
+            with self._cond:
+                self._handled += len(batch)
+                self._cond.notify_all()
+
+    def _write_batch(self, batch: list[Any]) -> None:
+        try:
+            with self._write_lock:
+                self._write(batch)
+            result = "written"
+        except Exception as e:
+            result = "failed"
+            logger.error(
+                "log_sink.write_failed",
+                extra={"meta": {"sink": self.name, "records": len(batch), "error": str(e)}},
+            )
+        LOG_SINK_RECORDS.labels(self.name, result).inc(len(batch))
+        LOG_SINK_BATCH_SIZE.labels(self.name).observe(len(batch))
+
+    # ------------------------------------------------------------- lifecycle
+    def flush(self, timeout: float | None = 5.0) -> bool:
+        """Wait until everything queued so far has been handled."""
+        if self.sync:
+            return True
+        with self._cond:
+            target = self._submitted
+            if self._handled >= target:
+                return True
+        self._ensure_thread()
+        with self._cond:
+            return self._cond.wait_for(lambda: self._handled >= target, timeout)
+
+    def close(self, timeout: float | None = 5.0) -> bool:
+        """Drain the queue and stop the writer thread.
+
+        The sink stays usable; a later submit starts a new writer.
+        """
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+            t = self._thread
+        try:
+            if t is not None and t.is_alive():
+                t.join(timeout)
+                if t.is_alive():
+                    logger.warning(
+                        "log_sink.close_timeout",
+                        extra={"meta": {"sink": self.name, "pending": self.pending}},
+                    )
+                    return False
+            return True
+        finally:
+            with self._cond:
+                self._closing = False
+
+
+_sinks: weakref.WeakSet[LogSink] = weakref.WeakSet()
+
+
+def _close_all(timeout: float) -> None:
+    for sink in list(_sinks):
+        try:
+            sink.close(timeout)
+        except Exception:
+            logger.debug("log sink close failed: %s", sink.name, exc_info=True)
+
+
+async def close_log_sinks(timeout: float = 5.0) -> None:
+    """Flush every log sink and stop its writer (application shutdown)."""
+    await asyncio.to_thread(_close_all, timeout)
+
+
+atexit.register(_close_all, 2.0)
+
+
+__all__ = [
+    "LogSink",
+    "NdjsonFile",
+    "RotationPolicy",
+    "backup_path",
+    "close_log_sinks",
+]
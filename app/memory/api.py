@@ -172,6 +172,7 @@ def add_user_memory(user_id: str, memory: str) -> str:
     """
     redacted, mapping = redact_pii(memory)
     mem_id = get_store().add_user_memory(user_id, redacted)
+    _invalidate_retrieval_cache(user_id)
     try:
         store_redaction_map("user_memory", mem_id, mapping)
     except Exception:
@@ -179,6 +180,15 @@ def add_user_memory(user_id: str, memory: str) -> str:
     return mem_id
 
 
+def _invalidate_retrieval_cache(user_id: str) -> None:
+    try:
+        from app.retrieval.cache import invalidate_user
+
+        invalidate_user(user_id)
+    except Exception:
+        pass
+
+
 def _coerce_k(k: int | str | None) -> int:
     """Return a positive integer ``k`` with sane fall-backs.
 
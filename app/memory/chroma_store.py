@@ -120,7 +120,7 @@ class _LengthEmbedder:
 
 
 class _OpenAIEmbedder:
-    """Embedding function that uses app.embeddings.embed_sync.
+    """Embedding function that uses app.embeddings.embed_many_sync.
 
     This stays synchronous to match Chroma's embedding_function contract.
     """
@@ -128,9 +128,9 @@ class _OpenAIEmbedder:
     _type = "OpenAIEmbedder"
 
     def __call__(self, input: list[str]) -> list[list[float]]:  # type: ignore[override]
-        from app.embeddings import embed_sync
+        from app.embeddings import embed_many_sync
 
-        return [embed_sync(t) for t in input]
+        return embed_many_sync(input)
 
     def name(self) -> str:  # pragma: no cover - simple helper
         return "openai-embedder"
@@ -69,10 +69,57 @@ def jaro_winkler_similarity(s1: str, s2: str) -> float:
     return jaro + 0.1 * prefix * (1 - jaro)
 
 
+# Simhash LSH: 8 bands of 8 bits. Two hashes within Hamming distance 7 always
+# agree on at least one band, so band lookups find every near-duplicate that
+# MEMGPT_SIMHASH_HAMMING_MAX (< 8) would accept.
+_SIMHASH_BANDS = 8
+_BAND_BITS = 64 // _SIMHASH_BANDS
+
+
+def _simhash_bands(simhash: int) -> list[tuple[int, int]]:
+    mask = (1 << _BAND_BITS) - 1
+    return [
+        (i, (simhash >> (i * _BAND_BITS)) & mask) for i in range(_SIMHASH_BANDS)
+    ]
+
+
+class _ClaimIndex:
+    """Claims of one user (or of all users) with checksum and simhash-band lookups."""
+
+    def __init__(self) -> None:
+        self.claims: list[dict[str, Any]] = []
+        self.checksums: set[str] = set()
+        self.bands: dict[tuple[int, int], list[int]] = {}
+
+    def add(self, record: dict[str, Any]) -> None:
+        row = len(self.claims)
+        self.claims.append(record)
+        if record.get("checksum"):
+            self.checksums.add(str(record["checksum"]))
+        try:
+            simhash = int(record.get("simhash"))
+        except Exception:
+            return
+        for key in _simhash_bands(simhash):
+            self.bands.setdefault(key, []).append(row)
+
+    def neighbours(self, simhash: int, recent: int) -> list[dict[str, Any]]:
+        """Claims sharing a simhash band with ``simhash`` plus the ``recent`` latest."""
+        rows: set[int] = set()
+        for key in _simhash_bands(simhash):
+            rows.update(self.bands.get(key, ()))
+        rows.update(range(max(0, len(self.claims) - recent), len(self.claims)))
+        return [self.claims[r] for r in sorted(rows)]
+
+
 class MemGPT:
     """Simple in-process memory manager (governed variant).
 
     Stores prompt/answer pairs per session and supports governed claim writes.
+    Writes append one line to ``<storage>.log``; the JSON snapshots
+    (``memories.json`` / ``pinned_memories.json``) are rewritten only on
+    compaction, every ``MEMGPT_COMPACT_EVERY`` appends and during nightly
+    maintenance.
     """
 
     def __init__(
@@ -97,6 +144,13 @@ class MemGPT:
         self._pin_store: dict[str, list[dict[str, Any]]] = {}
         # Separate file so pins survive across restarts
         self._pin_path = self.storage_path.with_name("pinned_memories.json")
+        # Append-only write log replayed over the snapshots on load
+        self._log_path = self.storage_path.with_suffix(".log")
+        self._log_file: Any = None
+        self._log_ops = 0
+        # Claim indexes: per user_id, and across all users for user_id=None
+        self._user_claims: dict[str | None, _ClaimIndex] = {}
+        self._all_claims = _ClaimIndex()
         self.ttl_seconds = ttl_seconds
         self._load()
 
@@ -114,12 +168,73 @@ class MemGPT:
                 self._pin_store = json.loads(self._pin_path.read_text(encoding="utf-8"))
             except Exception:
                 self._pin_store = {}
+        if self._log_path.exists():
+            self._replay_log()
+        self._reindex()
+
+    def _replay_log(self) -> None:
+        with self._log_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    op = json.loads(line)
+                except Exception:
+                    continue  # torn final line after a crash
+                store = self._pin_store if op.get("pin") else self._data
+                sid = str(op.get("sid"))
+                if op.get("op") == "add":
+                    bucket = store.setdefault(sid, [])
+                    # Idempotent: a crash mid-compaction can leave ops that the
+                    # snapshot already contains
+                    if op.get("item") not in bucket:
+                        bucket.append(op["item"])
+                elif op.get("op") == "put":
+                    store[sid] = list(op.get("items") or [])
+                self._log_ops += 1
+
+    def _append(self, op: dict[str, Any]) -> None:
+        """Persist one write as a log line; compacts when the log grows large."""
+        if self._log_file is None:
+            self._log_file = self._log_path.open("a", encoding="utf-8")
+        self._log_file.write(json.dumps(op, ensure_ascii=False) + "\n")
+        self._log_file.flush()
+        self._log_ops += 1
+        if self._log_ops >= int(os.getenv("MEMGPT_COMPACT_EVERY", "1000")):
+            self._save()
 
     def _save(self) -> None:
-        with self.storage_path.open("w", encoding="utf-8") as f:
-            json.dump(self._data, f, ensure_ascii=False, indent=2)
-        with self._pin_path.open("w", encoding="utf-8") as f:
-            json.dump(self._pin_store, f, ensure_ascii=False, indent=2)
+        """Compact: write full snapshots atomically, then truncate the log."""
+        for path, payload in (
+            (self.storage_path, self._data),
+            (self._pin_path, self._pin_store),
+        ):
+            tmp = path.with_name(path.name + ".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, path)
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+        self._log_path.unlink(missing_ok=True)
+        self._log_ops = 0
+
+    def _reindex(self) -> None:
+        self._user_claims = {}
+        self._all_claims = _ClaimIndex()
+        for store in (self._data, self._pin_store):
+            for interactions in store.values():
+                for item in interactions:
+                    if item.get("kind") == "claim":
+                        self._index_claim(item)
+
+    def _index_claim(self, record: dict[str, Any]) -> None:
+        self._all_claims.add(record)
+        uid = record.get("user_id")
+        self._user_claims.setdefault(uid, _ClaimIndex()).add(record)
+
+    def _claim_index(self, user_id: str | None) -> _ClaimIndex | None:
+        if user_id is None:
+            return self._all_claims
+        return self._user_claims.get(user_id)
 
     # ------------------------------------------------------------------
     # Public API
@@ -158,7 +273,7 @@ class MemGPT:
         simhash = self._simhash(redacted_text)
         norm_entities = self._normalize_entities(entities)
         importance = self._importance_score(redacted_text, norm_entities, links)
-        novelty = self._novelty_score(redacted_text, user_id)
+        novelty = self._novelty_score(redacted_text, user_id, simhash=simhash)
 
         thr_novelty = float(os.getenv("MEMGPT_NOVELTY_THRESHOLD", "0.25"))
         thr_importance = float(os.getenv("MEMGPT_IMPORTANCE_THRESHOLD", "0.50"))
@@ -199,13 +314,22 @@ class MemGPT:
         }
 
         with self._lock:
+            # Re-check against claims committed by concurrent writers since the
+            # unlocked similarity pass (checksum and simhash only, no embeddings)
+            if self._is_duplicate(
+                checksum=checksum, simhash=simhash, text="", user_id=user_id
+            ):
+                return None
             bucket = (
                 self._pin_store.setdefault(session_id, [])
                 if pinned
                 else self._data.setdefault(session_id, [])
             )
             bucket.append(record)
-            self._save()
+            self._index_claim(record)
+            self._append(
+                {"op": "add", "pin": bool(pinned), "sid": session_id, "item": record}
+            )
         return checksum
 
     def store_interaction(
@@ -243,19 +367,19 @@ class MemGPT:
                     if jaro_winkler_similarity(answer, prev) >= 0.9:
                         return
 
-            bucket.append(
-                {
-                    "prompt": prompt,
-                    "answer": answer,
-                    "tags": tags or [],
-                    "timestamp": now,
-                    "hash": entry_hash,
-                    "audit": {"pinned": bool(is_pinned), "user_id": user_id},
-                }
+            item = {
+                "prompt": prompt,
+                "answer": answer,
+                "tags": tags or [],
+                "timestamp": now,
+                "hash": entry_hash,
+                "audit": {"pinned": bool(is_pinned), "user_id": user_id},
+            }
+            bucket.append(item)
+            self._append(
+                {"op": "add", "pin": is_pinned, "sid": session_id, "item": item}
             )
 
-            self._save()
-
     def summarize_session(self, session_id: str, user_id: str | None = None) -> str:
         """Return a condensed representation of a session's interactions."""
 
@@ -379,6 +503,7 @@ class MemGPT:
                 self._data[sid] = kept
 
             self._save()
+            self._reindex()
 
     # ----------------------- Governance helpers ------------------------
     def _normalize_entities(
@@ -463,19 +588,27 @@ class MemGPT:
         nb = (sum(y * y for y in vb) ** 0.5) or 1.0
         return float(num / (na * nb))
 
-    def _novelty_score(self, text: str, user_id: str | None) -> float:
-        corpus: list[str] = []
-        for store in (self._data, self._pin_store):
-            for interactions in store.values():
-                for item in interactions:
-                    if item.get("kind") == "claim" and (
-                        user_id is None or item.get("user_id") == user_id
-                    ):
-                        corpus.append(item.get("text", ""))
+    def _neighbour_claims(self, simhash: int, user_id: str | None) -> list[dict]:
+        """Candidate claims for similarity checks: simhash-band matches plus
+        the ``MEMGPT_NEIGHBOUR_RECENT`` most recent claims of the user."""
+        idx = self._claim_index(user_id)
+        if idx is None:
+            return []
+        recent = int(os.getenv("MEMGPT_NEIGHBOUR_RECENT", "20"))
+        return idx.neighbours(simhash, recent)
+
+    def _novelty_score(
+        self, text: str, user_id: str | None, *, simhash: int | None = None
+    ) -> float:
+        if simhash is None:
+            simhash = self._simhash(text)
+        corpus = [
+            item.get("text", "") for item in self._neighbour_claims(simhash, user_id)
+        ]
         if not corpus:
             return 1.0
         max_sim = 0.0
-        for t in corpus[-100:]:
+        for t in corpus:
             max_sim = max(max_sim, self._cosine_sim(text, t))
         return float(max(0.0, 1.0 - max_sim))
 
@@ -498,24 +631,27 @@ class MemGPT:
     ) -> bool:
         max_hamming = int(os.getenv("MEMGPT_SIMHASH_HAMMING_MAX", "3"))
         max_cosine = float(os.getenv("MEMGPT_COSINE_DUP_MAX", "0.90"))
-        for store in (self._data, self._pin_store):
-            for interactions in store.values():
-                for item in interactions:
-                    if item.get("kind") != "claim":
-                        continue
-                    if user_id is not None and item.get("user_id") != user_id:
-                        continue
-                    if item.get("checksum") == checksum:
-                        return True
-                    try:
-                        sh = int(item.get("simhash"))
-                        if self._hamming(simhash, sh) <= max_hamming:
-                            return True
-                    except Exception:
-                        pass
-                    t = item.get("text", "")
-                    if t and self._cosine_sim(text, t) >= max_cosine:
-                        return True
+        idx = self._claim_index(user_id)
+        if idx is None:
+            return False
+        if checksum in idx.checksums:
+            return True
+        candidates = (
+            idx.claims
+            if max_hamming >= _SIMHASH_BANDS  # bands no longer guarantee recall
+            else self._neighbour_claims(simhash, user_id)
+        )
+        for item in candidates:
+            try:
+                sh = int(item.get("simhash"))
+                if self._hamming(simhash, sh) <= max_hamming:
+                    return True
+            except Exception:
+                pass
+            t = item.get("text", "")
+            # Empty ``text`` skips the embedding comparison (locked re-check)
+            if t and text and self._cosine_sim(text, t) >= max_cosine:
+                return True
         return False
 
     def _decay_and_rollup_claims(
@@ -621,17 +757,21 @@ class MemGPT:
 
         removed = False
         with self._lock:
-            for store in (self._data, self._pin_store):
+            for pin, store in ((False, self._data), (True, self._pin_store)):
                 for sid, interactions in list(store.items()):
-                    kept: list[dict[str, Any]] = []
-                    for item in interactions:
-                        if str(item.get("hash")) == str(hash_value):
-                            removed = True
-                            continue
-                        kept.append(item)
-                    store[sid] = kept
-        if removed:
-            self._save()
+                    kept = [
+                        item
+                        for item in interactions
+                        if str(item.get("hash")) != str(hash_value)
+                    ]
+                    if len(kept) != len(interactions):
+                        removed = True
+                        store[sid] = kept
+                        self._append(
+                            {"op": "put", "pin": pin, "sid": sid, "items": kept}
+                        )
+            if removed:
+                self._reindex()
         return removed
 
 
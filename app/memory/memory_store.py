@@ -10,13 +10,14 @@ import time
 import uuid
 from dataclasses import dataclass
 
+import numpy as np
+
 from app import metrics
 from app.embeddings import embed_sync
 from app.telemetry import hash_user_id
 
 from .env_utils import (
     _clean_meta,
-    _cosine_similarity,
     _env_flag,
     _get_sim_threshold,
     _normalize,
@@ -61,6 +62,113 @@ class VectorStore:
     def close(self) -> None: ...
 
 
+def _is_composed_id(cache_id: str) -> bool:
+    """Return True for composed ``v1|...`` cache keys (exact-id lookups only)."""
+    return cache_id.startswith("v1|") and "|" in cache_id
+
+
+class _MatrixIndex:
+    """Contiguous, pre-normalized float32 embedding matrix keyed by id.
+
+    Rows keep insertion order. Deleted rows are tombstoned and compacted away
+    once they make up more than half of the matrix, so a query is a single
+    matrix-vector product over the used rows. Similarities are mapped to
+    ``[0, 1]`` exactly like :func:`env_utils._cosine_similarity`.
+    """
+
+    _MIN_CAPACITY = 16
+
+    def __init__(self) -> None:
+        self._ids: list[str | None] = []
+        self._row: dict[str, int] = {}
+        self._mat: np.ndarray | None = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._nonzero = np.zeros(0, dtype=bool)
+        self._n = 0
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._row)
+
+    def upsert(self, key: str, vec: list[float]) -> None:
+        v = np.asarray(vec, dtype=np.float32).ravel()
+        if self._mat is None:
+            self._alloc(self._MIN_CAPACITY, v.shape[0])
+        elif v.shape[0] != self._mat.shape[1]:
+            raise ValueError(
+                f"embedding dim {v.shape[0]} does not match index dim {self._mat.shape[1]}"
+            )
+        norm = float(np.linalg.norm(v))
+        row = self._row.get(key)
+        if row is None:
+            if self._n == self._mat.shape[0]:
+                self._resize(self._n * 2)
+            row = self._n
+            self._n += 1
+            self._ids.append(key)
+            self._row[key] = row
+        self._mat[row] = v / norm if norm else 0.0
+        self._alive[row] = True
+        self._nonzero[row] = bool(norm)
+
+    def delete(self, key: str) -> bool:
+        row = self._row.pop(key, None)
+        if row is None:
+            return False
+        self._alive[row] = False
+        self._ids[row] = None
+        self._dead += 1
+        if self._dead > self._MIN_CAPACITY and self._dead * 2 > self._n:
+            self._compact()
+        return True
+
+    def similarities(self, query: list[float]) -> tuple[list[str | None], np.ndarray]:
+        """Return ``(ids, sims)`` over used rows; dead rows score ``-inf``."""
+        if self._mat is None or not self._n:
+            return [], np.empty(0, dtype=np.float32)
+        q = np.asarray(query, dtype=np.float32).ravel()
+        if q.shape[0] != self._mat.shape[1]:
+            raise ValueError(
+                f"query dim {q.shape[0]} does not match index dim {self._mat.shape[1]}"
+            )
+        n = self._n
+        qn = float(np.linalg.norm(q))
+        if qn:
+            raw = self._mat[:n] @ (q / qn)
+            sims = np.clip((raw + 1.0) / 2.0, 0.0, 1.0)
+            sims[~self._nonzero[:n]] = 0.0
+        else:
+            sims = np.zeros(n, dtype=np.float32)
+        sims[~self._alive[:n]] = -np.inf
+        return self._ids[:n], sims
+
+    def _alloc(self, capacity: int, dim: int) -> None:
+        self._mat = np.zeros((capacity, dim), dtype=np.float32)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._nonzero = np.zeros(capacity, dtype=bool)
+
+    def _resize(self, capacity: int) -> None:
+        assert self._mat is not None
+        mat, alive, nonzero = self._mat, self._alive, self._nonzero
+        self._alloc(max(capacity, self._MIN_CAPACITY), mat.shape[1])
+        self._mat[: self._n] = mat[: self._n]
+        self._alive[: self._n] = alive[: self._n]
+        self._nonzero[: self._n] = nonzero[: self._n]
+
+    def _compact(self) -> None:
+        assert self._mat is not None
+        keep = np.nonzero(self._alive[: self._n])[0]
+        mat, nonzero = self._mat[keep], self._nonzero[keep]
+        self._ids = [self._ids[i] for i in keep]
+        self._row = {k: i for i, k in enumerate(self._ids) if k is not None}
+        self._n = len(keep)
+        self._dead = 0
+        self._alloc(max(self._MIN_CAPACITY, self._n * 2), mat.shape[1])
+        self._mat[: self._n] = mat
+        self._alive[: self._n] = True
+        self._nonzero[: self._n] = nonzero
+
+
 @dataclass
 class _CacheRecord:
     embedding: list[float]
@@ -73,6 +181,9 @@ class _CacheRecord:
 class _Collection:
     def __init__(self) -> None:
         self._store: dict[str, _CacheRecord] = {}
+        # Embeddings of natural-language entries for fuzzy lookups; composed
+        # ``v1|...`` ids are only ever fetched by exact id and are not indexed.
+        self._index = _MatrixIndex()
         # Optional TTL for entries (seconds); 0 disables TTL eviction on read
         self._ttl_seconds: float = float(os.getenv("QA_CACHE_TTL_SECONDS", "86400"))
 
@@ -96,6 +207,8 @@ class _Collection:
                 timestamp=meta.get("timestamp", time.time()),
                 feedback=meta.get("feedback"),
             )
+            if not _is_composed_id(i):
+                self._index.upsert(i, emb)
 
     def get_items(
         self, ids: list[str] | None = None, include: list[str] | None = None
@@ -122,8 +235,7 @@ class _Collection:
                 for i, rec in list(self._store.items())
                 if now - rec.timestamp > self._ttl_seconds
             ]
-            for i in expired:
-                self._store.pop(i, None)
+            self.delete(ids=expired)
 
         ids = ids or list(self._store)
         metas: list[dict | None] = []
@@ -156,6 +268,7 @@ class _Collection:
     def delete(self, *, ids: list[str] | None = None) -> None:
         for i in ids or []:
             self._store.pop(i, None)
+            self._index.delete(i)
 
     def update(self, *, ids: list[str], metadatas: list[dict]) -> None:
         for i, meta in zip(ids, metadatas, strict=False):
@@ -171,13 +284,16 @@ class MemoryVectorStore(VectorStore):
     def __init__(self) -> None:
         self._dist_cutoff = 1.0 - _get_sim_threshold()
         self._cache = _Collection()
-        self._user_memories: dict[str, list[tuple[str, str, list[float], float]]] = {}
+        # user_id -> {mem_id: (text, ts)} in insertion order, plus a matrix index
+        self._user_memories: dict[str, dict[str, tuple[str, float]]] = {}
+        self._user_index: dict[str, _MatrixIndex] = {}
 
     def add_user_memory(self, user_id: str, memory: str) -> str:
         mem_id = str(uuid.uuid4())
-        self._user_memories.setdefault(user_id, []).append(
-            (mem_id, memory, embed_sync(memory), time.time())
+        self._user_index.setdefault(user_id, _MatrixIndex()).upsert(
+            mem_id, embed_sync(memory)
         )
+        self._user_memories.setdefault(user_id, {})[mem_id] = (memory, time.time())
         hashed = hash_user_id(user_id)
         metrics.USER_MEMORY_ADDS.labels("memory", hashed).inc()
         logger.debug("Added user memory %s for %s", mem_id, hashed)
@@ -193,13 +309,21 @@ class MemoryVectorStore(VectorStore):
             k,
         )
         q_emb = embed_sync(prompt)
+        records = self._user_memories.get(user_id, {})
+        total = len(records)
         items: list[tuple[float, float, str]] = []
-        total = 0
-        for _mid, doc, emb, ts in self._user_memories.get(user_id, []):
-            total += 1
-            sim = _cosine_similarity(q_emb, emb)
-            if sim >= sim_threshold:
-                items.append((sim, ts, doc))
+        index = self._user_index.get(user_id)
+        if index is not None and k > 0:
+            ids, sims = index.similarities(q_emb)
+            cand = np.nonzero(sims >= sim_threshold)[0]
+            if len(cand) > k:
+                # Keep everything tied with the k-th best so the recency
+                # tie-break below sees the same candidates as a full sort.
+                kth = np.partition(sims[cand], -k)[-k]
+                cand = cand[sims[cand] >= kth]
+            for row in cand:
+                doc, ts = records[ids[row]]
+                items.append((float(sims[row]), ts, doc))
         # Sort by similarity desc, then recency desc
         items.sort(key=lambda t: (-t[0], -t[1]))
         top_items = items[:k]
@@ -229,20 +353,16 @@ class MemoryVectorStore(VectorStore):
 
     def list_user_memories(self, user_id: str) -> list[dict]:
         items: list[dict] = []
-        for mid, doc, _emb, ts in list(self._user_memories.get(user_id, [])):
+        for mid, (doc, ts) in list(self._user_memories.get(user_id, {}).items()):
             items.append({"id": mid, "text": doc, "ts": ts})
         return items
 
     def delete_user_memory(self, user_id: str, mem_id: str) -> bool:
-        arr = self._user_memories.get(user_id, [])
-        if not arr:
+        records = self._user_memories.get(user_id)
+        if not records or records.pop(mem_id, None) is None:
             return False
-        before = len(arr)
-        arr = [t for t in arr if t[0] != mem_id]
-        if len(arr) != before:
-            self._user_memories[user_id] = arr
-            return True
-        return False
+        self._user_index[user_id].delete(mem_id)
+        return True
 
     @property
     def qa_cache(self) -> _Collection:
@@ -292,19 +412,19 @@ class MemoryVectorStore(VectorStore):
         best = None
         best_id = None
         best_sim: float | None = None
-        total = 0
-        kept = 0
-        for cid, rec in self._cache._store.items():
-            if rec.feedback == "down":
-                continue
-            # Ignore composed-id entries when querying by plain prompt
-            if "|" in cid and cid.startswith("v1|"):
-                continue
-            total += 1
-            sim = _cosine_similarity(q_emb, rec.embedding)
-            if sim >= sim_threshold and (best_sim is None or sim > best_sim):
-                best, best_id, best_sim = rec, cid, sim
-                kept += 1
+        # Composed-id entries are not in the index, so they never match here.
+        ids, sims = self._cache._index.similarities(q_emb)
+        total = len(self._cache._index)
+        kept = int(np.count_nonzero(sims >= sim_threshold))
+        while kept and len(sims):
+            row = int(np.argmax(sims))
+            if sims[row] < sim_threshold:
+                break
+            rec = self._cache._store.get(ids[row] or "")
+            if rec is not None and rec.feedback != "down":
+                best, best_id, best_sim = rec, ids[row], float(sims[row])
+                break
+            sims[row] = -np.inf
         if not best:
             logger.debug("Cache miss for %s", hash_)
             return None
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import hashlib
 import logging
 import os
 import time
@@ -20,15 +21,19 @@ try:  # optional dependency at import time
         Distance,
         FieldCondition,
         Filter,
+        FilterSelector,
+        HasIdCondition,
         HnswConfigDiff,
         MatchValue,
         PointStruct,
+        Range,
         SearchParams,
         VectorParams,
     )
 except Exception:  # pragma: no cover - symbol shim to keep import light
     QdrantClient = None  # type: ignore
     Distance = VectorParams = PointStruct = Filter = FieldCondition = MatchValue = object  # type: ignore
+    Range = FilterSelector = HasIdCondition = object  # type: ignore
 
 # Under pytest, treat qdrant as unavailable by default to avoid external deps.
 # Tests that need Qdrant can explicitly patch the adapter.
@@ -72,28 +77,80 @@ def get_stats() -> dict[str, object]:
     }
 
 
+_QA_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "gesahni:qa_cache")
+_QA_META_KEYS = ("answer", "timestamp", "feedback")
+
+
+def _qa_point_id(cache_id: str) -> str:
+    """Return the Qdrant point id for ``cache_id``.
+
+    Qdrant only accepts UUID or integer point ids, so composed ``v1|...`` keys
+    and other free-form ids map to a stable UUIDv5; the original id is kept
+    in the indexed ``cache_id`` payload field.
+    """
+    try:
+        return str(uuid.UUID(str(cache_id)))
+    except ValueError:
+        return str(uuid.uuid5(_QA_NAMESPACE, str(cache_id)))
+
+
+def _is_composed_id(cache_id: str) -> bool:
+    return str(cache_id).startswith("v1|")
+
+
+def _doc_hash(doc: str) -> str:
+    return hashlib.sha256((doc or "").encode("utf-8")).hexdigest()
+
+
 class _QACollection(SupportsQACache):
-    def __init__(self, client: QdrantClient, name: str):  # type: ignore[name-defined]
+    """QA cache points with real prompt embeddings.
+
+    Composed ``v1|...`` entries are exact-id only: they get a constant
+    placeholder vector (no embedding call) and ``composed=True`` so semantic
+    searches filter them out.
+    """
+
+    def __init__(self, client: QdrantClient, name: str, dim: int):  # type: ignore[name-defined]
         self.client = client
         self.name = name
+        self.dim = dim
+
+    def _placeholder(self) -> list[float]:
+        return [1.0] + [0.0] * (self.dim - 1)
+
+    def _vectors(self, ids: list[str], documents: list[str]) -> list[list[float]]:
+        from app.embeddings import embed_many_sync
+
+        todo = [
+            j
+            for j, (i, d) in enumerate(zip(ids, documents, strict=False))
+            if not _is_composed_id(i) and isinstance(d, str) and d
+        ]
+        embedded = embed_many_sync([documents[j] for j in todo]) if todo else []
+        out = [self._placeholder() for _ in ids]
+        for j, vec in zip(todo, embedded, strict=False):
+            out[j] = list(vec)
+        return out
+
+    def _points(self, ids: list[str]) -> list[str]:
+        return [_qa_point_id(i) for i in ids]
 
     def get_items(
         self, ids: list[str] | None = None, include: list[str] | None = None
     ) -> dict[str, list]:
         include = include or ["metadatas", "documents"]
-        want_payload = ("metadatas" in include) or ("documents" in include)
         if ids:
             res = self.client.retrieve(
                 collection_name=self.name,
-                ids=ids,
-                with_payload=want_payload,
+                ids=self._points(ids),
+                with_payload=True,
                 with_vectors=False,
             )
         else:
             # for simplicity, limit to first 1000
             res = self.client.scroll(
                 collection_name=self.name,
-                with_payload=want_payload,
+                with_payload=True,
                 with_vectors=False,
                 limit=1000,
             )[0]
@@ -101,12 +158,10 @@ class _QACollection(SupportsQACache):
         metadatas: list[dict] = []
         documents: list[str] = []
         for pt in res:
-            out_ids.append(str(pt.id))
             payload = pt.payload or {}
-            metadatas.append(
-                {k: payload.get(k) for k in ("answer", "timestamp", "feedback")}
-            )
-            documents.append(payload.get("doc") if "documents" in include else None)
+            out_ids.append(str(payload.get("cache_id") or pt.id))
+            metadatas.append({k: payload.get(k) for k in _QA_META_KEYS})
+            documents.append(payload.get("doc"))
         out: dict[str, list] = {"ids": out_ids}
         if "metadatas" in include:
             out["metadatas"] = metadatas
@@ -117,17 +172,23 @@ class _QACollection(SupportsQACache):
     def upsert(
         self, *, ids: list[str], documents: list[str], metadatas: list[dict]
     ) -> None:
+        vectors = self._vectors(ids, documents)
         points = []
-        for i, doc, meta in zip(ids, documents, metadatas, strict=False):
+        for i, doc, meta, vec in zip(ids, documents, metadatas, vectors, strict=False):
             payload = dict(meta or {})
-            payload["doc"] = doc
-            points.append(PointStruct(id=i, vector=None, payload=payload))
+            payload.update(
+                cache_id=i,
+                doc=doc,
+                doc_hash=_doc_hash(doc),
+                composed=_is_composed_id(i),
+            )
+            points.append(PointStruct(id=_qa_point_id(i), vector=vec, payload=payload))
         self.client.upsert(collection_name=self.name, points=points)
 
     def delete(self, *, ids: list[str] | None = None) -> None:  # type: ignore[override]
         if not ids:
             return
-        self.client.delete(collection_name=self.name, points_selector=ids)
+        self.client.delete(collection_name=self.name, points_selector=self._points(ids))
 
     def update(self, *, ids: list[str], metadatas: list[dict]) -> None:  # type: ignore[override]
         # Apply per-id payload updates to avoid accidental metadata cross-application
@@ -136,13 +197,15 @@ class _QACollection(SupportsQACache):
         if len(metadatas) == 1 and len(ids) >= 1:
             # Single metadata for multiple ids: apply same payload to all ids
             self.client.set_payload(
-                collection_name=self.name, points=ids, payload=metadatas[0]
+                collection_name=self.name,
+                points=self._points(ids),
+                payload=metadatas[0],
             )
             return
         for i, meta in zip(ids, metadatas, strict=False):
             try:
                 self.client.set_payload(
-                    collection_name=self.name, points=[i], payload=meta
+                    collection_name=self.name, points=[_qa_point_id(i)], payload=meta
                 )
             except Exception:
                 # best-effort; continue
@@ -150,13 +213,20 @@ class _QACollection(SupportsQACache):
 
     def keys(self) -> list[str]:
         res = self.client.scroll(
-            collection_name=self.name, with_payload=False, limit=1000
+            collection_name=self.name, with_payload=["cache_id"], limit=1000
         )[0]
-        return [str(p.id) for p in res]
+        return [str((p.payload or {}).get("cache_id") or p.id) for p in res]
 
 
 class QdrantVectorStore:
-    """Thin adapter to Qdrant for user memories + lightweight QA cache."""
+    """Thin adapter to Qdrant for user memories + lightweight QA cache.
+
+    Memories live in one collection per user (``mem_user_<id>``) by default.
+    With ``QDRANT_MEMORY_LAYOUT=shared`` every user shares
+    ``QDRANT_MEMORY_COLLECTION`` (default ``mem_users``), partitioned by a
+    tenant-indexed ``user_id`` payload; ``app.jobs.migrate_qdrant_shared``
+    moves existing per-user collections over.
+    """
 
     def __init__(self) -> None:
         _require_qdrant()
@@ -179,26 +249,18 @@ class QdrantVectorStore:
         except Exception:
             self.cache_collection = "cache_qa"
 
-        # QA cache uses payload-only, but Qdrant requires vectors; use size=1 stub
-        try:
-            self.client.get_collection(self.cache_collection)
-        except Exception:
-            self.client.recreate_collection(
-                collection_name=self.cache_collection,
-                vectors_config=VectorParams(size=1, distance=Distance.COSINE),
-            )
-        # Health signal: record when we recreate to help detect drift
-        try:
-            import logging as _logging
-
-            _logging.getLogger(__name__).info(
-                "qdrant.bootstrap.cache_qa_collection",
-                extra={"meta": {"name": self.cache_collection}},
-            )
-        except Exception:
-            pass
+        self.shared_memory = (
+            os.getenv("QDRANT_MEMORY_LAYOUT", "per_user").strip().lower() == "shared"
+        )
+        self.memory_collection = os.getenv(
+            "QDRANT_MEMORY_COLLECTION", "mem_users"
+        ).replace(":", "_")
+        # Collections already created/configured by this process
+        self._ensured: set[str] = set()
 
-        self._qa = _QACollection(self.client, self.cache_collection)
+        dim = int(os.getenv("EMBED_DIM", "1536"))
+        self._ensure_qa_collection(self.cache_collection, dim)
+        self._qa = _QACollection(self.client, self.cache_collection, dim)
 
     # -------------------- Lightweight helpers --------------------
     def ping(self) -> bool:
@@ -309,7 +371,18 @@ class QdrantVectorStore:
         return ids
 
     # -------------------- Bootstrap helpers --------------------
+    def _hnsw_config(self, name: str) -> HnswConfigDiff:
+        m = int(os.getenv("QDRANT_HNSW_M", "32"))
+        ef_construct = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "128"))
+        if self.shared_memory and name == self.memory_collection:
+            # Every query filters by user_id: skip the global graph and build
+            # one per tenant instead
+            return HnswConfigDiff(m=0, payload_m=m, ef_construct=ef_construct)
+        return HnswConfigDiff(m=m, ef_construct=ef_construct)
+
     def _ensure_collection(self, name: str, dim: int) -> None:
+        if name in self._ensured:
+            return
         t0 = time.perf_counter()
         try:
             self.client.get_collection(name)
@@ -317,20 +390,13 @@ class QdrantVectorStore:
             self.client.recreate_collection(
                 collection_name=name,
                 vectors_config=VectorParams(size=dim, distance=Distance.COSINE),
-                hnsw_config=HnswConfigDiff(
-                    m=int(os.getenv("QDRANT_HNSW_M", "32")),
-                    ef_construct=int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "128")),
-                ),
+                hnsw_config=self._hnsw_config(name),
             )
         else:
             # Ensure HNSW params on existing collection
             try:
                 self.client.update_collection(
-                    collection_name=name,
-                    hnsw_config=HnswConfigDiff(
-                        m=int(os.getenv("QDRANT_HNSW_M", "32")),
-                        ef_construct=int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "128")),
-                    ),
+                    collection_name=name, hnsw_config=self._hnsw_config(name)
                 )
             except Exception:
                 pass
@@ -341,15 +407,22 @@ class QdrantVectorStore:
                 ).observe(time.perf_counter() - t0)
             except Exception:
                 pass
+        fields = ["user_id", "type", "topic", "created_at", "source_tier", "pinned"]
+        if self.shared_memory and name == self.memory_collection:
+            try:
+                from qdrant_client.http.models import KeywordIndexParams
+
+                # Tenant index: Qdrant co-locates each user's points on disk
+                self.client.create_payload_index(
+                    collection_name=name,
+                    field_name="user_id",
+                    field_schema=KeywordIndexParams(type="keyword", is_tenant=True),
+                )
+                fields.remove("user_id")
+            except Exception:
+                pass  # older server/client: plain keyword index below
         # Attempt to create useful payload indexes (best-effort)
-        for field in (
-            "user_id",
-            "type",
-            "topic",
-            "created_at",
-            "source_tier",
-            "pinned",
-        ):
+        for field in fields:
             try:
                 # Field schema names are client-version dependent; pass plain strings
                 self.client.create_payload_index(
@@ -368,8 +441,46 @@ class QdrantVectorStore:
                         )
                 except Exception:
                     pass
+        self._ensured.add(name)
+
+    def _ensure_qa_collection(self, name: str, dim: int) -> None:
+        """Create the QA cache collection with ``dim``-sized prompt vectors.
+
+        Caches created by older builds used a size-1 stub vector; they hold
+        nothing worth keeping and are recreated at the right size.
+        """
+        try:
+            info = self.client.get_collection(name)
+            size = getattr(info.config.params.vectors, "size", dim)
+        except Exception:
+            size = None
+        if size != dim:
+            self.client.recreate_collection(
+                collection_name=name,
+                vectors_config=VectorParams(size=dim, distance=Distance.COSINE),
+            )
+            # Health signal: record when we recreate to help detect drift
+            logger.info(
+                "qdrant.bootstrap.cache_qa_collection",
+                extra={"meta": {"name": name, "dim": dim, "previous_dim": size}},
+            )
+        for field, schema in (
+            ("cache_id", "keyword"),
+            ("doc_hash", "keyword"),
+            ("feedback", "keyword"),
+            ("composed", "bool"),
+            ("timestamp", "float"),
+        ):
+            try:
+                self.client.create_payload_index(
+                    collection_name=name, field_name=field, field_schema=schema
+                )
+            except Exception:
+                pass
 
     def _user_collection(self, user_id: str) -> str:
+        if self.shared_memory:
+            return self.memory_collection
         # Sanitize user_id for use as a Qdrant collection name. Qdrant collection
         # names must not include characters like ':' which can cause 4xx errors.
         # Replace any non-alphanumeric or underscore/dash characters with '_'.
@@ -382,6 +493,14 @@ class QdrantVectorStore:
         except Exception:
             return f"mem_user_{user_id}"
 
+    def _user_filter(self, user_id: str, *conditions) -> Filter:
+        return Filter(
+            must=[
+                FieldCondition(key="user_id", match=MatchValue(value=user_id)),
+                *conditions,
+            ]
+        )
+
     # -------------------- User memory API --------------------
     def add_user_memory(self, user_id: str, memory: str) -> str:
         from app.embeddings import embed_sync
@@ -444,11 +563,6 @@ class QdrantVectorStore:
                 )
             except Exception:
                 op_id = None
-            try:
-                info = self.client.get_collection(col)
-                after = getattr(info, "points_count", None)
-            except Exception:
-                after = None
             try:
                 logger.info(
                     "qdrant.upsert",
@@ -458,7 +572,6 @@ class QdrantVectorStore:
                             "user_id": user_id,
                             "op_id": op_id,
                             "points_upserted": 1,
-                            "after": after,
                         }
                     },
                 )
@@ -491,12 +604,10 @@ class QdrantVectorStore:
             dim = int(os.getenv("EMBED_DIM", "1536"))
             self._ensure_collection(col, dim)
             try:
-                flt = Filter(
-                    must=[
-                        FieldCondition(key="user_id", match=MatchValue(value=user_id))
-                    ]
-                )
+                flt = self._user_filter(user_id)
             except Exception:
+                if self.shared_memory:
+                    raise
                 flt = None  # not strictly needed with per-user collections
             t1 = time.perf_counter()
             res = self.client.search(
@@ -563,8 +674,12 @@ class QdrantVectorStore:
         t0 = time.perf_counter()
         try:
             t1 = time.perf_counter()
+            flt = self._user_filter(user_id) if self.shared_memory else None
             res, _ = self.client.scroll(
-                collection_name=col, with_payload=True, limit=1000
+                collection_name=col,
+                scroll_filter=flt,
+                with_payload=True,
+                limit=1000,
             )
             try:
                 DEPENDENCY_LATENCY_SECONDS.labels("qdrant", "scroll").observe(
@@ -599,7 +714,13 @@ class QdrantVectorStore:
             dim = int(os.getenv("EMBED_DIM", "1536"))
             self._ensure_collection(col, dim)
             t1 = time.perf_counter()
-            self.client.delete(collection_name=col, points_selector=[mem_id])
+            selector = [mem_id]
+            if self.shared_memory:
+                # Only delete the point if it belongs to this user
+                selector = FilterSelector(
+                    filter=self._user_filter(user_id, HasIdCondition(has_id=[mem_id]))
+                )
+            self.client.delete(collection_name=col, points_selector=selector)
             try:
                 DEPENDENCY_LATENCY_SECONDS.labels("qdrant", "delete").observe(
                     time.perf_counter() - t1
@@ -618,10 +739,20 @@ class QdrantVectorStore:
             _rec_latency_ms(t0)
 
     def drop_user_collection(self, user_id: str) -> bool:
-        """Delete entire per-user collection. Returns True on success."""
+        """Delete all of a user's memories. Returns True on success.
+
+        Drops the per-user collection, or the user's points in shared mode.
+        """
         col = self._user_collection(user_id)
         try:
-            self.client.delete_collection(collection_name=col)
+            if self.shared_memory:
+                self.client.delete(
+                    collection_name=col,
+                    points_selector=FilterSelector(filter=self._user_filter(user_id)),
+                )
+            else:
+                self._ensured.discard(col)
+                self.client.delete_collection(collection_name=col)
             try:
                 logger.info(
                     "qdrant.drop_collection",
@@ -654,6 +785,12 @@ class QdrantVectorStore:
                     len(vec),
                 )
                 return False
+            if self.shared_memory:
+                owned = self.client.retrieve(
+                    collection_name=col, ids=[mem_id], with_payload=["user_id"]
+                )
+                if not owned or (owned[0].payload or {}).get("user_id") != user_id:
+                    return False
             payload = {"user_id": user_id, "text": new_text, "updated_at": time.time()}
             self.client.upsert(
                 collection_name=col,
@@ -694,49 +831,57 @@ class QdrantVectorStore:
     def lookup_cached_answer(self, prompt: str, ttl_seconds: int = 86400) -> str | None:
         if os.getenv("DISABLE_QA_CACHE", "").lower() in {"1", "true", "yes", "on"}:
             return None
-        # Lightweight exact-id path: treat prompts like hashes via env usage in app.memory.api
-        res = self._qa.get_items(
-            ids=None, include=["metadatas", "documents"]
-        )  # scan small cache (<=1k)
-        ids = res.get("ids", [])
-        docs = res.get("documents", [])
-        metas = res.get("metadatas", [])
-        best: tuple[float, str | None] = (1e9, None)
-        try:
-            import numpy as _np
-
-            from app.embeddings import embed_sync
+        from app.embeddings import embed_sync
 
-            q = embed_sync(prompt)
-            for _id, d, m in zip(ids, docs, metas, strict=False):
-                if not isinstance(d, str):
-                    continue
-                v = embed_sync(d)
-                # simple cosine distance
-                num = float(_np.dot(q, v))
-                den = float((_np.linalg.norm(q) * _np.linalg.norm(v)) or 1.0)
-                dist = 1.0 - (num / den)
-                ts = float((m or {}).get("timestamp", 0.0) or 0.0)
-                if ttl_seconds and ts and (time.time() - ts > ttl_seconds):
-                    continue
-                if dist < best[0]:
-                    best = (dist, (m or {}).get("answer"))
+        from ...env_utils import _get_sim_threshold
+
+        # One embed plus one filtered ANN query; composed ids, expired and
+        # down-voted entries are excluded by the payload filter.
+        must = [FieldCondition(key="composed", match=MatchValue(value=False))]
+        if ttl_seconds:
+            cutoff = time.time() - ttl_seconds
+            must.append(FieldCondition(key="timestamp", range=Range(gte=cutoff)))
+        flt = Filter(
+            must=must,
+            must_not=[FieldCondition(key="feedback", match=MatchValue(value="down"))],
+        )
+        t0 = time.perf_counter()
+        try:
+            res = self.client.search(
+                collection_name=self.cache_collection,
+                query_vector=embed_sync(prompt),
+                query_filter=flt,
+                limit=1,
+                score_threshold=_get_sim_threshold(),
+                with_payload=["answer"],
+            )
         except Exception:
             return None
-        return best[1]
+        finally:
+            _rec_latency_ms(t0)
+        if not res:
+            return None
+        return (res[0].payload or {}).get("answer")
 
     def record_feedback(self, prompt: str, feedback: str) -> None:
-        # Best-effort: look up by latest matching doc equality
-        res = self._qa.get_items(ids=None, include=["metadatas", "documents"])  # type: ignore[arg-type]
-        ids = res.get("ids", [])
-        docs = res.get("documents", [])
-        for _id, d in zip(ids, docs, strict=False):
-            if d == prompt:
-                try:
-                    self._qa.update(ids=[_id], metadatas=[{"feedback": feedback}])
-                except Exception:
-                    pass
-                break
+        # Exact prompt match through the indexed doc hash
+        match = MatchValue(value=_doc_hash(prompt))
+        flt = Filter(must=[FieldCondition(key="doc_hash", match=match)])
+        try:
+            res = self.client.scroll(
+                collection_name=self.cache_collection,
+                scroll_filter=flt,
+                with_payload=False,
+                limit=1,
+            )[0]
+            if res:
+                self.client.set_payload(
+                    collection_name=self.cache_collection,
+                    points=[res[0].id],
+                    payload={"feedback": feedback},
+                )
+        except Exception:
+            pass
 
     def close(self) -> None:  # pragma: no cover - no-op for HTTP client
         return None
@@ -500,6 +500,12 @@ RATE_LIMITED = Counter(
     labelnames=("route",),
 )
 
+RATE_LIMIT_BACKEND_ERRORS = Counter(
+    "rate_limit_backend_errors_total",
+    "Rate limit backend failures answered from local buckets instead",
+    labelnames=("backend",),
+)
+
 # Legacy compatibility - keep existing metrics for backward compatibility
 REQUEST_COUNT = Counter(
     "app_request_total", "Total number of requests", ["endpoint", "method", "engine"]
@@ -1124,6 +1130,87 @@ EMBEDDING_LATENCY_SECONDS = Histogram(
     ["backend"],
 )
 
+# Number of texts sent to the embedding backend per request
+EMBEDDING_BATCH_SIZE = Histogram(
+    "embedding_batch_size",
+    "Texts per embedding backend request",
+    ["backend"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048),
+)
+
+# Persistent embedding cache (app.embedding_cache)
+EMBEDDING_CACHE_REQUESTS = Counter(
+    "embedding_cache_requests_total",
+    "Persistent embedding cache lookups",
+    ["backend", "result"],  # result: hit | miss
+)
+EMBEDDING_CACHE_EVICTIONS = Counter(
+    "embedding_cache_evictions_total",
+    "Entries evicted from the persistent embedding cache",
+)
+if Gauge is not None:
+    EMBEDDING_CACHE_BYTES = Gauge(
+        "embedding_cache_bytes",
+        "Approximate size of stored vectors in the persistent embedding cache",
+    )
+else:  # pragma: no cover - Gauge unavailable
+    EMBEDDING_CACHE_BYTES = _MetricStub("embedding_cache_bytes")
+
+# In-process retrieval result cache (app.retrieval.cache)
+RETRIEVAL_CACHE_REQUESTS = Counter(
+    "retrieval_cache_requests_total",
+    "Retrieval pipeline cache lookups",
+    ["result"],  # result: hit | miss | coalesced
+)
+RETRIEVAL_CACHE_EVICTIONS = Counter(
+    "retrieval_cache_evictions_total",
+    "Entries evicted from the retrieval cache by the LRU size bounds",
+)
+if Gauge is not None:
+    RETRIEVAL_CACHE_BYTES = Gauge(
+        "retrieval_cache_bytes",
+        "Approximate size of cached retrieval results",
+    )
+else:  # pragma: no cover - Gauge unavailable
+    RETRIEVAL_CACHE_BYTES = _MetricStub("retrieval_cache_bytes")
+
+# Background log writers (app.log_sink): request history, audit trail
+LOG_SINK_RECORDS = Counter(
+    "log_sink_records_total",
+    "Records handed to background log sinks",
+    ["sink", "result"],  # result: written | dropped | failed
+)
+LOG_SINK_BATCH_SIZE = Histogram(
+    "log_sink_batch_size",
+    "Records written per log sink batch",
+    ["sink"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+if Gauge is not None:
+    LOG_SINK_QUEUE_DEPTH = Gauge(
+        "log_sink_queue_depth",
+        "Records waiting in a log sink queue",
+        ["sink"],
+    )
+else:  # pragma: no cover - Gauge unavailable
+    LOG_SINK_QUEUE_DEPTH = _MetricStub("log_sink_queue_depth")
+
+# Session store (app.session_store)
+SESSION_NEAR_CACHE_REQUESTS = Counter(
+    "session_near_cache_requests_total",
+    "Session identity lookups against the local near cache",
+    ["result"],  # result: hit | miss
+)
+AUTH_SESSION_CACHE = Counter(
+    "auth_session_cache_requests_total",
+    "Auth identity/session-state cache lookups",
+    ["cache", "result"],  # cache: request | session_state; result: hit | miss
+)
+SESSION_STORE_SWEPT = Counter(
+    "session_store_swept_total",
+    "Expired in-memory sessions removed by the background sweeper",
+)
+
 # Vector store operation latency (backend-specific ops aggregated)
 VECTOR_OP_LATENCY_SECONDS = Histogram(
     "vector_op_latency_seconds",
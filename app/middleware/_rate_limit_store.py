@@ -0,0 +1,158 @@
+"""Rate limit backends for :mod:`app.middleware.rate_limit`.
+
+Both backends implement a token bucket per key: a bucket holds up to
+``limit`` tokens and refills at ``limit / window_s`` tokens per second, so the
+long-run rate matches "``limit`` requests per window" while a full window's
+worth of burst is still allowed.
+
+* :class:`InMemoryRateLimitBackend` keeps buckets in an ``OrderedDict``
+  ordered by last use. A bucket idle for a whole window has refilled and is
+  indistinguishable from a missing one, so stale buckets are evicted from the
+  front as requests arrive; ``max_keys`` caps memory regardless of traffic.
+* :class:`RedisRateLimitBackend` runs the same bucket as an atomic Lua script
+  so limits hold across workers. Redis errors fall back to the in-memory
+  backend for that request.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    from app.metrics import RATE_LIMIT_BACKEND_ERRORS
+except Exception:  # pragma: no cover - optional
+    RATE_LIMIT_BACKEND_ERRORS = None  # type: ignore
+
+_DEFAULT_MAX_KEYS = 100_000
+
+
+class RateLimitDecision(NamedTuple):
+    allowed: bool
+    remaining: int
+
+
+class RateLimitBackend(ABC):
+    """Abstract token-bucket store."""
+
+    @abstractmethod
+    async def hit(self, key: str, limit: int, window_s: float) -> RateLimitDecision:
+        """Take one token from ``key``'s bucket if available."""
+
+    def clear(self) -> None:
+        """Drop local state (tests)."""
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Process-local token buckets with idle eviction and a key cap."""
+
+    def __init__(self, max_keys: int | None = None):
+        if max_keys is None:
+            max_keys = int(os.getenv("RATE_LIMIT_MAX_KEYS", str(_DEFAULT_MAX_KEYS)))
+        self.max_keys = max(1, max_keys)
+        # key -> [tokens, last_refill_monotonic], least recently used first
+        self.buckets: OrderedDict[str, list[float]] = OrderedDict()
+
+    def take(self, key: str, limit: int, window_s: float) -> RateLimitDecision:
+        now = time.monotonic()
+        buckets = self.buckets
+        # Evict buckets that have been idle long enough to be full again
+        while buckets:
+            oldest = next(iter(buckets.values()))
+            if now - oldest[1] < window_s:
+                break
+            buckets.popitem(last=False)
+
+        bucket = buckets.get(key)
+        if bucket is None:
+            tokens = float(limit)
+        else:
+            tokens = min(float(limit), bucket[0] + (now - bucket[1]) * limit / window_s)
+            buckets.move_to_end(key)
+        allowed = tokens >= 1.0
+        if allowed:
+            tokens -= 1.0
+        buckets[key] = [tokens, now]
+        if len(buckets) > self.max_keys:
+            buckets.popitem(last=False)
+        return RateLimitDecision(allowed, int(tokens))
+
+    async def hit(self, key: str, limit: int, window_s: float) -> RateLimitDecision:
+        return self.take(key, limit, window_s)
+
+    def clear(self) -> None:
+        self.buckets.clear()
+
+
+# KEYS[1] bucket hash; ARGV[1] capacity; ARGV[2] window in ms.
+# Uses the Redis clock so all workers refill against the same time source.
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+  tokens = capacity
+else
+  tokens = math.min(capacity, tokens + math.max(0, now - ts) * capacity / window_ms)
+end
+local allowed = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], window_ms)
+return {allowed, math.floor(tokens)}
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Token buckets shared across workers via a Redis Lua script."""
+
+    def __init__(
+        self,
+        client: Any,
+        prefix: str = "rl",
+        fallback: InMemoryRateLimitBackend | None = None,
+    ):
+        self._client = client
+        self._prefix = prefix
+        self._script = client.register_script(_TOKEN_BUCKET_LUA)
+        self.fallback = fallback or InMemoryRateLimitBackend()
+
+    async def hit(self, key: str, limit: int, window_s: float) -> RateLimitDecision:
+        try:
+            res = await self._script(
+                keys=[f"{self._prefix}:mw:{key}"],
+                args=[int(limit), max(1, int(window_s * 1000))],
+            )
+            return RateLimitDecision(bool(int(res[0])), int(res[1]))
+        except Exception as e:
+            if RATE_LIMIT_BACKEND_ERRORS is not None:
+                RATE_LIMIT_BACKEND_ERRORS.labels(backend="redis").inc()
+            logger.warning(
+                "rate_limit.backend_error",
+                extra={"meta": {"backend": "redis", "error": str(e)}},
+            )
+            return self.fallback.take(key, limit, window_s)
+
+    def clear(self) -> None:
+        self.fallback.clear()
+
+
+__all__ = [
+    "InMemoryRateLimitBackend",
+    "RateLimitBackend",
+    "RateLimitDecision",
+    "RedisRateLimitBackend",
+]
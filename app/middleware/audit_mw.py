@@ -1,15 +1,20 @@
 # app/middleware/audit_mw.py
 import importlib
 
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import Response
 
+from app.http_middleware import INFRA_ROUTE_CLASSES, HTTPMiddleware
 from app.logging_config import req_id_var
 
 
-class AuditMiddleware(BaseHTTPMiddleware):
-    """Append-only audit middleware for HTTP requests."""
+class AuditMiddleware(HTTPMiddleware):
+    """Append-only audit middleware for HTTP requests.
+
+    Health probes, metrics scrapes and static assets are not audited.
+    """
+
+    skip_route_classes = INFRA_ROUTE_CLASSES
 
     async def dispatch(self, request: Request, call_next):
         resp: Response | None = None
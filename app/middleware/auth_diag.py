@@ -1,9 +1,10 @@
 import uuid
 
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import Response
 
+from ..http_middleware import HTTPMiddleware
+
 REDACT = "■" * 8
 
 
@@ -54,7 +55,7 @@ def _summarize_set_cookie(headers):
     return items
 
 
-class AuthDiagMiddleware(BaseHTTPMiddleware):
+class AuthDiagMiddleware(HTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         rid = request.headers.get("x-req-id") or str(uuid.uuid4())
         # only record cookie *names*, never values
@@ -68,28 +69,32 @@ class AuthDiagMiddleware(BaseHTTPMiddleware):
         referer = request.headers.get("referer", "none")
         user_agent = request.headers.get("user-agent", "none")[:50] + "..." if len(request.headers.get("user-agent", "")) > 50 else request.headers.get("user-agent", "none")
         
-        resp: Response = await call_next(request)
-
-        set_cookie_summaries = _summarize_set_cookie(getattr(resp, "raw_headers", []))
+        set_cookie_summaries: list[str] = []
 
         # Echo enhanced diag for easy inspection
-        try:
-            resp.headers["X-Req-Id"] = rid
-            resp.headers["X-AuthDiag-Req"] = (
-                f"cookies={cookie_names}; authz={authz_present}; auth_cookies={auth_cookies}; csrf={csrf_present}"
+        def _echo(resp: Response) -> None:
+            set_cookie_summaries.extend(
+                _summarize_set_cookie(getattr(resp, "raw_headers", []))
             )
-            if set_cookie_summaries:
-                resp.headers["X-AuthDiag-SetCookie"] = " | ".join(
-                    set_cookie_summaries[:3]
+            try:
+                resp.headers["X-Req-Id"] = rid
+                resp.headers["X-AuthDiag-Req"] = (
+                    f"cookies={cookie_names}; authz={authz_present}; auth_cookies={auth_cookies}; csrf={csrf_present}"
                 )
+                if set_cookie_summaries:
+                    resp.headers["X-AuthDiag-SetCookie"] = " | ".join(
+                        set_cookie_summaries[:3]
+                    )
             
-            # Add additional diagnostic headers
-            resp.headers["X-AuthDiag-Origin"] = origin
-            resp.headers["X-AuthDiag-UserAgent"] = user_agent
-            resp.headers["X-AuthDiag-CSRF"] = "present" if csrf_present else "absent"
-            resp.headers["X-AuthDiag-AuthCookies"] = ",".join(auth_cookies) if auth_cookies else "none"
-        except Exception:
-            pass
+                # Add additional diagnostic headers
+                resp.headers["X-AuthDiag-Origin"] = origin
+                resp.headers["X-AuthDiag-UserAgent"] = user_agent
+                resp.headers["X-AuthDiag-CSRF"] = "present" if csrf_present else "absent"
+                resp.headers["X-AuthDiag-AuthCookies"] = ",".join(auth_cookies) if auth_cookies else "none"
+            except Exception:
+                pass
+
+        resp = await call_next(request, _echo)
 
         # Enhanced structured log line (redacted)
         try:
@@ -7,9 +7,12 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.types import ASGIApp
 
+from ..http_middleware import INFRA_ROUTE_CLASSES, CallNext, HTTPMiddleware
+
 # Import your existing function middlewares so we reuse their logic
+from .middleware_core import apply_silent_refresh as _apply_silent_refresh
 from .middleware_core import reload_env_middleware as _reload_env_fn
-from .middleware_core import silent_refresh_middleware as _silent_refresh_fn
+from .middleware_core import silent_refresh_disabled as _silent_refresh_disabled
 
 
 def _generate_error_code(status_code: int, error_type: str = None) -> str:
@@ -265,24 +268,27 @@ class EnhancedErrorHandlingMiddleware(BaseHTTPMiddleware):
 
 
 # ===== Silent Refresh as a class wrapper (reuses your function) =====
-class SilentRefreshMiddleware(BaseHTTPMiddleware):
+class SilentRefreshMiddleware(HTTPMiddleware):
+    skip_route_classes = INFRA_ROUTE_CLASSES
+
     def __init__(self, app: ASGIApp) -> None:
         super().__init__(app)
 
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Awaitable]
-    ):
-        return await _silent_refresh_fn(request, call_next)
+    async def dispatch(self, request: Request, call_next: CallNext):
+        if _silent_refresh_disabled():
+            return await call_next(request)
+        # Cookies must be set before the response starts
+        return await call_next(
+            request, lambda response: _apply_silent_refresh(request, response)
+        )
 
 
 # ===== Reload Env as a class wrapper (reuses your function; dev-only) =====
-class ReloadEnvMiddleware(BaseHTTPMiddleware):
+class ReloadEnvMiddleware(HTTPMiddleware):
     def __init__(self, app: ASGIApp) -> None:
         super().__init__(app)
 
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Awaitable]
-    ):
+    async def dispatch(self, request: Request, call_next: CallNext):
         return await _reload_env_fn(request, call_next)
 
 
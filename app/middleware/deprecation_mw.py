@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 from starlette.requests import Request
 from starlette.responses import Response
 
+from ..http_middleware import CallNext, HTTPMiddleware
 
-class DeprecationHeaderMiddleware(BaseHTTPMiddleware):
+
+class DeprecationHeaderMiddleware(HTTPMiddleware):
     """Attach a Deprecation header for selected legacy paths.
 
     This ensures that when deprecated alias paths overlap with canonical handlers
@@ -19,10 +20,11 @@ class DeprecationHeaderMiddleware(BaseHTTPMiddleware):
         None  # (compiled regex, methods)
     )
 
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
-        response = await call_next(request)
+    async def dispatch(self, request: Request, call_next: CallNext) -> Response | None:
+        return await call_next(request, lambda response: self._mark(request, response))
+
+    def _mark(self, request: Request, response: Response) -> None:
+        """Stamp deprecation headers before the response is sent."""
         try:
             # Build cache of deprecated routes on first use
             if (
@@ -143,4 +145,3 @@ class DeprecationHeaderMiddleware(BaseHTTPMiddleware):
         except Exception:
             # Never break responses over deprecation header
             pass
-        return response
@@ -1,8 +1,9 @@
 from datetime import UTC, datetime, timedelta
 
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 
+from ..http_middleware import HTTPMiddleware
+
 try:
     from app.metrics import LEGACY_HITS
 except ImportError:
@@ -17,7 +18,7 @@ except ImportError:
     LEGACY_HITS = _LegacyHitsStub()
 
 
-class LegacyHeadersMiddleware(BaseHTTPMiddleware):
+class LegacyHeadersMiddleware(HTTPMiddleware):
     def __init__(self, app: ASGIApp, prefix="/v1/legacy", deprecates_in_days=90):
         super().__init__(app)
         self.prefix = prefix
@@ -26,8 +27,10 @@ class LegacyHeadersMiddleware(BaseHTTPMiddleware):
         )
 
     async def dispatch(self, request, call_next):
-        resp = await call_next(request)
-        if request.url.path.startswith(self.prefix):
+        if not request.url.path.startswith(self.prefix):
+            return await call_next(request)
+
+        def _add_headers(resp):
             # Track legacy endpoint usage
             LEGACY_HITS.labels(endpoint=request.url.path).inc()
 
@@ -35,4 +38,5 @@ class LegacyHeadersMiddleware(BaseHTTPMiddleware):
             resp.headers.setdefault("Deprecation", "true")
             resp.headers.setdefault("Sunset", self.sunset)
             resp.headers.setdefault("Link", '</docs#legacy>; rel="deprecation"')
-        return resp
+
+        return await call_next(request, _add_headers)
@@ -14,6 +14,7 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.cors import CORSMiddleware
 
 from ..csrf import CSRFMiddleware
+from ..http_middleware import HTTPMiddleware
 
 # Import middleware classes directly to avoid circular imports
 from .audit_mw import AuditMiddleware
@@ -46,7 +47,7 @@ logger = logging.getLogger(__name__)
 
 def add_mw(
     app,
-    mw_cls: type[BaseHTTPMiddleware],
+    mw_cls: type[HTTPMiddleware] | type[BaseHTTPMiddleware],
     *,
     name: str,
     **kwargs,
@@ -72,10 +73,11 @@ def add_mw(
     if not inspect.isclass(mw_cls):
         raise RuntimeError(f"Middleware '{name}' is not a class: {mw_cls!r}")
 
-    # Validate it subclasses BaseHTTPMiddleware
-    if not issubclass(mw_cls, BaseHTTPMiddleware):
+    # Validate it subclasses HTTPMiddleware (or legacy BaseHTTPMiddleware)
+    if not issubclass(mw_cls, HTTPMiddleware | BaseHTTPMiddleware):
         raise RuntimeError(
-            f"Middleware '{name}' must subclass BaseHTTPMiddleware (got {mw_cls})"
+            f"Middleware '{name}' must subclass HTTPMiddleware or "
+            f"BaseHTTPMiddleware (got {mw_cls})"
         )
 
     # Add the middleware
@@ -6,10 +6,10 @@ Clean Prometheus metrics collection for HTTP requests.
 
 import time
 
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import Response
 
+from app.http_middleware import HTTPMiddleware
 from app.metrics import LATENCY, REQUESTS
 
 
@@ -30,7 +30,7 @@ def _route_name(scope) -> str:
     return path or "<unknown>"
 
 
-class MetricsMiddleware(BaseHTTPMiddleware):
+class MetricsMiddleware(HTTPMiddleware):
     """Clean metrics collection middleware for HTTP requests."""
 
     async def dispatch(self, request: Request, call_next):
@@ -40,7 +40,7 @@ class MetricsMiddleware(BaseHTTPMiddleware):
         status = 500  # Default to server error
 
         try:
-            resp: Response = await call_next(request)
+            resp: Response | None = await call_next(request)
             status = getattr(resp, "status_code", 200)
             return resp
         except Exception:
@@ -7,10 +7,9 @@ from hashlib import sha256
 
 import jwt
 from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-
 from ..env_utils import load_env
 from ..security import jwt_decode
+from ..http_middleware import INFRA_ROUTE_CLASSES, HTTPMiddleware, route_class
 
 try:  # Optional dependency; provide a tiny fallback to avoid hard dep in tests
     from cachetools import TTLCache  # type: ignore
@@ -71,21 +70,30 @@ from typing import Any
 
 from .. import metrics
 from ..analytics import latency_p95, record_latency
-from ..history import append_history
+from ..history import enqueue_history
 from ..otel_utils import get_trace_id_hex, observe_with_exemplar, start_span
 from ..security import get_rate_limit_snapshot
 from ..telemetry import LogRecord, log_record_var, utc_now
+from ..user_stats_buffer import UserStatsBuffer
 
 _user_store_provider: Callable[[], Any] | None = None
+_user_stats: UserStatsBuffer | None = None
 
 
 def set_store_providers(*, user_store_provider: Callable[[], Any]):
     """Set store providers for middleware. Called from main.py after app construction."""
-    global _user_store_provider
+    global _user_store_provider, _user_stats
     _user_store_provider = user_store_provider
+    _user_stats = UserStatsBuffer(user_store_provider)
+
+
+async def flush_user_stats() -> None:
+    """Stop the write-behind user stats flusher and persist pending counts."""
+    if _user_stats is not None:
+        await _user_stats.aclose()
 
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
+class RequestIDMiddleware(HTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         # Let CORS handle preflight; do NOTHING here for OPTIONS
         if request.method == "OPTIONS":
@@ -107,20 +115,18 @@ class RequestIDMiddleware(BaseHTTPMiddleware):
             except Exception:
                 pass
         token = req_id_var.set(req_id)
+
+        def _stamp(response: Response) -> None:
+            # Ensure response carries the same request id without overwriting existing value
+            response.headers.setdefault("X-Request-ID", req_id)
+
         try:
-            response = await call_next(request)
+            return await call_next(request, _stamp)
         finally:
-            # Ensure response carries the same request id without overwriting existing value
-            try:
-                if isinstance(response, Response):
-                    response.headers.setdefault("X-Request-ID", req_id)
-            except Exception:
-                pass
             req_id_var.reset(token)
-        return response
 
 
-class RedactHashMiddleware(BaseHTTPMiddleware):
+class RedactHashMiddleware(HTTPMiddleware):
     """Middleware that redacts sensitive headers and hashes sensitive values for logs."""
 
     SENSITIVE_HEADERS = {"authorization", "cookie", "x-api-key", "set-cookie"}
@@ -168,23 +174,22 @@ class RedactHashMiddleware(BaseHTTPMiddleware):
         except Exception:
             pass
 
-        resp = await call_next(request)
-
         # Redact sensitive response headers for logging only, but do NOT remove
         # or overwrite Set-Cookie headers that the application relies on. Replace
         # only non-critical headers; preserve 'set-cookie' so browsers can receive
         # auth cookies during dev/test flows.
-        try:
-            for h in list(resp.headers.keys()):
-                if h.lower() in self.SENSITIVE_HEADERS and h.lower() != "set-cookie":
-                    resp.headers[h] = "[REDACTED]"
-        except Exception:
-            pass
+        def _redact(resp: Response) -> None:
+            try:
+                for h in list(resp.headers.keys()):
+                    if h.lower() in self.SENSITIVE_HEADERS and h.lower() != "set-cookie":
+                        resp.headers[h] = "[REDACTED]"
+            except Exception:
+                pass
 
-        return resp
+        return await call_next(request, _redact)
 
 
-class HealthCheckFilterMiddleware(BaseHTTPMiddleware):
+class HealthCheckFilterMiddleware(HTTPMiddleware):
     """Filter out health check requests from access logs."""
 
     async def dispatch(self, request: Request, call_next):
@@ -199,7 +204,7 @@ class HealthCheckFilterMiddleware(BaseHTTPMiddleware):
         return await call_next(request)
 
 
-class DedupMiddleware(BaseHTTPMiddleware):
+class DedupMiddleware(HTTPMiddleware):
     """Handle request deduplication and idempotency.
 
     Features:
@@ -279,15 +284,15 @@ class DedupMiddleware(BaseHTTPMiddleware):
                 },
             )
 
-        # Process the request normally
-        response = await call_next(request)
+        cacheable = bool(
+            idempotency_key and request.method in {"POST", "PUT", "PATCH", "DELETE"}
+        )
+
+        # Process the request normally; keep the body only if we may cache it
+        response = await call_next(request, capture_body=cacheable)
 
         # Cache response for idempotency if Idempotency-Key was provided
-        if (
-            idempotency_key
-            and request.method in {"POST", "PUT", "PATCH", "DELETE"}
-            and response.status_code < 500
-        ):
+        if cacheable and response is not None and response.status_code < 500:
             try:
                 # Get user identity for cache key
                 user_id = _anon_user_id(request)
@@ -295,12 +300,12 @@ class DedupMiddleware(BaseHTTPMiddleware):
                     request.method, request.url.path, idempotency_key, user_id
                 )
 
-                # For FastAPI/Starlette responses, we need to be careful about body access
-                # The body might not be available yet or might be a streaming response
+                # Only bodies sent in a single message are captured; streaming
+                # responses can't be cached
                 response_body = b""
-                if hasattr(response, "body") and response.body:
+                if response.body:
                     response_body = response.body
-                elif hasattr(response, "body_iterator"):
+                elif response.streamed:
                     # For streaming responses, we can't cache them
                     logger.debug(
                         "idempotency.cache_skipped",
@@ -403,7 +408,7 @@ def _anon_user_id(source: Request | str | None) -> str:
     return "anon"
 
 
-class TraceRequestMiddleware(BaseHTTPMiddleware):
+class TraceRequestMiddleware(HTTPMiddleware):
     """Trace/logging middleware — never stamp headers on OPTIONS (and strip if inherited)"""
 
     async def dispatch(self, request: Request, call_next):
@@ -422,17 +427,18 @@ class TraceRequestMiddleware(BaseHTTPMiddleware):
         rec = LogRecord(req_id=req_id)
         token_req = req_id_var.set(req_id)
         token_rec = log_record_var.set(rec)
+        # Probes, metrics scrapes and static assets still get headers and a
+        # span but skip user stats, logging, history, latency/SLO and metrics
+        accounting = route_class(request.scope) not in INFRA_ROUTE_CLASSES
 
         # Set session/device ids if present
         rec.session_id = request.headers.get("X-Session-ID")
         rec.user_id = _anon_user_id(request)
 
-        # Best-effort user accounting (do not affect request latency on failure)
+        # Best-effort user accounting, written behind in batches (no DB here)
         try:
-            if _user_store_provider is not None:
-                user_store = _user_store_provider()
-                await user_store.ensure_user(rec.user_id)
-                await user_store.increment_request(rec.user_id)
+            if accounting and _user_stats is not None:
+                _user_stats.record_request(rec.user_id)
         except Exception:
             pass
 
@@ -488,93 +494,174 @@ class TraceRequestMiddleware(BaseHTTPMiddleware):
                 except Exception:
                     pass
 
-                response = await call_next(request)
-                rec.status = "OK"
+                # Span attributes and headers are stamped as the response
+                # starts; logging and metrics below run once it has been sent
+                def _on_response(response: Response) -> None:
+                    # Enhanced tracing for golden trace endpoints
+                    status_code = getattr(response, "status_code", 200)
+                    try:
+                        if _span is not None and hasattr(_span, "set_attribute"):
+                            _span.set_attribute("http.status_code", status_code)
+
+                            # Golden trace fields for whoami and auth/finish
+                            if route_path in ["/v1/whoami", "/v1/auth/finish"]:
+                                _span.set_attribute("http.rid", req_id)
+                                _span.set_attribute("http.uid", rec.user_id)
+                                _span.set_attribute(
+                                    "http.origin", request.headers.get("Origin", "")
+                                )
+                                _span.set_attribute("http.status", status_code)
 
-                # Enhanced tracing for golden trace endpoints
-                status_code = getattr(response, "status_code", 200)
-                try:
-                    if _span is not None and hasattr(_span, "set_attribute"):
-                        _span.set_attribute("http.status_code", status_code)
-
-                        # Golden trace fields for whoami and auth/finish
-                        if route_path in ["/v1/whoami", "/v1/auth/finish"]:
-                            _span.set_attribute("http.rid", req_id)
-                            _span.set_attribute("http.uid", rec.user_id)
-                            _span.set_attribute(
-                                "http.origin", request.headers.get("Origin", "")
-                            )
-                            _span.set_attribute("http.status", status_code)
+                                # Set cookie flags for auth endpoints
+                                if route_path == "/v1/auth/finish":
+                                    set_cookie_headers = response.headers.getlist(
+                                        "set-cookie", []
+                                    )
+                                    cookie_flags = []
+                                    for cookie in set_cookie_headers:
+                                        try:
+                                            from ..web.cookies import NAMES
+
+                                            if (
+                                                "access_token" in cookie
+                                                or NAMES.access in cookie
+                                                or "refresh_token" in cookie
+                                                or NAMES.refresh in cookie
+                                            ):
+                                                flags = []
+                                                if "HttpOnly" in cookie:
+                                                    flags.append("HttpOnly")
+                                                if "Secure" in cookie:
+                                                    flags.append("Secure")
+                                        except Exception:
+                                            if (
+                                                "access_token" in cookie
+                                                or "refresh_token" in cookie
+                                            ):
+                                                flags = []
+                                                if "HttpOnly" in cookie:
+                                                    flags.append("HttpOnly")
+                                                if "Secure" in cookie:
+                                                    flags.append("Secure")
+
+                                        if "SameSite=" in cookie:
+                                            samesite = cookie.split("SameSite=")[1].split(
+                                                ";"
+                                            )[0]
+                                            flags.append(f"SameSite={samesite}")
+                                        cookie_flags.extend(flags)
+                                    if cookie_flags:
+                                        _span.set_attribute(
+                                            "http.cookie_flags", " ".join(cookie_flags)
+                                        )
+                    except Exception:
+                        pass
 
-                            # Set cookie flags for auth endpoints
-                            if route_path == "/v1/auth/finish":
-                                set_cookie_headers = response.headers.getlist(
-                                    "set-cookie", []
+                    # Only stamp RL headers for non-OPTIONS requests
+                    # CORS preflight requests should never have rate limit headers
+                    if request.method != "OPTIONS":
+                        try:
+                            snap = get_rate_limit_snapshot(request)
+                            if snap:
+                                response.headers["ratelimit-limit"] = str(snap.get("limit"))
+                                response.headers["ratelimit-remaining"] = str(
+                                    snap.get("remaining")
                                 )
-                                cookie_flags = []
-                                for cookie in set_cookie_headers:
-                                    try:
-                                        from ..web.cookies import NAMES
-
-                                        if (
-                                            "access_token" in cookie
-                                            or NAMES.access in cookie
-                                            or "refresh_token" in cookie
-                                            or NAMES.refresh in cookie
-                                        ):
-                                            flags = []
-                                            if "HttpOnly" in cookie:
-                                                flags.append("HttpOnly")
-                                            if "Secure" in cookie:
-                                                flags.append("Secure")
-                                    except Exception:
-                                        if (
-                                            "access_token" in cookie
-                                            or "refresh_token" in cookie
-                                        ):
-                                            flags = []
-                                            if "HttpOnly" in cookie:
-                                                flags.append("HttpOnly")
-                                            if "Secure" in cookie:
-                                                flags.append("Secure")
-
-                                    if "SameSite=" in cookie:
-                                        samesite = cookie.split("SameSite=")[1].split(
-                                            ";"
-                                        )[0]
-                                        flags.append(f"SameSite={samesite}")
-                                    cookie_flags.extend(flags)
-                                if cookie_flags:
-                                    _span.set_attribute(
-                                        "http.cookie_flags", " ".join(cookie_flags)
-                                    )
-                except Exception:
-                    pass
+                                response.headers["ratelimit-reset"] = str(snap.get("reset"))
+                                response.headers["X-RateLimit-Burst-Limit"] = str(
+                                    snap.get("burst_limit")
+                                )
+                                response.headers["X-RateLimit-Burst-Remaining"] = str(
+                                    snap.get("burst_remaining")
+                                )
+                                response.headers["X-RateLimit-Burst-Reset"] = str(
+                                    snap.get("burst_reset")
+                                )
+                        except Exception:
+                            # Silently fail if rate limit snapshot fails
+                            pass
 
-                # Only stamp RL headers for non-OPTIONS requests
-                # CORS preflight requests should never have rate limit headers
-                if request.method != "OPTIONS":
+                    response.headers.setdefault("X-Request-ID", rec.req_id)
+                    # Surface current trace id in responses when available
                     try:
-                        snap = get_rate_limit_snapshot(request)
-                        if snap:
-                            response.headers["ratelimit-limit"] = str(snap.get("limit"))
-                            response.headers["ratelimit-remaining"] = str(
-                                snap.get("remaining")
-                            )
-                            response.headers["ratelimit-reset"] = str(snap.get("reset"))
-                            response.headers["X-RateLimit-Burst-Limit"] = str(
-                                snap.get("burst_limit")
+                        tid = get_trace_id_hex()
+                        if tid:
+                            response.headers["X-Trace-ID"] = tid
+                            # Optional hint for browser devtools
+                            response.headers.setdefault(
+                                "Server-Timing", f"traceparent;desc={tid}"
                             )
-                            response.headers["X-RateLimit-Burst-Remaining"] = str(
-                                snap.get("burst_remaining")
+                    except Exception:
+                        pass
+
+                    # Mark model fallback headers for observability (e.g., llama→gpt)
+                    try:
+                        rr = rec.route_reason or ""
+                        if rr and "fallback_from_llama" in rr:
+                            response.headers.setdefault("X-Fallback", "gpt")
+                    except Exception:
+                        pass
+
+                    # Make backend origin explicit for debugging across the Next proxy
+                    try:
+                        response.headers.setdefault("X-Debug-Backend", "fastapi")
+                    except Exception:
+                        pass
+
+                    # Security headers: HSTS, CSP and other hardening headers
+                    try:
+                        env = os.getenv("ENV", "").strip().lower()
+                        if request.url.scheme == "https" and env in {"prod", "production"}:
+                            response.headers.setdefault(
+                                "Strict-Transport-Security",
+                                "max-age=63072000; includeSubDomains; preload",
                             )
-                            response.headers["X-RateLimit-Burst-Reset"] = str(
-                                snap.get("burst_reset")
+                        # Security headers (CSP handled by frontend)
+                        response.headers.setdefault("Referrer-Policy", "no-referrer")
+                        response.headers.setdefault("X-Content-Type-Options", "nosniff")
+                        response.headers.setdefault(
+                            "Permissions-Policy", "camera=(), microphone=(), geolocation=()"
+                        )
+                        response.headers.setdefault("X-Frame-Options", "DENY")
+                    except Exception:
+                        pass
+
+                    # Offline mode badge for UI: set a cookie when local fallback is in use
+                    try:
+                        from .llama_integration import LLAMA_HEALTHY as _LL_OK
+
+                        local_mode = (not _LL_OK) and (
+                            os.getenv("OPENAI_API_KEY", "") == ""
+                        )
+                        if local_mode:
+                            # Enforce Secure/SameSite in prod; relax in tests/dev (http)
+                            secure = True
+                            try:
+                                if getattr(request.url, "scheme", "http") != "https":
+                                    secure = False
+                            except Exception:
+                                pass
+                            # Use centralized cookie functions for local mode indicator
+                            from ..web.cookies import set_named_cookie
+
+                            set_named_cookie(
+                                resp=response,
+                                name="X-Local-Mode",
+                                value="1",
+                                ttl=600,
+                                httponly=True,
+                                secure=secure,
+                                samesite="Lax",  # Keep Lax for local mode indicator
                             )
                     except Exception:
-                        # Silently fail if rate limit snapshot fails
                         pass
 
+                response = await call_next(request, _on_response)
+                rec.status = "OK"
+
+            if not accounting:
+                return response
+
             # Attach a compact logging meta for downstream log formatters and history
             # Include required fields: latency_ms, status_code, req_id, and router decision tag
             status_code = 0
@@ -646,41 +733,32 @@ class TraceRequestMiddleware(BaseHTTPMiddleware):
             }
 
             try:
-                # Skip logging for health check requests
-                if route_path.startswith("/healthz") or route_path.startswith(
-                    "/health/"
-                ):
-                    pass
-                else:
-                    # log via std logging for live dashboards then persist in history
-                    import logging
-                    import random as _rand
+                # log via std logging for live dashboards then persist in history
+                import logging
+                import random as _rand
 
-                    env = os.getenv("ENV", "").strip().lower()
-                    status_family = (status_code // 100) if status_code else 0
-                    # Sample successes in prod; log all non-2xx
-                    p = 1.0
-                    if env in {"prod", "production"} and status_family == 2:
-                        try:
-                            p = float(os.getenv("OBS_SAMPLE_SUCCESS_RATE", "0.1"))
-                        except Exception:
-                            p = 0.1
-                    if status_family != 2 or _rand.random() < p:
-                        logging.getLogger(__name__).info(
-                            "request_summary", extra={"meta": meta}
-                        )
+                env = os.getenv("ENV", "").strip().lower()
+                status_family = (status_code // 100) if status_code else 0
+                # Sample successes in prod; log all non-2xx
+                p = 1.0
+                if env in {"prod", "production"} and status_family == 2:
+                    try:
+                        p = float(os.getenv("OBS_SAMPLE_SUCCESS_RATE", "0.1"))
+                    except Exception:
+                        p = 0.1
+                if status_family != 2 or _rand.random() < p:
+                    logging.getLogger(__name__).info(
+                        "request_summary", extra={"meta": meta}
+                    )
             except Exception:
                 pass
 
-            # Persist structured history (skip health checks)
-            if not (
-                route_path.startswith("/healthz") or route_path.startswith("/health/")
-            ):
-                full = {**rec.model_dump(exclude_none=True), **{"meta": meta}}
-                try:
-                    asyncio.create_task(append_history(full))
-                except Exception:
-                    pass
+            # Persist structured history
+            full = {**rec.model_dump(exclude_none=True), **{"meta": meta}}
+            try:
+                enqueue_history(full)
+            except Exception:
+                pass
 
             # Record latency and metrics
             rec.latency_ms = int((time.monotonic() - start_time) * 1000)
@@ -789,82 +867,6 @@ class TraceRequestMiddleware(BaseHTTPMiddleware):
                     route_path, request.method, engine, "total"
                 ).observe(rec.cost_usd)
 
-            if isinstance(response, Response):
-                response.headers.setdefault("X-Request-ID", rec.req_id)
-                # Surface current trace id in responses when available
-                try:
-                    tid = get_trace_id_hex()
-                    if tid:
-                        response.headers["X-Trace-ID"] = tid
-                        # Optional hint for browser devtools
-                        response.headers.setdefault(
-                            "Server-Timing", f"traceparent;desc={tid}"
-                        )
-                except Exception:
-                    pass
-
-                # Mark model fallback headers for observability (e.g., llama→gpt)
-                try:
-                    rr = rec.route_reason or ""
-                    if rr and "fallback_from_llama" in rr:
-                        response.headers.setdefault("X-Fallback", "gpt")
-                except Exception:
-                    pass
-
-                # Make backend origin explicit for debugging across the Next proxy
-                try:
-                    response.headers.setdefault("X-Debug-Backend", "fastapi")
-                except Exception:
-                    pass
-
-                # Security headers: HSTS, CSP and other hardening headers
-                try:
-                    env = os.getenv("ENV", "").strip().lower()
-                    if request.url.scheme == "https" and env in {"prod", "production"}:
-                        response.headers.setdefault(
-                            "Strict-Transport-Security",
-                            "max-age=63072000; includeSubDomains; preload",
-                        )
-                    # Security headers (CSP handled by frontend)
-                    response.headers.setdefault("Referrer-Policy", "no-referrer")
-                    response.headers.setdefault("X-Content-Type-Options", "nosniff")
-                    response.headers.setdefault(
-                        "Permissions-Policy", "camera=(), microphone=(), geolocation=()"
-                    )
-                    response.headers.setdefault("X-Frame-Options", "DENY")
-                except Exception:
-                    pass
-
-                # Offline mode badge for UI: set a cookie when local fallback is in use
-                try:
-                    from .llama_integration import LLAMA_HEALTHY as _LL_OK
-
-                    local_mode = (not _LL_OK) and (
-                        os.getenv("OPENAI_API_KEY", "") == ""
-                    )
-                    if local_mode:
-                        # Enforce Secure/SameSite in prod; relax in tests/dev (http)
-                        secure = True
-                        try:
-                            if getattr(request.url, "scheme", "http") != "https":
-                                secure = False
-                        except Exception:
-                            pass
-                        # Use centralized cookie functions for local mode indicator
-                        from ..web.cookies import set_named_cookie
-
-                        set_named_cookie(
-                            resp=response,
-                            name="X-Local-Mode",
-                            value="1",
-                            ttl=600,
-                            httponly=True,
-                            secure=secure,
-                            samesite="Lax",  # Keep Lax for local mode indicator
-                        )
-                except Exception:
-                    pass
-
         except TimeoutError:
             rec.status = "ERR_TIMEOUT"
             raise
@@ -888,7 +890,18 @@ async def silent_refresh_middleware(request: Request, call_next):
       - ACCESS_REFRESH_THRESHOLD_SECONDS: refresh when exp - now < threshold (default 3600s)
       - DISABLE_SILENT_REFRESH: set to "1" to disable this middleware
     """
-    # Check if silent refresh is disabled via environment variable
+    if silent_refresh_disabled():
+        return await call_next(request)
+
+    logger.debug("SILENT_REFRESH: Middleware called")
+    # Call downstream first; do not swallow exceptions from handlers
+    response: Response = await call_next(request)
+    await apply_silent_refresh(request, response)
+    return response
+
+
+def silent_refresh_disabled() -> bool:
+    """Check if silent refresh is disabled via environment variable."""
     if os.getenv("DISABLE_SILENT_REFRESH", "0").strip().lower() in {
         "1",
         "true",
@@ -896,12 +909,12 @@ async def silent_refresh_middleware(request: Request, call_next):
         "on",
     }:
         logger.debug("SILENT_REFRESH: Disabled via environment variable")
-        return await call_next(request)
+        return True
+    return False
 
-    logger.debug("SILENT_REFRESH: Middleware called")
-    # Call downstream first; do not swallow exceptions from handlers
-    response: Response = await call_next(request)
 
+async def apply_silent_refresh(request: Request, response: Response) -> None:
+    """Set rotated auth cookies on ``response`` (before it is sent) if due."""
     # Best-effort refresh; never raise from middleware
     try:
         # Skip static and non-API paths to avoid unnecessary token work
@@ -910,7 +923,7 @@ async def silent_refresh_middleware(request: Request, call_next):
             logger.debug("SILENT_REFRESH: Processing path %s", path)
             if not path.startswith("/v1"):
                 logger.debug("SILENT_REFRESH: Skipping non-v1 path")
-                return response
+                return
             # Skip logout endpoints to avoid setting new cookies during logout
             # Broadened: skip any path that is logout-ish (ends with /logout or contains /auth/logout), regardless of status code
             if (
@@ -919,7 +932,7 @@ async def silent_refresh_middleware(request: Request, call_next):
                 or request.headers.get("X-Logout") == "true"
             ):
                 logger.debug("SILENT_REFRESH: Skipping logout path or X-Logout header")
-                return response
+                return
             # Skip refresh if the response includes any Set-Cookie that deletes an auth cookie
             # (access_token, refresh_token, or __session)—i.e., a delete with Max-Age=0
             set_cookies = response.headers.getlist("set-cookie", [])
@@ -943,11 +956,11 @@ async def silent_refresh_middleware(request: Request, call_next):
                 logger.debug(
                     "SILENT_REFRESH: Skipping due to auth cookie deletion (Max-Age=0)"
                 )
-                return response
+                return
             # Skip on 204 responses
             if response.status_code == 204:
                 logger.debug("SILENT_REFRESH: Skipping due to 204 status code")
-                return response
+                return
         except Exception:
             pass
         # Accept both canonical and legacy cookie names for access token
@@ -987,13 +1000,13 @@ async def silent_refresh_middleware(request: Request, call_next):
                 if user_id != "anon":
                     await perform_lazy_refresh(request, response, user_id)
                     logger.debug("SILENT_REFRESH: Cold-boot refresh completed")
-                return response
+                return
             except Exception as e:
                 logger.debug(f"SILENT_REFRESH: Cold-boot refresh failed: {e}")
-                return response
+                return
 
         if not token or not secret:
-            return response
+            return
         # Decode without hard-failing on expiry/format
         try:
             payload = jwt_decode(token, secret, algorithms=["HS256"])
@@ -1002,7 +1015,7 @@ async def silent_refresh_middleware(request: Request, call_next):
         except Exception:
             payload = None
         if not payload:
-            return response
+            return
         now = int(time.time())
         exp = int(payload.get("exp", 0))
         threshold = int(os.getenv("ACCESS_REFRESH_THRESHOLD_SECONDS", "3600"))
@@ -1028,7 +1041,7 @@ async def silent_refresh_middleware(request: Request, call_next):
             # Rotate token, preserving custom claims
             user_id = str(payload.get("user_id") or "")
             if not user_id:
-                return response
+                return
             # Use centralized TTL from tokens.py
             from ..tokens import get_default_access_ttl
 
@@ -1123,7 +1136,6 @@ async def silent_refresh_middleware(request: Request, call_next):
     except Exception:
         # best-effort; never fail request due to refresh
         pass
-    return response
 
 
 async def reload_env_middleware(request: Request, call_next):
@@ -1147,9 +1159,11 @@ async def reload_env_middleware(request: Request, call_next):
     return await call_next(request)
 
 
-class APILoggingMiddleware(BaseHTTPMiddleware):
+class APILoggingMiddleware(HTTPMiddleware):
     """Comprehensive API request/response logging middleware."""
 
+    skip_route_classes = INFRA_ROUTE_CLASSES
+
     def __init__(self, app, exclude_paths=None, exclude_methods=None):
         super().__init__(app)
         self.exclude_paths = exclude_paths or ["/health", "/metrics", "/favicon.ico"]
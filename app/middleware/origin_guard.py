@@ -7,10 +7,11 @@ from typing import Iterable
 from urllib.parse import urlparse
 
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import Response
 
+from ..http_middleware import HTTPMiddleware
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,7 +32,7 @@ def _normalize_origin(origin: str | None) -> str | None:
         return None
 
 
-class OriginGuardMiddleware(BaseHTTPMiddleware):
+class OriginGuardMiddleware(HTTPMiddleware):
     """Block state-changing requests that lack an approved Origin header."""
 
     def __init__(
@@ -87,9 +88,7 @@ class OriginGuardMiddleware(BaseHTTPMiddleware):
                     if inferred and not self._is_allowed(request, inferred):
                         return self._reject(request, "bad_origin")
 
-        response = await call_next(request)
-        self._ensure_vary(response)
-        return response
+        return await call_next(request, self._ensure_vary)
 
     def _should_enforce(self, request: Request) -> bool:
         cookie_header = request.headers.get("cookie") or request.headers.get("Cookie")
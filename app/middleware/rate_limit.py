@@ -1,14 +1,14 @@
 # app/middleware/rate_limit.py
 import hashlib
+import logging
 import os
 import sys
-import time
 
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 
 from app.errors import json_error
 from app.headers import get_rate_limit_headers, get_retry_after_header
+from app.http_middleware import METRICS, PROBE, HTTPMiddleware
 
 # Import settings and header utilities
 from app.settings_rate import rate_limit_settings
@@ -19,8 +19,20 @@ try:
 except Exception:  # pragma: no cover - optional
     RATE_LIMITED = None  # type: ignore
 
-# Simple in-process bucket (swap with Redis for prod scale)
-_BUCKET = {}
+from ._rate_limit_store import (
+    InMemoryRateLimitBackend,
+    RateLimitBackend,
+    RedisRateLimitBackend,
+)
+
+logger = logging.getLogger(__name__)
+
+# Process-local token buckets (bounded, idle buckets evicted). Also the
+# fallback when the Redis backend is unreachable.
+_LOCAL_BACKEND = InMemoryRateLimitBackend()
+_BUCKET = _LOCAL_BACKEND.buckets
+
+_backend: RateLimitBackend | None = None
 
 # Metrics for observability
 _METRICS = {
@@ -46,6 +58,55 @@ def _get_bypass_scopes():
     return rate_limit_settings.bypass_scopes
 
 
+def get_rate_limit_backend() -> RateLimitBackend:
+    """Return the limiter backend, selecting it on first use.
+
+    ``RATE_LIMIT_BACKEND=redis`` (or ``distributed``) shares buckets across
+    workers through ``REDIS_URL``; anything else, a missing redis package, or
+    running under tests keeps the in-process buckets.
+    """
+    global _backend
+    if _backend is not None:
+        return _backend
+    backend: RateLimitBackend = _LOCAL_BACKEND
+    if rate_limit_settings.backend in {"redis", "distributed"} and not _detect_test_mode():
+        try:
+            import redis.asyncio as redis  # type: ignore
+
+            url = os.getenv("REDIS_URL") or "redis://localhost:6379/0"
+            client = redis.from_url(url)
+            backend = RedisRateLimitBackend(
+                client, rate_limit_settings.redis_prefix, fallback=_LOCAL_BACKEND
+            )
+            logger.info("Rate limiter using Redis backend")
+        except Exception as e:
+            logger.warning(f"Redis unavailable for rate limiter, using in-memory: {e}")
+    _backend = backend
+    return backend
+
+
+def set_rate_limit_backend(backend: RateLimitBackend | None) -> None:
+    """Replace the limiter backend (tests); None re-selects on next use."""
+    global _backend
+    _backend = backend
+
+
+def _detect_test_mode() -> bool:
+    # Prefer centralized test switch `env_utils.IS_TEST` when available, but
+    # also accept the usual pytest indicators so tests running in various
+    # CI/local environments are not rate limited unexpectedly.
+    try:
+        from app.env_utils import IS_TEST
+    except Exception:
+        IS_TEST = False
+    return bool(
+        IS_TEST
+        or "pytest" in sys.modules
+        or "PYTEST_CURRENT_TEST" in os.environ
+        or "PYTEST_RUNNING" in os.environ
+    )
+
+
 def _key(client_ip: str, path: str, user_id: str | None) -> str:
     """Generate rate limit key based on configured strategy."""
     key_scope = rate_limit_settings.key_scope
@@ -135,8 +196,9 @@ def _test_reset_config():
 
 def _test_clear_buckets():
     """Test helper to clear all rate limit buckets."""
-    global _BUCKET
-    _BUCKET.clear()
+    _LOCAL_BACKEND.clear()
+    if _backend is not None:
+        _backend.clear()
 
 
 def _test_clear_metrics():
@@ -152,65 +214,39 @@ def _test_clear_metrics():
     }
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class RateLimitMiddleware(HTTPMiddleware):
+    # Health probes and metrics scrapes are never limited
+    skip_route_classes = frozenset({PROBE, METRICS})
+
     def __init__(self, app: ASGIApp):
         super().__init__(app)
-
-    async def dispatch(self, request, call_next):
-        # Skip OPTIONS (preflight), health, metrics
-        p = request.url.path
-        if request.method == "OPTIONS" or p.startswith("/health") or p == "/metrics":
-            return await call_next(request)
-
-        # Check if rate limiting should be disabled for tests or by configuration.
-        # Prefer centralized test switch `env_utils.IS_TEST` when available.
-        try:
-            from app.env_utils import IS_TEST
-
-            test_mode_disabled = IS_TEST
-        except Exception:
-            test_mode_disabled = False
-
-        # Even when env_utils.IS_TEST is available but False, also accept
-        # heuristic indicators of test mode so tests running under pytest in
-        # various CI/local environments are not rate limited unexpectedly.
-        heuristic_test_mode = (
-            "pytest" in sys.modules
-            or "PYTEST_CURRENT_TEST" in os.environ
-            or "PYTEST_RUNNING" in os.environ
-            or any(
-                "pytest" in str(m)
-                for m in sys.modules.values()
-                if hasattr(m, "__file__")
-            )
-        )
-
-        test_mode_disabled = test_mode_disabled or heuristic_test_mode
-
-        # Check for RATE_LIMIT_MODE=off configuration (highest priority)
-        rate_limit_mode_off = os.getenv("RATE_LIMIT_MODE", "").lower() == "off"
-
+        # Resolved once when the middleware stack is built rather than per
+        # request (the pytest heuristic used to scan sys.modules every call).
+        test_mode = _detect_test_mode()
         # Allow explicit enabling of rate limiting in tests (overrides IS_TEST)
-        enable_rate_limiting_in_tests = os.getenv(
-            "ENABLE_RATE_LIMIT_IN_TESTS", "0"
-        ).lower() in (
+        enable_in_tests = os.getenv("ENABLE_RATE_LIMIT_IN_TESTS", "0").lower() in (
             "1",
             "true",
             "yes",
         )
+        # RATE_LIMIT_MODE=off has the highest priority
+        mode_off = os.getenv("RATE_LIMIT_MODE", "").lower() == "off"
+        self._test_mode = test_mode
+        self._disabled = mode_off or (test_mode and not enable_in_tests)
+
+    async def dispatch(self, request, call_next):
+        # Skip OPTIONS (preflight); health and metrics never get here
+        p = request.url.path
+        if request.method == "OPTIONS":
+            return await call_next(request)
 
-        # Debug logging for troubleshooting
-        if test_mode_disabled:
+        if self._test_mode:
             _METRICS["requests_total"] += 1  # Track even when disabled
 
         # Disable rate limiting if:
         # 1) RATE_LIMIT_MODE=off is set, OR
         # 2) In test mode AND ENABLE_RATE_LIMIT_IN_TESTS is not explicitly set to enable it
-        should_disable = rate_limit_mode_off or (
-            test_mode_disabled and not enable_rate_limiting_in_tests
-        )
-
-        if should_disable:
+        if self._disabled:
             return await call_next(request)
 
         # Debug: track that middleware is being called
@@ -244,17 +280,9 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
 
         ip = request.client.host if request.client else "0.0.0.0"
         k = _key(ip, p, uid)
-        now = int(time.time())
-        slot = now // window_s
+        decision = await get_rate_limit_backend().hit(k, max_req, window_s)
 
-        bucket = _BUCKET.setdefault(k, {})
-        cnt, last_slot = bucket.get("cnt", 0), bucket.get("slot", slot)
-        if last_slot != slot:
-            cnt = 0
-        cnt += 1
-        bucket["cnt"], bucket["slot"] = cnt, slot
-
-        if cnt > max_req:
+        if not decision.allowed:
             # Record rate limit metrics
             _record_rate_limit_metrics(uid, scopes)
             # Phase 6.1: Clean Prometheus metrics
@@ -285,15 +313,13 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                 error_response.headers[key] = value
             return error_response
 
-        # For successful requests, add rate limit headers to the response
-        response = await call_next(request)
-
         # Calculate remaining requests
-        remaining = max(0, max_req - cnt)
-
-        # Add rate limit headers to successful response
+        remaining = max(0, decision.remaining)
         rate_limit_headers = get_rate_limit_headers(max_req, remaining, window_s)
-        for header_name, header_value in rate_limit_headers.items():
-            response.headers[header_name] = header_value
 
-        return response
+        # For successful requests, add rate limit headers to the response
+        def _add_headers(response):
+            for header_name, header_value in rate_limit_headers.items():
+                response.headers[header_name] = header_value
+
+        return await call_next(request, _add_headers)
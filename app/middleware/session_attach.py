@@ -3,16 +3,19 @@ import logging
 import os
 import time
 
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 
+from app.http_middleware import INFRA_ROUTE_CLASSES, HTTPMiddleware
 from app.security import _get_request_payload
 
 log = logging.getLogger(__name__)
 logger = logging.getLogger(__name__)
 
 
-class SessionAttachMiddleware(BaseHTTPMiddleware):
+class SessionAttachMiddleware(HTTPMiddleware):
+    # Probes, metrics scrapes and static assets carry no session to attach
+    skip_route_classes = INFRA_ROUTE_CLASSES
+
     async def dispatch(self, request: Request, call_next):
         # Skip preflight
         if request.method == "OPTIONS":
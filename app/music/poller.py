@@ -0,0 +1,206 @@
+"""
+Central per-user player-state poller.
+
+Every ``/v1/ws/music`` connection subscribes here instead of pulling provider
+state itself. One loop per user (while it has listeners) fetches state and
+fans it out to all of that user's connections; concurrent refreshes share one
+upstream call. A refresh requested after a command (``fresh=True``) only joins
+a pull that started after it, so it never returns state from before the
+command.
+
+The poll interval adapts to playback: short while playing (and just after the
+current track is due to end), longer when paused or idle. It also backs off
+on errors and never polls inside a Spotify ``Retry-After`` window. Between
+polls ``DeltaBuilder`` extrapolates position from ``server_ts_at_position``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from .models import PlayerState
+
+logger = logging.getLogger(__name__)
+
+Listener = Callable[[PlayerState], Awaitable[None]]
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def to_player_state(provider: Any, playback_state: Any) -> PlayerState:
+    """Build a ``PlayerState`` from a provider ``PlaybackState``."""
+    device = getattr(playback_state, "device", None)
+    return PlayerState(
+        is_playing=getattr(playback_state, "is_playing", False),
+        progress_ms=getattr(playback_state, "progress_ms", 0),
+        track=getattr(playback_state, "track", None),
+        device=device,
+        shuffle=getattr(playback_state, "shuffle", False),
+        repeat=getattr(playback_state, "repeat", "off"),
+        volume_percent=getattr(device, "volume", 50) if device else 50,
+        provider=getattr(provider, "name", "unknown"),
+    )
+
+
+class _UserPoll:
+    def __init__(self, provider: Any) -> None:
+        self.provider = provider
+        self.listeners: set[Listener] = set()
+        self.state: PlayerState | None = None
+        self.inflight: asyncio.Future | None = None
+        # Bumped by each fresh refresh; a pull remembers the value it began at
+        self.epoch = 0
+        self.inflight_epoch = 0
+        self.pulls = 0
+        self.applied = 0
+        self.task: asyncio.Task | None = None
+        self.errors = 0
+
+
+class PlayerStatePoller:
+    def __init__(self) -> None:
+        self._users: dict[str, _UserPoll] = {}
+
+    def latest(self, user_id: str) -> PlayerState | None:
+        up = self._users.get(user_id)
+        return up.state if up else None
+
+    def subscribe(
+        self, user_id: str, provider: Any, listener: Listener
+    ) -> Callable[[], None]:
+        """Register ``listener`` for ``user_id``; returns an unsubscribe callable.
+
+        The first subscriber's provider is used for the user's polling loop.
+        """
+        up = self._users.get(user_id)
+        if up is None:
+            up = self._users[user_id] = _UserPoll(provider)
+        up.listeners.add(listener)
+        if up.task is None or up.task.done():
+            up.task = asyncio.create_task(self._run(user_id, up))
+
+        def _unsubscribe() -> None:
+            up.listeners.discard(listener)
+            if not up.listeners and self._users.get(user_id) is up:
+                del self._users[user_id]
+                if up.task is not None:
+                    up.task.cancel()
+
+        return _unsubscribe
+
+    async def refresh(self, user_id: str, *, fresh: bool = False) -> PlayerState | None:
+        """Fetch state now and fan it out.
+
+        A pull already in flight is shared, unless ``fresh`` is set and that
+        pull began before this call (e.g. it cannot reflect a command just sent).
+        """
+        up = self._users.get(user_id)
+        if up is None:
+            return None
+        if fresh:
+            up.epoch += 1
+        if up.inflight is None or up.inflight_epoch < up.epoch:
+            up.pulls += 1
+            up.inflight = asyncio.ensure_future(self._pull(user_id, up, up.pulls))
+            up.inflight_epoch = up.epoch
+        return await asyncio.shield(up.inflight)
+
+    async def stop(self) -> None:
+        users, self._users = self._users, {}
+        tasks = [up.task for up in users.values() if up.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _pull(self, user_id: str, up: _UserPoll, seq: int) -> PlayerState | None:
+        try:
+            state = to_player_state(up.provider, await up.provider.get_state())
+            up.errors = 0
+        except Exception as e:
+            up.errors += 1
+            logger.warning(
+                "music.poller.get_state_failed",
+                extra={"meta": {"user_id": user_id, "error": str(e)}},
+            )
+            state = None
+        finally:
+            if up.inflight is asyncio.current_task():
+                up.inflight = None
+        if seq < up.applied:
+            # A later pull already landed; do not roll listeners back
+            return state
+        up.applied = seq
+        up.state = state
+        if state is not None:
+            for listener in list(up.listeners):
+                try:
+                    await listener(state)
+                except Exception as e:
+                    logger.debug(
+                        "music.poller.listener_failed",
+                        extra={"meta": {"user_id": user_id, "error": str(e)}},
+                    )
+        return state
+
+    def _next_delay(self, up: _UserPoll) -> float:
+        state = up.state
+        if up.errors:
+            delay = min(60.0, 2.0**up.errors)
+        elif state is None or state.device is None:
+            delay = _env_float("MUSIC_POLL_IDLE_S", 30.0)
+        elif state.is_playing:
+            delay = _env_float("MUSIC_POLL_PLAYING_S", 5.0)
+            track = state.track
+            if track is not None and track.duration_ms:
+                # Catch the track change shortly after it happens
+                left = (track.duration_ms - state.progress_ms) / 1000.0
+                elapsed = time.time() - state.server_ts_at_position
+                delay = min(delay, max(1.0, left - elapsed + 0.5))
+        else:
+            delay = _env_float("MUSIC_POLL_PAUSED_S", 15.0)
+        return max(delay, self._backoff_remaining(up.provider))
+
+    @staticmethod
+    def _backoff_remaining(provider: Any) -> float:
+        if getattr(provider, "name", None) != "spotify":
+            return 0.0
+        try:
+            from app.integrations.spotify.budget import get_spotify_budget_manager
+
+            budget = get_spotify_budget_manager(provider.user_id)
+            return budget.get_backoff_remaining()
+        except Exception:
+            return 0.0
+
+    async def _run(self, user_id: str, up: _UserPoll) -> None:
+        try:
+            while up.listeners:
+                await asyncio.sleep(self._next_delay(up))
+                if up.listeners:
+                    await self.refresh(user_id)
+        except asyncio.CancelledError:
+            pass
+
+
+_POLLER = PlayerStatePoller()
+
+
+def get_poller() -> PlayerStatePoller:
+    return _POLLER
+
+
+async def stop_poller() -> None:
+    await _POLLER.stop()
+
+
+__all__ = ["PlayerStatePoller", "get_poller", "stop_poller", "to_player_state"]
@@ -9,6 +9,7 @@ This module handles all post-call processing including:
 - Response caching
 """
 
+import asyncio
 import logging
 import time
 from dataclasses import dataclass
@@ -168,9 +169,10 @@ async def store_memory(data: PostCallData) -> bool:
             logger.debug("Memory write blocked by policy")
             return False
 
-        # Store in MemGPT
+        # Store in MemGPT (file I/O stays off the event loop)
         if data.session_id and data.user_id:
-            memgpt.store_interaction(
+            await asyncio.to_thread(
+                memgpt.store_interaction,
                 data.prompt,
                 data.response,
                 session_id=data.session_id,
@@ -213,8 +215,9 @@ async def write_claims(data: PostCallData) -> bool:
         # Extract fact for claim
         fact = _extract_fact_from_qa(data.prompt, data.response)
 
-        # Write claim
-        memgpt.write_claim(
+        # Write claim (similarity checks and file I/O stay off the event loop)
+        await asyncio.to_thread(
+            memgpt.write_claim,
             session_id=data.session_id,
             user_id=data.user_id,
             claim_text=fact,
@@ -5,9 +5,10 @@ from __future__ import annotations
 
 import logging
 import os
+import re
 from dataclasses import dataclass
 from datetime import UTC, datetime
-from functools import cache
+from functools import cache, lru_cache
 from pathlib import Path
 from typing import Any
 
@@ -45,6 +46,42 @@ def _prompt_core() -> str:
 # ---------------------------------------------------------------------------
 
 
+_SLOT_RE = re.compile(r"\{\{(\w+)\}\}")
+
+
+@lru_cache(maxsize=8)
+def _template_parts(template: str) -> tuple[str, ...]:
+    """Split ``template`` into alternating literal text and slot names."""
+    return tuple(_SLOT_RE.split(template))
+
+
+@lru_cache(maxsize=8)
+def _encoding(model_name: str) -> Any | None:
+    """Return the cached tiktoken encoding for ``model_name`` or ``None``."""
+    try:  # pragma: no cover - optional dependency
+        import tiktoken
+    except Exception:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except Exception:
+        pass
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=8)
+def _static_tokens(template: str, model_name: str) -> int:
+    """Token count of the template text outside its ``{{slots}}``."""
+    enc = _encoding(model_name)
+    literals = _template_parts(template)[0::2]
+    if enc is None:
+        return sum(count_tokens(lit) for lit in literals)
+    return sum(len(enc.encode(lit)) for lit in literals if lit)
+
+
 def _coerce_k(value: int | str | None) -> int:
     """Return a positive integer `k` for memory retrieval.
 
@@ -267,8 +304,12 @@ class PromptBuilder:
         if len(memories) > RETRIEVER_MAX_MEM_LINES:
             memories = memories[:RETRIEVER_MAX_MEM_LINES]
         logger.info("safe_query_user_memories returned %d memories", len(memories))
-        while count_tokens("\n".join(memories)) > 120 and memories:
+        # Count each memory once and trim from the end by arithmetic
+        mem_counts = [count_tokens(m) for m in memories]
+        nl_tokens = count_tokens("\n") if memories else 0
+        while memories and sum(mem_counts) + nl_tokens * (len(memories) - 1) > 120:
             memories.pop()
+            mem_counts.pop()
 
         # ------------------------------------------------------------------
         # Core prompt assembly
@@ -283,73 +324,77 @@ class PromptBuilder:
             )
         ci = (custom_instructions + kv_rule).strip()
         core_template = _prompt_core()
+        parts = _template_parts(core_template)
+        slots = parts[1::2]
 
-        base_replacements = {
-            "date_time": date_time,
-            "conversation_summary": summary,
-            "memories": "",
-            "custom_instructions": ci,
-            "user_prompt": user_prompt,
-            "debug_info": dbg,
-        }
-
-        base_prompt = core_template
-        for key, val in base_replacements.items():
-            base_prompt = base_prompt.replace(f"{{{{{key}}}}}", val)
-
-        # Prefer tiktoken for accurate token counts when available; fall back to approx counter
-        def _count_tokens_precise(text: str) -> tuple[int, str]:
-            try:  # pragma: no cover - optional dependency
-                import tiktoken
-
-                # Try to use the runtime OPENAI_MODEL if available for encoding selection
-                model_name = os.getenv("OPENAI_MODEL", "gpt-4o")
-                try:
-                    enc = tiktoken.encoding_for_model(model_name)
-                except Exception:
-                    enc = tiktoken.get_encoding("cl100k_base")
-                return len(enc.encode(text)), "tiktoken"
-            except Exception:
-                # Fall back to the project's approximate token counter
-                return count_tokens(text), "approx"
-
-        base_tokens, tokens_est_method = _count_tokens_precise(base_prompt)
+        model_name = os.getenv("OPENAI_MODEL", "gpt-4o")
+        enc = _encoding(model_name)
+        tokens_est_method = "tiktoken" if enc is not None else "approx"
 
         # Log once if falling back to approximate counting
         global _approx_counting_warned
-        if tokens_est_method == "approx" and not _approx_counting_warned:
+        if enc is None and not _approx_counting_warned:
             logger.info(
                 "PromptBuilder using approximate token counting (tiktoken not available)"
             )
             _approx_counting_warned = True
-        mem_list = memories.copy()
+
+        def _count(text: str) -> int:
+            if not text:
+                return 0
+            if enc is not None:
+                try:
+                    return len(enc.encode(text))
+                except Exception:
+                    pass
+            return count_tokens(text)
 
         # ------------------------------------------------------------------
-        # Token-budget loop
+        # Token budget: every segment is tokenized once and the prompt is
+        # trimmed by arithmetic on the cached counts. Segment sums never
+        # undercount the rendered prompt because splitting only prevents
+        # merges across boundaries.
         # ------------------------------------------------------------------
+        values = {
+            "date_time": date_time,
+            "conversation_summary": summary,
+            "memories": "",
+            "custom_instructions": ci,
+            "user_prompt": user_prompt,
+            "debug_info": dbg,
+        }
+        if enc is not None:
+            static_tokens = _static_tokens(core_template, model_name)
+        else:
+            static_tokens = sum(_count(lit) for lit in parts[0::2])
+        slot_tokens = {name: _count(values.get(name, "")) for name in set(slots)}
+        # The memories slot renders as ``(facts_block + "\n".join(mems)).strip()``
+        facts_text = facts_block.strip()
+        facts_tokens = _count(facts_text)
+        mem_list = memories.copy()
+        mem_counts = [_count(m) for m in mem_list]
+        sep_tokens = _count("\n") if (mem_list or facts_text) else 0
+
+        def _mem_slot_tokens(n: int) -> int:
+            pieces = ([facts_tokens] if facts_text else []) + mem_counts[:n]
+            return sum(pieces) + sep_tokens * max(0, len(pieces) - 1)
+
+        def _total(n_mems: int) -> int:
+            tokens = static_tokens
+            for name in slots:
+                if name == "memories":
+                    tokens += _mem_slot_tokens(n_mems)
+                else:
+                    tokens += slot_tokens.get(name, 0)
+            return tokens
+
+        mem_occurrences = slots.count("memories")
         trimmed_summary = False
         trimmed_memories = 0
+        n_mems = len(mem_list)
         while True:
-            prompt = core_template
-            # Render retrieved memories as raw lines to preserve tests' expectations
-            mem_text = "\n".join(mem_list)
-
-            replacements = {
-                "date_time": date_time,
-                "conversation_summary": summary,
-                "memories": (facts_block + mem_text).strip(),
-                "custom_instructions": ci,
-                "user_prompt": user_prompt,
-                "debug_info": dbg,
-            }
-            for key, val in replacements.items():
-                prompt = prompt.replace(f"{{{{{key}}}}}", val)
-
-            prompt_tokens, method = _count_tokens_precise(prompt)
-            # Prefer tiktoken if available for the overall prompt
-            if method == "tiktoken":
-                tokens_est_method = "tiktoken"
-
+            prompt_tokens = _total(n_mems)
+            base_tokens = prompt_tokens - _mem_slot_tokens(n_mems) * mem_occurrences
             fits_budget = (
                 prompt_tokens <= MAX_PROMPT_TOKENS and prompt_tokens - base_tokens <= 75
             )
@@ -357,32 +402,34 @@ class PromptBuilder:
                 break
 
             # Budget overflow: drop summary first, then memories
-            if summary:
-                summary = ""
+            if values["conversation_summary"]:
+                values["conversation_summary"] = ""
+                slot_tokens["conversation_summary"] = 0
                 trimmed_summary = True
-                base_replacements["conversation_summary"] = ""
-                base_prompt = core_template
-                for key, val in base_replacements.items():
-                    base_prompt = base_prompt.replace(f"{{{{{key}}}}}", val)
-                base_tokens, _ = _count_tokens_precise(base_prompt)
                 continue
 
-            if mem_list:
-                mem_list.pop()
+            if n_mems:
+                n_mems -= 1
                 trimmed_memories += 1
                 continue
 
             # Nothing left to trim
             break
 
+        mem_list = mem_list[:n_mems]
+        values["memories"] = (facts_block + "\n".join(mem_list)).strip()
+        prompt = "".join(
+            part if i % 2 == 0 else values.get(part, "")
+            for i, part in enumerate(parts)
+        )
+
         # ------------------------------------------------------------------
-        # Final telemetry (recount after adding sources)
+        # Final telemetry (sources are appended after budgeting)
         # ------------------------------------------------------------------
         if sources_text:
-            prompt = f"{prompt}\n\nSOURCES\n{sources_text}"
-            prompt_tokens, method = _count_tokens_precise(prompt)
-            if method == "tiktoken":
-                tokens_est_method = "tiktoken"
+            sep = "\n\nSOURCES\n"
+            prompt = f"{prompt}{sep}{sources_text}"
+            prompt_tokens += _count(sep) + _count(sources_text)
 
         if rec:
             rec.retrieval_count = len(mem_list)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from .diagnostics import why_logs
-from .pipeline import run_pipeline
+from .pipeline import arun_pipeline, run_pipeline
 from .pipeline import run_pipeline as run_retrieval
 
-__all__ = ["run_pipeline", "run_retrieval", "why_logs"]
+__all__ = ["run_pipeline", "arun_pipeline", "run_retrieval", "why_logs"]
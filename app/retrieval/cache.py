@@ -0,0 +1,358 @@
+"""Bounded in-process cache for retrieval pipeline results.
+
+Entries are keyed by ``(user_id, normalized query, intent, collection,
+filter)`` and hold the final ``(texts, trace)`` pair. The cache is a true LRU
+bounded by entry count and by an approximate byte budget, with a per-entry TTL.
+
+Concurrent identical requests are coalesced (single-flight): the first caller
+runs the pipeline and later callers wait for its result instead of issuing
+their own embedding and Qdrant calls. Waiting works across threads and event
+loops because the shared result is a :class:`concurrent.futures.Future`.
+
+Memory writes call :func:`invalidate_user`, which drops the user's entries and
+bumps a per-user generation so a run that started before the write does not
+store its now-stale result. Generations are drawn from one increasing counter
+and only the most recently bumped users are remembered; a forgotten user reads
+the highest generation evicted so far, which no run that is still in flight
+can hold.
+
+Configuration:
+
+- ``RETRIEVE_CACHE_TTL_SECONDS``: entry lifetime (default 30); ``0`` disables
+  caching and single-flight.
+- ``RETRIEVE_CACHE_MAX``: maximum number of entries (default 128).
+- ``RETRIEVE_CACHE_MAX_BYTES``: approximate memory cap (default 8 MiB).
+- ``RETRIEVE_SINGLE_FLIGHT_TIMEOUT_S``: how long a follower waits for the
+  in-flight run before computing on its own (default 10).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from ..metrics import (
+    RETRIEVAL_CACHE_BYTES,
+    RETRIEVAL_CACHE_EVICTIONS,
+    RETRIEVAL_CACHE_REQUESTS,
+)
+
+logger = logging.getLogger(__name__)
+
+CacheKey = tuple[str, str, str | None, str, str]
+Result = tuple[list[str], list[dict[str, Any]]]
+
+_DEFAULT_TTL_S = 30.0
+_DEFAULT_MAX_ENTRIES = 128
+_DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+_DEFAULT_FLIGHT_TIMEOUT_S = 10.0
+_DEFAULT_MAX_GENERATIONS = 4096
+
+
+def _estimate_bytes(texts: list[str], trace: list[dict[str, Any]]) -> int:
+    size = sum(len(t.encode("utf-8", "ignore")) for t in texts)
+    try:
+        size += len(json.dumps(trace, default=str))
+    except Exception:
+        size += 64 * len(trace)
+    return size + 256  # key and container overhead
+
+
+def _inc(result: str, n: int = 1) -> None:
+    try:
+        RETRIEVAL_CACHE_REQUESTS.labels(result).inc(n)
+    except Exception:
+        pass
+
+
+@dataclass
+class _Entry:
+    texts: list[str]
+    trace: list[dict[str, Any]]
+    stored_at: float
+    size: int
+
+
+class RetrievalCache:
+    """LRU + TTL cache of pipeline results with single-flight coalescing."""
+
+    def __init__(
+        self,
+        *,
+        ttl_s: float = _DEFAULT_TTL_S,
+        max_entries: int = _DEFAULT_MAX_ENTRIES,
+        max_bytes: int = _DEFAULT_MAX_BYTES,
+        flight_timeout_s: float = _DEFAULT_FLIGHT_TIMEOUT_S,
+        max_generations: int = _DEFAULT_MAX_GENERATIONS,
+    ) -> None:
+        self.ttl_s = float(ttl_s)
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(0, int(max_bytes))
+        self.flight_timeout_s = float(flight_timeout_s)
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[CacheKey, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._inflight: dict[CacheKey, concurrent.futures.Future] = {}
+        self.max_generations = max(1, int(max_generations))
+        self._generations: OrderedDict[str, int] = OrderedDict()
+        self._epoch = 0
+        self._generation_floor = 0
+
+    # ------------------------------------------------------------------ lookups
+    def get(self, key: CacheKey) -> tuple[list[str], list[dict[str, Any]], float] | None:
+        """Return ``(texts, trace, age_s)`` for a fresh entry, else ``None``."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry.stored_at > self.ttl_s:
+                self._remove_locked(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            _inc("miss")
+            return None
+        _inc("hit")
+        return list(entry.texts), list(entry.trace), now - entry.stored_at
+
+    def put(
+        self,
+        key: CacheKey,
+        texts: list[str],
+        trace: list[dict[str, Any]],
+        *,
+        generation: int | None = None,
+    ) -> bool:
+        """Store a result; skipped when the user's memories changed meanwhile."""
+        size = _estimate_bytes(texts, trace)
+        if self.max_bytes and size > self.max_bytes:
+            return False
+        evicted = 0
+        with self._lock:
+            if generation is not None and self._generation_locked(key[0]) != generation:
+                return False
+            if key in self._entries:
+                self._remove_locked(key)
+            self._entries[key] = _Entry(list(texts), list(trace), time.time(), size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes and self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._entries))
+                self._remove_locked(oldest)
+                evicted += 1
+            total = self._bytes
+        if evicted:
+            try:
+                RETRIEVAL_CACHE_EVICTIONS.inc(evicted)
+            except Exception:
+                pass
+        RETRIEVAL_CACHE_BYTES.set(total)
+        return True
+
+    def _remove_locked(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    # ------------------------------------------------------------- invalidation
+    def _generation_locked(self, uid: str) -> int:
+        return self._generations.get(uid, self._generation_floor)
+
+    def generation(self, user_id: str) -> int:
+        with self._lock:
+            return self._generation_locked(str(user_id))
+
+    def invalidate_user(self, user_id: str) -> int:
+        """Drop every entry for ``user_id``; returns the number removed."""
+        uid = str(user_id)
+        with self._lock:
+            self._epoch += 1
+            self._generations[uid] = self._epoch
+            self._generations.move_to_end(uid)
+            while len(self._generations) > self.max_generations:
+                _, oldest = self._generations.popitem(last=False)
+                self._generation_floor = max(self._generation_floor, oldest)
+            victims = [k for k in self._entries if k[0] == uid]
+            for k in victims:
+                self._remove_locked(k)
+            total = self._bytes
+        RETRIEVAL_CACHE_BYTES.set(total)
+        return len(victims)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        RETRIEVAL_CACHE_BYTES.set(0)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    # ------------------------------------------------------------ single-flight
+    def _join(self, key: CacheKey) -> tuple[concurrent.futures.Future, bool]:
+        """Return the in-flight future for ``key`` and whether we lead it."""
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is not None:
+                return fut, False
+            fut = concurrent.futures.Future()
+            self._inflight[key] = fut
+            return fut, True
+
+    def _complete(
+        self,
+        key: CacheKey,
+        fut: concurrent.futures.Future,
+        *,
+        result: Result | None = None,
+        error: BaseException | None = None,
+        generation: int,
+    ) -> None:
+        if error is None and result is not None:
+            self.put(key, result[0], result[1], generation=generation)
+        with self._lock:
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(result)
+
+    @staticmethod
+    def _shared(result: Result) -> Result:
+        texts, trace = result
+        return list(texts), list(trace) + [{"event": "single_flight", "meta": {}}]
+
+    def run_once(self, key: CacheKey, compute: Callable[[], Result]) -> Result:
+        """Run ``compute`` unless an identical run is already in flight."""
+        fut, leader = self._join(key)
+        if not leader:
+            try:
+                asyncio.get_running_loop()
+                in_loop = True
+            except RuntimeError:
+                in_loop = False
+            # Blocking an event loop thread on a leader that may be scheduled
+            # on that same loop would deadlock, so compute independently.
+            if not in_loop:
+                try:
+                    res = fut.result(timeout=self.flight_timeout_s)
+                    _inc("coalesced")
+                    return self._shared(res)
+                except Exception:
+                    pass
+            return compute()
+        generation = self.generation(key[0])
+        try:
+            result = compute()
+        except BaseException as e:
+            self._complete(key, fut, error=e, generation=generation)
+            raise
+        self._complete(key, fut, result=result, generation=generation)
+        return result
+
+    async def arun_once(
+        self, key: CacheKey, compute: Callable[[], Awaitable[Result]]
+    ) -> Result:
+        """Async counterpart of :meth:`run_once`."""
+        fut, leader = self._join(key)
+        if not leader:
+            try:
+                res = await asyncio.wait_for(
+                    asyncio.shield(asyncio.wrap_future(fut)), self.flight_timeout_s
+                )
+                _inc("coalesced")
+                return self._shared(res)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                return await compute()
+        generation = self.generation(key[0])
+        try:
+            result = await compute()
+        except BaseException as e:
+            self._complete(key, fut, error=e, generation=generation)
+            raise
+        self._complete(key, fut, result=result, generation=generation)
+        return result
+
+
+_cache: RetrievalCache | None = None
+_cache_lock = threading.Lock()
+
+
+def _settings() -> tuple[float, int, int, float]:
+    def _num(name: str, default: float) -> float:
+        try:
+            return float(os.getenv(name, str(default)) or 0)
+        except ValueError:
+            return default
+
+    return (
+        _num("RETRIEVE_CACHE_TTL_SECONDS", _DEFAULT_TTL_S),
+        int(_num("RETRIEVE_CACHE_MAX", _DEFAULT_MAX_ENTRIES)),
+        int(_num("RETRIEVE_CACHE_MAX_BYTES", _DEFAULT_MAX_BYTES)),
+        _num("RETRIEVE_SINGLE_FLIGHT_TIMEOUT_S", _DEFAULT_FLIGHT_TIMEOUT_S),
+    )
+
+
+def get_retrieval_cache() -> RetrievalCache | None:
+    """Return the process-wide cache, or ``None`` when the TTL is 0."""
+    global _cache
+    ttl, max_entries, max_bytes, timeout = _settings()
+    if ttl <= 0:
+        return None
+    cache = _cache
+    if cache is not None:
+        # Settings are re-read so operators (and tests) can tune them live.
+        cache.ttl_s = ttl
+        cache.max_entries = max(1, max_entries)
+        cache.max_bytes = max(0, max_bytes)
+        cache.flight_timeout_s = timeout
+        return cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = RetrievalCache(
+                ttl_s=ttl,
+                max_entries=max_entries,
+                max_bytes=max_bytes,
+                flight_timeout_s=timeout,
+            )
+        return _cache
+
+
+def invalidate_user(user_id: str) -> None:
+    """Drop cached retrieval results for ``user_id`` after a memory write."""
+    cache = _cache
+    if cache is None or not user_id:
+        return
+    try:
+        removed = cache.invalidate_user(user_id)
+    except Exception:
+        return
+    if removed:
+        logger.debug("retrieval.cache_invalidated entries=%d", removed)
+
+
+def _reset_retrieval_cache_for_tests() -> None:  # pragma: no cover - test helper
+    global _cache
+    with _cache_lock:
+        _cache = None
+
+
+__all__ = ["RetrievalCache", "get_retrieval_cache", "invalidate_user"]
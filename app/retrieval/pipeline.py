@@ -5,6 +5,6 @@ This module provides the main retrieval pipeline functionality.
 For backward compatibility, it imports the implementation from pipeline_legacy.
 """
 
-from .pipeline_legacy import run_pipeline
+from .pipeline_legacy import arun_pipeline, run_pipeline
 
-__all__ = ["run_pipeline"]
+__all__ = ["run_pipeline", "arun_pipeline"]
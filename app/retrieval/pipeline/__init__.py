@@ -20,6 +20,7 @@ else:  # pragma: no cover - defensive
     raise ImportError("Failed to load retrieval pipeline implementation")
 
 run_pipeline = _mod.run_pipeline
+arun_pipeline = _mod.arun_pipeline
 
 
 def run_retrieval(q: str, user_id: str, k: int | None = None, **kwargs):
@@ -35,4 +36,4 @@ def run_retrieval(q: str, user_id: str, k: int | None = None, **kwargs):
     )
 
 
-__all__ = ["run_pipeline", "run_retrieval"]
+__all__ = ["run_pipeline", "arun_pipeline", "run_retrieval"]
@@ -1,15 +1,18 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 import time
+from dataclasses import dataclass
 from typing import Any
 
-from ..embeddings import embed_sync
+from ..embeddings import embed, embed_sync
 from ..otel_utils import start_span
 from ..telemetry import hash_user_id
 from ..token_budgeter import _table as _intent_table
-from .qdrant_hybrid import dense_search, sparse_search
+from .cache import CacheKey, RetrievalCache, get_retrieval_cache
+from .qdrant_hybrid import adense_search, asparse_search, dense_search, sparse_search
 from .reranker import hosted_rerank_passthrough, local_rerank
 from .utils import (
     RetrievedItem,
@@ -23,18 +26,22 @@ from .utils import (
 
 logger = logging.getLogger(__name__)
 
-# ---------------------------------------------------------------------------
-# Lightweight in-process cache for repeated queries within a short TTL
-# ---------------------------------------------------------------------------
-_CACHE: dict[
-    tuple[str, str, str | None, str], tuple[list[str], list[dict[str, Any]], float]
-] = {}
-
 
 def _normalize_query(q: str) -> str:
     return (q or "").strip().lower()
 
 
+def _cache_key(
+    user_id: str,
+    query: str,
+    intent: str | None,
+    collection: str,
+    extra_filter: dict[str, Any] | None,
+) -> CacheKey:
+    filt = repr(sorted(extra_filter.items())) if extra_filter else ""
+    return (str(user_id), _normalize_query(query), intent, str(collection), filt)
+
+
 def _budgets_for_intent(intent: str | None) -> tuple[int, int, int]:
     """Return (k_dense, k_sparse, token_budget) based on task class/intent."""
     max_in, _max_out = _intent_table(intent or "chat")
@@ -48,18 +55,41 @@ def _budgets_for_intent(intent: str | None) -> tuple[int, int, int]:
     return k_dense, k_sparse, token_budget
 
 
-def run_pipeline(
+@dataclass
+class _PipelineRun:
+    """State carried from the cache/budget stage to the ranking stages."""
+
+    user_id: str
+    query: str
+    intent: str | None
+    collection: str
+    explain: bool
+    trace: list[dict[str, Any]]
+    key: CacheKey
+    cache: RetrievalCache | None
+    kd: int
+    ks: int
+    token_budget: int
+
+
+def _with_vectors() -> bool:
+    # Ask Qdrant to return stored vectors so MMR and the local rerank reuse
+    # them; the query is embedded exactly once per run.
+    return os.getenv("RETRIEVE_WITH_VECTORS", "1").lower() in {"1", "true", "yes"}
+
+
+def _begin_pipeline(
     *,
     user_id: str,
     query: str,
     intent: str | None,
     collection: str,
-    explain: bool = False,
-    extra_filter: dict[str, Any] | None = None,
-) -> tuple[list[str], list[dict[str, Any]]]:
-    """Execute the end-to-end retrieval pipeline and return (texts, trace).
+    explain: bool,
+    extra_filter: dict[str, Any] | None,
+) -> _PipelineRun | tuple[list[str], list[dict[str, Any]]]:
+    """Log the start, serve cache hits and compute budgets.
 
-    Trace contains compact events with reasons and intermediate sizes/scores.
+    Returns the cached ``(texts, trace)`` on a hit, otherwise the run state.
     """
 
     trace: list[dict[str, Any]] = []
@@ -79,16 +109,14 @@ def run_pipeline(
     except Exception:
         pass
     # Cache check
-    cache_ttl = float(os.getenv("RETRIEVE_CACHE_TTL_SECONDS", "0") or 0)
-    cache_max = int(os.getenv("RETRIEVE_CACHE_MAX", "128"))
-    key = (str(user_id), _normalize_query(query), intent, str(collection))
-    now = time.time()
-    if cache_ttl > 0:
-        cached = _CACHE.get(key)
-        if cached and now - cached[2] <= cache_ttl:
-            texts, trace_cached, _ts = cached
-            trace_cached = list(trace_cached) + [
-                {"event": "cache_hit", "meta": {"age_s": round(now - _ts, 3)}}
+    cache = get_retrieval_cache()
+    key = _cache_key(user_id, query, intent, collection, extra_filter)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            texts, trace_cached, age = cached
+            trace_cached = trace_cached + [
+                {"event": "cache_hit", "meta": {"age_s": round(age, 3)}}
             ]
             try:
                 logger.info(
@@ -100,14 +128,14 @@ def run_pipeline(
                             ),
                             "intent": (intent or ""),
                             "collection": str(collection),
-                            "age_s": round(now - _ts, 3),
+                            "age_s": round(age, 3),
                             "texts": len(texts),
                         }
                     },
                 )
             except Exception:
                 pass
-            return list(texts), trace_cached
+            return texts, trace_cached
     kd, ks, token_budget = _budgets_for_intent(intent)
     trace.append(
         {
@@ -121,43 +149,42 @@ def run_pipeline(
         }
     )
 
-    # Hybrid search first pass
-    t0 = time.perf_counter()
-    qvec = embed_sync(query)
-    t_embed = (time.perf_counter() - t0) * 1000.0
-    dense = []
-    sparse = []
-    with start_span(
-        "vector.qdrant.search", {"k": kd, "filter": str(extra_filter or {})}
-    ):
-        t1 = time.perf_counter()
-        try:
-            dense = dense_search(
-                collection=collection,
-                user_id=user_id,
-                query_vector=qvec,
-                limit=kd,
-                extra_filter=extra_filter,
-            )
-        except Exception:
-            dense = []
-        t_vec = (time.perf_counter() - t1) * 1000.0
-    with start_span(
-        "vector.qdrant.search",
-        {"k": ks, "filter": str(extra_filter or {}), "sparse": True},
-    ):
-        t2 = time.perf_counter()
-        try:
-            sparse = sparse_search(
-                collection=collection,
-                user_id=user_id,
-                query=query,
-                limit=ks,
-                extra_filter=extra_filter,
-            )
-        except Exception:
-            sparse = []
-        t_sparse = (time.perf_counter() - t2) * 1000.0
+    return _PipelineRun(
+        user_id=user_id,
+        query=query,
+        intent=intent,
+        collection=collection,
+        explain=explain,
+        trace=trace,
+        key=key,
+        cache=cache,
+        kd=kd,
+        ks=ks,
+        token_budget=token_budget,
+    )
+
+
+def _finish_pipeline(
+    run: _PipelineRun,
+    *,
+    qvec: list[float],
+    dense: list[RetrievedItem],
+    sparse: list[RetrievedItem],
+    t_embed: float,
+    t_vec: float,
+    t_sparse: float,
+) -> tuple[list[str], list[dict[str, Any]]]:
+    """Fuse, diversify, rerank, boost and trim search results."""
+
+    user_id, query, intent, collection = (
+        run.user_id,
+        run.query,
+        run.intent,
+        run.collection,
+    )
+    explain, trace = run.explain, run.trace
+    kd, ks, token_budget = run.kd, run.ks, run.token_budget
+
     # Threshold filtering policy (best-effort)
     dense_thresh = float(os.getenv("RETRIEVE_DENSE_SIM_THRESHOLD", "0.75"))
     if dense:
@@ -230,7 +257,11 @@ def run_pipeline(
     mmr_lambda = float(os.getenv("RETRIEVE_MMR_LAMBDA", "0.6"))
     with start_span("retrieval.pipeline", {"mmr": True, "topk_pre": len(pool)}):
         diversified = mmr_diversify(
-            query, pool, k=min(mmr_k, len(pool)), lambda_=mmr_lambda
+            query,
+            pool,
+            k=min(mmr_k, len(pool)),
+            lambda_=mmr_lambda,
+            query_vector=qvec,
         )
     t_mmr = (time.perf_counter() - t4) * 1000.0
 
@@ -271,7 +302,7 @@ def run_pipeline(
     keep1 = int(os.getenv("RETRIEVE_CE_KEEP1", "24"))
     keep2 = int(os.getenv("RETRIEVE_CE_KEEP2", "12"))
     t5 = time.perf_counter()
-    after_local = local_rerank(query, diversified, keep=keep1)
+    after_local = local_rerank(query, diversified, keep=keep1, query_vector=qvec)
     t_rerank1 = (time.perf_counter() - t5) * 1000.0
     ce_scores = [float(it.metadata.get("local_ce", 0.0)) for it in after_local]
     ce_top = ce_scores[0] if ce_scores else 0.0
@@ -296,7 +327,7 @@ def run_pipeline(
     }
     t6 = time.perf_counter()
     after_hosted = (
-        hosted_rerank_passthrough(query, after_local, keep=keep2)
+        hosted_rerank_passthrough(query, after_local, keep=keep2, query_vector=qvec)
         if use_hosted
         else after_local[:keep2]
     )
@@ -435,15 +466,6 @@ def run_pipeline(
     if explain:
         trace.append({"event": "explain", "meta": {"items": explain_rows}})
 
-    # Cache store
-    if cache_ttl > 0:
-        try:
-            if len(_CACHE) >= cache_max:
-                # drop oldest entry (simple heuristic: pop arbitrary)
-                _CACHE.pop(next(iter(_CACHE)))
-            _CACHE[key] = (list(trimmed), list(trace), now)
-        except Exception:
-            pass
     try:
         logger.info(
             "retrieval.finish",
@@ -465,4 +487,183 @@ def run_pipeline(
     return trimmed, trace
 
 
-__all__ = ["run_pipeline"]
+def run_pipeline(
+    *,
+    user_id: str,
+    query: str,
+    intent: str | None,
+    collection: str,
+    explain: bool = False,
+    extra_filter: dict[str, Any] | None = None,
+) -> tuple[list[str], list[dict[str, Any]]]:
+    """Execute the end-to-end retrieval pipeline and return (texts, trace).
+
+    Trace contains compact events with reasons and intermediate sizes/scores.
+    Identical concurrent calls share one run when the result cache is enabled.
+    """
+
+    run = _begin_pipeline(
+        user_id=user_id,
+        query=query,
+        intent=intent,
+        collection=collection,
+        explain=explain,
+        extra_filter=extra_filter,
+    )
+    if isinstance(run, tuple):
+        return run
+    if run.cache is None:
+        return _search_and_rank(run, extra_filter)
+    return run.cache.run_once(run.key, lambda: _search_and_rank(run, extra_filter))
+
+
+def _search_and_rank(
+    run: _PipelineRun, extra_filter: dict[str, Any] | None
+) -> tuple[list[str], list[dict[str, Any]]]:
+    user_id, query, collection = run.user_id, run.query, run.collection
+    kd, ks = run.kd, run.ks
+
+    # Hybrid search first pass (sequential)
+    with_vectors = _with_vectors()
+    t0 = time.perf_counter()
+    qvec = embed_sync(query)
+    t_embed = (time.perf_counter() - t0) * 1000.0
+    dense = []
+    sparse = []
+    with start_span(
+        "vector.qdrant.search", {"k": kd, "filter": str(extra_filter or {})}
+    ):
+        t1 = time.perf_counter()
+        try:
+            dense = dense_search(
+                collection=collection,
+                user_id=user_id,
+                query_vector=qvec,
+                limit=kd,
+                extra_filter=extra_filter,
+                with_vectors=with_vectors,
+            )
+        except Exception:
+            dense = []
+        t_vec = (time.perf_counter() - t1) * 1000.0
+    with start_span(
+        "vector.qdrant.search",
+        {"k": ks, "filter": str(extra_filter or {}), "sparse": True},
+    ):
+        t2 = time.perf_counter()
+        try:
+            sparse = sparse_search(
+                collection=collection,
+                user_id=user_id,
+                query=query,
+                limit=ks,
+                extra_filter=extra_filter,
+                with_vectors=with_vectors,
+            )
+        except Exception:
+            sparse = []
+        t_sparse = (time.perf_counter() - t2) * 1000.0
+
+    return _finish_pipeline(
+        run,
+        qvec=qvec,
+        dense=dense,
+        sparse=sparse,
+        t_embed=t_embed,
+        t_vec=t_vec,
+        t_sparse=t_sparse,
+    )
+
+
+async def arun_pipeline(
+    *,
+    user_id: str,
+    query: str,
+    intent: str | None,
+    collection: str,
+    explain: bool = False,
+    extra_filter: dict[str, Any] | None = None,
+) -> tuple[list[str], list[dict[str, Any]]]:
+    """Async variant of :func:`run_pipeline` with concurrent hybrid search.
+
+    Dense and sparse searches are issued together on the pooled async Qdrant
+    client, so search latency is max(dense, sparse) rather than their sum.
+    The CPU-bound ranking stages run in a worker thread.
+    """
+
+    run = _begin_pipeline(
+        user_id=user_id,
+        query=query,
+        intent=intent,
+        collection=collection,
+        explain=explain,
+        extra_filter=extra_filter,
+    )
+    if isinstance(run, tuple):
+        return run
+    if run.cache is None:
+        return await _asearch_and_rank(run, extra_filter)
+    return await run.cache.arun_once(
+        run.key, lambda: _asearch_and_rank(run, extra_filter)
+    )
+
+
+async def _asearch_and_rank(
+    run: _PipelineRun, extra_filter: dict[str, Any] | None
+) -> tuple[list[str], list[dict[str, Any]]]:
+    user_id, query, collection = run.user_id, run.query, run.collection
+    kd, ks = run.kd, run.ks
+    with_vectors = _with_vectors()
+
+    t0 = time.perf_counter()
+    qvec = await embed(query)
+    t_embed = (time.perf_counter() - t0) * 1000.0
+
+    async def _timed(coro) -> tuple[list[RetrievedItem], float]:
+        t = time.perf_counter()
+        try:
+            items = await coro
+        except Exception:
+            items = []
+        return items, (time.perf_counter() - t) * 1000.0
+
+    with start_span(
+        "vector.qdrant.search",
+        {"k": kd + ks, "filter": str(extra_filter or {}), "concurrent": True},
+    ):
+        (dense, t_vec), (sparse, t_sparse) = await asyncio.gather(
+            _timed(
+                adense_search(
+                    collection=collection,
+                    user_id=user_id,
+                    query_vector=qvec,
+                    limit=kd,
+                    extra_filter=extra_filter,
+                    with_vectors=with_vectors,
+                )
+            ),
+            _timed(
+                asparse_search(
+                    collection=collection,
+                    user_id=user_id,
+                    query=query,
+                    limit=ks,
+                    extra_filter=extra_filter,
+                    with_vectors=with_vectors,
+                )
+            ),
+        )
+
+    return await asyncio.to_thread(
+        _finish_pipeline,
+        run,
+        qvec=qvec,
+        dense=dense,
+        sparse=sparse,
+        t_embed=t_embed,
+        t_vec=t_vec,
+        t_sparse=t_sparse,
+    )
+
+
+__all__ = ["run_pipeline", "arun_pipeline"]
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 import os
+import threading
 from typing import Any
 
 try:  # pragma: no cover - optional dependency
@@ -10,16 +13,92 @@ except Exception:  # pragma: no cover
     QdrantClient = None  # type: ignore
     Filter = FieldCondition = MatchValue = object  # type: ignore
 
+try:  # pragma: no cover - available in qdrant-client >= 1.6
+    from qdrant_client import AsyncQdrantClient
+except Exception:  # pragma: no cover
+    AsyncQdrantClient = None  # type: ignore
+
+from ..utils.async_clients import aclose_client, retire_client
 from .utils import RetrievedItem
 
+logger = logging.getLogger(__name__)
+
+# Clients are long-lived and shared so HTTP keep-alive / gRPC channels are
+# reused across requests. Each cache entry remembers the settings it was built
+# with and is rebuilt when QDRANT_* env changes (tests, admin reloads).
+_SYNC_CLIENT: tuple[tuple[str, str, bool], Any] | None = None
+_ASYNC_CLIENT: tuple[tuple[str, str, bool], asyncio.AbstractEventLoop, Any] | None = None
+_client_lock = threading.Lock()
+
+
+def _client_settings() -> tuple[str, str, bool]:
+    return (
+        os.getenv("QDRANT_URL", "http://localhost:6333"),
+        os.getenv("QDRANT_API_KEY", ""),
+        os.getenv("QDRANT_PREFER_GRPC", "0").lower() in {"1", "true", "yes"},
+    )
+
 
 def _client() -> QdrantClient:  # type: ignore[name-defined]
+    """Return the shared sync client, creating it on first use."""
+    global _SYNC_CLIENT
     if QdrantClient is None:
         raise RuntimeError("qdrant-client not installed")
-    return QdrantClient(
-        url=os.getenv("QDRANT_URL", "http://localhost:6333"),
-        api_key=os.getenv("QDRANT_API_KEY", ""),
-    )
+    settings = _client_settings()
+    cached = _SYNC_CLIENT
+    if cached is not None and cached[0] == settings:
+        return cached[1]
+    with _client_lock:
+        if _SYNC_CLIENT is None or _SYNC_CLIENT[0] != settings:
+            url, api_key, prefer_grpc = settings
+            old, _SYNC_CLIENT = _SYNC_CLIENT, (
+                settings,
+                QdrantClient(url=url, api_key=api_key, prefer_grpc=prefer_grpc),
+            )
+            if old is not None:
+                _close_sync(old[1])
+        return _SYNC_CLIENT[1]
+
+
+def _close_sync(client: Any) -> None:
+    try:
+        client.close()
+    except Exception:
+        logger.debug("qdrant client close failed", exc_info=True)
+
+
+def _async_client() -> Any:
+    """Return the shared async client bound to the running event loop."""
+    global _ASYNC_CLIENT
+    if AsyncQdrantClient is None:
+        raise RuntimeError("qdrant-client async support not installed")
+    settings = _client_settings()
+    loop = asyncio.get_running_loop()
+    cached = _ASYNC_CLIENT
+    if cached is not None and cached[0] == settings and cached[1] is loop:
+        return cached[2]
+    url, api_key, prefer_grpc = settings
+    client = AsyncQdrantClient(url=url, api_key=api_key, prefer_grpc=prefer_grpc)
+    _ASYNC_CLIENT = (settings, loop, client)
+    if cached is not None:
+        # Release the replaced client's connection pool on its own loop
+        retire_client(cached[1], cached[2], "qdrant")
+    return client
+
+
+async def close_clients() -> None:
+    """Close the shared sync and async clients (application shutdown)."""
+    global _SYNC_CLIENT, _ASYNC_CLIENT
+    with _client_lock:
+        sync, _SYNC_CLIENT = _SYNC_CLIENT, None
+    if sync is not None:
+        _close_sync(sync[1])
+    cached, _ASYNC_CLIENT = _ASYNC_CLIENT, None
+    if cached is not None:
+        if cached[1] is asyncio.get_running_loop():
+            await aclose_client(cached[2], "qdrant")
+        else:
+            retire_client(cached[1], cached[2], "qdrant")
 
 
 def _payload_filter(user_id: str, extra: dict[str, Any] | None = None) -> Any:
@@ -32,6 +111,19 @@ def _payload_filter(user_id: str, extra: dict[str, Any] | None = None) -> Any:
     return Filter(must=conditions)  # type: ignore[call-arg]
 
 
+def _point_vector(p: Any) -> list[float] | None:
+    """Return the dense vector attached to a scored point, if any.
+
+    Named-vector collections return a mapping; the first dense entry is used.
+    """
+    vec = getattr(p, "vector", None)
+    if isinstance(vec, dict):
+        vec = next((v for v in vec.values() if isinstance(v, list)), None)
+    if isinstance(vec, list) and vec:
+        return [float(x) for x in vec]
+    return None
+
+
 def _to_items(points: list[Any]) -> list[RetrievedItem]:
     items: list[RetrievedItem] = []
     for p in points or []:
@@ -54,6 +146,7 @@ def _to_items(points: list[Any]) -> list[RetrievedItem]:
                     "topic": payload.get("topic"),
                     **payload,
                 },
+                vector=_point_vector(p),
             )
         )
     return items
@@ -66,6 +159,7 @@ def dense_search(
     query_vector: list[float],
     limit: int,
     extra_filter: dict[str, Any] | None = None,
+    with_vectors: bool = False,
 ) -> list[RetrievedItem]:
     c = _client()
     f = _payload_filter(user_id, extra_filter)
@@ -74,8 +168,12 @@ def dense_search(
         query_vector=query_vector,
         limit=limit,
         query_filter=f,
+        with_vectors=with_vectors,
     )
-    items = _to_items(res)
+    return _keep_dense(_to_items(res))
+
+
+def _keep_dense(items: list[RetrievedItem]) -> list[RetrievedItem]:
     # Enforce keep threshold: sim>=THRESH (dist<=1-THRESH). Default 0.75
     try:
         thresh = float(os.getenv("RETRIEVE_DENSE_SIM_THRESHOLD", "0.75"))
@@ -93,6 +191,7 @@ def sparse_search(
     query: str,
     limit: int,
     extra_filter: dict[str, Any] | None = None,
+    with_vectors: bool = False,
 ) -> list[RetrievedItem]:
     """Sparse search using Qdrant's full-text/BM25-like payload index via recommend/search points.
 
@@ -105,11 +204,92 @@ def sparse_search(
         # Prefer the dedicated text search API when available (qdrant >= 1.7)
         f = _payload_filter(user_id, extra_filter)
         res = c.search(
-            collection_name=collection, query_text=query, limit=limit, query_filter=f
+            collection_name=collection,
+            query_text=query,
+            limit=limit,
+            query_filter=f,
+            with_vectors=with_vectors,
+        )
+        return _to_items(res)
+    except Exception:
+        return []
+
+
+async def adense_search(
+    *,
+    collection: str,
+    user_id: str,
+    query_vector: list[float],
+    limit: int,
+    extra_filter: dict[str, Any] | None = None,
+    with_vectors: bool = False,
+) -> list[RetrievedItem]:
+    """Async :func:`dense_search` on the shared async client.
+
+    Falls back to running the sync search in a thread when the installed
+    qdrant-client has no async client.
+    """
+
+    if AsyncQdrantClient is None:
+        return await asyncio.to_thread(
+            dense_search,
+            collection=collection,
+            user_id=user_id,
+            query_vector=query_vector,
+            limit=limit,
+            extra_filter=extra_filter,
+            with_vectors=with_vectors,
+        )
+    c = _async_client()
+    res = await c.search(
+        collection_name=collection,
+        query_vector=query_vector,
+        limit=limit,
+        query_filter=_payload_filter(user_id, extra_filter),
+        with_vectors=with_vectors,
+    )
+    return _keep_dense(_to_items(res))
+
+
+async def asparse_search(
+    *,
+    collection: str,
+    user_id: str,
+    query: str,
+    limit: int,
+    extra_filter: dict[str, Any] | None = None,
+    with_vectors: bool = False,
+) -> list[RetrievedItem]:
+    """Async :func:`sparse_search`; returns an empty list when unavailable."""
+
+    if AsyncQdrantClient is None:
+        return await asyncio.to_thread(
+            sparse_search,
+            collection=collection,
+            user_id=user_id,
+            query=query,
+            limit=limit,
+            extra_filter=extra_filter,
+            with_vectors=with_vectors,
+        )
+    try:
+        c = _async_client()
+        res = await c.search(
+            collection_name=collection,
+            query_text=query,
+            limit=limit,
+            query_filter=_payload_filter(user_id, extra_filter),
+            with_vectors=with_vectors,
         )
         return _to_items(res)
     except Exception:
         return []
 
 
-__all__ = ["dense_search", "sparse_search"]
+__all__ = [
+    "dense_search",
+    "sparse_search",
+    "adense_search",
+    "asparse_search",
+    "close_clients",
+]
@@ -13,6 +13,7 @@ except Exception:  # pragma: no cover
     PointStruct = object  # type: ignore
 
 from ..embeddings import embed_sync
+from .cache import invalidate_user
 from .qdrant_hybrid import _client as _q_client  # reuse URL/key loader
 
 
@@ -106,6 +107,7 @@ def upsert_claim(
             collection_name=col,
             points=[PointStruct(id=doc_id, vector=vec, payload=payload)],
         )
+        invalidate_user(user_id)
         return True
     except Exception:
         return False
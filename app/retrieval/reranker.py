@@ -1,17 +1,25 @@
 from __future__ import annotations
 
+import math
 from collections.abc import Iterable
 
 from ..embeddings import embed_sync
-from .utils import RetrievedItem
+from .utils import RetrievedItem, resolve_vectors
 
 
-def _cheap_cross_score(query: str, text: str) -> float:
+def _cheap_cross_score(
+    query: str,
+    text: str,
+    *,
+    q: list[float] | None = None,
+    d: list[float] | None = None,
+) -> float:
     # Heuristic cross-encoder proxy using cosine between query and doc embeddings,
     # lightly length-normalized to prefer concise passages.
-    q = embed_sync(query)
-    d = embed_sync(text)
-    import math
+    if q is None:
+        q = embed_sync(query)
+    if d is None:
+        d = embed_sync(text)
 
     dot = sum(x * y for x, y in zip(q, d, strict=False))
     nq = math.sqrt(sum(x * x for x in q)) or 1.0
@@ -24,26 +32,42 @@ def _cheap_cross_score(query: str, text: str) -> float:
 
 
 def local_rerank(
-    query: str, items: Iterable[RetrievedItem], keep: int
+    query: str,
+    items: Iterable[RetrievedItem],
+    keep: int,
+    *,
+    query_vector: list[float] | None = None,
 ) -> list[RetrievedItem]:
+    items = list(items)
+    if not items:
+        return []
+    q, docs = resolve_vectors(query, items, query_vector=query_vector)
     scored: list[tuple[float, RetrievedItem]] = []
-    for it in items:
-        s = _cheap_cross_score(query, it.text)
+    for it, d in zip(items, docs, strict=True):
+        s = _cheap_cross_score(query, it.text, q=q, d=d)
         scored.append((s, it))
     scored.sort(key=lambda x: x[0], reverse=True)
     out: list[RetrievedItem] = []
     for s, it in scored[: max(0, keep)]:
         md = dict(it.metadata or {})
         md["local_ce"] = float(s)
-        out.append(RetrievedItem(id=it.id, text=it.text, score=float(s), metadata=md))
+        out.append(
+            RetrievedItem(
+                id=it.id, text=it.text, score=float(s), metadata=md, vector=it.vector
+            )
+        )
     return out
 
 
 def hosted_rerank_passthrough(
-    query: str, items: Iterable[RetrievedItem], keep: int
+    query: str,
+    items: Iterable[RetrievedItem],
+    keep: int,
+    *,
+    query_vector: list[float] | None = None,
 ) -> list[RetrievedItem]:
     # Placeholder for a hosted cross-encoder; returns top-N by local score.
-    return local_rerank(query, items, keep)
+    return local_rerank(query, items, keep, query_vector=query_vector)
 
 
 __all__ = ["local_rerank", "hosted_rerank_passthrough"]
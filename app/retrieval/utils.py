@@ -4,10 +4,12 @@ import math
 import os
 import re
 from collections.abc import Iterable, Sequence
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any
 
-from ..embeddings import embed_sync
+import numpy as np
+
+from ..embeddings import embed_many_sync
 
 
 @dataclass
@@ -19,12 +21,17 @@ class RetrievedItem:
     - text: document text
     - score: base score from the originating retriever (higher is better)
     - metadata: payload with at least optional fields: created_at, source_tier, pinned, type, topic
+
+    Optional:
+    - vector: the stored embedding when the retriever returned it, so later
+      stages (MMR, local rerank) do not need to re-embed the text
     """
 
     id: str
     text: str
     score: float
     metadata: dict[str, Any]
+    vector: list[float] | None = field(default=None, repr=False)
 
 
 def reciprocal_rank_fusion(
@@ -48,16 +55,56 @@ def reciprocal_rank_fusion(
                 # shallow copy is fine; text/metadata reused
                 fused[item.id] = (item, contrib)
 
+    # Keep a stored vector from whichever ranking returned one
+    vectors: dict[str, list[float]] = {}
+    for ranking in rankings:
+        for item in ranking:
+            if item.vector is not None and item.id not in vectors:
+                vectors[item.id] = item.vector
+
     items = []
     for it, s in fused.values():
         md = dict(it.metadata or {})
         md["rrf_score"] = float(s)
-        items.append(RetrievedItem(id=it.id, text=it.text, score=float(s), metadata=md))
+        items.append(
+            RetrievedItem(
+                id=it.id,
+                text=it.text,
+                score=float(s),
+                metadata=md,
+                vector=vectors.get(it.id),
+            )
+        )
 
     items.sort(key=lambda x: x.score, reverse=True)
     return items
 
 
+def resolve_vectors(
+    query: str,
+    items: Sequence[RetrievedItem],
+    *,
+    query_vector: list[float] | None = None,
+) -> tuple[list[float], list[list[float]]]:
+    """Return ``(query_vector, item_vectors)`` embedding only what is missing.
+
+    Items carrying a stored ``vector`` reuse it; the query and any remaining
+    item texts are embedded together in a single batch call.
+    """
+
+    missing = [i for i, it in enumerate(items) if it.vector is None]
+    texts = [it.text for it in (items[i] for i in missing)]
+    if query_vector is None:
+        texts.insert(0, query)
+    embedded = embed_many_sync(texts) if texts else []
+    if query_vector is None:
+        query_vector, embedded = embedded[0], embedded[1:]
+    vecs: list[list[float]] = [it.vector for it in items]  # type: ignore[misc]
+    for i, v in zip(missing, embedded, strict=True):
+        vecs[i] = v
+    return query_vector, vecs
+
+
 def _tokenize(text: str) -> list[str]:
     return re.findall(r"[a-z0-9]+", (text or "").lower())
 
@@ -71,37 +118,32 @@ def _jaccard(a: Iterable[str], b: Iterable[str]) -> float:
     return float(inter) / float(union) if union else 0.0
 
 
-def mmr_diversify(
-    query: str,
-    items: Sequence[RetrievedItem],
-    *,
-    k: int,
-    lambda_: float = 0.6,
-) -> list[RetrievedItem]:
-    """Select a diverse subset using MMR over embeddings + lexical overlap.
-
-    Diversity is computed as the average of cosine distance in embedding space
-    and (1 - Jaccard overlap) over token sets.
-    """
+def _cos_sim(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b, strict=False))
+    na = math.sqrt(sum(x * x for x in a)) or 1.0
+    nb = math.sqrt(sum(y * y for y in b)) or 1.0
+    return dot / (na * nb)
 
-    if k <= 0 or not items:
-        return []
 
-    q_emb = embed_sync(query)
-    item_embs = [embed_sync(it.text) for it in items]
-    item_tokens = [_tokenize(it.text) for it in items]
+def _mmr_select_py(
+    q_emb: Sequence[float],
+    item_embs: Sequence[Sequence[float]],
+    item_tokens: Sequence[Sequence[str]],
+    scores: Sequence[float],
+    k: int,
+    lambda_: float,
+) -> list[int]:
+    """Reference pure-Python MMR selection.
 
-    def _cos_sim(a: list[float], b: list[float]) -> float:
-        dot = sum(x * y for x, y in zip(a, b, strict=False))
-        na = math.sqrt(sum(x * x for x in a)) or 1.0
-        nb = math.sqrt(sum(y * y for y in b)) or 1.0
-        return dot / (na * nb)
+    Used when item vectors have mismatched lengths (which the vectorized path
+    cannot stack) and as the baseline for equivalence tests and ``bench/mmr.py``.
+    """
 
     selected: list[int] = []
-    candidates: list[int] = list(range(len(items)))
+    candidates: list[int] = list(range(len(scores)))
 
     # Seed with the highest base score
-    first = max(candidates, key=lambda idx: items[idx].score)
+    first = max(candidates, key=lambda idx: scores[idx])
     selected.append(first)
     candidates.remove(first)
 
@@ -111,24 +153,117 @@ def mmr_diversify(
             # relevance: sim(query, doc)
             rel = _cos_sim(q_emb, item_embs[idx])
             # diversity: 1 - max(sim(doc, sel)) with embedding + lexical
-            if not selected:
-                div = 1.0
-            else:
-                emb_sims = [_cos_sim(item_embs[idx], item_embs[j]) for j in selected]
-                lex_overlaps = [
-                    _jaccard(item_tokens[idx], item_tokens[j]) for j in selected
-                ]
-                # combine similarities then convert to diversity (1 - sim)
-                sim = 0.5 * (max(emb_sims) if emb_sims else 0.0) + 0.5 * (
-                    max(lex_overlaps) if lex_overlaps else 0.0
-                )
-                div = 1.0 - sim
-            return lambda_ * rel + (1.0 - lambda_) * div
+            emb_sims = [_cos_sim(item_embs[idx], item_embs[j]) for j in selected]
+            lex_overlaps = [_jaccard(item_tokens[idx], item_tokens[j]) for j in selected]
+            # combine similarities then convert to diversity (1 - sim)
+            sim = 0.5 * max(emb_sims) + 0.5 * max(lex_overlaps)
+            return lambda_ * rel + (1.0 - lambda_) * (1.0 - sim)
 
         best = max(candidates, key=_mmr_score)
         selected.append(best)
         candidates.remove(best)
 
+    return selected
+
+
+def _mmr_select_np(
+    q_emb: Sequence[float],
+    item_embs: Sequence[Sequence[float]],
+    item_tokens: Sequence[Sequence[str]],
+    scores: Sequence[float],
+    k: int,
+    lambda_: float,
+) -> list[int]:
+    """Vectorized MMR selection equivalent to :func:`_mmr_select_py`.
+
+    The item×item cosine matrix is computed once. Running max-similarity to
+    the selected set (embedding and lexical) is updated with one column per
+    pick, so each round is O(n) NumPy work instead of O(n·|selected|) Python.
+    Lexical overlap stays exact Jaccard: token sets are interned to integer
+    ids once and intersection sizes for a picked item come from a bincount
+    over its tokens' posting lists.
+    """
+
+    n = len(scores)
+    emb = np.asarray(item_embs, dtype=np.float64)
+    norms = np.linalg.norm(emb, axis=1)
+    norms[norms == 0.0] = 1.0
+    unit = emb / norms[:, None]
+    q = np.asarray(q_emb, dtype=np.float64)
+    rel = unit @ (q / (float(np.linalg.norm(q)) or 1.0))
+    emb_sim = unit @ unit.T
+
+    vocab: dict[str, int] = {}
+    doc_tokens = [
+        np.fromiter(
+            {vocab.setdefault(t, len(vocab)) for t in toks}, dtype=np.intp
+        )
+        for toks in item_tokens
+    ]
+    sizes = np.array([len(t) for t in doc_tokens], dtype=np.float64)
+    postings: list[list[int]] = [[] for _ in range(len(vocab))]
+    for i, toks in enumerate(doc_tokens):
+        for t in toks:
+            postings[t].append(i)
+    postings_np = [np.asarray(p, dtype=np.intp) for p in postings]
+
+    def _jaccard_col(j: int) -> np.ndarray:
+        if not len(doc_tokens[j]):
+            return np.zeros(n)
+        hits = np.concatenate([postings_np[t] for t in doc_tokens[j]])
+        inter = np.bincount(hits, minlength=n).astype(np.float64)
+        union = sizes + sizes[j] - inter
+        out = np.zeros(n)
+        np.divide(inter, union, out=out, where=union > 0)
+        return out
+
+    first = int(np.argmax(np.asarray(scores, dtype=np.float64)))
+    selected = [first]
+    available = np.ones(n, dtype=bool)
+    available[first] = False
+    max_emb = emb_sim[:, first].copy()
+    max_lex = _jaccard_col(first)
+    relevance = lambda_ * rel
+
+    while len(selected) < min(k, n):
+        mmr = relevance + (1.0 - lambda_) * (1.0 - (0.5 * max_emb + 0.5 * max_lex))
+        mmr[~available] = -np.inf
+        best = int(np.argmax(mmr))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_emb, emb_sim[:, best], out=max_emb)
+        np.maximum(max_lex, _jaccard_col(best), out=max_lex)
+
+    return selected
+
+
+def mmr_diversify(
+    query: str,
+    items: Sequence[RetrievedItem],
+    *,
+    k: int,
+    lambda_: float = 0.6,
+    query_vector: list[float] | None = None,
+) -> list[RetrievedItem]:
+    """Select a diverse subset using MMR over embeddings + lexical overlap.
+
+    Diversity is computed as the average of cosine distance in embedding space
+    and (1 - Jaccard overlap) over token sets. Stored item vectors and a
+    precomputed ``query_vector`` are used when available.
+    """
+
+    if k <= 0 or not items:
+        return []
+
+    q_emb, item_embs = resolve_vectors(query, items, query_vector=query_vector)
+    item_tokens = [_tokenize(it.text) for it in items]
+    scores = [it.score for it in items]
+
+    dims = {len(v) for v in item_embs}
+    if len(dims) == 1 and dims == {len(q_emb)}:
+        selected = _mmr_select_np(q_emb, item_embs, item_tokens, scores, k, lambda_)
+    else:
+        selected = _mmr_select_py(q_emb, item_embs, item_tokens, scores, k, lambda_)
     return [items[i] for i in selected]
 
 
@@ -197,6 +332,7 @@ def truncate_to_token_budget(texts: list[str], *, max_tokens: int) -> list[str]:
 __all__ = [
     "RetrievedItem",
     "reciprocal_rank_fusion",
+    "resolve_vectors",
     "mmr_diversify",
     "time_decay_boost",
     "quality_boost",
@@ -0,0 +1,168 @@
+"""Time-bucketed rolling windows with mergeable quantile sketches.
+
+Hot-path recorders (``slos.record_api_request``, ``analytics.record_latency``)
+used to append raw samples to a list, re-filter it on every call and sort it
+for percentiles. ``RollingWindow`` instead keeps a fixed ring of per-minute
+buckets: recording touches a single bucket (O(1)) and evaluating a period
+merges only the buckets inside it (O(buckets)).
+
+Each bucket carries a count, a sum, named flag counters and a
+``QuantileSketch`` -- a DDSketch-style log-bucketed histogram with 1 %
+relative accuracy. Sketches merge by adding bin counts, so percentiles over
+any period come from merging per-minute sketches rather than sorting samples.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections.abc import Iterable
+
+_ALPHA = 0.01  # relative accuracy of quantile estimates
+_GAMMA = (1 + _ALPHA) / (1 - _ALPHA)
+_LOG_GAMMA = math.log(_GAMMA)
+# Values at or below this are counted in the zero bin
+_MIN_VALUE = 1e-9
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with bounded relative error."""
+
+    __slots__ = ("_bins", "_zero", "count", "sum", "min", "max")
+
+    def __init__(self) -> None:
+        self._bins: dict[int, int] = {}
+        self._zero = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if value <= _MIN_VALUE:
+            self._zero += 1
+            return
+        idx = math.ceil(math.log(value) / _LOG_GAMMA)
+        self._bins[idx] = self._bins.get(idx, 0) + 1
+
+    def merge(self, other: QuantileSketch) -> None:
+        if not other.count:
+            return
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._zero += other._zero
+        bins = self._bins
+        for idx, n in other._bins.items():
+            bins[idx] = bins.get(idx, 0) + n
+
+    def quantile(self, q: float) -> float:
+        """Nearest-rank quantile (``q`` in [0, 1]); 0.0 when empty."""
+        if not self.count:
+            return 0.0
+        rank = max(0, math.ceil(q * self.count) - 1)
+        if rank >= self.count - 1:
+            return self.max
+        seen = self._zero
+        if rank < seen:
+            return max(self.min, 0.0)
+        for idx in sorted(self._bins):
+            seen += self._bins[idx]
+            if rank < seen:
+                est = 2.0 * _GAMMA**idx / (_GAMMA + 1.0)
+                return min(max(est, self.min), self.max)
+        return self.max
+
+
+class _Bucket:
+    __slots__ = ("minute", "flags", "sketch")
+
+    def __init__(self, minute: int) -> None:
+        self.minute = minute
+        self.flags: dict[str, int] = {}
+        self.sketch = QuantileSketch()
+
+
+class WindowSummary:
+    """Merged view of the buckets in a period."""
+
+    __slots__ = ("flags", "sketch")
+
+    def __init__(self) -> None:
+        self.flags: dict[str, int] = {}
+        self.sketch = QuantileSketch()
+
+    @property
+    def count(self) -> int:
+        return self.sketch.count
+
+    @property
+    def mean(self) -> float:
+        return self.sketch.sum / self.sketch.count if self.sketch.count else 0.0
+
+    def flag(self, name: str) -> int:
+        return self.flags.get(name, 0)
+
+    def quantile(self, q: float) -> float:
+        return self.sketch.quantile(q)
+
+
+class RollingWindow:
+    """Ring of per-minute buckets covering the last ``span_s`` seconds.
+
+    Periods are resolved at minute granularity: a period includes the whole
+    bucket that contains its start.
+    """
+
+    def __init__(self, span_s: int, *, bucket_s: int = 60) -> None:
+        self.bucket_s = max(1, int(bucket_s))
+        self._size = max(1, math.ceil(span_s / self.bucket_s)) + 1
+        self._ring: list[_Bucket | None] = [None] * self._size
+        self._lock = threading.Lock()
+
+    def _slot(self, now: float) -> int:
+        return int(now // self.bucket_s)
+
+    def record(
+        self, value: float, *, flags: Iterable[str] = (), ts: float | None = None
+    ) -> None:
+        minute = self._slot(time.time() if ts is None else ts)
+        i = minute % self._size
+        with self._lock:
+            bucket = self._ring[i]
+            if bucket is None or bucket.minute != minute:
+                bucket = self._ring[i] = _Bucket(minute)
+            bucket.sketch.add(value)
+            for name in flags:
+                bucket.flags[name] = bucket.flags.get(name, 0) + 1
+
+    def summary(self, period_s: float, *, now: float | None = None) -> WindowSummary:
+        """Merge the buckets that fall within the last ``period_s`` seconds."""
+        now = time.time() if now is None else now
+        last = self._slot(now)
+        first = max(self._slot(now - period_s), last - self._size + 1)
+        out = WindowSummary()
+        with self._lock:
+            for minute in range(first, last + 1):
+                bucket = self._ring[minute % self._size]
+                if bucket is None or bucket.minute != minute:
+                    continue
+                out.sketch.merge(bucket.sketch)
+                for name, n in bucket.flags.items():
+                    out.flags[name] = out.flags.get(name, 0) + n
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ring = [None] * self._size
+
+
+__all__ = ["QuantileSketch", "RollingWindow", "WindowSummary"]
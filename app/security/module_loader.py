@@ -59,6 +59,13 @@ SAFE_UTILITY_MODULES = (
             "app.security.",  # For security utilities
             "app.auth",  # For auth module
             "app.home_assistant",  # For home assistant integration
+            # Shutdown closers resolved by app.startup._shutdown
+            "app.middleware.middleware_core",
+            "app.log_sink",
+            "app.retrieval.qdrant_hybrid",
+            "app.llama_integration",
+            "app.session_store",
+            "app.music.poller",
         }
     )
     | SAFE_STDLIB_MODULES
@@ -1178,7 +1178,7 @@ async def verify_token(request: Request, response: Response = None) -> None:  #
             from .session_store import SessionStoreUnavailable, get_session_store
 
             store = get_session_store()
-            identity = store.get_session_identity(token)
+            identity = await store.aget_session_identity(token)
         except SessionStoreUnavailable:
             # Outage: allow requests with Authorization header, but session-only protected routes may choose to 503
             identity = None
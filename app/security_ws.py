@@ -108,7 +108,7 @@ async def verify_ws(ws: WebSocket):
                 extract_token as _extract,
             )
             from .auth_core import (
-                resolve_session_identity as _resolve_sess,
+                aresolve_session_identity as _resolve_sess,
             )
 
             src, tok = _extract(ws)
@@ -117,7 +117,7 @@ async def verify_ws(ws: WebSocket):
                 token_source = "access_token_cookie"
             elif src == "session" and tok:
                 try:
-                    ident = _resolve_sess(tok)
+                    ident = await _resolve_sess(tok)
                 except Exception:
                     ident = None
                     session_outage = True
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import asyncio
+import heapq
 import json
 import logging
 import os
+import threading
 import time
+import weakref
+from collections import OrderedDict
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
@@ -11,8 +16,16 @@ from typing import Any
 
 from secrets import token_urlsafe
 
+from .utils.async_clients import aclose_client, retire_client
+
 logger = logging.getLogger(__name__)
 
+try:
+    from .metrics import SESSION_NEAR_CACHE_REQUESTS, SESSION_STORE_SWEPT
+except Exception:  # pragma: no cover - optional
+    SESSION_NEAR_CACHE_REQUESTS = None  # type: ignore
+    SESSION_STORE_SWEPT = None  # type: ignore
+
 # Base directory for session metadata and media
 SESSIONS_DIR = Path(
     os.getenv("SESSIONS_DIR", Path(__file__).parent.parent / "sessions")
@@ -46,6 +59,75 @@ class SessionStoreUnavailable(Exception):
     """Raised when the configured session store backend is unavailable."""
 
 
+_MAX_SESSION_TTL_S = 30 * 24 * 3600
+# Session ids published here are dropped from every worker's near cache
+INVALIDATION_CHANNEL = "session:invalidate"
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _entry_expires_at(entry: Any) -> float:
+    if isinstance(entry, tuple):
+        return float(entry[1])
+    if isinstance(entry, dict):
+        return float(entry.get("expires_at", 0))
+    return 0.0
+
+
+class _NearCache:
+    """Process-local session -> identity cache in front of Redis.
+
+    Entries live at most ``ttl_s`` seconds and never past the session's own
+    expiry. ``epoch`` advances on every invalidation so a lookup that raced a
+    revoke cannot put the revoked identity back.
+    """
+
+    def __init__(self, ttl_s: float, max_entries: int):
+        self.ttl_s = ttl_s
+        self.max_entries = max(1, max_entries)
+        # session_id -> (monotonic deadline, session expires_at, identity)
+        self._entries: OrderedDict[str, tuple[float, float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.epoch = 0
+
+    def get(self, session_id: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            deadline, expires_at, identity = entry
+            if deadline <= time.monotonic() or expires_at <= time.time():
+                del self._entries[session_id]
+                return None
+            return dict(identity)
+
+    def put(self, session_id: str, identity: dict, expires_at: float, epoch: int):
+        with self._lock:
+            if epoch != self.epoch:
+                return
+            self._entries[session_id] = (
+                time.monotonic() + self.ttl_s,
+                expires_at,
+                dict(identity),
+            )
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, session_id: str | None = None) -> None:
+        with self._lock:
+            self.epoch += 1
+            if session_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(session_id, None)
+
+
 class SessionCookieStore:
     """Store for mapping __session cookie IDs to access token JTIs.
 
@@ -53,15 +135,40 @@ class SessionCookieStore:
     Uses Redis if available, falls back to in-memory storage for development/testing.
 
     The session ID is always opaque (never a JWT) and maps to the JWT ID (JTI) from the access token.
+
+    With Redis, the ``a*`` methods use ``redis.asyncio`` so request handlers do
+    not block the event loop, and identity lookups are served from a short-TTL
+    near cache (``SESSION_NEAR_CACHE_TTL_S``, default 5s). Deletes and identity
+    changes are published on :data:`INVALIDATION_CHANNEL`; the near cache is
+    only consulted while this worker is subscribed, so a revoke elsewhere is
+    never masked by a cached identity. The in-memory backend drops expired
+    sessions from a background sweeper (``SESSION_SWEEP_INTERVAL_S``).
     """
 
     def __init__(self):
         self._redis_client = None
+        self._redis_url: str | None = None
+        # (event loop, redis.asyncio client); async clients are loop-bound
+        self._aredis: tuple[Any, Any] | None = None
         # In-memory fallback
         # session_id -> payload dict
         # Legacy entries may be stored as tuple (jti, expires_at)
         self._memory_store: dict[str, Any] = {}
+        # (expires_at, session_id) for the sweeper; pairs may be stale
+        self._expiry_heap: list[tuple[float, str]] = []
+        self._lock = threading.Lock()
+        ttl = _env_float("SESSION_NEAR_CACHE_TTL_S", 5.0)
+        self._near = (
+            _NearCache(ttl, int(_env_float("SESSION_NEAR_CACHE_MAX", 10_000)))
+            if ttl > 0
+            else None
+        )
+        self._subscriber: threading.Thread | None = None
+        self._pubsub = None
+        self._subscribed = threading.Event()
+        self._closed = threading.Event()
         self._init_redis()
+        _stores.add(self)
 
     def _init_redis(self):
         """Initialize Redis client if available."""
@@ -73,6 +180,7 @@ class SessionCookieStore:
                 self._redis_client = Redis.from_url(redis_url, decode_responses=True)
                 # Test connection
                 self._redis_client.ping()
+                self._redis_url = redis_url
                 logger.info("Session store using Redis backend")
             else:
                 logger.info("Session store using in-memory backend (no REDIS_URL)")
@@ -84,6 +192,155 @@ class SessionCookieStore:
         """Get Redis key for session."""
         return f"session:{session_id}"
 
+    def _async_client(self):
+        loop = asyncio.get_running_loop()
+        cached = self._aredis
+        if cached is not None and cached[0] is loop:
+            return cached[1]
+        from redis.asyncio import Redis as AsyncRedis
+
+        client = AsyncRedis.from_url(self._redis_url, decode_responses=True)
+        self._aredis = (loop, client)
+        if cached is not None:
+            # Release the previous loop's connection pool on that loop
+            retire_client(cached[0], cached[1], "session store redis")
+        return client
+
+    # -----------------------------
+    # Near cache and invalidation
+    # -----------------------------
+
+    def _near_cache(self) -> _NearCache | None:
+        near = self._near
+        if near is None or self._redis_client is None:
+            return None
+        if not self._subscribed.is_set():
+            self._ensure_subscriber()
+            return None
+        return near
+
+    def _ensure_subscriber(self) -> None:
+        if self._subscriber is not None or self._closed.is_set():
+            return
+        with self._lock:
+            if self._subscriber is not None:
+                return
+            self._subscriber = threading.Thread(
+                target=self._listen_invalidations,
+                name="session-invalidations",
+                daemon=True,
+            )
+        self._subscriber.start()
+
+    def _listen_invalidations(self) -> None:
+        near = self._near
+        assert near is not None
+        delay = 1.0
+        while not self._closed.is_set():
+            pubsub = None
+            try:
+                pubsub = self._redis_client.pubsub()
+                self._pubsub = pubsub
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                for msg in pubsub.listen():
+                    if self._closed.is_set():
+                        break
+                    kind = msg.get("type")
+                    if kind == "subscribe":
+                        self._subscribed.set()
+                        delay = 1.0
+                    elif kind == "message" and msg.get("data"):
+                        near.invalidate(msg["data"])
+            except Exception as e:
+                if not self._closed.is_set():
+                    logger.warning(
+                        "session_store.invalidation_listener_error",
+                        extra={"meta": {"error": str(e), "retry_s": delay}},
+                    )
+            finally:
+                # Revokes published while disconnected would be missed
+                self._subscribed.clear()
+                near.invalidate()
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            self._closed.wait(delay)
+            delay = min(delay * 2, 30.0)
+
+    def _lookup_near(self, session_id: str) -> tuple[_NearCache | None, int, dict | None]:
+        near = self._near_cache()
+        if near is None:
+            return None, 0, None
+        epoch = near.epoch
+        hit = near.get(session_id)
+        if SESSION_NEAR_CACHE_REQUESTS is not None:
+            SESSION_NEAR_CACHE_REQUESTS.labels("hit" if hit is not None else "miss").inc()
+        return near, epoch, hit
+
+    def _invalidate_local(self, session_id: str) -> None:
+        if self._near is not None:
+            self._near.invalidate(session_id)
+
+    def _publish_invalidation(self, session_id: str) -> None:
+        try:
+            self._redis_client.publish(INVALIDATION_CHANNEL, session_id)
+        except Exception as e:
+            # Other workers converge once their near cache entry expires
+            logger.warning(
+                "session_store.invalidation_publish_failed",
+                extra={"meta": {"error": str(e)}},
+            )
+
+    def _track_expiry(self, session_id: str, expires_at: float) -> None:
+        with self._lock:
+            heapq.heappush(self._expiry_heap, (float(expires_at), session_id))
+        _ensure_sweeper()
+
+    def sweep_expired(self, now: float | None = None) -> int:
+        """Drop in-memory sessions whose expiry has passed; return the count.
+
+        Walks the expiry heap only as far as ``now``, so a sweep costs
+        O(expired * log n) rather than a scan of every session.
+        """
+        now = time.time() if now is None else now
+        removed = 0
+        with self._lock:
+            heap = self._expiry_heap
+            while heap and heap[0][0] <= now:
+                _, sid = heapq.heappop(heap)
+                entry = self._memory_store.get(sid)
+                # A re-set session has a later pair of its own; skip this one
+                if entry is not None and _entry_expires_at(entry) <= now:
+                    self._memory_store.pop(sid, None)
+                    removed += 1
+        if removed:
+            if SESSION_STORE_SWEPT is not None:
+                SESSION_STORE_SWEPT.inc(removed)
+            logger.debug(f"Swept {removed} expired sessions")
+        return removed
+
+    def close(self) -> None:
+        """Stop the invalidation listener; the store stays usable."""
+        self._closed.set()
+        pubsub = self._pubsub
+        if pubsub is not None:
+            try:
+                pubsub.close()
+            except Exception:
+                pass
+        self._subscribed.clear()
+
+    async def aclose(self) -> None:
+        self.close()
+        cached, self._aredis = self._aredis, None
+        if cached is not None:
+            if cached[0] is asyncio.get_running_loop():
+                await aclose_client(cached[1], "session store redis")
+            else:
+                retire_client(cached[0], cached[1], "session store redis")
+
     def create_session(
         self,
         jti: str,
@@ -131,7 +388,7 @@ class SessionCookieStore:
             if refresh_fam_id:
                 payload["refresh_fam_id"] = refresh_fam_id
 
-        ttl = int(min(float(expires_at) - time.time(), 30 * 24 * 3600))
+        ttl = int(min(float(expires_at) - time.time(), _MAX_SESSION_TTL_S))
         ttl = max(ttl, 1)
 
         if self._redis_client:
@@ -149,6 +406,7 @@ class SessionCookieStore:
         else:
             # Store in memory
             self._memory_store[session_id] = payload
+            self._track_expiry(session_id, payload["expires_at"])
 
         logger.debug(f"Created opaque session {session_id} for JTI {jti}")
         return session_id
@@ -208,12 +466,16 @@ class SessionCookieStore:
         Returns:
             bool: True if session was deleted, False if not found
         """
+        self._invalidate_local(session_id)
         if self._redis_client:
             try:
-                return bool(self._redis_client.delete(self._get_key(session_id)))
+                deleted = bool(self._redis_client.delete(self._get_key(session_id)))
             except Exception as e:
                 logger.warning(f"Redis error deleting session {session_id}: {e}")
                 raise SessionStoreUnavailable(str(e))
+            if deleted:
+                self._publish_invalidation(session_id)
+            return deleted
         else:
             if session_id in self._memory_store:
                 del self._memory_store[session_id]
@@ -226,17 +488,12 @@ class SessionCookieStore:
             current_time = time.time()
             expired = [
                 sid
-                for sid, entry in self._memory_store.items()
-                if (
-                    (isinstance(entry, tuple) and entry[1] <= current_time)
-                    or (
-                        isinstance(entry, dict)
-                        and float(entry.get("expires_at", 0)) <= current_time
-                    )
-                )
+                for sid, entry in list(self._memory_store.items())
+                if isinstance(entry, (tuple, dict))
+                and _entry_expires_at(entry) <= current_time
             ]
             for sid in expired:
-                del self._memory_store[sid]
+                self._memory_store.pop(sid, None)
             if expired:
                 logger.debug(f"Cleaned up {len(expired)} expired sessions")
 
@@ -255,8 +512,29 @@ class SessionCookieStore:
 
         TTL is min(exp_s-now, 30d). Never raises on in-memory backend.
         """
+        payload, ttl = self._identity_payload(identity, exp_s, refresh_fam_id)
+        self._invalidate_local(session_id)
+        if self._redis_client:
+            try:
+                self._redis_client.setex(
+                    self._get_key(session_id), ttl, json.dumps(payload)
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Redis unavailable during set_session_identity for {session_id}: {e}"
+                )
+                raise SessionStoreUnavailable(str(e))
+            self._publish_invalidation(session_id)
+        else:
+            self._memory_store[session_id] = payload
+            self._track_expiry(session_id, payload["expires_at"])
+
+    @staticmethod
+    def _identity_payload(
+        identity: dict, exp_s: int, refresh_fam_id: str | None
+    ) -> tuple[dict, int]:
         now = int(time.time())
-        ttl = max(1, min(int(exp_s - now), 30 * 24 * 3600))
+        ttl = max(1, min(int(exp_s - now), _MAX_SESSION_TTL_S))
         # Normalize identity
         ident = identity.copy()
         if "user_id" not in ident and ident.get("sub"):
@@ -273,35 +551,30 @@ class SessionCookieStore:
         }
         if refresh_fam_id:
             payload["refresh_fam_id"] = refresh_fam_id
-
-        if self._redis_client:
-            try:
-                self._redis_client.setex(
-                    self._get_key(session_id), ttl, json.dumps(payload)
-                )
-            except Exception as e:
-                logger.warning(
-                    f"Redis unavailable during set_session_identity for {session_id}: {e}"
-                )
-                raise SessionStoreUnavailable(str(e))
-        else:
-            self._memory_store[session_id] = payload
+        return payload, ttl
 
     def get_session_identity(self, session_id: str) -> dict | None:
         """Return identity payload for a session if present and not expired."""
         if self._redis_client:
+            near, epoch, hit = self._lookup_near(session_id)
+            if hit is not None:
+                return hit
             try:
                 data = self._redis_client.get(self._get_key(session_id))
                 if not data:
                     return None
                 obj = json.loads(data)
-                if float(obj.get("expires_at", 0)) <= time.time():
+                expires_at = float(obj.get("expires_at", 0))
+                if expires_at <= time.time():
                     self._redis_client.delete(self._get_key(session_id))
                     return None
-                return obj.get("identity")
             except Exception as e:
                 logger.warning(f"Redis error get_session_identity {session_id}: {e}")
                 raise SessionStoreUnavailable(str(e))
+            identity = obj.get("identity")
+            if near is not None and isinstance(identity, dict):
+                near.put(session_id, identity, expires_at, epoch)
+            return identity
         else:
             entry = self._memory_store.get(session_id)
             if not entry:
@@ -317,7 +590,7 @@ class SessionCookieStore:
     def touch_session(self, session_id: str, exp_s: int) -> None:
         """Update last_seen_at and extend TTL (bounded) when appropriate."""
         now = int(time.time())
-        ttl = max(1, min(int(exp_s - now), 30 * 24 * 3600))
+        ttl = max(1, min(int(exp_s - now), _MAX_SESSION_TTL_S))
         if self._redis_client:
             try:
                 data = self._redis_client.get(self._get_key(session_id))
@@ -341,6 +614,115 @@ class SessionCookieStore:
         """Remove session from the store."""
         _ = self.delete_session(session_id)
 
+    # -----------------------------
+    # Async API (request path)
+    # -----------------------------
+
+    async def aget_session_identity(self, session_id: str) -> dict | None:
+        """Async :meth:`get_session_identity`."""
+        if not self._redis_client:
+            return self.get_session_identity(session_id)
+        near, epoch, hit = self._lookup_near(session_id)
+        if hit is not None:
+            return hit
+        key = self._get_key(session_id)
+        try:
+            client = self._async_client()
+            data = await client.get(key)
+            if not data:
+                return None
+            obj = json.loads(data)
+            expires_at = float(obj.get("expires_at", 0))
+            if expires_at <= time.time():
+                await client.delete(key)
+                return None
+        except Exception as e:
+            logger.warning(f"Redis error get_session_identity {session_id}: {e}")
+            raise SessionStoreUnavailable(str(e))
+        identity = obj.get("identity")
+        if near is not None and isinstance(identity, dict):
+            near.put(session_id, identity, expires_at, epoch)
+        return identity
+
+    async def aset_session_identity(
+        self,
+        session_id: str,
+        identity: dict,
+        exp_s: int,
+        refresh_fam_id: str | None = None,
+    ) -> None:
+        """Async :meth:`set_session_identity`; write and publish share a round trip."""
+        if not self._redis_client:
+            self.set_session_identity(session_id, identity, exp_s, refresh_fam_id)
+            return
+        payload, ttl = self._identity_payload(identity, exp_s, refresh_fam_id)
+        self._invalidate_local(session_id)
+        try:
+            async with self._async_client().pipeline(transaction=False) as pipe:
+                pipe.setex(self._get_key(session_id), ttl, json.dumps(payload))
+                pipe.publish(INVALIDATION_CHANNEL, session_id)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(
+                f"Redis unavailable during set_session_identity for {session_id}: {e}"
+            )
+            raise SessionStoreUnavailable(str(e))
+
+    async def adelete_session(self, session_id: str) -> bool:
+        """Async :meth:`delete_session`; delete and publish share a round trip."""
+        if not self._redis_client:
+            return self.delete_session(session_id)
+        self._invalidate_local(session_id)
+        try:
+            async with self._async_client().pipeline(transaction=False) as pipe:
+                pipe.delete(self._get_key(session_id))
+                pipe.publish(INVALIDATION_CHANNEL, session_id)
+                deleted, _ = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Redis error deleting session {session_id}: {e}")
+            raise SessionStoreUnavailable(str(e))
+        return bool(deleted)
+
+    async def arevoke_session(self, session_id: str) -> None:
+        """Async :meth:`revoke_session`."""
+        _ = await self.adelete_session(session_id)
+
+
+# ---------------------------------------------------------------------------
+# Memory backend sweeper
+# ---------------------------------------------------------------------------
+
+_stores: weakref.WeakSet[SessionCookieStore] = weakref.WeakSet()
+_sweeper: threading.Thread | None = None
+_sweeper_stop = threading.Event()
+_sweeper_lock = threading.Lock()
+
+
+def _sweep_loop(interval: float) -> None:
+    while not _sweeper_stop.wait(interval):
+        for store in list(_stores):
+            try:
+                store.sweep_expired()
+            except Exception:
+                logger.debug("session sweep failed", exc_info=True)
+
+
+def _ensure_sweeper() -> None:
+    global _sweeper
+    if _sweeper is not None and _sweeper.is_alive():
+        return
+    interval = _env_float("SESSION_SWEEP_INTERVAL_S", 60.0)
+    if interval <= 0:
+        return
+    with _sweeper_lock:
+        if _sweeper is not None and _sweeper.is_alive():
+            return
+        _sweeper_stop.clear()
+        _sweeper = threading.Thread(
+            target=_sweep_loop, args=(interval,), name="session-sweeper", daemon=True
+        )
+        _sweeper.start()
+
 
 # Global session store instance
 _session_store = SessionCookieStore()
@@ -351,6 +733,12 @@ def get_session_store() -> SessionCookieStore:
     return _session_store
 
 
+async def close_session_store() -> None:
+    """Stop the sweeper and invalidation listener (application shutdown)."""
+    _sweeper_stop.set()
+    await _session_store.aclose()
+
+
 # ---------------------------------------------------------------------------
 # Basic file helpers
 # ---------------------------------------------------------------------------
@@ -466,5 +854,6 @@ __all__ = [
     "get_session",
     "list_sessions",
     "get_session_store",
+    "close_session_store",
     "SessionStoreUnavailable",
 ]
@@ -1,12 +1,21 @@
 """
 PostgreSQL-based device sessions store.
+
+Token validation consults a process-level cache of ``(sess_ver, revoked)``
+per session id instead of selecting the session row on every authenticated
+request. Entries expire after ``SESSION_STATE_CACHE_TTL_S`` seconds (default
+10) and are invalidated explicitly when this process revokes a session or
+bumps its version; other workers see such changes once their entry expires.
 """
 
 from __future__ import annotations
 
 import logging
+import os
+import threading
 import time
 import uuid
+from collections import OrderedDict
 from datetime import UTC, datetime
 from typing import Any
 
@@ -14,6 +23,11 @@ logger = logging.getLogger(__name__)
 
 from sqlalchemy import select, update
 
+try:
+    from .metrics import AUTH_SESSION_CACHE
+except Exception:  # pragma: no cover - optional
+    AUTH_SESSION_CACHE = None  # type: ignore
+
 from .db.core import get_async_db
 from .db.models import AuthDevice
 from .db.models import Session as SessionModel
@@ -24,9 +38,13 @@ class SessionsStore:
         # Path parameter kept for compatibility but not used
         self._path = path
 
-        # Session version cache: {sid: (version, timestamp)}
-        self._version_cache: dict[str, tuple[int, float]] = {}
-        self._cache_ttl_seconds = 60  # Cache session versions for 60 seconds
+        # Session state cache: {sid: (sess_ver, revoked, cached_at)}
+        self._state_cache: OrderedDict[str, tuple[int, bool, float]] = OrderedDict()
+        self._state_lock = threading.Lock()
+        self._cache_ttl_seconds = float(os.getenv("SESSION_STATE_CACHE_TTL_S", "10"))
+        self._cache_max_entries = int(os.getenv("SESSION_STATE_CACHE_MAX", "50000"))
+        # Bumped on every invalidation so a read that raced a revoke is not cached
+        self._state_epoch = 0
 
         # JTI blacklist cache: {jti: timestamp}
         self._jti_blacklist_cache: dict[str, float] = {}
@@ -150,8 +168,10 @@ class SessionsStore:
             await session.execute(stmt)
             await session.commit()
 
-            # Update cache and invalidate for immediate effect
-            self._set_cached_version(sid, new_ver)
+            # Bump the epoch so loads that read the pre-revoke row cannot
+            # overwrite this entry, then cache the revoked state
+            self._invalidate_version_cache(sid)
+            self._set_cached_state(sid, new_ver, True)
 
     async def increment_session_version(self, sid: str) -> int | None:
         """Increment the session version to invalidate tokens.
@@ -177,29 +197,52 @@ class SessionsStore:
             await session.execute(update_stmt)
             await session.commit()
 
-            # Update cache with new version
-            self._set_cached_version(sid, new_ver)
+            # Version changed; revocation state is re-read on next access
+            self._invalidate_version_cache(sid)
 
             return new_ver
 
-    def _get_cached_version(self, sid: str) -> int | None:
-        """Get session version from cache if valid."""
-        if sid in self._version_cache:
-            version, timestamp = self._version_cache[sid]
-            if time.time() - timestamp < self._cache_ttl_seconds:
-                return version
-            else:
+    def _get_cached_state(self, sid: str) -> tuple[int, bool] | None:
+        """Get ``(sess_ver, revoked)`` from cache if still fresh."""
+        with self._state_lock:
+            entry = self._state_cache.get(sid)
+            if entry is None:
+                return None
+            version, revoked, cached_at = entry
+            if time.monotonic() - cached_at >= self._cache_ttl_seconds:
                 # Cache expired, remove it
-                del self._version_cache[sid]
-        return None
+                del self._state_cache[sid]
+                return None
+            return version, revoked
+
+    def _set_cached_state(
+        self, sid: str, version: int, revoked: bool, epoch: int | None = None
+    ) -> None:
+        """Cache session state; skipped if an invalidation happened since ``epoch``."""
+        if self._cache_ttl_seconds <= 0:
+            return
+        with self._state_lock:
+            if epoch is not None and epoch != self._state_epoch:
+                return
+            self._state_cache[sid] = (version, revoked, time.monotonic())
+            self._state_cache.move_to_end(sid)
+            while len(self._state_cache) > self._cache_max_entries:
+                self._state_cache.popitem(last=False)
 
-    def _set_cached_version(self, sid: str, version: int) -> None:
-        """Cache session version with timestamp."""
-        self._version_cache[sid] = (version, time.time())
+    def _get_cached_version(self, sid: str) -> int | None:
+        """Get session version from cache if valid."""
+        state = self._get_cached_state(sid)
+        return state[0] if state is not None else None
 
     def _invalidate_version_cache(self, sid: str) -> None:
-        """Invalidate cached session version."""
-        self._version_cache.pop(sid, None)
+        """Invalidate cached session state."""
+        with self._state_lock:
+            self._state_epoch += 1
+            self._state_cache.pop(sid, None)
+
+    def _count_cache(self, result: str) -> None:
+        if AUTH_SESSION_CACHE is not None:
+            AUTH_SESSION_CACHE.labels("session_state", result).inc()
 
     async def get_session_version(self, sid: str) -> int | None:
         """Get the current session version with caching.
@@ -212,16 +255,24 @@ class SessionsStore:
             return cached_version
 
         # Cache miss, fetch from database
+        state = await self._load_state(sid)
+        return state[0] if state is not None else None
+
+    async def _load_state(self, sid: str) -> tuple[int, bool] | None:
+        """Read ``(sess_ver, revoked)`` from the database and cache it."""
+        epoch = self._state_epoch
         async with get_async_db() as session:
-            stmt = select(SessionModel.sess_ver).where(SessionModel.id == sid)
+            stmt = select(SessionModel.sess_ver, SessionModel.revoked_at).where(
+                SessionModel.id == sid
+            )
             result = await session.execute(stmt)
-            version = result.scalar_one_or_none()
-
-            # Cache the result if found
-            if version is not None:
-                self._set_cached_version(sid, version)
+            row = result.one_or_none()
 
-            return version
+        if row is None:
+            return None
+        state = (row[0], row[1] is not None)
+        self._set_cached_state(sid, state[0], state[1], epoch)
+        return state
 
     async def validate_session_token(self, sid: str, token_version: int, jti: str) -> tuple[bool, str]:
         """Validate a JWT token against the session store.
@@ -234,28 +285,30 @@ class SessionsStore:
         Returns:
             Tuple of (is_valid, reason)
         """
-        async with get_async_db() as session:
-            # Get session info
-            stmt = select(SessionModel).where(SessionModel.id == sid)
-            result = await session.execute(stmt)
-            session_obj = result.scalar_one_or_none()
+        state = self._get_cached_state(sid)
+        if state is not None:
+            self._count_cache("hit")
+        else:
+            self._count_cache("miss")
+            state = await self._load_state(sid)
 
-            if not session_obj:
-                return False, "session.not_found"
+        if state is None:
+            return False, "session.not_found"
+        sess_ver, revoked = state
 
-            # Check if session is revoked
-            if session_obj.revoked_at is not None:
-                return False, "session.revoked"
+        # Check if session is revoked
+        if revoked:
+            return False, "session.revoked"
 
-            # Check session version mismatch
-            if session_obj.sess_ver != token_version:
-                return False, "session.version_mismatch"
+        # Check session version mismatch
+        if sess_ver != token_version:
+            return False, "session.version_mismatch"
 
-            # Check JTI blacklist (if implemented)
-            if await self._is_jti_blacklisted(jti):
-                return False, "token.blacklisted"
+        # Check JTI blacklist (if implemented)
+        if await self._is_jti_blacklisted(jti):
+            return False, "token.blacklisted"
 
-            return True, "valid"
+        return True, "valid"
 
     def _get_cached_jti_blacklist(self, jti: str) -> bool:
         """Check if JTI is in blacklist cache."""
@@ -330,14 +383,20 @@ class SessionsStore:
         
         async with get_async_db() as session:
             db_user_id = str(to_uuid(user_id))
+            where = (SessionModel.user_id == db_user_id, SessionModel.device_id == did)
+            result = await session.execute(select(SessionModel.id).where(*where))
+            session_ids = [row[0] for row in result.fetchall()]
             stmt = (
                 update(SessionModel)
-                .where(SessionModel.user_id == db_user_id, SessionModel.device_id == did)
+                .where(*where)
                 .values(revoked_at=datetime.now(UTC))
             )
             await session.execute(stmt)
             await session.commit()
 
+        for sid in session_ids:
+            self._invalidate_version_cache(sid)
+
     async def revoke_all_user_sessions(self, user_id: str) -> int:
         """Revoke all active sessions for a user.
 
@@ -394,7 +453,6 @@ class SessionsStore:
                 self._invalidate_version_cache(sid)
                 new_version = await self.get_session_version(sid)
                 if new_version is not None:
-                    self._set_cached_version(sid, new_version)
                     return True
 
                 return False
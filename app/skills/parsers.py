@@ -111,15 +111,7 @@ async def resolve_entity(name: str, kind: str = "light") -> dict[str, Any]:
     except Exception:
         states = []
 
-    choices: dict[str, str] = {}
-    for s in states:
-        eid = s.get("entity_id")
-        if not eid:
-            continue
-        if kind and not eid.startswith(f"{kind}."):
-            continue
-        friendly = (s.get("attributes") or {}).get("friendly_name") or eid
-        choices[friendly.lower()] = eid
+    choices = ha.entity_index(states).choices(kind)
 
     if not choices:
         return {"action": "disambiguate", "candidates": []}
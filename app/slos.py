@@ -11,6 +11,11 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Any
 
+from app.rolling_window import RollingWindow, WindowSummary
+
+# Measurements are kept in per-minute buckets for the last 24 hours
+_RETENTION_SECONDS = 24 * 3600
+
 
 @dataclass
 class SLO:
@@ -197,42 +202,55 @@ class SLOMonitor:
     }
 
     def __init__(self):
-        self.measurements: dict[str, list[dict[str, Any]]] = {}
+        self.measurements: dict[str, RollingWindow] = {}
         self.last_evaluation: dict[str, datetime] = {}
 
     def record_measurement(self, sli_name: str, value: float, **metadata):
-        """Record an SLI measurement."""
-        if sli_name not in self.measurements:
-            self.measurements[sli_name] = []
-
-        measurement = {"timestamp": datetime.now(), "value": value, **metadata}
+        """Record an SLI measurement.
+
+        Only the metadata the SLIs evaluate (``success``, ``status_code``,
+        ``incident``) is kept, as per-minute flag counters.
+        """
+        window = self.measurements.get(sli_name)
+        if window is None:
+            window = self.measurements.setdefault(
+                sli_name, RollingWindow(_RETENTION_SECONDS)
+            )
 
-        self.measurements[sli_name].append(measurement)
+        flags = []
+        if metadata.get("success", False):
+            flags.append("success")
+        status_code = metadata.get("status_code", 0)
+        if 400 <= status_code < 500:
+            flags.append("status_4xx")
+        elif status_code >= 500:
+            flags.append("status_5xx")
+        if metadata.get("incident", False):
+            flags.append("incident")
 
-        # Keep only recent measurements (last 24 hours)
-        cutoff = datetime.now() - timedelta(hours=24)
-        self.measurements[sli_name] = [
-            m for m in self.measurements[sli_name] if m["timestamp"] > cutoff
-        ]
+        window.record(float(value), flags=flags)
 
     def evaluate_slo(self, slo: SLO) -> SLIResult:
         """Evaluate an SLO against recent measurements."""
-        measurements = self.measurements.get(slo.sli_name, [])
+        window = self.measurements.get(slo.sli_name)
         now = datetime.now()
         period_start = now - timedelta(seconds=slo.period_seconds)
 
-        # Filter measurements in the evaluation period
-        period_measurements = [
-            m for m in measurements if m["timestamp"] >= period_start
-        ]
+        # Merge the per-minute buckets in the evaluation period
+        period = (
+            window.summary(slo.period_seconds)
+            if window is not None
+            else WindowSummary()
+        )
+        sample_size = period.count
 
-        if len(period_measurements) < slo.min_sample_size:
+        if sample_size < slo.min_sample_size:
             return SLIResult(
                 sli_name=slo.sli_name,
                 value=0.0,
                 target=slo.target,
                 achieved=False,
-                sample_size=len(period_measurements),
+                sample_size=sample_size,
                 period_start=period_start,
                 period_end=now,
                 details={"error": "Insufficient sample size"},
@@ -246,51 +264,22 @@ class SLOMonitor:
                 "api_availability",
                 "authz_success_rate",
             ]:
-                good_count = sum(
-                    1 for m in period_measurements if m.get("success", False)
-                )
-                value = (good_count / len(period_measurements)) * 100
+                value = (period.flag("success") / sample_size) * 100
             elif slo.sli_name == "error_rate_4xx":
-                error_count = sum(
-                    1
-                    for m in period_measurements
-                    if 400 <= m.get("status_code", 0) < 500
-                )
-                value = (error_count / len(period_measurements)) * 100
+                value = (period.flag("status_4xx") / sample_size) * 100
             elif slo.sli_name == "error_rate_5xx":
-                error_count = sum(
-                    1 for m in period_measurements if m.get("status_code", 0) >= 500
-                )
-                value = (error_count / len(period_measurements)) * 100
+                value = (period.flag("status_5xx") / sample_size) * 100
             elif slo.sli_name == "security_incident_rate":
-                incident_count = len(
-                    [m for m in period_measurements if m.get("incident", False)]
-                )
                 hours = slo.period_seconds / 3600
-                value = incident_count / hours
-            else:
-                value = sum(m["value"] for m in period_measurements) / len(
-                    period_measurements
-                )
-        elif slo.sli_name.endswith("_latency"):
-            # For latency: percentile calculation
-            if slo.sli_name.endswith("_p95"):
-                sorted_measurements = sorted(
-                    period_measurements, key=lambda m: m["value"]
-                )
-                p95_index = int(len(sorted_measurements) * 0.95)
-                value = sorted_measurements[
-                    min(p95_index, len(sorted_measurements) - 1)
-                ]["value"]
+                value = period.flag("incident") / hours
             else:
-                value = sum(m["value"] for m in period_measurements) / len(
-                    period_measurements
-                )
+                value = period.mean
+        elif slo.sli_name.endswith("_p95"):
+            # For latency: percentile from the merged quantile sketch
+            value = period.quantile(0.95)
         else:
             # Default: average
-            value = sum(m["value"] for m in period_measurements) / len(
-                period_measurements
-            )
+            value = period.mean
 
         achieved = value >= slo.target if slo.target > 1 else value <= slo.target
 
@@ -299,11 +288,11 @@ class SLOMonitor:
             value=value,
             target=slo.target,
             achieved=achieved,
-            sample_size=len(period_measurements),
+            sample_size=sample_size,
             period_start=period_start,
             period_end=now,
             details={
-                "measurements": len(period_measurements),
+                "measurements": sample_size,
                 "target_type": "minimum" if slo.target <= 1 else "maximum",
             },
         )
@@ -343,6 +343,21 @@ def _start_daemons():
         logger.debug("OpenAI health background loop not started", exc_info=True)
 
 
+# Resolved through secure_import_attr, so each module must be allowlisted
+_SHUTDOWN_CLOSERS = (
+    "app.gpt_client:close_client",
+    "app.transcription:close_whisper_client",
+    "app.llama_integration:close_client",
+    "app.retrieval.qdrant_hybrid:close_clients",
+    "app.middleware.middleware_core:flush_user_stats",
+    "app.log_sink:close_log_sinks",
+    "app.session_store:close_session_store",
+    "app.home_assistant:stop_state_mirror",
+    "app.music.poller:stop_poller",
+    "app.integrations.spotify.client:close_http_client",
+)
+
+
 async def _shutdown(app: FastAPI):
     # Mark offline for health
     try:
@@ -355,10 +370,7 @@ async def _shutdown(app: FastAPI):
         pass
 
     # Close clients (best effort)
-    for closer_path in (
-        "app.gpt_client:close_client",
-        "app.transcription:close_whisper_client",
-    ):
+    for closer_path in _SHUTDOWN_CLOSERS:
         try:
             closer = secure_import_attr(*closer_path.split(":", 1))
             res = closer()
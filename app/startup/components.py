@@ -16,7 +16,8 @@ Components:
   implementations.
 - ``init_llama``: Check LLaMA configuration and call into integration to
   verify availability.
-- ``init_home_assistant``: Probe Home Assistant `/states` when configured.
+- ``init_home_assistant``: Probe Home Assistant `/states` and start the state
+  mirror when configured.
 - ``init_memory_store``: Ensure memory store backend is constructible.
 - ``init_scheduler``: Start the scheduler if not already running (sync/async
   tolerant).
@@ -245,7 +246,8 @@ async def init_home_assistant():
 
     - If feature flag GSN_ENABLE_HOME_ASSISTANT is off, this is a no-op.
     Honor ``HOME_ASSISTANT_ENABLED`` and ``HOME_ASSISTANT_URL``; if missing,
-    log and skip. Otherwise perform a minimal ``get_states`` probe.
+    log and skip. Otherwise perform a minimal ``get_states`` probe and start
+    the websocket state mirror that serves entity states from then on.
     """
     from app.feature_flags import HA_ON
 
@@ -260,11 +262,13 @@ async def init_home_assistant():
     if not os.getenv("HOME_ASSISTANT_URL"):
         logger.debug("HA not configured (no HOME_ASSISTANT_URL); skipping")
         return
-    from app.home_assistant import get_states
+    from app.home_assistant import get_states, start_state_mirror
 
     try:
         await get_states()
         logger.debug("Home Assistant integration OK")
+        if start_state_mirror():
+            logger.debug("Home Assistant state mirror started")
     except Exception as e:
         _log_failure_dev("Home Assistant", e)
         raise
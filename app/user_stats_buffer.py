@@ -0,0 +1,165 @@
+"""Write-behind accumulator for per-request user statistics.
+
+``TraceRequestMiddleware`` used to await two provisioning upserts and a
+counter update on every request. Requests now only bump an in-memory delta;
+a background task flushes all pending deltas in one batched transaction every
+``USER_STATS_FLUSH_MS`` milliseconds (default 1000) or as soon as
+``USER_STATS_FLUSH_EVENTS`` requests (default 500) are pending.
+
+Users already provisioned by this process are remembered in a known-user set
+so provisioning is only sent once per user. Pending deltas are flushed on
+shutdown; if a flush fails they are retried with the next one.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+from collections.abc import Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_KNOWN_MAX = 50_000
+# Cap on distinct users carried over after failed flushes
+_PENDING_MAX = 100_000
+
+
+class UserStatsBuffer:
+    """Accumulate request counts per user and flush them in batches."""
+
+    def __init__(
+        self,
+        store_provider: Callable[[], Any],
+        *,
+        flush_interval_s: float | None = None,
+        flush_events: int | None = None,
+    ) -> None:
+        self._store_provider = store_provider
+        if flush_interval_s is None:
+            flush_interval_s = float(os.getenv("USER_STATS_FLUSH_MS", "1000")) / 1000.0
+        if flush_events is None:
+            flush_events = int(os.getenv("USER_STATS_FLUSH_EVENTS", "500"))
+        self.flush_interval_s = max(0.01, flush_interval_s)
+        self.flush_events = max(1, flush_events)
+        self._lock = threading.Lock()
+        self._deltas: dict[str, int] = {}
+        self._new: set[str] = set()
+        self._known: set[str] = set()
+        self._events = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+        self._wake: asyncio.Event | None = None
+        self._flush_lock: asyncio.Lock | None = None
+
+    def record_request(self, user_id: str) -> None:
+        """Count one request for ``user_id``; never touches the database."""
+        if not user_id:
+            return
+        with self._lock:
+            self._deltas[user_id] = self._deltas.get(user_id, 0) + 1
+            if user_id not in self._known:
+                self._new.add(user_id)
+            self._events += 1
+            full = self._events >= self.flush_events
+        self._ensure_task()
+        if full and self._wake is not None:
+            self._wake.set()
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return self._events
+
+    def _ensure_task(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._loop is loop and self._task is not None and not self._task.done():
+            return
+        self._loop = loop
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        wake = self._wake
+        assert wake is not None
+        while True:
+            try:
+                await asyncio.wait_for(wake.wait(), self.flush_interval_s)
+            except TimeoutError:
+                pass
+            wake.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write all pending deltas in one batch (no-op when nothing is pending)."""
+        lock = self._flush_lock
+        if lock is None:
+            await self._flush_once()
+            return
+        async with lock:
+            await self._flush_once()
+
+    async def _flush_once(self) -> None:
+        with self._lock:
+            if not self._deltas and not self._new:
+                return
+            deltas, self._deltas = self._deltas, {}
+            new, self._new = self._new, set()
+            self._events = 0
+        try:
+            store = self._store_provider()
+            if hasattr(store, "apply_request_deltas"):
+                await store.apply_request_deltas(deltas, new)
+            else:  # stores without batch support
+                for uid in new:
+                    await store.ensure_user(uid)
+                for uid, n in deltas.items():
+                    for _ in range(n):
+                        await store.increment_request_count(uid)
+        except asyncio.CancelledError:
+            self._requeue(deltas, new)
+            raise
+        except Exception as e:
+            self._requeue(deltas, new)
+            logger.warning(
+                "user_stats.flush_failed",
+                extra={"meta": {"users": len(deltas), "error": str(e)}},
+            )
+            return
+        with self._lock:
+            if len(self._known) + len(new) > _KNOWN_MAX:
+                self._known.clear()
+            self._known.update(new)
+        logger.debug(
+            "user_stats.flushed",
+            extra={"meta": {"users": len(deltas), "provisioned": len(new)}},
+        )
+
+    def _requeue(self, deltas: dict[str, int], new: set[str]) -> None:
+        with self._lock:
+            for uid, n in deltas.items():
+                if uid in self._deltas or len(self._deltas) < _PENDING_MAX:
+                    self._deltas[uid] = self._deltas.get(uid, 0) + n
+                    self._events += n
+            self._new.update(u for u in new if u in self._deltas)
+
+    async def aclose(self) -> None:
+        """Stop the background flusher and flush what is pending."""
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._flush_lock = None
+        await self.flush()
+
+
+__all__ = ["UserStatsBuffer"]
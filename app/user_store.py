@@ -4,6 +4,7 @@ PostgreSQL-based user statistics store.
 
 from __future__ import annotations
 
+from collections.abc import Iterable, Mapping
 from datetime import UTC, datetime
 
 from sqlalchemy import select, text, update
@@ -143,6 +144,61 @@ class UserDAO:
 
             await session.commit()
 
+    async def apply_request_deltas(
+        self, deltas: Mapping[str, int], new_users: Iterable[str] = ()
+    ) -> None:
+        """Provision ``new_users`` and add ``deltas`` to request counts.
+
+        Everything is written in one transaction with one batched statement per
+        table, so a flush costs the same regardless of how many users it covers.
+        """
+        users = [str(to_uuid(u)) for u in new_users]
+        counts: dict[str, int] = {}
+        for uid, n in deltas.items():
+            key = str(to_uuid(uid))
+            counts[key] = counts.get(key, 0) + int(n)
+        if not users and not counts:
+            return
+
+        async with get_async_session() as session:
+            if users:
+                insert_users = text(
+                    """
+                    INSERT INTO auth.users (id, email, username, name, created_at)
+                    VALUES (CAST(:id AS uuid), :email, :username, :name, now())
+                    ON CONFLICT (id) DO NOTHING
+                    """
+                )
+                rows = []
+                for user_uuid in users:
+                    username = f"anon_{user_uuid.replace('-', '')}"[:100]
+                    rows.append(
+                        {
+                            "id": user_uuid,
+                            "email": f"{user_uuid}@local.test",
+                            "username": username,
+                            "name": f"Guest {username}",
+                        }
+                    )
+                await session.execute(insert_users, rows)
+
+            stats_rows = [{"id": u, "n": 0} for u in users if u not in counts]
+            stats_rows += [{"id": u, "n": n} for u, n in counts.items()]
+            upsert_stats = text(
+                """
+                INSERT INTO users.user_stats
+                    (user_id, login_count, last_login, request_count, updated_at)
+                VALUES (CAST(:id AS uuid), 0, NULL, :n, now())
+                ON CONFLICT (user_id) DO UPDATE SET
+                    request_count = users.user_stats.request_count
+                        + EXCLUDED.request_count,
+                    updated_at = EXCLUDED.updated_at
+                """
+            )
+            await session.execute(upsert_stats, stats_rows)
+
+            await session.commit()
+
 
 # Global instance
 user_store = UserDAO()
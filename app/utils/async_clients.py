@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Close tasks scheduled on the running loop (kept so they are not collected)
+_closing: set[asyncio.Task] = set()
+
+
+async def aclose_client(client: Any, name: str) -> None:
+    """Close an async client (``aclose()`` or ``close()``), logging failures."""
+    closer = getattr(client, "aclose", None) or getattr(client, "close", None)
+    if closer is None:
+        return
+    try:
+        res = closer()
+        if inspect.isawaitable(res):
+            await res
+    except Exception:
+        logger.debug("%s client close failed", name, exc_info=True)
+
+
+def retire_client(loop: asyncio.AbstractEventLoop, client: Any, name: str) -> None:
+    """Close a replaced loop-bound client without blocking the caller.
+
+    The close runs on the loop that owns the client's connections: as a task
+    when that is the running loop, thread-safely when it runs elsewhere. A
+    client whose loop has stopped cannot be closed cleanly and is dropped.
+    """
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if loop is running:
+        task = loop.create_task(aclose_client(client, name))
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
+    elif not loop.is_closed() and loop.is_running():
+        asyncio.run_coroutine_threadsafe(aclose_client(client, name), loop)
+    else:
+        logger.warning("dropping %s client bound to a stopped event loop", name)
+
+
+__all__ = ["aclose_client", "retire_client"]
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""Micro-benchmark: per-request middleware overhead on a trivial endpoint.
+
+Compares a bare app against the same app wrapped in ``LAYERS`` pass-through
+``BaseHTTPMiddleware`` layers (the old stack's plumbing) and in ``LAYERS``
+pass-through ``HTTPMiddleware`` layers, then the full canonical stack from
+``register_canonical_middlewares``. Requests are driven straight through the
+ASGI callable so client overhead does not blur the numbers.
+
+Usage: PYTHONPATH=. python bench/middleware.py [requests] [layers]
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.http_middleware import HTTPMiddleware
+from app.middleware.loader import register_canonical_middlewares
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+LAYERS = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+
+
+class _PassBase(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        return await call_next(request)
+
+
+class _PassASGI(HTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        return await call_next(request)
+
+
+def _app(layer: type | None = None, canonical: bool = False) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/v1/ping")
+    async def ping():
+        return {"ok": True}
+
+    for _ in range(LAYERS if layer else 0):
+        app.add_middleware(layer)
+    if canonical:
+        register_canonical_middlewares(app)
+    return app
+
+
+async def _drive(app, n: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/v1/ping",
+        "raw_path": b"/v1/ping",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"user-agent", b"bench")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    # Warm up routing/caches outside the timed loop
+    for _ in range(50):
+        await app(dict(scope), receive, send)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - t0) / n
+
+
+async def main() -> None:
+    logging.disable(logging.INFO)
+    os.environ.setdefault("RATE_LIMIT_MODE", "off")
+    results = {}
+    for name, app in (
+        ("bare", _app()),
+        ("base_http_x%d" % LAYERS, _app(_PassBase)),
+        ("pure_asgi_x%d" % LAYERS, _app(_PassASGI)),
+        ("canonical_stack", _app(canonical=True)),
+    ):
+        results[name] = await _drive(app, N)
+    bare = results["bare"]
+    print(
+        {
+            name: {
+                "us_per_request": round(t * 1e6, 1),
+                "overhead_us": round((t - bare) * 1e6, 1),
+            }
+            for name, t in results.items()
+        }
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -33,6 +33,23 @@ def test_history_recent_reads_jsonl(monkeypatch, tmp_path: Path):
     assert len(items) == 2 and items[0]["x"] == 1 and items[1]["x"] == 2
 
 
+def test_history_recent_json_array_is_newest_first(monkeypatch, tmp_path: Path):
+    import app.history as hist
+    from app.api import history as api_history
+
+    p = tmp_path / "history.json"
+    monkeypatch.setattr(hist, "HISTORY_FILE", p)
+    monkeypatch.setattr(api_history, "HISTORY_FILE", p)
+    p.write_text('[{"x":1},{"x":2},{"x":3}]')
+
+    app = FastAPI()
+    app.include_router(api_history.router)
+    client = TestClient(app)
+    r = client.get("/history/recent", params={"limit": 2})
+    assert r.status_code == 200
+    assert [i["x"] for i in r.json()["items"]] == [3, 2]
+
+
 def test_rag_search_works_without_store(monkeypatch):
     # Force import path where _safe_query is None
     import app.api.rag as api_rag
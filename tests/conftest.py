@@ -44,6 +44,9 @@ def _lock_test_env():
 
     # Prevent any real API calls by setting safe defaults
     os.environ.setdefault("VECTOR_STORE", "memory")  # Use in-memory vector store
+    os.environ.setdefault("EMBED_CACHE_PATH", "")  # No persistent embedding cache
+    os.environ.setdefault("RETRIEVE_CACHE_TTL_SECONDS", "0")  # No cross-test result reuse
+    os.environ.setdefault("LOG_SINK_SYNC", "1")  # History/audit written before return
     os.environ.setdefault("HOME_ASSISTANT_URL", "http://127.0.0.1:8123")  # Blackhole HA
     os.environ.setdefault("SPOTIFY_CLIENT_ID", "test_client_id")
     os.environ.setdefault("SPOTIFY_CLIENT_SECRET", "test_client_secret")
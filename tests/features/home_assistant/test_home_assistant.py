@@ -55,3 +55,81 @@ def test_request_picks_up_token(monkeypatch):
     asyncio.run(home_assistant._request("GET", "/states"))
 
     assert captured["headers"]["Authorization"] == "Bearer newtoken"
+
+
+def test_get_states_served_from_mirror(monkeypatch):
+    from app import home_assistant
+
+    async def no_network(*a, **k):  # pragma: no cover - must not be called
+        raise AssertionError("REST fetch while mirror is synced")
+
+    mirror = home_assistant.StateMirror()
+    monkeypatch.setattr(home_assistant, "_MIRROR", mirror)
+    monkeypatch.setattr(home_assistant, "_request", no_network)
+    mirror.load(
+        [
+            {"entity_id": "light.kitchen", "state": "off", "attributes": {}},
+            {"entity_id": "switch.fan", "state": "on", "attributes": {}},
+        ]
+    )
+    mirror.apply_event(
+        {
+            "data": {
+                "entity_id": "light.kitchen",
+                "new_state": {"entity_id": "light.kitchen", "state": "on"},
+            }
+        }
+    )
+    mirror.apply_event({"data": {"entity_id": "switch.fan", "new_state": None}})
+
+    states = asyncio.run(home_assistant.get_states())
+    assert states == [{"entity_id": "light.kitchen", "state": "on"}]
+    assert asyncio.run(home_assistant.resolve_entity("light.kitchen")) == [
+        "light.kitchen"
+    ]
+
+
+def test_entity_index_survives_state_only_events(monkeypatch):
+    from app import home_assistant
+
+    mirror = home_assistant.StateMirror()
+    monkeypatch.setattr(home_assistant, "_MIRROR", mirror)
+    builds = []
+    real_index = home_assistant.EntityIndex
+
+    def counting_index(states):
+        builds.append(len(states))
+        return real_index(states)
+
+    monkeypatch.setattr(home_assistant, "EntityIndex", counting_index)
+    monkeypatch.setattr(home_assistant, "_ENTITY_INDEX", None)
+    kitchen = {"friendly_name": "Kitchen Light"}
+    mirror.load(
+        [{"entity_id": "light.kitchen", "state": "off", "attributes": kitchen}]
+    )
+
+    def event(eid, state, attributes):
+        mirror.apply_event(
+            {
+                "data": {
+                    "entity_id": eid,
+                    "new_state": {
+                        "entity_id": eid,
+                        "state": state,
+                        "attributes": attributes,
+                    },
+                }
+            }
+        )
+
+    idx = home_assistant.entity_index(mirror.states())
+    for i in range(5):
+        event("light.kitchen", "on" if i % 2 else "off", dict(kitchen))
+        assert home_assistant.entity_index(mirror.states()) is idx
+    assert builds == [1]
+
+    event("light.kitchen", "on", {"friendly_name": "Cooking Light"})
+    assert home_assistant.entity_index(mirror.states()).exact("cooking light")
+    event("sensor.temp", "21", {})
+    assert home_assistant.entity_index(mirror.states()).exact("sensor.temp")
+    assert builds == [1, 1, 2]
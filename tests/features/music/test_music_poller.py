@@ -0,0 +1,128 @@
+import asyncio
+import types
+
+import pytest
+
+from app.music.models import Device, Track
+from app.music.poller import PlayerStatePoller
+
+
+class _Provider:
+    name = "fake"
+
+    def __init__(self, is_playing: bool = True) -> None:
+        self.calls = 0
+        self.is_playing = is_playing
+
+    async def get_state(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return types.SimpleNamespace(
+            is_playing=self.is_playing,
+            progress_ms=1000,
+            track=Track(id="t1", title="Song", artist="A", duration_ms=180_000),
+            device=Device(id="d1", name="Speaker", volume=40),
+            shuffle=False,
+            repeat="off",
+        )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refreshes_share_one_pull_and_fan_out():
+    poller = PlayerStatePoller()
+    provider = _Provider()
+    seen: list[list] = [[], []]
+
+    async def first(state):
+        seen[0].append(state)
+
+    async def second(state):
+        seen[1].append(state)
+
+    unsub_a = poller.subscribe("u1", provider, first)
+    unsub_b = poller.subscribe("u1", _Provider(), second)
+    try:
+        states = await asyncio.gather(*(poller.refresh("u1") for _ in range(4)))
+        assert provider.calls == 1
+        assert all(s is states[0] for s in states)
+        assert states[0].volume_percent == 40 and states[0].is_playing
+        assert len(seen[0]) == 1 and len(seen[1]) == 1
+        assert poller.latest("u1") is states[0]
+    finally:
+        unsub_a()
+        unsub_b()
+    assert poller.latest("u1") is None
+    await poller.stop()
+
+
+@pytest.mark.asyncio
+async def test_interval_adapts_to_playback_and_errors(monkeypatch):
+    monkeypatch.setenv("MUSIC_POLL_PLAYING_S", "5")
+    monkeypatch.setenv("MUSIC_POLL_PAUSED_S", "15")
+    monkeypatch.setenv("MUSIC_POLL_IDLE_S", "30")
+    poller = PlayerStatePoller()
+    playing, paused = _Provider(True), _Provider(False)
+
+    async def noop(state):
+        return None
+
+    unsub_play = poller.subscribe("u1", playing, noop)
+    unsub_pause = poller.subscribe("u2", paused, noop)
+    try:
+        assert poller._next_delay(poller._users["u1"]) == 30.0  # no state yet
+        await poller.refresh("u1")
+        await poller.refresh("u2")
+        assert poller._next_delay(poller._users["u1"]) == 5.0
+        assert poller._next_delay(poller._users["u2"]) == 15.0
+
+        # Near the end of the track, poll right after it should change
+        poller._users["u1"].state.progress_ms = 178_500
+        assert poller._next_delay(poller._users["u1"]) < 5.0
+
+        poller._users["u2"].errors = 3
+        assert poller._next_delay(poller._users["u2"]) == 8.0
+    finally:
+        unsub_play()
+        unsub_pause()
+    await poller.stop()
+
+
+class _SnapshotProvider(_Provider):
+    """Reports the playback flag as of the moment the request was sent."""
+
+    async def get_state(self):
+        playing = self.is_playing
+        state = await super().get_state()
+        state.is_playing = playing
+        return state
+
+
+@pytest.mark.asyncio
+async def test_command_refresh_does_not_join_a_pull_started_before_it():
+    poller = PlayerStatePoller()
+    provider = _SnapshotProvider(is_playing=False)
+
+    async def noop(state):
+        return None
+
+    unsub = poller.subscribe("u1", provider, noop)
+    try:
+        poll = asyncio.ensure_future(poller.refresh("u1"))
+        while not provider.calls:  # wait until the poll's pull is in flight
+            await asyncio.sleep(0)
+        provider.is_playing = True  # a play command lands meanwhile
+        after_cmd = await poller.refresh("u1", fresh=True)
+        before_cmd = await poll
+
+        assert provider.calls == 2
+        assert not before_cmd.is_playing
+        assert after_cmd.is_playing
+        assert poller.latest("u1").is_playing
+        # Later refreshes still share the pull the command started
+        joined = await asyncio.gather(
+            poller.refresh("u1", fresh=True), poller.refresh("u1")
+        )
+        assert provider.calls == 3 and joined[0] is joined[1]
+    finally:
+        unsub()
+    await poller.stop()
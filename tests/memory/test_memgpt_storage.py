@@ -0,0 +1,94 @@
+import json
+import threading
+
+import pytest
+
+import app.memory.memgpt as mg
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(mg, "_embed_sync", None)
+    monkeypatch.setenv("MEMGPT_COMPACT_EVERY", "1000")
+    return mg.MemGPT(tmp_path / "memories.json")
+
+
+def _claim(m, text, session_id="s1", user_id="u1"):
+    return m.write_claim(
+        session_id=session_id,
+        user_id=user_id,
+        claim_text=text,
+        evidence_links=["https://example.com/a"],
+        claim_type="fact",
+        entities=["api"],
+        confidence=0.9,
+    )
+
+
+def test_writes_append_to_log_and_replay_on_load(store, tmp_path):
+    store.store_interaction("what is up", "the sky", "s1", user_id="u1")
+    store.store_interaction("pin me", "pinned answer", "s1", tags=["pin"])
+    assert _claim(store, "The API invoice deadline is due next Friday afternoon")
+
+    assert not (tmp_path / "memories.json").exists()
+    lines = (tmp_path / "memories.log").read_text().splitlines()
+    assert [json.loads(line)["op"] for line in lines] == ["add", "add", "add"]
+
+    reloaded = mg.MemGPT(tmp_path / "memories.json")
+    assert reloaded._data == store._data
+    assert reloaded._pin_store == store._pin_store
+    assert len(reloaded._all_claims.claims) == 1
+
+
+def test_compaction_writes_snapshots_and_truncates_log(tmp_path, monkeypatch):
+    monkeypatch.setenv("MEMGPT_COMPACT_EVERY", "2")
+    m = mg.MemGPT(tmp_path / "memories.json")
+    m.store_interaction("first", "alpha", "s1")
+    m.store_interaction("second", "completely different reply", "s2")
+
+    assert not (tmp_path / "memories.log").exists()
+    snapshot = json.loads((tmp_path / "memories.json").read_text())
+    assert set(snapshot) == {"s1", "s2"}
+
+    h = m._data["s1"][0]["hash"]
+    assert m.delete_by_hash(h)
+    assert mg.MemGPT(tmp_path / "memories.json")._data["s1"] == []
+
+
+def test_duplicates_found_through_user_index(store):
+    text = "The API invoice deadline is due next Friday afternoon"
+    assert _claim(store, text)
+    # Same checksum from another session of the same user
+    assert _claim(store, text, session_id="s2") is None
+    # Other users are indexed separately
+    assert _claim(store, text, user_id="u2")
+
+    sh = store._simhash(text)
+    near = sh ^ 0b101  # Hamming distance 2
+    assert store._is_duplicate(checksum="x", simhash=near, text="", user_id="u1")
+    assert not store._is_duplicate(checksum="x", simhash=near, text="", user_id="u3")
+
+
+def test_parallel_writes_of_same_claim_store_it_once(store, monkeypatch):
+    text = "The API invoice deadline is due next Friday afternoon"
+    barrier = threading.Barrier(2)
+    real_novelty = store._novelty_score
+
+    def novelty(*args, **kwargs):
+        score = real_novelty(*args, **kwargs)
+        barrier.wait(timeout=5)  # both writers pass the unlocked checks together
+        return score
+
+    monkeypatch.setattr(store, "_novelty_score", novelty)
+    results: list = []
+    threads = [
+        threading.Thread(target=lambda: results.append(_claim(store, text)))
+        for _ in range(2)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(r is None for r in results) == [False, True]
+    assert len(store._all_claims.claims) == 1
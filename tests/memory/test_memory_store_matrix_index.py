@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from app.memory.env_utils import _cosine_similarity
+from app.memory.memory_store import MemoryVectorStore, _MatrixIndex
+
+
+def test_matrix_index_matches_pairwise_cosine():
+    rng = np.random.default_rng(0)
+    vecs = rng.normal(size=(50, 8)).tolist()
+    vecs.append([0.0] * 8)
+    idx = _MatrixIndex()
+    for i, v in enumerate(vecs):
+        idx.upsert(f"m{i}", v)
+    q = rng.normal(size=8).tolist()
+
+    ids, sims = idx.similarities(q)
+    expected = [_cosine_similarity(q, v) for v in vecs]
+    assert ids == [f"m{i}" for i in range(len(vecs))]
+    assert sims == pytest.approx(expected, abs=1e-6)
+
+
+def test_matrix_index_delete_compacts_and_keeps_order():
+    idx = _MatrixIndex()
+    for i in range(40):
+        idx.upsert(f"m{i}", [1.0, float(i)])
+    for i in range(0, 40, 2):
+        assert idx.delete(f"m{i}")
+    assert not idx.delete("m0")
+    for i in range(1, 25, 2):
+        idx.delete(f"m{i}")
+
+    ids, sims = idx.similarities([1.0, 0.0])
+    assert len(idx) == 8
+    assert [i for i in ids if i is not None] == [f"m{i}" for i in range(25, 40, 2)]
+    assert np.isfinite(sims[[ids.index(f"m{i}") for i in range(25, 40, 2)]]).all()
+
+
+def test_matrix_index_rejects_dim_mismatch():
+    idx = _MatrixIndex()
+    idx.upsert("a", [1.0, 0.0])
+    with pytest.raises(ValueError):
+        idx.upsert("b", [1.0, 0.0, 0.0])
+
+
+def test_query_user_memories_after_delete(monkeypatch):
+    monkeypatch.setenv("SIM_THRESHOLD", "0.0")
+    vs = MemoryVectorStore()
+    keep = vs.add_user_memory("u", "alpha")
+    drop = vs.add_user_memory("u", "beta")
+    assert vs.delete_user_memory("u", drop)
+    assert not vs.delete_user_memory("u", drop)
+
+    assert vs.query_user_memories("u", "alpha", k=5) == ["alpha"]
+    assert [m["id"] for m in vs.list_user_memories("u")] == [keep]
+
+
+def test_lookup_skips_downvoted_and_composed_entries(monkeypatch):
+    monkeypatch.setenv("SIM_THRESHOLD", "0.0")
+    vs = MemoryVectorStore()
+    vs.cache_answer("v1|hello|m", "hello", "composed")
+    vs.cache_answer("h1", "hello", "plain")
+    vs.qa_cache.update(ids=["h1"], metadatas=[{"feedback": "down"}])
+    assert vs.lookup_cached_answer("hello") is None
+
+    vs.cache_answer("h2", "hello", "fresh")
+    assert vs.lookup_cached_answer("hello") == "fresh"
+    assert vs.lookup_cached_answer("v1|hello|m") == "composed"
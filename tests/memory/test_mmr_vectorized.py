@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from app.retrieval.utils import (
+    RetrievedItem,
+    _mmr_select_np,
+    _mmr_select_py,
+    _tokenize,
+    mmr_diversify,
+)
+
+WORDS = ["alpha", "beta", "gamma", "delta", "lights", "kitchen", "music", "on", "off"]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("lambda_", [0.3, 0.6, 0.9])
+def test_vectorized_mmr_matches_reference(seed, lambda_):
+    rng = random.Random(seed)
+    n, dim = 40, 12
+    q = [rng.gauss(0, 1) for _ in range(dim)]
+    embs = [[rng.gauss(0, 1) for _ in range(dim)] for _ in range(n)]
+    embs[3] = [0.0] * dim  # zero vector is treated as orthogonal
+    embs[7] = list(embs[5])  # exact duplicate exercises tie-breaking
+    tokens = [_tokenize(" ".join(rng.choices(WORDS, k=rng.randint(0, 6)))) for _ in range(n)]
+    scores = [rng.random() for _ in range(n)]
+
+    for k in (1, 10, n, n + 5):
+        assert _mmr_select_np(q, embs, tokens, scores, k, lambda_) == _mmr_select_py(
+            q, embs, tokens, scores, k, lambda_
+        )
+
+
+def test_mmr_diversify_falls_back_on_ragged_vectors():
+    items = [
+        RetrievedItem(id="a", text="alpha", score=0.9, metadata={}, vector=[1.0, 0.0]),
+        RetrievedItem(id="b", text="beta", score=0.5, metadata={}, vector=[0.0, 1.0, 0.0]),
+    ]
+    out = mmr_diversify("q", items, k=2, query_vector=[1.0, 0.0])
+    assert [it.id for it in out] == ["a", "b"]
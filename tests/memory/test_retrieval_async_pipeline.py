@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from app.retrieval import pipeline_legacy, qdrant_hybrid
+from app.retrieval.utils import RetrievedItem
+
+
+@pytest.fixture(autouse=True)
+def _env(monkeypatch):
+    monkeypatch.setenv("EMBEDDING_BACKEND", "stub")
+    monkeypatch.setenv("RETRIEVE_DENSE_SIM_THRESHOLD", "0.0")
+    monkeypatch.setenv("RETRIEVE_CACHE_TTL_SECONDS", "0")
+
+
+def _items(ids):
+    return [
+        RetrievedItem(id=f"d{i}", text=f"doc {i}", score=0.9, metadata={}) for i in ids
+    ]
+
+
+@pytest.mark.asyncio
+async def test_arun_pipeline_runs_searches_concurrently(monkeypatch):
+    async def slow_dense(**kw):
+        await asyncio.sleep(0.2)
+        return _items(range(3))
+
+    async def slow_sparse(**kw):
+        await asyncio.sleep(0.2)
+        return _items(range(2, 5))
+
+    monkeypatch.setattr(pipeline_legacy, "adense_search", slow_dense)
+    monkeypatch.setattr(pipeline_legacy, "asparse_search", slow_sparse)
+    monkeypatch.setattr(pipeline_legacy, "dense_search", lambda **kw: _items(range(3)))
+    monkeypatch.setattr(
+        pipeline_legacy, "sparse_search", lambda **kw: _items(range(2, 5))
+    )
+
+    t0 = time.perf_counter()
+    texts, trace = await pipeline_legacy.arun_pipeline(
+        user_id="u1", query="hello", intent="chat", collection="kb:test"
+    )
+    elapsed = time.perf_counter() - t0
+
+    assert elapsed < 0.35
+    hybrid = next(t for t in trace if t["event"] == "hybrid")
+    assert hybrid["meta"]["dense"] == 3 and hybrid["meta"]["sparse"] == 3
+    sync_texts, _ = pipeline_legacy.run_pipeline(
+        user_id="u1", query="hello", intent="chat", collection="kb:test"
+    )
+    assert sorted(texts) == sorted(sync_texts)
+
+
+@pytest.mark.asyncio
+async def test_arun_pipeline_tolerates_search_failure(monkeypatch):
+    async def boom(**kw):
+        raise RuntimeError("qdrant down")
+
+    async def sparse(**kw):
+        return _items([1])
+
+    monkeypatch.setattr(pipeline_legacy, "adense_search", boom)
+    monkeypatch.setattr(pipeline_legacy, "asparse_search", sparse)
+
+    texts, _trace = await pipeline_legacy.arun_pipeline(
+        user_id="u1", query="hello", intent="chat", collection="kb:test"
+    )
+    assert texts == ["doc 1"]
+
+
+def test_sync_client_is_shared_until_settings_change(monkeypatch):
+    built = []
+
+    class FakeClient:
+        def __init__(self, **kw):
+            built.append(kw)
+
+    monkeypatch.setattr(qdrant_hybrid, "QdrantClient", FakeClient)
+    monkeypatch.setattr(qdrant_hybrid, "_SYNC_CLIENT", None)
+    monkeypatch.setenv("QDRANT_URL", "http://q1:6333")
+
+    assert qdrant_hybrid._client() is qdrant_hybrid._client()
+    monkeypatch.setenv("QDRANT_URL", "http://q2:6333")
+    qdrant_hybrid._client()
+    assert [b["url"] for b in built] == ["http://q1:6333", "http://q2:6333"]
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.retrieval import cache as rcache
+from app.retrieval import pipeline_legacy
+from app.retrieval.cache import RetrievalCache
+from app.retrieval.utils import RetrievedItem
+
+
+def _key(user="u1", q="q"):
+    return (user, q, "chat", "kb", "")
+
+
+def test_lru_evicts_least_recently_used():
+    c = RetrievalCache(ttl_s=60, max_entries=2, max_bytes=0)
+    c.put(_key(q="a"), ["A"], [])
+    c.put(_key(q="b"), ["B"], [])
+    assert c.get(_key(q="a")) is not None  # a is now most recent
+    c.put(_key(q="c"), ["C"], [])
+    assert c.get(_key(q="b")) is None
+    assert c.get(_key(q="a"))[0] == ["A"]
+    assert c.get(_key(q="c"))[0] == ["C"]
+
+
+def test_ttl_expiry(monkeypatch):
+    c = RetrievalCache(ttl_s=10, max_entries=8, max_bytes=0)
+    now = [1000.0]
+    monkeypatch.setattr(rcache.time, "time", lambda: now[0])
+    c.put(_key(), ["A"], [])
+    now[0] += 5
+    assert c.get(_key()) is not None
+    now[0] += 6
+    assert c.get(_key()) is None
+    assert len(c) == 0
+
+
+def test_byte_cap_bounds_memory():
+    c = RetrievalCache(ttl_s=60, max_entries=100, max_bytes=3000)
+    for i in range(10):
+        c.put(_key(q=str(i)), ["x" * 500], [])
+    assert c.bytes <= 3000
+    assert 0 < len(c) < 10
+    assert c.get(_key(q="9")) is not None
+    # A single oversized result is never stored
+    assert c.put(_key(q="big"), ["y" * 5000], []) is False
+
+
+def test_invalidate_user_drops_entries_and_stale_runs():
+    c = RetrievalCache(ttl_s=60, max_entries=8, max_bytes=0)
+    c.put(_key(user="u1", q="a"), ["A"], [])
+    c.put(_key(user="u2", q="a"), ["B"], [])
+    gen = c.generation("u1")
+    assert c.invalidate_user("u1") == 1
+    assert c.get(_key(user="u1", q="a")) is None
+    assert c.get(_key(user="u2", q="a")) is not None
+    # A run that began before the write must not repopulate the cache
+    assert c.put(_key(user="u1", q="b"), ["old"], [], generation=gen) is False
+
+
+def test_generations_stay_bounded_and_still_reject_stale_runs():
+    c = RetrievalCache(ttl_s=60, max_entries=8, max_bytes=0, max_generations=2)
+    gen = c.generation("u1")
+    c.invalidate_user("u1")
+    for i in range(10):
+        c.invalidate_user(f"other-{i}")
+    assert len(c._generations) == 2
+    # u1 was forgotten, yet a run started before its write stays stale
+    assert c.put(_key(user="u1", q="a"), ["old"], [], generation=gen) is False
+    fresh = c.generation("u1")
+    assert c.put(_key(user="u1", q="a"), ["new"], [], generation=fresh) is True
+
+
+def test_run_once_coalesces_concurrent_threads():
+    c = RetrievalCache(ttl_s=60, max_entries=8, max_bytes=0)
+    calls = []
+    gate = threading.Event()
+
+    def compute():
+        calls.append(1)
+        gate.wait(1.0)
+        return ["A"], [{"event": "done"}]
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(c.run_once(_key(), compute)))
+        for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert [r[0] for r in results] == [["A"]] * 4
+    assert c.get(_key()) is not None
+
+
+@pytest.mark.asyncio
+async def test_arun_once_coalesces_and_propagates_errors():
+    c = RetrievalCache(ttl_s=60, max_entries=8, max_bytes=0)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return ["A"], []
+
+    res = await asyncio.gather(*(c.arun_once(_key(), compute) for _ in range(5)))
+    assert len(calls) == 1
+    assert all(r[0] == ["A"] for r in res)
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("qdrant down")
+
+    with pytest.raises(RuntimeError):
+        await c.arun_once(_key(q="err"), boom)
+    assert c.get(_key(q="err")) is None
+
+
+def test_pipeline_serves_hits_and_invalidates_on_memory_write(monkeypatch):
+    monkeypatch.setenv("EMBEDDING_BACKEND", "stub")
+    monkeypatch.setenv("RETRIEVE_DENSE_SIM_THRESHOLD", "0.0")
+    monkeypatch.setenv("RETRIEVE_CACHE_TTL_SECONDS", "60")
+    rcache._reset_retrieval_cache_for_tests()
+    calls = []
+
+    def dense(**kw):
+        calls.append(kw["user_id"])
+        return [RetrievedItem(id="d1", text="doc one", score=0.9, metadata={})]
+
+    monkeypatch.setattr(pipeline_legacy, "dense_search", dense)
+    monkeypatch.setattr(pipeline_legacy, "sparse_search", lambda **kw: [])
+    try:
+        args = dict(user_id="u1", query="Hello ", intent="chat", collection="kb")
+        texts, _ = pipeline_legacy.run_pipeline(**args)
+        texts2, trace2 = pipeline_legacy.run_pipeline(**{**args, "query": "hello"})
+        assert texts2 == texts
+        assert trace2[-1]["event"] == "cache_hit"
+        assert len(calls) == 1
+
+        # A different filter is a different result set
+        pipeline_legacy.run_pipeline(**args, extra_filter={"type": "fact"})
+        assert len(calls) == 2
+
+        rcache.invalidate_user("u1")
+        pipeline_legacy.run_pipeline(**args)
+        assert len(calls) == 3
+    finally:
+        rcache._reset_retrieval_cache_for_tests()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import pytest
+
+from app.retrieval import pipeline_legacy, utils
+from app.retrieval.utils import RetrievedItem, mmr_diversify, reciprocal_rank_fusion
+
+
+@pytest.fixture(autouse=True)
+def _env(monkeypatch):
+    monkeypatch.setenv("EMBEDDING_BACKEND", "stub")
+    monkeypatch.setenv("RETRIEVE_DENSE_SIM_THRESHOLD", "0.0")
+    monkeypatch.setenv("RETRIEVE_CACHE_TTL_SECONDS", "0")
+
+
+def _item(i: int, vec: list[float] | None) -> RetrievedItem:
+    return RetrievedItem(
+        id=f"d{i}", text=f"doc number {i}", score=1.0 - i / 10, metadata={}, vector=vec
+    )
+
+
+def test_rrf_keeps_stored_vectors():
+    dense = [_item(0, [1.0, 0.0])]
+    sparse = [_item(0, None), _item(1, None)]
+    fused = {it.id: it for it in reciprocal_rank_fusion([dense, sparse])}
+    assert fused["d0"].vector == [1.0, 0.0]
+    assert fused["d1"].vector is None
+
+
+def test_mmr_embeds_only_missing_vectors(monkeypatch):
+    calls: list[list[str]] = []
+
+    def fake_many(texts):
+        calls.append(list(texts))
+        return [[0.5, 0.5] for _ in texts]
+
+    monkeypatch.setattr(utils, "embed_many_sync", fake_many)
+    items = [_item(0, [1.0, 0.0]), _item(1, None), _item(2, [0.0, 1.0])]
+
+    out = mmr_diversify("q", items, k=3, query_vector=[1.0, 0.0])
+    assert len(out) == 3
+    assert calls == [["doc number 1"]]
+
+
+def test_pipeline_embeds_query_once(monkeypatch):
+    seen_with_vectors: list[bool] = []
+
+    def fake_dense(**kw):
+        seen_with_vectors.append(kw["with_vectors"])
+        return [_item(i, [1.0, float(i)]) for i in range(5)]
+
+    def fake_sparse(**kw):
+        seen_with_vectors.append(kw["with_vectors"])
+        return [_item(i, [1.0, float(i)]) for i in range(3, 7)]
+
+    query_embeds: list[str] = []
+
+    def fake_embed(text):
+        query_embeds.append(text)
+        return [1.0, 0.0]
+
+    def no_batch(texts):
+        raise AssertionError(f"unexpected re-embedding of {texts!r}")
+
+    monkeypatch.setattr(pipeline_legacy, "dense_search", fake_dense)
+    monkeypatch.setattr(pipeline_legacy, "sparse_search", fake_sparse)
+    monkeypatch.setattr(pipeline_legacy, "embed_sync", fake_embed)
+    monkeypatch.setattr(utils, "embed_many_sync", no_batch)
+
+    texts, _trace = pipeline_legacy.run_pipeline(
+        user_id="u1", query="hello", intent="chat", collection="kb:test"
+    )
+    assert texts
+    assert query_embeds == ["hello"]
+    assert seen_with_vectors == [True, True]
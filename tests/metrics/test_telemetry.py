@@ -39,7 +39,7 @@ def test_telemetry_logged(monkeypatch, tmp_path):
     client = setup_app(monkeypatch, str(hist))
     from app import analytics, prompt_builder
 
-    analytics._latency_samples = []
+    analytics._reset_latency_for_tests()
     monkeypatch.setattr(
         prompt_builder.memgpt, "summarize_session", lambda sid, user_id=None: ""
     )
@@ -63,7 +63,7 @@ def test_telemetry_logged(monkeypatch, tmp_path):
 def test_latency_p95(monkeypatch):
     from app import analytics
 
-    analytics._latency_samples = []
+    analytics._reset_latency_for_tests()
     for val in [10, 20, 30, 40, 50]:
         asyncio.run(analytics.record_latency(val))
     assert analytics.latency_p95() == 50
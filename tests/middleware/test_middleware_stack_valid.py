@@ -9,6 +9,8 @@ import inspect
 
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from app.http_middleware import HTTPMiddleware
+
 
 def test_user_middleware_are_classes():
     """
@@ -33,16 +35,16 @@ def test_user_middleware_are_classes():
             "All middleware must be class-based. Check that add_mw() is used instead of app.add_middleware() with functions."
         )
 
-        # The cls should subclass BaseHTTPMiddleware (except for built-in Starlette middleware like CORSMiddleware)
-        # We allow some exceptions for well-known middleware that don't follow BaseHTTPMiddleware
+        # The cls should subclass HTTPMiddleware or BaseHTTPMiddleware (except for built-in Starlette middleware like CORSMiddleware)
+        # We allow some exceptions for well-known middleware that follow neither
         known_exceptions = [
             "CORSMiddleware",  # Starlette's CORS middleware
         ]
 
         if middleware.cls.__name__ not in known_exceptions:
-            assert issubclass(middleware.cls, BaseHTTPMiddleware), (
-                f"Middleware does not subclass BaseHTTPMiddleware: {middleware.cls}\n"
-                f"Custom middleware must inherit from BaseHTTPMiddleware for proper validation."
+            assert issubclass(middleware.cls, HTTPMiddleware | BaseHTTPMiddleware), (
+                f"Middleware does not subclass HTTPMiddleware: {middleware.cls}\n"
+                f"Custom middleware must inherit from HTTPMiddleware (or BaseHTTPMiddleware) for proper validation."
             )
 
 
@@ -225,3 +225,91 @@ def test_stub_deterministic(monkeypatch):
     v3 = asyncio.run(embeddings.embed("hello"))
     assert len(v1) == 8
     assert v1 == v2 == v3
+
+
+class BatchOpenAIClient:
+    """Records each ``embeddings.create`` input and returns items out of order."""
+
+    def __init__(self):
+        self.inputs: list = []
+        self.embeddings = self
+
+    def create(self, model, input, encoding_format="float"):
+        self.inputs.append(input)
+        texts = input if isinstance(input, list) else [input]
+        data = [
+            types.SimpleNamespace(index=i, embedding=[float(len(t)), float(i)])
+            for i, t in enumerate(texts)
+        ]
+        return types.SimpleNamespace(data=list(reversed(data)))
+
+
+def test_embed_many_sync_chunks_and_dedupes(monkeypatch):
+    monkeypatch.delenv("PYTEST_CURRENT_TEST", raising=False)
+    monkeypatch.setenv("VECTOR_STORE", "chroma")
+    monkeypatch.setenv("EMBEDDING_BACKEND", "openai")
+    monkeypatch.setenv("EMBED_BATCH_SIZE", "2")
+    monkeypatch.setenv("EMBED_DIM", "0")
+    from app import embeddings
+
+    client = BatchOpenAIClient()
+    monkeypatch.setattr(embeddings, "get_openai_client", lambda: client)
+
+    res = embeddings.embed_many_sync(["a", "bb", "a", "ccc"])
+    assert client.inputs == [["a", "bb"], ["ccc"]]
+    assert [v[0] for v in res] == [1.0, 2.0, 1.0, 3.0]
+    assert res[0] == res[2]
+
+
+def test_embed_many_stub_matches_single(monkeypatch):
+    monkeypatch.setenv("EMBEDDING_BACKEND", "stub")
+    from app import embeddings
+
+    texts = ["x", "y", "x"]
+    assert embeddings.embed_many_sync(texts) == [embeddings.embed_sync(t) for t in texts]
+    assert asyncio.run(embeddings.embed_many(texts)) == [
+        embeddings._embed_stub(t) for t in texts
+    ]
+    assert embeddings.embed_many_sync([]) == []
+
+
+def test_embed_coalesces_concurrent_calls(monkeypatch):
+    monkeypatch.delenv("PYTEST_CURRENT_TEST", raising=False)
+    monkeypatch.setenv("VECTOR_STORE", "chroma")
+    monkeypatch.setenv("EMBEDDING_BACKEND", "openai")
+    monkeypatch.setenv("EMBED_COALESCE_MS", "20")
+    monkeypatch.setenv("EMBED_DIM", "0")
+    from app import embeddings
+
+    client = BatchOpenAIClient()
+    monkeypatch.setattr(embeddings, "get_openai_client", lambda: client)
+    monkeypatch.setattr(embeddings, "_coalescers", {})
+
+    async def _run():
+        return await asyncio.gather(*(embeddings.embed(t) for t in ["a", "bb", "a"]))
+
+    res = asyncio.run(_run())
+    assert client.inputs == [["a", "bb"]]
+    assert [v[0] for v in res] == [1.0, 2.0, 1.0]
+
+
+def test_embed_coalescer_propagates_errors(monkeypatch):
+    monkeypatch.delenv("PYTEST_CURRENT_TEST", raising=False)
+    monkeypatch.setenv("VECTOR_STORE", "chroma")
+    monkeypatch.setenv("EMBEDDING_BACKEND", "openai")
+    monkeypatch.setenv("EMBED_COALESCE_MS", "5")
+    from app import embeddings
+
+    def boom():
+        raise RuntimeError("upstream down")
+
+    monkeypatch.setattr(embeddings, "get_openai_client", boom)
+    monkeypatch.setattr(embeddings, "_coalescers", {})
+
+    async def _run():
+        return await asyncio.gather(
+            embeddings.embed("a"), embeddings.embed("b"), return_exceptions=True
+        )
+
+    res = asyncio.run(_run())
+    assert all(isinstance(r, RuntimeError) for r in res)
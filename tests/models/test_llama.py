@@ -33,11 +33,7 @@ def test_llama_status_returns_healthy(monkeypatch):
     os.environ["OLLAMA_MODEL"] = "llama3"
     from app import llama_integration
 
-    monkeypatch.setattr(
-        llama_integration,
-        "httpx",
-        type("x", (), {"AsyncClient": lambda *a, **k: DummyClient()}),
-    )
+    monkeypatch.setattr(llama_integration, "get_client", lambda: DummyClient())
     res = asyncio.run(llama_integration.get_status())
     assert res["status"] == "healthy"
     assert "latency_ms" in res
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from app import llama_integration
+
+
+class _StreamResp:
+    def __init__(self, lines):
+        self._lines = lines
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    def raise_for_status(self):
+        return None
+
+    async def aiter_lines(self):
+        for line in self._lines:
+            yield line
+
+
+class _PooledClient:
+    def __init__(self):
+        self.streams = 0
+
+    def stream(self, method, url, **kwargs):
+        self.streams += 1
+        lines = [
+            json.dumps({"response": "hel"}),
+            json.dumps({"response": "lo", "done": True, "eval_count": 2}),
+        ]
+        return _StreamResp(lines)
+
+
+@pytest.fixture(autouse=True)
+def _reset(monkeypatch):
+    # Other suites may reload this module against a stubbed tenacity
+    tenacity = pytest.importorskip("tenacity")
+    monkeypatch.setattr(llama_integration, "AsyncRetrying", tenacity.AsyncRetrying)
+    monkeypatch.setattr(
+        llama_integration, "stop_after_attempt", tenacity.stop_after_attempt
+    )
+    monkeypatch.setattr(
+        llama_integration, "wait_random_exponential", tenacity.wait_random_exponential
+    )
+    monkeypatch.setattr(llama_integration, "LLAMA_HEALTHY", True)
+    monkeypatch.setattr(llama_integration, "llama_circuit_open", False)
+    monkeypatch.setitem(
+        llama_integration.llama_health_check_state, "consecutive_failures", 0
+    )
+
+
+@pytest.mark.asyncio
+async def test_ask_llama_streams_on_pooled_client_without_ping(monkeypatch):
+    client = _PooledClient()
+
+    async def no_ping(*a, **k):
+        raise AssertionError("ask_llama must not ping Ollama per request")
+
+    monkeypatch.setattr(llama_integration, "json_request", no_ping)
+    monkeypatch.setattr(llama_integration, "get_client", lambda: client)
+
+    for _ in range(2):
+        gen = await llama_integration.ask_llama("hi", model="llama3")
+        assert "".join([t async for t in gen]) == "hello"
+    assert client.streams == 2
+
+
+@pytest.mark.asyncio
+async def test_ask_llama_short_circuits_when_health_loop_reports_down(monkeypatch):
+    client = _PooledClient()
+    monkeypatch.setattr(llama_integration, "get_client", lambda: client)
+    monkeypatch.setattr(llama_integration, "LLAMA_HEALTHY", False)
+    monkeypatch.setitem(
+        llama_integration.llama_health_check_state, "consecutive_failures", 2
+    )
+
+    gen = await llama_integration.ask_llama("hi", model="llama3")
+    assert [t async for t in gen] == []
+    assert client.streams == 0
+
+
+@pytest.mark.asyncio
+async def test_get_client_is_reused_per_loop():
+    await llama_integration.close_client()
+    try:
+        first = llama_integration.get_client()
+        assert llama_integration.get_client() is first
+    finally:
+        await llama_integration.close_client()
+    assert llama_integration._client is None
@@ -121,3 +121,32 @@ def test_prompt_builder_drops_summary_before_memories(monkeypatch):
     prompt, _ = PromptBuilder.build("hi", session_id="s", user_id="u")
     assert "S" * 40 not in prompt
     assert "M" * 30 in prompt
+
+
+def test_prompt_builder_counts_segments_once(monkeypatch):
+    calls: list[str] = []
+
+    def _len_counter(text):
+        calls.append(text)
+        return len(text)
+
+    monkeypatch.setattr(prompt_builder, "_encoding", lambda model: None)
+    monkeypatch.setattr(prompt_builder, "count_tokens", _len_counter)
+    monkeypatch.setattr(prompt_builder, "MAX_PROMPT_TOKENS", 120)
+    monkeypatch.setattr(prompt_builder, "RETRIEVER_MAX_MEM_LINES", 50)
+    monkeypatch.setattr(
+        prompt_builder.memgpt, "summarize_session", lambda sid, user_id=None: "S" * 20
+    )
+    mems = [f"m{i}" for i in range(30)]
+    monkeypatch.setattr(
+        prompt_builder, "safe_query_user_memories", lambda uid, q, k=5: list(mems)
+    )
+
+    prompt, tokens = PromptBuilder.build("hi", session_id="s", user_id="u")
+
+    # Arithmetic on segment counts matches the rendered prompt exactly
+    assert tokens == len(prompt) <= 120
+    assert "S" * 20 not in prompt
+    # Many trim steps, yet every memory was tokenized at most twice
+    assert sum(1 for c in calls if c in mems) <= 2 * len(mems)
+    assert not any("USER PROMPT" in c and "RELEVANT MEMORY" in c for c in calls)
@@ -0,0 +1,139 @@
+import asyncio
+import json
+
+import pytest
+
+from app import history
+from app.history_store import HistoryStore
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False)
+
+
+@pytest.fixture
+def hist_path(tmp_path, monkeypatch):
+    path = tmp_path / "history.jsonl"
+    monkeypatch.setattr(history, "HISTORY_FILE", path)
+    return path
+
+
+def test_concurrent_appends_are_batched_and_indexed(hist_path, monkeypatch):
+    monkeypatch.setenv("LOG_SINK_SYNC", "0")
+    batches = []
+    store = history._store()
+    orig = store.write_batch
+
+    def spy(records):
+        batches.append(len(records))
+        orig(records)
+
+    monkeypatch.setattr(store, "write_batch", spy)
+
+    async def main():
+        await asyncio.gather(
+            *(
+                history.append_history({"req_id": f"r{i}", "user_id": "u1"})
+                for i in range(20)
+            )
+        )
+        return await history.get_record_by_req_id("r7")
+
+    rec = asyncio.run(main())
+    assert rec["req_id"] == "r7" and rec["user_id"] == "u1"
+    assert sum(batches) == 20 and len(batches) < 20
+    assert len(hist_path.read_text().splitlines()) == 20
+
+
+def test_lookup_seeks_without_reading_whole_file(hist_path, monkeypatch):
+    asyncio.run(history.append_history({"req_id": "a", "prompt": "x" * 1000}))
+    asyncio.run(history.append_history({"req_id": "b", "prompt": "y"}))
+
+    def no_full_read(*a, **k):
+        raise AssertionError("lookup must not read the whole file")
+
+    monkeypatch.setattr(type(hist_path), "read_text", no_full_read)
+    rec = asyncio.run(history.get_record_by_req_id("a"))
+    assert rec["prompt"] == "x" * 1000
+    assert asyncio.run(history.get_record_by_req_id("missing")) is None
+
+
+def test_rotated_segments_remain_searchable(hist_path, monkeypatch):
+    monkeypatch.setenv("HISTORY_MAX_BYTES", "200")
+    for i in range(12):
+        asyncio.run(history.append_history({"req_id": f"r{i}", "prompt": "p" * 40}))
+    store = history._store()
+    assert len(store.segments()) > 1
+    assert asyncio.run(history.get_record_by_req_id("r0"))["req_id"] == "r0"
+    assert asyncio.run(history.get_record_by_req_id("r11"))["req_id"] == "r11"
+    newest = asyncio.run(history.query_history(limit=3))
+    assert [r["req_id"] for r in newest] == ["r11", "r10", "r9"]
+
+
+def test_catches_up_on_records_written_elsewhere(tmp_path):
+    path = tmp_path / "history.jsonl"
+    legacy = tmp_path / "history.backup.1700000000.jsonl"
+    legacy.write_text(json.dumps({"req_id": "old", "user_id": "u2"}) + "\n")
+    path.write_text(json.dumps({"req_id": "ext"}) + "\n")
+    store = HistoryStore(path, _dumps)
+    try:
+        assert store.lookup("old")["user_id"] == "u2"
+        assert store.lookup("ext") is not None
+        # Appended by another process after the first catch-up
+        with open(path, "a") as f:
+            f.write(json.dumps({"req_id": "later"}) + "\n")
+        assert store.lookup("later") is not None
+        assert [r["req_id"] for r in store.query(user_id="u2")] == ["old"]
+    finally:
+        store.close()
+
+
+def test_own_appends_are_not_reread_by_catch_up(tmp_path):
+    path = tmp_path / "history.jsonl"
+    store = HistoryStore(path, _dumps)
+
+    def indexed_bytes():
+        return store._conn.execute(
+            "SELECT indexed_bytes FROM segments WHERE name = ?", (path.name,)
+        ).fetchone()[0]
+
+    try:
+        store.write_batch([{"req_id": "a"}, {"req_id": "b"}])
+        store.write_batch([{"req_id": "c"}])
+        assert indexed_bytes() == path.stat().st_size
+        # A gap left by another writer is still indexed by the next catch-up
+        with open(path, "a") as f:
+            f.write(json.dumps({"req_id": "ext"}) + "\n")
+        store.write_batch([{"req_id": "d"}])
+        assert indexed_bytes() < path.stat().st_size
+        assert store.lookup("ext") is not None
+        assert indexed_bytes() == path.stat().st_size
+        assert sorted(r["req_id"] for r in store.query()) == ["a", "b", "c", "d", "ext"]
+    finally:
+        store.close()
+
+
+def test_time_and_user_queries(hist_path):
+    recs = [
+        {"req_id": "a", "user_id": "u1", "timestamp": "2024-01-01T00:00:00Z"},
+        {"req_id": "b", "user_id": "u2", "timestamp": "2024-01-02T00:00:00Z"},
+        {"req_id": "c", "user_id": "u1", "timestamp": "2024-01-03T00:00:00Z"},
+    ]
+    for r in recs:
+        asyncio.run(history.append_history(r))
+    u1 = asyncio.run(history.query_history(user_id="u1"))
+    assert [r["req_id"] for r in u1] == ["c", "a"]
+    since = asyncio.run(history.query_history(since=1704153600.0))  # 2024-01-02
+    assert [r["req_id"] for r in since] == ["c", "b"]
+
+
+def test_json_array_appends_in_place(tmp_path, monkeypatch):
+    path = tmp_path / "history.json"
+    path.write_text(json.dumps([{"req_id": "legacy"}]))
+    monkeypatch.setattr(history, "HISTORY_FILE", path)
+    asyncio.run(history.append_history({"req_id": "n1"}))
+    asyncio.run(history.append_history({"req_id": "n2"}))
+    data = json.loads(path.read_text())
+    assert [d["req_id"] for d in data] == ["legacy", "n1", "n2"]
+    assert asyncio.run(history.get_record_by_req_id("n1"))["req_id"] == "n1"
+    assert asyncio.run(history.get_record_by_req_id("legacy"))["req_id"] == "legacy"
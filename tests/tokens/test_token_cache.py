@@ -0,0 +1,84 @@
+"""
+Tests for the in-process decrypted token cache used by TokenDAO.get_token
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.auth_store_tokens import _TokenCache
+from app.models.third_party_tokens import ThirdPartyToken
+
+
+def _token(expires_in: int = 3600, access: str = "tok") -> ThirdPartyToken:
+    return ThirdPartyToken(
+        user_id="u1",
+        provider="spotify",
+        access_token=access,
+        expires_at=int(time.time()) + expires_in,
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    cache = _TokenCache()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return _token()
+
+    key = ("u1", "spotify", None)
+    results = await asyncio.gather(*(cache.get_or_load(key, loader) for _ in range(5)))
+    assert calls == 1
+    assert {t.access_token for t in results} == {"tok"}
+
+    # Served from cache now; callers get copies they may mutate
+    hit = await cache.get_or_load(key, loader)
+    hit.access_token = "mutated"
+    assert (await cache.get_or_load(key, loader)).access_token == "tok"
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_tokens_are_not_cached():
+    cache = _TokenCache()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        return _token(expires_in=-10)
+
+    key = ("u1", "spotify", None)
+    await cache.get_or_load(key, loader)
+    await cache.get_or_load(key, loader)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_entries_and_racing_loads():
+    cache = _TokenCache()
+    key = ("u1", "spotify", "sub")
+    release = asyncio.Event()
+
+    async def slow_old():
+        await release.wait()
+        return _token(access="old")
+
+    async def fresh():
+        return _token(access="new")
+
+    pending = asyncio.create_task(cache.get_or_load(key, slow_old))
+    await asyncio.sleep(0)
+    cache.invalidate("u1", "spotify")  # a write lands while the read is in flight
+    release.set()
+    assert (await pending).access_token == "old"
+    # The stale read was not cached
+    assert (await cache.get_or_load(key, fresh)).access_token == "new"
+
+    cache.invalidate("u1", "spotify")
+    assert (await cache.get_or_load(key, fresh)).access_token == "new"
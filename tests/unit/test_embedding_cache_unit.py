@@ -0,0 +1,67 @@
+import types
+
+from app import embedding_cache as ec
+
+
+def test_cache_roundtrip_and_normalized_keys(tmp_path):
+    cache = ec.EmbeddingCache(str(tmp_path / "emb.sqlite3"), max_bytes=0)
+    cache.put_many("openai", "m", ["hello  world"], [[0.5, 1.0, 2.0]])
+
+    assert cache.get_many("openai", "m", ["hello world", " hello world "]) == [
+        [0.5, 1.0, 2.0],
+        [0.5, 1.0, 2.0],
+    ]
+    assert cache.get_many("openai", "other-model", ["hello world"]) == [None]
+    assert cache.get_many("llama", "m", ["hello world"]) == [None]
+
+
+def test_cache_shared_across_instances(tmp_path):
+    path = str(tmp_path / "emb.sqlite3")
+    ec.EmbeddingCache(path, max_bytes=0).put_many("llama", "m", ["a"], [[1.0]])
+    assert ec.EmbeddingCache(path, max_bytes=0).get_many("llama", "m", ["a"]) == [[1.0]]
+
+
+def test_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr(ec.time, "time", lambda: float(next(clock)))
+    # Each vector is 4 float32 = 16 bytes; cap fits three entries.
+    cache = ec.EmbeddingCache(str(tmp_path / "emb.sqlite3"), max_bytes=48)
+    for t in ["a", "b", "c"]:
+        cache.put_many("openai", "m", [t], [[1.0, 2.0, 3.0, 4.0]])
+    cache.put_many("openai", "m", ["d"], [[1.0, 2.0, 3.0, 4.0]])
+
+    assert len(cache) <= 2
+    assert cache.get_many("openai", "m", ["a"]) == [None]
+    assert cache.get_many("openai", "m", ["d"]) == [[1.0, 2.0, 3.0, 4.0]]
+
+
+def test_embeddings_read_through_persistent_cache(tmp_path, monkeypatch):
+    monkeypatch.delenv("PYTEST_CURRENT_TEST", raising=False)
+    monkeypatch.setenv("VECTOR_STORE", "chroma")
+    monkeypatch.setenv("EMBEDDING_BACKEND", "openai")
+    monkeypatch.setenv("EMBED_DIM", "0")
+    monkeypatch.setenv("EMBED_CACHE_PATH", str(tmp_path / "emb.sqlite3"))
+    from app import embeddings
+
+    class Client:
+        def __init__(self):
+            self.inputs = []
+            self.embeddings = self
+
+        def create(self, model, input, encoding_format="float"):
+            self.inputs.append(input)
+            texts = input if isinstance(input, list) else [input]
+            return types.SimpleNamespace(
+                data=[types.SimpleNamespace(embedding=[float(len(t))]) for t in texts]
+            )
+
+    client = Client()
+    monkeypatch.setattr(embeddings, "get_openai_client", lambda: client)
+    embeddings._embed_openai_sync.cache_clear()
+    try:
+        assert embeddings.embed_sync("abc") == [3.0]
+        # Batch path reuses the vector stored by the single-text path.
+        assert embeddings.embed_many_sync(["abc", "de"]) == [[3.0], [2.0]]
+        assert client.inputs == ["abc", ["de"]]
+    finally:
+        ec._reset_embedding_cache_for_tests()
@@ -0,0 +1,33 @@
+from app.ha_entity_index import EntityIndex
+
+STATES = [
+    {"entity_id": "light.kitchen", "attributes": {"friendly_name": "Kitchen Light"}},
+    {"entity_id": "light.living_room", "attributes": {"friendly_name": "Lounge Lamp"}},
+    {"entity_id": "switch.kitchen_fan", "attributes": {}},
+    {"entity_id": "fan.bedroom", "attributes": {"friendly_name": "Bedroom Fan"}},
+]
+
+
+def test_exact_substring_and_domain_lookups():
+    idx = EntityIndex(STATES)
+    assert idx.exact("kitchen light") == "light.kitchen"
+    assert idx.exact("light.living_room") == "light.living_room"
+    assert idx.exact("garage") is None
+    assert idx.substring("kitchen") == ["light.kitchen", "switch.kitchen_fan"]
+    assert idx.substring("fan") == ["switch.kitchen_fan", "fan.bedroom"]
+    assert idx.domain("light") == ["light.kitchen", "light.living_room"]
+    assert idx.choices("fan") == {"bedroom fan": "fan.bedroom"}
+
+
+def test_fuzzy_matches_linear_sequence_matcher():
+    from difflib import SequenceMatcher
+
+    idx = EntityIndex(STATES)
+    for query in ("kitchen lite", "bedrom fan", "lamp", "zzz"):
+        expected = (None, 0.0)
+        for st in STATES:
+            label = st["attributes"].get("friendly_name") or st["entity_id"]
+            score = SequenceMatcher(a=query, b=label.lower()).ratio()
+            if score > expected[1]:
+                expected = (st["entity_id"], score)
+        assert idx.fuzzy(query) == expected
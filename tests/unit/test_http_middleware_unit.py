@@ -0,0 +1,117 @@
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from fastapi.testclient import TestClient
+
+from app.http_middleware import (
+    API,
+    INFRA_ROUTE_CLASSES,
+    METRICS,
+    PROBE,
+    STATIC,
+    HTTPMiddleware,
+    RouteClassifier,
+)
+
+
+def _app(*middlewares):
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def gen():
+            for i in range(3):
+                yield f"{i};"
+
+        return StreamingResponse(gen())
+
+    for mw in middlewares:
+        app.add_middleware(mw)
+    return app
+
+
+def test_hook_mutates_headers_and_status_before_send():
+    seen = []
+
+    class Stamp(HTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            def hook(response):
+                response.headers["X-Stamp"] = "1"
+                response.set_cookie("c", "v")
+
+            resp = await call_next(request, hook)
+            seen.append((resp.status_code, resp.headers["x-stamp"]))
+            return resp
+
+    r = TestClient(_app(Stamp)).get("/ping")
+    assert r.json() == {"ok": True}
+    assert r.headers["X-Stamp"] == "1"
+    assert r.cookies["c"] == "v"
+    assert seen == [(200, "1")]
+
+
+def test_short_circuit_skips_downstream():
+    class Block(HTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            return JSONResponse({"blocked": True}, status_code=403)
+
+    r = TestClient(_app(Block)).get("/ping")
+    assert r.status_code == 403
+    assert r.json() == {"blocked": True}
+
+
+def test_streaming_body_passes_through_and_after_code_sees_end():
+    events = []
+
+    class Capture(HTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            resp = await call_next(request, capture_body=True)
+            events.append((resp.body, resp.streamed))
+            return resp
+
+    client = TestClient(_app(Capture))
+    assert client.get("/stream").text == "0;1;2;"
+    assert client.get("/ping").json() == {"ok": True}
+    assert events == [(b"", True), (b'{"ok":true}', False)]
+
+
+def test_route_classifier_buckets_paths():
+    c = RouteClassifier(["/shared_photos"])
+    assert c.classify("/healthz") == PROBE
+    assert c.classify("/health/ready") == PROBE
+    assert c.classify("/v1/health") == PROBE
+    assert c.classify("/metrics") == METRICS
+    assert c.classify("/shared_photos/a.png") == STATIC
+    assert c.classify("/favicon.ico") == STATIC
+    assert c.classify("/healthy") == API
+    assert c.classify("/v1/ask") == API
+
+
+def test_skipped_route_class_bypasses_dispatch(tmp_path):
+    calls = []
+
+    class Audit(HTTPMiddleware):
+        skip_route_classes = INFRA_ROUTE_CLASSES
+
+        async def dispatch(self, request, call_next):
+            calls.append(request.url.path)
+            return await call_next(request)
+
+    app = _app(Audit)
+
+    @app.get("/healthz")
+    async def healthz():
+        return {"ok": True}
+
+    (tmp_path / "a.txt").write_text("hi")
+    app.mount("/assets", StaticFiles(directory=tmp_path), name="assets")
+
+    client = TestClient(app)
+    assert client.get("/healthz").json() == {"ok": True}
+    assert client.get("/assets/a.txt").text == "hi"
+    assert client.get("/ping").json() == {"ok": True}
+    assert calls == ["/ping"]
@@ -523,3 +523,80 @@ async def test_json_request_context_manager_exception(monkeypatch):
     data, err = await http_utils.json_request("GET", "https://x/y")
     assert data is None
     assert err == "unknown_error"
+
+
+@pytest.mark.asyncio
+async def test_json_request_reuses_supplied_client(monkeypatch):
+    """A caller-owned client is used for every attempt and left open."""
+    import httpx
+
+    from app import http_utils
+
+    calls = {"n": 0, "closed": False}
+
+    class Resp:
+        def raise_for_status(self):
+            return None
+
+        def json(self):
+            return {"ok": True}
+
+    class Client:
+        async def request(self, method, url, **kwargs):
+            calls["n"] += 1
+            if calls["n"] < 2:
+                raise httpx.RequestError("net", request=httpx.Request(method, url))
+            return Resp()
+
+        async def aclose(self):
+            calls["closed"] = True
+
+    def no_factory(*a, **k):
+        raise AssertionError("json_request must not build a client")
+
+    async def no_sleep(_):
+        return None
+
+    monkeypatch.setattr(asyncio, "sleep", no_sleep)
+    monkeypatch.setattr(http_utils.httpx, "AsyncClient", no_factory)
+
+    data, err = await http_utils.json_request("GET", "https://x/y", client=Client())
+    assert data == {"ok": True} and err is None
+    assert calls == {"n": 2, "closed": False}
+
+
+@pytest.mark.asyncio
+async def test_json_request_one_client_per_call(monkeypatch):
+    import httpx
+
+    from app import http_utils
+
+    made = {"clients": 0, "requests": 0, "timeouts": []}
+
+    class Client:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, exc_type, exc, tb):
+            return False
+
+        async def request(self, method, url, **kwargs):
+            made["requests"] += 1
+            r = httpx.Response(503, request=httpx.Request(method, url))
+            raise httpx.HTTPStatusError("err", request=r.request, response=r)
+
+    def factory(timeout=None):
+        made["clients"] += 1
+        made["timeouts"].append(timeout)
+        return Client()
+
+    async def no_sleep(_):
+        return None
+
+    monkeypatch.setattr(asyncio, "sleep", no_sleep)
+    monkeypatch.setattr(http_utils.httpx, "AsyncClient", factory)
+
+    data, err = await http_utils.json_request("GET", "https://x/y", timeout=7.0)
+    assert err == "http_error"
+    assert made["requests"] == 3 and made["clients"] == 1
+    assert made["timeouts"] == [7.0]
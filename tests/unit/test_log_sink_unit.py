@@ -0,0 +1,94 @@
+import threading
+
+from app.log_sink import LogSink, NdjsonFile, RotationPolicy
+
+
+def test_batches_and_flush_waits_for_writer():
+    gate = threading.Event()
+    batches = []
+
+    def write(items):
+        gate.wait(1.0)
+        batches.append(list(items))
+
+    sink = LogSink("t", write, sync=False)
+    for i in range(5):
+        assert sink.submit(i)
+    gate.set()
+    assert sink.flush(2.0)
+    assert [x for b in batches for x in b] == [0, 1, 2, 3, 4]
+    assert len(batches) < 5
+    sink.close()
+
+
+def test_full_queue_drops_new_records():
+    gate = threading.Event()
+    written = []
+
+    def write(items):
+        gate.wait(1.0)
+        written.extend(items)
+
+    sink = LogSink("t", write, max_queue=2, batch_max=1, sync=False)
+    results = [sink.submit(i) for i in range(6)]
+    assert results.count(False) >= 1
+    gate.set()
+    assert sink.close(2.0)
+    accepted = [i for i, ok in zip(range(6), results, strict=True) if ok]
+    assert written == accepted
+
+
+
+def test_submit_nowait_never_waits_on_blocking_sink():
+    import time
+
+    gate = threading.Event()
+
+    def write(items):
+        gate.wait(2.0)
+
+    sink = LogSink(
+        "t",
+        write,
+        max_queue=1,
+        batch_max=1,
+        overflow="block",
+        block_timeout_s=1.0,
+        sync=False,
+    )
+    assert sink.submit_nowait(0)
+    # Wait for the writer to take item 0, then fill the queue again
+    deadline = time.monotonic() + 1.0
+    while sink.pending and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert sink.submit_nowait(1)
+    t0 = time.monotonic()
+    assert sink.submit_nowait(2) is False
+    assert time.monotonic() - t0 < 0.05
+    gate.set()
+    assert sink.close(2.0)
+
+def test_ndjson_file_keeps_handle_and_rotates_by_size(tmp_path):
+    path = tmp_path / "events.ndjson"
+    rotated = []
+    f = NdjsonFile(path, RotationPolicy(max_bytes=20), on_rotate=rotated.append)
+    spans = f.append([b'{"a":1}', b'{"b":2}'])
+    assert spans == [(0, 7), (8, 7)]
+    fh = f._fh
+    f.append([b'{"c":3}'])
+    assert f._fh is fh  # no reopen between batches
+    f.append([b'{"d":4}'])  # 24 bytes on disk -> rotate first
+    f.close()
+    assert len(rotated) == 1
+    assert rotated[0].read_text().count("\n") == 3
+    assert path.read_text() == '{"d":4}\n'
+
+
+def test_ndjson_file_reopens_after_external_removal(tmp_path):
+    path = tmp_path / "events.ndjson"
+    f = NdjsonFile(path)
+    f.append([b"1"])
+    path.unlink()
+    f.append([b"2"])
+    f.close()
+    assert path.read_text() == "2\n"
@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+import app.retrieval.qdrant_hybrid as qh
+
+
+class _FakeAsyncClient:
+    instances: list["_FakeAsyncClient"] = []
+
+    def __init__(self, url, api_key, prefer_grpc):
+        self.url = url
+        self.closed = False
+        _FakeAsyncClient.instances.append(self)
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_replaced_async_client_is_closed(monkeypatch):
+    _FakeAsyncClient.instances = []
+    monkeypatch.setattr(qh, "AsyncQdrantClient", _FakeAsyncClient)
+    monkeypatch.setattr(qh, "_ASYNC_CLIENT", None)
+    monkeypatch.setenv("QDRANT_URL", "http://a:6333")
+
+    first = qh._async_client()
+    assert qh._async_client() is first
+
+    monkeypatch.setenv("QDRANT_URL", "http://b:6333")
+    second = qh._async_client()
+    assert second is not first
+    await asyncio.sleep(0)  # close is scheduled on the owning loop
+    assert first.closed and not second.closed
+
+    await qh.close_clients()
+    assert second.closed
+    assert qh._ASYNC_CLIENT is None
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import time
+import types
+
+import pytest
+
+import app.memory.vector_store.qdrant as qmod
+
+
+def _ns(**kw):
+    return types.SimpleNamespace(**kw)
+
+
+class _FakeClient:
+    def __init__(self) -> None:
+        self.points: dict[str, types.SimpleNamespace] = {}
+        self.searches: list[dict] = []
+
+    def upsert(self, collection_name, points):
+        for p in points:
+            self.points[p.id] = p
+
+    def retrieve(self, collection_name, ids, with_payload, with_vectors):
+        return [self.points[i] for i in ids if i in self.points]
+
+    def delete(self, collection_name, points_selector):
+        for i in points_selector:
+            self.points.pop(i, None)
+
+    def set_payload(self, collection_name, points, payload):
+        for i in points:
+            self.points[i].payload.update(payload)
+
+    def search(self, collection_name, query_vector, query_filter, limit, **kw):
+        self.searches.append({"filter": query_filter, **kw})
+        hits = []
+        for p in self.points.values():
+            pl = p.payload
+            if pl["composed"] or pl.get("feedback") == "down":
+                continue
+            ranges = [c.range for c in query_filter.must if c.range is not None]
+            if any(pl["timestamp"] < r.gte for r in ranges):
+                continue
+            score = sum(a * b for a, b in zip(query_vector, p.vector, strict=False))
+            if score >= kw["score_threshold"]:
+                hits.append(_ns(id=p.id, payload=pl, score=score))
+        hits.sort(key=lambda h: -h.score)
+        return hits[:limit]
+
+    def scroll(self, collection_name, scroll_filter=None, limit=10, **kw):
+        want = scroll_filter.must[0].match.value if scroll_filter else None
+        res = [
+            p
+            for p in self.points.values()
+            if want is None or p.payload.get("doc_hash") == want
+        ]
+        return res[:limit], None
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(qmod, "PointStruct", _ns)
+    monkeypatch.setattr(
+        qmod, "Filter", lambda must=None, must_not=None: _ns(must=must or [])
+    )
+    monkeypatch.setattr(
+        qmod,
+        "FieldCondition",
+        lambda key, match=None, range=None: _ns(key=key, match=match, range=range),
+    )
+    monkeypatch.setattr(qmod, "MatchValue", _ns)
+    monkeypatch.setattr(qmod, "Range", _ns)
+    monkeypatch.delenv("DISABLE_QA_CACHE", raising=False)
+    monkeypatch.setenv("SIM_THRESHOLD", "0.9")
+
+    vectors = {"what time is it": [1.0, 0.0], "weather today": [0.0, 1.0]}
+    embedded: list[str] = []
+
+    def fake_embed(text):
+        embedded.append(text)
+        return vectors.get(text, [0.6, 0.8])
+
+    monkeypatch.setattr("app.embeddings.embed_sync", fake_embed)
+    monkeypatch.setattr(
+        "app.embeddings.embed_many_sync", lambda texts: [fake_embed(t) for t in texts]
+    )
+
+    s = object.__new__(qmod.QdrantVectorStore)
+    s.client = _FakeClient()
+    s.cache_collection = "cache_qa"
+    s._qa = qmod._QACollection(s.client, "cache_qa", 2)
+    s.embedded = embedded
+    return s
+
+
+def test_lookup_is_one_embed_and_one_search(store):
+    store.cache_answer("q1", "what time is it", "noon")
+    store.cache_answer("q2", "weather today", "sunny")
+    store.embedded.clear()
+
+    assert store.lookup_cached_answer("what time is it") == "noon"
+    assert store.embedded == ["what time is it"]
+    assert len(store.client.searches) == 1
+    assert store.lookup_cached_answer("something else") is None
+
+
+def test_composed_ids_are_exact_only_and_not_embedded(store):
+    cid = "v1|anon|p|s|gpt"
+    store.cache_answer(cid, "what time is it", "cached")
+    assert store.embedded == []
+
+    res = store.qa_cache.get_items(ids=[cid], include=["metadatas"])
+    assert res["ids"] == [cid]
+    assert res["metadatas"][0]["answer"] == "cached"
+    assert store.lookup_cached_answer("what time is it") is None
+
+    store.qa_cache.delete(ids=[cid])
+    assert store.qa_cache.get_items(ids=[cid])["ids"] == []
+
+
+def test_ttl_and_feedback_are_filtered(store):
+    store.cache_answer("q1", "what time is it", "noon")
+    pid = qmod._qa_point_id("q1")
+    store.client.points[pid].payload["timestamp"] = time.time() - 100
+    assert store.lookup_cached_answer("what time is it", ttl_seconds=10) is None
+    assert store.lookup_cached_answer("what time is it", ttl_seconds=0) == "noon"
+
+    store.record_feedback("what time is it", "down")
+    assert store.client.points[pid].payload["feedback"] == "down"
+    assert store.lookup_cached_answer("what time is it", ttl_seconds=0) is None
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import types
+
+import pytest
+
+import app.memory.vector_store.qdrant as qmod
+
+
+def _ns(**kw):
+    return types.SimpleNamespace(**kw)
+
+
+class _FakeClient:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, dict]] = []
+
+    def __getattr__(self, name):
+        def _call(*args, **kw):
+            self.calls.append((name, kw))
+            if name == "scroll":
+                return [], None
+            if name == "retrieve":
+                return [_ns(id="m1", payload={"user_id": "bob"})]
+            return _ns(operation_id=None)
+
+        return _call
+
+    def names(self) -> list[str]:
+        return [n for n, _ in self.calls]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    for name in ("Filter", "FieldCondition", "MatchValue", "HasIdCondition"):
+        monkeypatch.setattr(qmod, name, _ns)
+    monkeypatch.setattr(qmod, "FilterSelector", _ns)
+    monkeypatch.setattr(qmod, "HnswConfigDiff", _ns)
+    monkeypatch.setattr(qmod, "PointStruct", _ns)
+    monkeypatch.setenv("EMBED_DIM", "2")
+    monkeypatch.setattr("app.embeddings.embed_sync", lambda text: [1.0, 0.0])
+
+    s = object.__new__(qmod.QdrantVectorStore)
+    s.client = _FakeClient()
+    s.shared_memory = True
+    s.memory_collection = "mem_users"
+    s._ensured = set()
+    return s
+
+
+def test_shared_layout_uses_one_collection_and_ensures_once(store):
+    store.add_user_memory("alice", "likes tea")
+    store.add_user_memory("bob", "likes coffee")
+
+    upserts = [kw for n, kw in store.client.calls if n == "upsert"]
+    assert {kw["collection_name"] for kw in upserts} == {"mem_users"}
+    assert store.client.names().count("get_collection") == 1
+    hnsw = [kw["hnsw_config"] for n, kw in store.client.calls if "hnsw_config" in kw]
+    assert hnsw[0].m == 0 and hnsw[0].payload_m == 32
+
+
+def test_shared_layout_scopes_reads_and_writes_to_the_user(store):
+    store.list_user_memories("alice")
+    store.delete_user_memory("alice", "m1")
+    assert store.update_user_memory("alice", "m1", "new") is False
+
+    calls = dict(store.client.calls)
+    assert calls["scroll"]["scroll_filter"].must[0].key == "user_id"
+    selector = calls["delete"]["points_selector"].filter
+    assert selector.must[0].match.value == "alice"
+    assert selector.must[1].has_id == ["m1"]
+    assert "upsert" not in calls
@@ -0,0 +1,94 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware import _rate_limit_store as store
+from app.middleware import rate_limit
+from app.middleware._rate_limit_store import (
+    InMemoryRateLimitBackend,
+    RedisRateLimitBackend,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(store.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_token_bucket_allows_burst_then_refills(clock):
+    b = InMemoryRateLimitBackend()
+    assert [b.take("k", 2, 1.0).allowed for _ in range(3)] == [True, True, False]
+    clock[0] += 0.5  # half a window refills one token
+    assert b.take("k", 2, 1.0) == (True, 0)
+    assert b.take("k", 2, 1.0).allowed is False
+
+
+def test_idle_buckets_are_evicted_and_keys_capped(clock):
+    b = InMemoryRateLimitBackend(max_keys=3)
+    b.take("a", 5, 60)
+    clock[0] += 61
+    b.take("b", 5, 60)
+    assert list(b.buckets) == ["b"]  # "a" was full again and got dropped
+    for k in ("c", "d", "e"):
+        b.take(k, 5, 60)
+    assert len(b.buckets) == 3 and "b" not in b.buckets
+
+
+class _Script:
+    def __init__(self, result=None, exc=None):
+        self.calls = []
+        self.result, self.exc = result, exc
+
+    async def __call__(self, keys, args):
+        self.calls.append((keys, args))
+        if self.exc:
+            raise self.exc
+        return self.result
+
+
+class _Client:
+    def __init__(self, script):
+        self.script = script
+
+    def register_script(self, source):
+        assert "HMGET" in source
+        return self.script
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_runs_script_and_falls_back_on_error():
+    script = _Script(result=[1, 4])
+    b = RedisRateLimitBackend(_Client(script), "rl")
+    assert await b.hit("abc", 5, 60) == (True, 4)
+    assert script.calls == [(["rl:mw:abc"], [5, 60000])]
+
+    script.exc = ConnectionError("down")
+    assert (await b.hit("abc", 1, 60)).allowed is True  # local bucket
+    assert (await b.hit("abc", 1, 60)).allowed is False
+
+
+def test_middleware_uses_configured_backend(monkeypatch):
+    monkeypatch.setenv("ENABLE_RATE_LIMIT_IN_TESTS", "1")
+    monkeypatch.delenv("RATE_LIMIT_MODE", raising=False)
+    rate_limit._test_set_config(max_req=2, window_s=60)
+    rate_limit._test_clear_buckets()
+    local = InMemoryRateLimitBackend()
+    rate_limit.set_rate_limit_backend(local)
+    app = FastAPI()
+
+    @app.get("/v1/thing")
+    async def thing():
+        return {"ok": True}
+
+    app.add_middleware(rate_limit.RateLimitMiddleware)
+    try:
+        c = TestClient(app)
+        codes = [c.get("/v1/thing").status_code for _ in range(3)]
+        assert codes == [200, 200, 429]
+        assert len(local.buckets) == 1
+    finally:
+        rate_limit.set_rate_limit_backend(None)
+        rate_limit._test_reset_config()
+        rate_limit._test_clear_buckets()
@@ -0,0 +1,46 @@
+import random
+
+from app.rolling_window import QuantileSketch, RollingWindow
+
+
+def test_sketch_quantiles_within_relative_error():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(0, 1.5) for _ in range(5000)]
+    sketch = QuantileSketch()
+    for v in values:
+        sketch.add(v)
+    ordered = sorted(values)
+    for q in (0.5, 0.9, 0.95, 0.99):
+        exact = ordered[max(0, int(q * len(ordered) + 0.999999) - 1)]
+        assert abs(sketch.quantile(q) - exact) <= 0.011 * exact
+    assert sketch.quantile(1.0) == max(values)
+
+
+def test_merged_sketches_match_single_sketch():
+    a, b, whole = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for i in range(1, 1001):
+        (a if i % 2 else b).add(float(i))
+        whole.add(float(i))
+    a.merge(b)
+    assert a.count == whole.count and a.sum == whole.sum
+    assert a.quantile(0.95) == whole.quantile(0.95)
+
+
+def test_window_only_merges_buckets_in_period():
+    w = RollingWindow(3600)
+    now = 1_700_000_000.0
+    w.record(100.0, flags=["bad"], ts=now - 1800)
+    for _ in range(10):
+        w.record(1.0, flags=["good"], ts=now - 30)
+    recent = w.summary(600, now=now)
+    assert recent.count == 10 and recent.flag("good") == 10 and recent.flag("bad") == 0
+    full = w.summary(3600, now=now)
+    assert full.count == 11 and full.quantile(1.0) == 100.0
+
+
+def test_ring_slots_are_reused_after_span():
+    w = RollingWindow(120)
+    now = 1_700_000_000.0
+    w.record(5.0, ts=now - 3600)  # same ring slot as a recent minute
+    w.record(1.0, ts=now)
+    assert w.summary(120, now=now).count == 1
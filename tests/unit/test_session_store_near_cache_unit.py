@@ -0,0 +1,116 @@
+import json
+import os
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.session_store import INVALIDATION_CHANNEL, SessionCookieStore
+
+
+class _Pipeline:
+    def __init__(self, client):
+        self.client = client
+        self.ops = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def delete(self, key):
+        self.ops.append(("delete", key))
+
+    def publish(self, channel, msg):
+        self.ops.append(("publish", channel, msg))
+
+    async def execute(self):
+        self.client.executed.append(self.ops)
+        return [1 for _ in self.ops]
+
+
+class _AsyncRedis:
+    def __init__(self, data):
+        self.data = data
+        self.gets = 0
+        self.executed = []
+
+    async def get(self, key):
+        self.gets += 1
+        return self.data.get(key)
+
+    def pipeline(self, transaction=True):
+        return _Pipeline(self)
+
+
+def _redis_store(data, *, subscribed=True):
+    with patch.dict(os.environ, {"SESSION_NEAR_CACHE_TTL_S": "30"}, clear=True):
+        store = SessionCookieStore()
+    store._redis_client = Mock()
+    store._subscriber = object()  # no listener thread in unit tests
+    if subscribed:
+        store._subscribed.set()
+    client = _AsyncRedis(data)
+    store._async_client = lambda: client
+    return store, client
+
+
+def _payload(user_id):
+    return json.dumps(
+        {
+            "jti": "j1",
+            "expires_at": time.time() + 3600,
+            "identity": {"user_id": user_id, "sub": user_id},
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_identity_served_from_near_cache_until_invalidated():
+    store, client = _redis_store({"session:s1": _payload("alice")})
+
+    assert (await store.aget_session_identity("s1"))["user_id"] == "alice"
+    assert (await store.aget_session_identity("s1"))["user_id"] == "alice"
+    assert client.gets == 1
+
+    # Revocation message from another worker
+    store._near.invalidate("s1")
+    client.data.clear()
+    assert await store.aget_session_identity("s1") is None
+    assert client.gets == 2
+
+
+@pytest.mark.asyncio
+async def test_near_cache_bypassed_while_not_subscribed():
+    store, client = _redis_store({"session:s1": _payload("alice")}, subscribed=False)
+    await store.aget_session_identity("s1")
+    await store.aget_session_identity("s1")
+    assert client.gets == 2
+
+
+@pytest.mark.asyncio
+async def test_adelete_pipelines_delete_and_publish():
+    store, client = _redis_store({"session:s1": _payload("alice")})
+    await store.aget_session_identity("s1")
+
+    assert await store.adelete_session("s1") is True
+    assert client.executed == [
+        [("delete", "session:s1"), ("publish", INVALIDATION_CHANNEL, "s1")]
+    ]
+    assert store._near.get("s1") is None
+
+
+def test_sweeper_drops_only_expired_memory_sessions():
+    with patch.dict(os.environ, {"SESSION_SWEEP_INTERVAL_S": "0"}, clear=True):
+        store = SessionCookieStore()
+        now = time.time()
+        gone = store.create_session("j1", now + 10)
+        kept = store.create_session("j2", now + 1000)
+        renewed = store.create_session("j3", now + 10)
+        store.set_session_identity(renewed, {"user_id": "u3"}, int(now + 1000))
+
+        assert store.sweep_expired(now=now + 20) == 1
+    assert gone not in store._memory_store
+    assert kept in store._memory_store
+    assert renewed in store._memory_store
@@ -0,0 +1,137 @@
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+
+import pytest
+from starlette.requests import Request
+
+import app.deps.user as user_deps
+
+
+def _request(token: str, state: dict) -> Request:
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/v1/me",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "query_string": b"",
+        "client": ("127.0.0.1", 1234),
+        "state": state,
+    }
+    return Request(scope)
+
+
+@pytest.mark.asyncio
+async def test_identity_is_memoized_per_request(monkeypatch):
+    decoded = []
+
+    def fake_decode(token):
+        decoded.append(token)
+        return {"user_id": f"user-{token}"}
+
+    monkeypatch.setattr(user_deps, "decode_jwt", fake_decode)
+    state: dict = {}
+
+    # Middleware and dependency see separate Request objects over one scope
+    assert await user_deps.get_current_user_id(request=_request("a", state)) == "user-a"
+    assert await user_deps.get_current_user_id(request=_request("a", state)) == "user-a"
+    assert decoded == ["a"]
+
+    assert await user_deps.get_current_user_id(request=_request("b", state)) == "user-b"
+    assert decoded == ["a", "b"]
+
+
+class _Result:
+    def __init__(self, row):
+        self._row = row
+
+    def one_or_none(self):
+        return self._row
+
+
+class _DB:
+    def __init__(self, row):
+        self.row = row
+        self.selects = 0
+
+    async def execute(self, stmt):
+        self.selects += 1
+        return _Result(self.row)
+
+
+@pytest.mark.asyncio
+async def test_session_state_cached_until_invalidated(monkeypatch):
+    import app.sessions_store as mod
+
+    db = _DB((1, None))
+
+    @asynccontextmanager
+    async def fake_db():
+        yield db
+
+    monkeypatch.setattr(mod, "get_async_db", fake_db)
+    store = mod.SessionsStore()
+
+    assert await store.validate_session_token("s1", 1, "j1") == (True, "valid")
+    assert await store.validate_session_token("s1", 1, "j1") == (True, "valid")
+    assert db.selects == 1
+
+    db.row = (2, datetime.now(UTC))
+    store._invalidate_version_cache("s1")
+    assert await store.validate_session_token("s1", 1, "j1") == (
+        False,
+        "session.revoked",
+    )
+    assert db.selects == 2
+
+
+@pytest.mark.asyncio
+async def test_revoke_wins_over_load_started_before_it(monkeypatch):
+    import asyncio
+
+    import app.sessions_store as mod
+
+    gate = asyncio.Event()
+
+    class _Row:
+        def __init__(self, row):
+            self._row = row
+
+        def one_or_none(self):
+            return self._row
+
+        def scalar_one_or_none(self):
+            return self._row[0]
+
+    calls = 0
+
+    class _SlowDB:
+        async def execute(self, stmt):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                # The load's read, taken before the revoke commits
+                await gate.wait()
+                return _Row((1, None))
+            return _Row((1,))
+
+        async def commit(self):
+            return None
+
+    @asynccontextmanager
+    async def fake_db():
+        yield _SlowDB()
+
+    monkeypatch.setattr(mod, "get_async_db", fake_db)
+    store = mod.SessionsStore()
+
+    load = asyncio.create_task(store.validate_session_token("s1", 1, "j1"))
+    await asyncio.sleep(0)
+    await store.revoke_family("s1")
+    gate.set()
+    await load
+
+    assert store._get_cached_state("s1") == (2, True)
+    assert await store.validate_session_token("s1", 1, "j1") == (
+        False,
+        "session.revoked",
+    )
@@ -0,0 +1,32 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_shutdown_flushes_buffered_user_stats(monkeypatch):
+    import app.middleware.middleware_core as core
+    from app.startup import _shutdown
+
+    class _Stats:
+        closed = 0
+
+        async def aclose(self):
+            self.closed += 1
+
+    stats = _Stats()
+    monkeypatch.setattr(core, "_user_stats", stats)
+
+    await _shutdown(None)
+
+    assert stats.closed == 1
+
+
+def test_every_shutdown_closer_is_allowlisted():
+    from app.security.module_loader import SAFE_MODULES, _is_module_allowed
+    from app.startup import _SHUTDOWN_CLOSERS
+
+    blocked = [
+        path
+        for path in _SHUTDOWN_CLOSERS
+        if not _is_module_allowed(path.split(":", 1)[0], SAFE_MODULES)
+    ]
+    assert blocked == []
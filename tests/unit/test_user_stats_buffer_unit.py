@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from app.user_stats_buffer import UserStatsBuffer
+
+
+class _Store:
+    def __init__(self, fail: int = 0):
+        self.calls: list[tuple[dict[str, int], set[str]]] = []
+        self.fail = fail
+
+    async def apply_request_deltas(self, deltas, new_users=()):
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("db down")
+        self.calls.append((dict(deltas), set(new_users)))
+
+
+@pytest.mark.asyncio
+async def test_requests_are_aggregated_into_one_flush():
+    store = _Store()
+    buf = UserStatsBuffer(lambda: store, flush_interval_s=60, flush_events=10_000)
+    for _ in range(5):
+        buf.record_request("u1")
+    buf.record_request("u2")
+    assert store.calls == []  # nothing written in the request path
+
+    await buf.aclose()
+    assert store.calls == [({"u1": 5, "u2": 1}, {"u1", "u2"})]
+
+
+@pytest.mark.asyncio
+async def test_known_users_are_provisioned_once():
+    store = _Store()
+    buf = UserStatsBuffer(lambda: store, flush_interval_s=60, flush_events=10_000)
+    buf.record_request("u1")
+    await buf.flush()
+    buf.record_request("u1")
+    buf.record_request("u3")
+    await buf.aclose()
+    assert store.calls[1] == ({"u1": 1, "u3": 1}, {"u3"})
+
+
+@pytest.mark.asyncio
+async def test_event_threshold_triggers_background_flush():
+    store = _Store()
+    buf = UserStatsBuffer(lambda: store, flush_interval_s=60, flush_events=3)
+    for _ in range(3):
+        buf.record_request("u1")
+    for _ in range(50):
+        if store.calls:
+            break
+        await asyncio.sleep(0.01)
+    assert store.calls == [({"u1": 3}, {"u1"})]
+    await buf.aclose()
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_is_retried_with_next_batch():
+    store = _Store(fail=1)
+    buf = UserStatsBuffer(lambda: store, flush_interval_s=60, flush_events=10_000)
+    buf.record_request("u1")
+    await buf.flush()
+    assert store.calls == [] and buf.pending == 1
+    buf.record_request("u1")
+    await buf.aclose()
+    assert store.calls == [({"u1": 2}, {"u1"})]